@@ -40,15 +40,31 @@ from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 
 # Import des couches métier avec gestion d'erreur
 try:
-    from services.chatbot_service import ChatbotService
+    from services.chatbot_service import ChatbotService, ModelStatus
     from services.session_service import SessionService
     from services.feedback_service import FeedbackService
+    from services.capture_service import CaptureTraficService
+    from services.sante_service import SondeSante
+    from services.profilage import ProfileurRequetes, verifier_cle_admin
+    from services.memoire import ComptableMemoire, mesure_poids_modele
+    from services.tracing import TraceurRequetes, span
+    from services.metriques import REGISTRE, CONTENT_TYPE
     from config.app_config import AppConfig, ConfigurationError
 except ImportError as e:
     print(f"❌ Erreur d'import des modules: {e}")
     print("💡 Vérifiez que tous les fichiers sont présents et que les dépendances sont installées")
     sys.exit(1)
 
+REQUETES_HTTP = REGISTRE.compteur(
+    "mila_http_requetes_total", "Requêtes HTTP traitées par route et code", etiquettes=("route", "code")
+)
+DUREE_HTTP = REGISTRE.histogramme(
+    "mila_http_duree_secondes", "Durée de traitement des requêtes HTTP par route", etiquettes=("route",)
+)
+FEEDBACKS = REGISTRE.compteur(
+    "mila_feedbacks_total", "Feedbacks reçus puis traités (succes, echec) en arrière-plan", etiquettes=("etape",)
+)
+
 # Configuration du logging
 def setup_logging(debug: bool = False, log_file: str = None):
     """Configuration du système de logging"""
@@ -91,6 +107,9 @@ class MilaAssistApp:
         self.app = None
         self.config = None
         self.services = {}
+        self.traceur = None
+        self.profileur = None
+        self.memoire = None
         self.running = False
         self.startup_time = datetime.now()
         
@@ -175,6 +194,35 @@ class MilaAssistApp:
             # Service de feedback utilisateur
             self.services['feedback'] = FeedbackService(self.config)
             
+            # Traces par requête (sans effet si TRACE_REQUETES est désactivé)
+            self.traceur = TraceurRequetes(
+                self.config.TRACE_REQUETES, self.config.TRACE_REQUETES_LENTES_MS,
+                self.config.TRACE_REQUETES_LENTES_PATH
+            )
+            
+            # Capture anonymisée du trafic (optionnelle, écriture tamponnée en arrière-plan)
+            if self.config.CAPTURE_TRAFIC:
+                self.services['capture'] = CaptureTraficService(
+                    self.config.CAPTURE_TRAFIC_PATH, sel=self.config.CAPTURE_TRAFIC_SEL
+                )
+            
+            # Sonde de santé de l'API: /health et /stats lisent le dernier résultat
+            if self.config.USE_API:
+                self.services['sante'] = SondeSante(
+                    self.services['chatbot'].sonder_api, self.config.SANTE_INTERVALLE_S
+                ).demarrer()
+                self.services['chatbot'].sonde_api = self.services['sante']
+            
+            # Profilage à la demande (créé seulement si une clé admin est configurée)
+            if self.config.PROFILAGE_CLE_ADMIN:
+                self.profileur = ProfileurRequetes(
+                    self.config.PROFILAGE_PATH, self.config.PROFILAGE_RETENTION, self.config.PROFILAGE_DUREE_MAX_S
+                )
+                logging.info(f"🔬 Profilage à la demande activé: {self.config.PROFILAGE_PATH}")
+                self._initialiser_comptable_memoire()
+            
+            self._enregistrer_jauges()
+            
             logging.info("✅ Services métier initialisés instantanément")
             logging.info("🔄 Le modèle Keras se charge en arrière-plan si activé")
             logging.info("🚫 Reformulation désactivée - réponses directes uniquement")
@@ -183,6 +231,60 @@ class MilaAssistApp:
             logging.error(f"❌ Erreur lors de l'initialisation des services: {e}")
             raise
     
+    def _enregistrer_jauges(self):
+        """Jauges de /metrics, calculées à la lecture (sans appel réseau)"""
+        chatbot = self.services['chatbot']
+        REGISTRE.jauge(
+            "mila_modele_statut", "Statut du modèle Keras (1 pour le statut courant)",
+            lambda: {statut.value: int(chatbot.model_status == statut) for statut in ModelStatus},
+            etiquettes=("statut",)
+        )
+        REGISTRE.jauge(
+            "mila_ajustement_en_cours", "Ajustement du modèle sur les feedbacks en cours",
+            lambda: int(chatbot._ajustement_en_cours)
+        )
+        REGISTRE.jauge(
+            "mila_sessions_actives", "Sessions utilisateur en mémoire",
+            self.services['session'].nombre_sessions
+        )
+        REGISTRE.jauge(
+            "mila_feedbacks_en_attente", "Feedbacks reçus dont le traitement n'est pas terminé",
+            self._feedbacks_en_attente
+        )
+        REGISTRE.jauge(
+            "mila_uptime_secondes", "Temps écoulé depuis le démarrage de l'application",
+            lambda: (datetime.now() - self.startup_time).total_seconds()
+        )
+    
+    def _initialiser_comptable_memoire(self):
+        """Magasins internes suivis par /debug/memory"""
+        chatbot = self.services['chatbot']
+        self.memoire = ComptableMemoire()
+        self.memoire.enregistrer("cache_predictions", lambda: chatbot.prediction_cache)
+        self.memoire.enregistrer("cache_api_chatbot", lambda: chatbot.api_client.cache.cache)
+        self.memoire.enregistrer("cache_api_feedback", lambda: self.services['feedback'].api_client.cache.cache)
+        self.memoire.enregistrer("sessions", lambda: self.services['session']._sessions)
+        self.memoire.enregistrer("histogrammes_traces", lambda: self.traceur.histogrammes)
+        if 'capture' in self.services:
+            self.memoire.enregistrer("tampon_capture", lambda: self.services['capture']._tampon)
+        # Poids du modèle servi (Keras float32 ou réseau numpy d'un bundle quantifié)
+        self.memoire.enregistrer_mesure("modele_keras", lambda: mesure_poids_modele(chatbot.model))
+        if self.config.MEMOIRE_TRACEMALLOC_FRAMES:
+            self.memoire.demarrer_tracemalloc(self.config.MEMOIRE_TRACEMALLOC_FRAMES)
+    
+    def _demarrer_profil(self):
+        """Profil de la requête courante demandé par en-tête (clé admin requise)"""
+        if not verifier_cle_admin(request.headers.get('X-Admin-Key'), self.config.PROFILAGE_CLE_ADMIN):
+            logging.warning(f"🔒 Profilage refusé (clé admin invalide) pour {request.path}")
+            return None
+        return self.profileur.demarrer_requete(request.headers['X-Profile'].strip().lower(), request.endpoint or "inconnue")
+    
+    @staticmethod
+    def _feedbacks_en_attente() -> int:
+        """Feedbacks reçus dont le thread de traitement n'est pas terminé"""
+        etapes = FEEDBACKS.valeurs()
+        return int(etapes.get(("recu",), 0) - etapes.get(("succes",), 0) - etapes.get(("echec",), 0))
+    
     def _setup_event_handlers(self):
         """Configuration des gestionnaires d'événements système"""
         def signal_handler(sig, frame):
@@ -198,19 +300,43 @@ class MilaAssistApp:
         def before_request():
             g.request_start_time = time.time()
             g.request_id = f"{int(time.time()*1000)}{os.getpid()}"
+            g.trace = self.traceur.demarrer(f"{request.method} {request.path}")
+            if self.profileur is not None and 'X-Profile' in request.headers:
+                g.profil = self._demarrer_profil()
         
         # Gestionnaire après requête
         @self.app.after_request
         def after_request(response):
+            if getattr(g, 'profil', None) is not None:
+                response.headers['X-Profile-File'] = g.profil.terminer()
+                g.profil = None
+            
             if hasattr(g, 'request_start_time'):
                 response_time = (time.time() - g.request_start_time) * 1000
                 response.headers['X-Response-Time'] = f"{response_time:.2f}ms"
                 
+                # Route déclarée plutôt que chemin brut: cardinalité bornée (404 regroupées)
+                route = request.url_rule.rule if request.url_rule else "inconnue"
+                REQUETES_HTTP.inc(route, response.status_code)
+                DUREE_HTTP.observer(response_time / 1000, route)
+                
                 if response_time > 1000:  # Log les requêtes lentes
                     logging.warning(f"⏱️ Requête lente: {request.endpoint} - {response_time:.2f}ms")
             
+            if getattr(g, 'trace', None) is not None:
+                response.headers['Server-Timing'] = self.traceur.terminer(g.trace).server_timing()
+                g.trace = None
+            
             response.headers['X-Powered-By'] = 'Mila-Assist-RNCP6-NoReformat'
             return response
+        
+        @self.app.teardown_request
+        def teardown_request(exception):
+            # Trace non close (exception avant after_request): ne pas la laisser au thread suivant
+            if getattr(g, 'trace', None) is not None:
+                self.traceur.detacher()
+            if getattr(g, 'profil', None) is not None:
+                g.profil.terminer()
     
     def _register_routes(self):
         """Enregistrement des routes simplifiées (sans gestion des modes)"""
@@ -245,6 +371,7 @@ class MilaAssistApp:
                 # Validation des données d'entrée
                 message = request.form.get("msg", "").strip()
                 session_id = request.form.get("session_id", "").strip()
+                session_client = session_id
                 
                 if not message:
                     return self._create_error_response("Message vide non autorisé", 400)
@@ -253,13 +380,15 @@ class MilaAssistApp:
                     return self._create_error_response("Message trop long (maximum 500 caractères)", 400)
                 
                 # Gestion de la session
-                if not session_id or not self.services['session'].is_valid_session(session_id):
-                    session_id = self.services['session'].create_session()
-                    logging.info(f"Nouvelle session créée: {session_id[:12]}...")
+                with span("session"):
+                    if not session_id or not self.services['session'].is_valid_session(session_id):
+                        session_id = self.services['session'].create_session()
+                        logging.info(f"Nouvelle session créée: {session_id[:12]}...")
                 
                 # Traitement de la requête (INSTANTANÉ même si le modèle charge)
                 start_time = time.time()
-                reponse = self.services['chatbot'].obtenir_reponse(message, session_id)
+                with span("chatbot"):
+                    reponse = self.services['chatbot'].obtenir_reponse(message, session_id)
                 response_time = (time.time() - start_time) * 1000
                 
                 # Vérification que la réponse n'est jamais None ou vide
@@ -268,7 +397,15 @@ class MilaAssistApp:
                     reponse = "Désolé, je n'ai pas pu traiter votre demande. Veuillez réessayer."
                 
                 # Mise à jour des statistiques de session
-                self.services['session'].update_session_activity(session_id, response_time)
+                with span("session"):
+                    self.services['session'].update_session_activity(session_id, response_time)
+                
+                if 'capture' in self.services:
+                    with span("capture"):
+                        self.services['capture'].enregistrer(
+                            "/get", session_client or session_id, message,
+                            self.services['chatbot'].niveau_derniere_reponse(), duree_ms=round(response_time, 1)
+                        )
                 
                 # Log de performance
                 if response_time > 2000:
@@ -300,20 +437,30 @@ class MilaAssistApp:
                 if len(reponse_attendue) > 1000:
                     return self._create_error_response("Réponse attendue trop longue", 400)
                 
+                if 'capture' in self.services:
+                    self.services['capture'].enregistrer(
+                        "/feedback", request.form.get("session_id", "").strip(), question
+                    )
+                
                 # Traitement asynchrone du feedback
                 def process_feedback():
+                    success = False
                     try:
                         success = self.services['feedback'].soumettre_feedback(
                             question, reponse_attendue, reponse_actuelle
                         )
                         if success:
                             logging.info(f"📝 Feedback traité: {question[:50]}...")
+                            self.services['chatbot'].planifier_ajustement()
                         else:
                             logging.warning("⚠️ Échec traitement feedback")
                     except Exception as e:
                         logging.error(f"Erreur traitement feedback asynchrone: {e}")
+                    finally:
+                        FEEDBACKS.inc("succes" if success else "echec")
                 
                 # Lancer le traitement en arrière-plan
+                FEEDBACKS.inc("recu")
                 thread = threading.Thread(target=process_feedback)
                 thread.daemon = True
                 thread.start()
@@ -371,6 +518,8 @@ class MilaAssistApp:
                 <h3>💬 Feedbacks</h3>
                 <p>Total feedbacks: {feedback_stats.get('total_feedbacks', 0)}</p>
                 <p>Mode: {feedback_stats.get('mode', 'N/A')}</p>
+                {self._stats_capture_html()}
+                {self._stats_traces_html()}
                 
                 <h3>🔧 Configuration</h3>
                 <p>Base de données: {chatbot_stats.get('db_connectee', 'N/A')}</p>
@@ -382,13 +531,19 @@ class MilaAssistApp:
                 logging.error(f"Erreur dans get_stats: {e}")
                 return "<p>Erreur lors de la récupération des statistiques</p>", 500
         
+        @self.app.route("/metrics", methods=["GET"])
+        def metrics():
+            """Métriques au format d'exposition Prometheus (compteurs, histogrammes, jauges)"""
+            return REGISTRE.exposition(), 200, {'Content-Type': CONTENT_TYPE}
+        
         @self.app.route("/health", methods=["GET"])
         def health_check():
-            """Point de santé complet de l'application"""
+            """Point de santé complet: dernier résultat de la sonde API et état local (sans appel réseau)"""
             try:
-                # Test des services
-                api_connected = self.services['chatbot'].test_api_connection()
-                model_status_info = self.services['chatbot'].get_model_status()
+                chatbot = self.services['chatbot']
+                sonde = self.services['sante'].instantane() if 'sante' in self.services else None
+                api_connected = bool(sonde and sonde['ok'])
+                model_status_info = chatbot.get_model_status()
                 
                 # Calcul du statut global
                 status = "healthy"
@@ -400,6 +555,7 @@ class MilaAssistApp:
                 elif not api_connected or not model_status_info['is_ready']:
                     status = "partial"
                 
+                api_cache = chatbot.api_client.cache
                 return jsonify({
                     "status": status,
                     "timestamp": datetime.now().isoformat(),
@@ -410,7 +566,20 @@ class MilaAssistApp:
                         "api_connected": api_connected,
                         "model_status": model_status_info['status'],
                         "model_ready": model_status_info['is_ready'],
-                        "sessions_active": self.services['session'].get_active_sessions_count()
+                        "sessions_active": self.services['session'].nombre_sessions()
+                    },
+                    "api_probe": sonde,
+                    "caches": {
+                        "predictions": {"size": len(chatbot.prediction_cache), "max_size": chatbot.cache_size_limit},
+                        "api_responses": {
+                            "size": len(api_cache.cache), "max_size": api_cache.max_size,
+                            "hit_rate": round(chatbot.api_client.performance_monitor.get_cache_hit_rate(), 1)
+                        }
+                    },
+                    "queues": {
+                        "feedbacks_pending": self._feedbacks_en_attente(),
+                        "fine_tuning": chatbot._ajustement_en_cours,
+                        "capture": self.services['capture'].get_stats() if 'capture' in self.services else None
                     },
                     "configuration": {
                         "use_api": self.config.USE_API,
@@ -430,6 +599,56 @@ class MilaAssistApp:
                     "timestamp": datetime.now().isoformat()
                 }), 500
         
+        @self.app.route("/health/live", methods=["GET"])
+        def liveness_check():
+            """Vivacité du processus (répartiteur de charge): aucun appel réseau ni verrou"""
+            return jsonify({"status": "alive", "uptime_seconds": int((datetime.now() - self.startup_time).total_seconds())})
+        
+        @self.app.route("/debug/profile", methods=["POST"])
+        def profile_process():
+            """Échantillonnage de tous les threads pendant une durée bornée (piles repliées, clé admin)"""
+            if self.profileur is None:
+                return self._create_error_response("Page non trouvée", 404)
+            if not verifier_cle_admin(request.headers.get('X-Admin-Key'), self.config.PROFILAGE_CLE_ADMIN):
+                return self._create_error_response("Clé admin invalide", 403)
+            
+            duree_s = request.args.get('duration', 10.0, type=float)
+            intervalle_ms = request.args.get('interval_ms', 5.0, type=float)
+            resultat = self.profileur.echantillonner_processus(duree_s, max(intervalle_ms, 1.0) / 1000)
+            if resultat is None:
+                return self._create_error_response("Échantillonnage déjà en cours", 409)
+            return resultat['piles'], 200, {
+                'Content-Type': 'text/plain; charset=utf-8',
+                'X-Profile-File': resultat['fichier'],
+                'X-Profile-Samples': str(resultat['echantillons'])
+            }
+        
+        @self.app.route("/debug/memory", methods=["GET", "POST"])
+        def debug_memory():
+            """Tailles des magasins internes, RSS, objets du GC et différence tracemalloc (clé admin)
+
+            POST ?tracemalloc=start|stop démarre ou arrête tracemalloc; chaque rapport
+            devient la référence de la différence suivante.
+            """
+            if self.memoire is None:
+                return self._create_error_response("Page non trouvée", 404)
+            if not verifier_cle_admin(request.headers.get('X-Admin-Key'), self.config.PROFILAGE_CLE_ADMIN):
+                return self._create_error_response("Clé admin invalide", 403)
+            
+            if request.method == "POST":
+                action = request.args.get('tracemalloc', '')
+                if action == "start":
+                    self.memoire.demarrer_tracemalloc(request.args.get('frames', 10, type=int))
+                elif action == "stop":
+                    self.memoire.arreter_tracemalloc()
+                else:
+                    return self._create_error_response("Paramètre tracemalloc=start|stop requis", 400)
+            
+            rapport = self.memoire.rapport(min(max(request.args.get('top', 15, type=int), 1), 100))
+            rapport['timestamp'] = datetime.now().isoformat()
+            rapport['uptime_seconds'] = int((datetime.now() - self.startup_time).total_seconds())
+            return jsonify(rapport)
+        
         @self.app.route("/quit", methods=["POST"])
         def quit_app():
             """Fermer l'application proprement"""
@@ -467,6 +686,33 @@ class MilaAssistApp:
         
         logging.info("🛣️ Routes enregistrées avec succès (sans gestion des modes de reformulation)")
     
+    def _stats_capture_html(self) -> str:
+        """Section /stats de la capture du trafic (vide si désactivée)"""
+        if 'capture' not in self.services:
+            return ""
+        stats = self.services['capture'].get_stats()
+        return (
+            f"<h3>🎙️ Capture du trafic</h3>"
+            f"<p>Entrées écrites: {stats['ecrites']} (en attente: {stats['en_attente']}, perdues: {stats['perdues']})</p>"
+        )
+    
+    def _stats_traces_html(self) -> str:
+        """Section /stats des durées par étape (vide si le traçage est désactivé)"""
+        if not self.traceur or not self.traceur.actif:
+            return ""
+        lignes = "".join(
+            f"<tr><td>{nom}</td><td>{r['total']}</td>"
+            + "".join(f"<td>{v:.2f}</td>" for v in r['percentiles_ms'].values())
+            + f"<td>{r['max_ms']:.2f}</td></tr>"
+            for nom, r in self.traceur.resume().items()
+        )
+        return (
+            "<h3>⏱️ Étapes des requêtes (ms)</h3>"
+            "<table><tr><th>Étape</th><th>Nombre</th><th>p50</th><th>p90</th><th>p99</th><th>p99.9</th><th>Max</th></tr>"
+            f"{lignes}</table>"
+            f"<p>Requêtes lentes journalisées: {self.traceur.requetes_lentes}</p>"
+        )
+    
     def _create_error_response(self, message: str, status_code: int) -> tuple:
         """Créer une réponse d'erreur structurée"""
         if request.is_json or 'application/json' in request.headers.get('Accept', ''):
@@ -78,6 +78,33 @@ class AppConfig:
         # Configuration chatbot (reformulation désactivée)
         self.USE_LEGACY_FALLBACK = self._load_boolean('USE_LEGACY_FALLBACK', self.DEFAULT_VALUES['USE_LEGACY_FALLBACK'])
         
+        # Capture anonymisée du trafic /get et /feedback (rejeu: tests/rejeu_trafic.py)
+        self.CAPTURE_TRAFIC = self._load_boolean('CAPTURE_TRAFIC', False)
+        self.CAPTURE_TRAFIC_PATH = os.getenv(
+            'CAPTURE_TRAFIC_PATH', os.path.join(self.BASE_DIR, "data", "traffic_capture.jsonl")
+        )
+        self.CAPTURE_TRAFIC_SEL = os.getenv('CAPTURE_TRAFIC_SEL') or None
+        
+        # Traces par requête: en-tête Server-Timing, histogrammes par étape sur /stats,
+        # arbre complet des requêtes plus lentes que le seuil (0: pas de journal)
+        self.TRACE_REQUETES = self._load_boolean('TRACE_REQUETES', False)
+        self.TRACE_REQUETES_LENTES_MS = self._load_integer('TRACE_REQUETES_LENTES_MS', 0, 0, 600000)
+        self.TRACE_REQUETES_LENTES_PATH = os.getenv(
+            'TRACE_REQUETES_LENTES_PATH', os.path.join(self.BASE_DIR, "logs", "requetes_lentes.jsonl")
+        )
+        
+        # Sonde de santé de l'API en arrière-plan (/health lit le dernier résultat)
+        self.SANTE_INTERVALLE_S = self._load_integer('SANTE_INTERVALLE_S', 10, 1, 3600)
+        
+        # Routes d'administration (profilage à la demande: en-tête X-Profile, /debug/profile;
+        # comptabilité mémoire: /debug/memory): désactivées sans clé admin
+        self.PROFILAGE_CLE_ADMIN = self._load_profiling_key()
+        self.PROFILAGE_PATH = os.getenv('PROFILAGE_PATH', os.path.join(self.BASE_DIR, "profiles"))
+        self.PROFILAGE_RETENTION = self._load_integer('PROFILAGE_RETENTION', 50, 1, 10000)
+        self.PROFILAGE_DUREE_MAX_S = self._load_integer('PROFILAGE_DUREE_MAX_S', 30, 1, 600)
+        # > 0: tracemalloc démarré au lancement avec ce nombre de frames (sinon POST /debug/memory)
+        self.MEMOIRE_TRACEMALLOC_FRAMES = self._load_integer('MEMOIRE_TRACEMALLOC_FRAMES', 0, 0, 100)
+        
         # Mode réponse pour évolution future (LLM en conteneur)
         self.RESPONSE_MODE = "simple"  # Prêt pour "reformulation" avec LLM
         
@@ -151,6 +178,19 @@ class AppConfig:
         
         return api_key
     
+    def _load_profiling_key(self) -> Optional[str]:
+        """Charger la clé admin du profilage (None: profilage désactivé)"""
+        cle = os.getenv('PROFILAGE_CLE_ADMIN', '').strip()
+        if not cle:
+            return None
+        
+        if len(cle) < self.SECURITY_CONFIG['REQUIRED_API_KEY_LENGTH']:
+            raise ConfigurationError(
+                f"PROFILAGE_CLE_ADMIN trop courte (minimum {self.SECURITY_CONFIG['REQUIRED_API_KEY_LENGTH']} caractères)"
+            )
+        
+        return cle
+    
     def _load_api_url(self) -> str:
         """Charger et valider l'URL de l'API"""
         api_url = os.getenv('API_URL', '').strip()
@@ -187,13 +227,23 @@ class AppConfig:
     
     def _initialize_model_paths(self):
         """Initialiser les chemins des fichiers du modèle"""
+        # Bundle versionné produit par train.py (prioritaire sur les fichiers séparés)
+        self.MODEL_BUNDLE_PATH = os.getenv(
+            'MODEL_BUNDLE_PATH', os.path.join(self.BASE_DIR, "chatbot_bundle.npz")
+        )
+        
+        # Fichiers historiques (avant le bundle)
         self.MODEL_PATH = os.path.join(self.BASE_DIR, "chatbot_model.keras")
         self.WORDS_PATH = os.path.join(self.BASE_DIR, "words.pkl")
         self.CLASSES_PATH = os.path.join(self.BASE_DIR, "classes.pkl")
         self.TRAINING_PATTERNS_PATH = os.path.join(self.BASE_DIR, "training_patterns.pkl")
         
+        # Ajustement incrémental après chaque feedback (train.py --fine-tune en arrière-plan)
+        self.FEEDBACK_FINETUNE = self._load_boolean('FEEDBACK_FINETUNE', False)
+        self.FEEDBACK_FINETUNE_TIMEOUT = self._load_integer('FEEDBACK_FINETUNE_TIMEOUT', 600, 10, 7200)
+        
         # Vérifier l'existence des fichiers si le fallback est activé
-        if self.USE_LEGACY_FALLBACK:
+        if self.USE_LEGACY_FALLBACK and not os.path.exists(self.MODEL_BUNDLE_PATH):
             missing_files = []
             for path, name in [
                 (self.MODEL_PATH, "chatbot_model.keras"),
@@ -286,6 +336,11 @@ class AppConfig:
             # Configuration chatbot
             'response_mode': self.RESPONSE_MODE,
             'use_legacy_fallback': self.USE_LEGACY_FALLBACK,
+            'feedback_finetune': self.FEEDBACK_FINETUNE,
+            'capture_trafic': self.CAPTURE_TRAFIC,
+            'trace_requetes': self.TRACE_REQUETES,
+            'sante_intervalle_s': self.SANTE_INTERVALLE_S,
+            'profilage': self.PROFILAGE_CLE_ADMIN is not None,
             
             # Configuration base de données
             'use_db': self.USE_DB,
@@ -294,6 +349,7 @@ class AppConfig:
             'mysql_database': self.MYSQL_DATABASE,
             
             # Fichiers du modèle
+            'bundle_exists': os.path.exists(self.MODEL_BUNDLE_PATH),
             'model_exists': os.path.exists(self.MODEL_PATH),
             'words_exists': os.path.exists(self.WORDS_PATH),
             'classes_exists': os.path.exists(self.CLASSES_PATH),
@@ -317,7 +373,9 @@ class AppConfig:
         """Obtenir le statut des fichiers du modèle"""
         status = self.validate_model_files()
         
-        if all(status.values()):
+        if os.path.exists(self.MODEL_BUNDLE_PATH):
+            return "✅ Bundle du modèle présent"
+        elif all(status.values()):
             return "✅ Tous les fichiers du modèle sont présents"
         elif status['model'] and status['words'] and status['classes']:
             return "⚠️ Fichiers de base présents, training_patterns.pkl manquant"
@@ -12,11 +12,15 @@ import requests
 import logging
 import time
 import json
+import threading
 from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime, timedelta
 import urllib3
 from functools import wraps
 
+from .tracing import span
+from .metriques import REGISTRE, Histogramme, Statistiques
+
 # Désactiver les avertissements SSL pour le NAS
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -56,75 +60,96 @@ def retry_on_failure(max_retries: int = 3, delay: float = 1.0, backoff: float =
         return wrapper
     return decorator
 
+DUREE_API = REGISTRE.histogramme(
+    "mila_api_duree_secondes", "Durée des appels à l'API NAS par route", etiquettes=("endpoint", "succes")
+)
+CACHE_API = REGISTRE.compteur(
+    "mila_api_cache_total", "Consultations du cache des réponses GET de l'API", etiquettes=("resultat",)
+)
+
 class PerformanceMonitor:
-    """Moniteur de performance pour les requêtes API"""
+    """Moniteur de performance pour les requêtes API (compteurs répartis par thread, sans verrou)"""
+    
+    # Au-delà, les nouveaux endpoints sont regroupés sous "autre"
+    MAX_ENDPOINTS = 32
     
     def __init__(self):
-        self.metrics = {
-            'total_requests': 0,
-            'successful_requests': 0,
-            'failed_requests': 0,
-            'total_response_time': 0.0,
-            'cache_hits': 0,
-            'cache_misses': 0,
-            'last_request_time': None,
-            'endpoints_stats': {}
-        }
+        self.cache_stats = Statistiques({'cache_hits': 0, 'cache_misses': 0})
+        self.durees = Histogramme(
+            "api_client_duree_secondes", "Durée des requêtes par endpoint", etiquettes=("endpoint", "succes")
+        )
+        self.last_request_time = None
+        self._endpoints = set()
+        self._lock = threading.Lock()
+    
+    def _endpoint_borne(self, endpoint: str) -> str:
+        """Nom d'endpoint retenu pour les statistiques (ensemble borné)"""
+        if endpoint in self._endpoints:
+            return endpoint
+        with self._lock:
+            if len(self._endpoints) < self.MAX_ENDPOINTS:
+                self._endpoints.add(endpoint)
+                return endpoint
+        return "autre"
     
     def record_request(self, endpoint: str, response_time: float, success: bool):
         """Enregistrer les métriques d'une requête"""
-        self.metrics['total_requests'] += 1
-        self.metrics['total_response_time'] += response_time
-        self.metrics['last_request_time'] = datetime.now()
-        
-        if success:
-            self.metrics['successful_requests'] += 1
-        else:
-            self.metrics['failed_requests'] += 1
-        
-        # Statistiques par endpoint
-        if endpoint not in self.metrics['endpoints_stats']:
-            self.metrics['endpoints_stats'][endpoint] = {
-                'requests': 0,
-                'successes': 0,
-                'failures': 0,
-                'total_time': 0.0
-            }
-        
-        stats = self.metrics['endpoints_stats'][endpoint]
-        stats['requests'] += 1
-        stats['total_time'] += response_time
-        
-        if success:
-            stats['successes'] += 1
-        else:
-            stats['failures'] += 1
+        self.durees.observer(response_time, self._endpoint_borne(endpoint), success)
+        self.last_request_time = datetime.now()
     
     def record_cache_hit(self):
         """Enregistrer un cache hit"""
-        self.metrics['cache_hits'] += 1
+        self.cache_stats.inc('cache_hits')
     
     def record_cache_miss(self):
         """Enregistrer un cache miss"""
-        self.metrics['cache_misses'] += 1
+        self.cache_stats.inc('cache_misses')
+    
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Instantané des métriques: totaux, cache et statistiques par endpoint"""
+        endpoints_stats: Dict[str, Dict[str, Any]] = {}
+        for (endpoint, success), resume in self.durees.par_etiquettes().items():
+            stats = endpoints_stats.setdefault(endpoint, {
+                'requests': 0,
+                'successes': 0,
+                'failures': 0,
+                'total_time': 0.0
+            })
+            stats['requests'] += resume['nombre']
+            stats['successes' if success else 'failures'] += resume['nombre']
+            stats['total_time'] += resume['somme']
+        
+        return {
+            'total_requests': sum(e['requests'] for e in endpoints_stats.values()),
+            'successful_requests': sum(e['successes'] for e in endpoints_stats.values()),
+            'failed_requests': sum(e['failures'] for e in endpoints_stats.values()),
+            'total_response_time': sum(e['total_time'] for e in endpoints_stats.values()),
+            **self.cache_stats.instantane(),
+            'last_request_time': self.last_request_time,
+            'endpoints_stats': endpoints_stats
+        }
     
     def get_average_response_time(self) -> float:
         """Obtenir le temps de réponse moyen"""
-        if self.metrics['total_requests'] > 0:
-            return self.metrics['total_response_time'] / self.metrics['total_requests']
+        metrics = self.metrics
+        if metrics['total_requests'] > 0:
+            return metrics['total_response_time'] / metrics['total_requests']
         return 0.0
     
     def get_success_rate(self) -> float:
         """Obtenir le taux de succès"""
-        if self.metrics['total_requests'] > 0:
-            return (self.metrics['successful_requests'] / self.metrics['total_requests']) * 100
+        metrics = self.metrics
+        if metrics['total_requests'] > 0:
+            return (metrics['successful_requests'] / metrics['total_requests']) * 100
         return 0.0
     
     def get_cache_hit_rate(self) -> float:
         """Obtenir le taux de cache hit"""
-        total_cache_requests = self.metrics['cache_hits'] + self.metrics['cache_misses']
+        cache = self.cache_stats.instantane()
+        total_cache_requests = cache['cache_hits'] + cache['cache_misses']
         if total_cache_requests > 0:
-            return (self.metrics['cache_hits'] / total_cache_requests) * 100
+            return (cache['cache_hits'] / total_cache_requests) * 100
         return 0.0
 
 class ResponseCache:
@@ -239,7 +264,26 @@ class ApiClient:
         use_cache: bool = True,
         timeout: int = None
     ) -> Tuple[bool, Dict[str, Any]]:
-        """Effectuer une requête avec monitoring et cache"""
+        """Effectuer une requête avec monitoring et cache (étape "api.<endpoint>" de la trace)"""
+        debut = time.perf_counter()
+        succes = False
+        try:
+            with span(f"api.{endpoint.strip('/').replace('/', '.')}"):
+                succes, reponse = self._executer_requete(method, endpoint, data, params, use_cache, timeout)
+            return succes, reponse
+        finally:
+            DUREE_API.observer(time.perf_counter() - debut, endpoint.lstrip('/'), "oui" if succes else "non")
+    
+    def _executer_requete(
+        self, 
+        method: str, 
+        endpoint: str, 
+        data: Dict = None, 
+        params: Dict = None,
+        use_cache: bool = True,
+        timeout: int = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Requête HTTP effective avec monitoring et cache"""
         
         start_time = time.time()
         endpoint_clean = endpoint.lstrip('/')
@@ -249,10 +293,12 @@ class ApiClient:
             cached_response = self.cache.get(endpoint_clean, params)
             if cached_response is not None:
                 self.performance_monitor.record_cache_hit()
+                CACHE_API.inc("hit")
                 logger.debug(f"💾 Cache hit pour {endpoint_clean}")
                 return True, cached_response
             else:
                 self.performance_monitor.record_cache_miss()
+                CACHE_API.inc("miss")
         
         try:
             url = f"{self.base_url}/{endpoint_clean}"
@@ -591,7 +637,7 @@ class ApiClient:
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Obtenir les métriques de performance du client"""
-        metrics = self.performance_monitor.metrics.copy()
+        metrics = self.performance_monitor.metrics
         
         # Ajouter des métriques calculées
         metrics['average_response_time'] = self.performance_monitor.get_average_response_time()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Service de capture anonymisée du trafic - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Enregistre les messages reçus par /get et /feedback dans un fichier JSONL
+(data/traffic_capture.jsonl par défaut), pour rejouer la vraie distribution
+des questions (tests/rejeu_trafic.py) et pour l'échantillon de trafic de
+train.py --evaluate-backups.
+
+Le chemin de requête ne fait qu'ajouter un dictionnaire à un tampon en
+mémoire; un thread d'écriture vide le tampon par blocs (taille atteinte ou
+intervalle écoulé). Si l'écriture prend du retard, les entrées au-delà de la
+capacité du tampon sont abandonnées et comptées, sans jamais bloquer une
+requête.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import secrets
+import threading
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MOTIFS_ANONYMISATION = [
+    (re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+'), '<email>'),
+    (re.compile(r'https?://\S+|www\.\S+'), '<url>'),
+    (re.compile(r'(?<!\w)@\w+'), '<pseudo>'),
+    (re.compile(r'\+?\d[\d .-]{7,}\d'), '<numero>'),
+]
+
+def anonymiser_message(message: str) -> str:
+    """Masque e-mails, URL, pseudos (@...) et numéros longs"""
+    for motif, remplacement in MOTIFS_ANONYMISATION:
+        message = motif.sub(remplacement, message)
+    return message
+
+class CaptureTraficService:
+    """Écriture tamponnée et anonymisée du trafic en JSONL"""
+
+    def __init__(self, chemin: str, taille_bloc: int = 64, intervalle_vidage_s: float = 1.0,
+                 capacite_tampon: int = 10000, sel: Optional[str] = None):
+        self.chemin = chemin
+        self.taille_bloc = taille_bloc
+        self.intervalle_vidage_s = intervalle_vidage_s
+        self.capacite_tampon = capacite_tampon
+        # Sel par processus sauf configuration: les sessions ne sont pas reliables entre captures
+        self.sel = (sel or secrets.token_hex(16)).encode('utf-8')
+
+        self._tampon: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self.stats = {'capturees': 0, 'ecrites': 0, 'perdues': 0, 'vidages': 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+        self._thread = threading.Thread(target=self._boucle_ecriture, daemon=True, name="CaptureTrafic")
+        self._thread.start()
+        logger.info(f"🎙️ Capture du trafic activée: {chemin}")
+
+    def hacher_session(self, session_id: str) -> str:
+        return hashlib.sha256(self.sel + session_id.encode('utf-8')).hexdigest()[:16]
+
+    def enregistrer(self, route: str, session_id: str, message: str, niveau: Optional[str] = None,
+                    **details: Any):
+        """Ajoute une entrée au tampon (appelé dans le chemin de requête)"""
+        entree = {
+            'horodatage': round(time.time(), 3),
+            'route': route,
+            'session': self.hacher_session(session_id) if session_id else None,
+            'message': anonymiser_message(message),
+            'niveau': niveau
+        }
+        entree.update(details)
+        with self._lock:
+            if len(self._tampon) >= self.capacite_tampon:
+                self.stats['perdues'] += 1
+                return
+            self._tampon.append(entree)
+            self.stats['capturees'] += 1
+            plein = len(self._tampon) >= self.taille_bloc
+        if plein:
+            self._reveil.set()
+
+    def vider(self):
+        """Écrit le contenu du tampon en un seul appel d'écriture"""
+        with self._lock:
+            entrees, self._tampon = self._tampon, []
+        if not entrees:
+            return
+        bloc = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entrees)
+        try:
+            with open(self.chemin, 'a', encoding='utf-8') as f:
+                f.write(bloc)
+            with self._lock:
+                self.stats['ecrites'] += len(entrees)
+                self.stats['vidages'] += 1
+        except OSError as e:
+            with self._lock:
+                self.stats['perdues'] += len(entrees)
+            logger.warning(f"⚠️ Écriture de la capture impossible: {e}")
+
+    def _boucle_ecriture(self):
+        while not self._arret.is_set():
+            self._reveil.wait(self.intervalle_vidage_s)
+            self._reveil.clear()
+            self.vider()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'en_attente': len(self._tampon), 'fichier': self.chemin}
+
+    def fermer(self):
+        """Arrête le thread d'écriture et vide le tampon restant"""
+        self._arret.set()
+        self._reveil.set()
+        self._thread.join(timeout=5)
+        self.vider()
+        logger.info(
+            f"🎙️ Capture fermée: {self.stats['ecrites']} entrées écrites, {self.stats['perdues']} perdues"
+        )
@@ -14,17 +14,24 @@ Date: 16-09-2025
 import time
 import requests
 import os
+import sys
+import subprocess
 import random
 import pickle
 import json
 import numpy as np
 import re
 import threading
+from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List, Tuple
 import logging
 from datetime import datetime
 from enum import Enum
 from .api_client import ApiClient
+from .model_bundle import ModelBundle, BundleError
+from .feature_hashing import colonnes_hachees, ponderer
+from .tracing import etape, span
+from .metriques import REGISTRE, Statistiques
 
 # Import conditionnel de TensorFlow
 try:
@@ -56,6 +63,20 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Niveau qui a produit la dernière réponse, par thread de requête (capture du trafic)
+_contexte_requete = threading.local()
+
+REPONSES_PAR_NIVEAU = REGISTRE.compteur(
+    "mila_reponses_total", "Réponses du chatbot par niveau (api, keras, keras_cache, chargement, defaut, erreur)",
+    etiquettes=("niveau",)
+)
+CACHE_PREDICTIONS = REGISTRE.compteur(
+    "mila_cache_predictions_total", "Consultations du cache de prédictions Keras", etiquettes=("resultat",)
+)
+TAILLE_LOT_INFERENCE = REGISTRE.histogramme(
+    "mila_inference_taille_lot", "Nombre de phrases par appel model.predict", bornes=(1, 2, 4, 8, 16, 32, 64)
+)
+
 class ModelStatus(Enum):
     """États du modèle Keras"""
     NOT_INITIALIZED = "not_initialized"
@@ -64,9 +85,37 @@ class ModelStatus(Enum):
     ERROR = "error"
     DISABLED = "disabled"
 
+@dataclass(frozen=True)
+class EtatModele:
+    """Modèle local servi et tout ce qui l'accompagne
+    
+    Remplacé d'un bloc (une seule affectation) au rechargement à chaud; chaque
+    requête lit self.etat une fois et n'utilise que cet objet, ce qui évite
+    d'associer le modèle d'une version aux classes d'une autre. Le cache de
+    prédictions appartient à l'état: un rechargement repart d'un cache vide et une
+    requête commencée avant lui n'écrit que dans l'ancien.
+    """
+    model: Any = None
+    words: Optional[List[str]] = None
+    classes: Optional[List[str]] = None
+    training_patterns: Optional[Dict[str, Any]] = None
+    version: Optional[str] = None
+    hachage_buckets: int = 0  # > 0: features hachées, pas de vocabulaire
+    ponderation: Optional[Dict[str, Any]] = None  # Pondération du bundle (preprocessing['ponderation'])
+    colonnes_mots_cles: Optional[np.ndarray] = None  # Masque des colonnes hachées des mots-clés du bundle
+    quantification: Optional[str] = None  # Mode du bundle quantifié (int8, float16), None en float32
+    cache: Dict[str, Any] = field(default_factory=dict)
+    
+    def dimension_entree(self) -> int:
+        """Largeur de l'entrée du modèle (buckets de hachage ou taille du vocabulaire)"""
+        return self.hachage_buckets or len(self.words)
+
 class ChatbotService:
     """Service principal du chatbot - VERSION SANS REFORMULATION"""
     
+    # Lignes de stderr de train.py --fine-tune journalisées en cas d'échec
+    LIGNES_ERREUR_AJUSTEMENT = 20
+    
     def __init__(self, config):
         self.config = config
         # REFORMULATION DÉSACTIVÉE - Mode fixé sur minimal (pas de reformulation)
@@ -79,20 +128,24 @@ class ChatbotService:
         
         # Initialiser le client API
         self.api_client = ApiClient(config)
+        # Sonde de santé en arrière-plan (attachée par l'application): test_api_connection() sans appel réseau
+        self.sonde_api = None
         
-        # Variables pour le modèle Keras local (fallback)
-        self.model = None
-        self.words = None
-        self.classes = None
+        # Modèle Keras local (fallback): état remplacé d'un bloc, cache de prédictions compris
+        self.etat = EtatModele()
         self.lemmatizer = WordNetLemmatizer() if NLTK_AVAILABLE else WordNetLemmatizer()
-        self.training_patterns = None
         
-        # Cache pour optimiser les prédictions
-        self.prediction_cache = {}
+        # Ajustement incrémental depuis les feedbacks (un seul processus à la fois)
+        self._ajustement_lock = threading.Lock()
+        self._ajustement_en_cours = False
+        self._ajustement_relance = False
+        self._ajustement_impossible_signale = False
+        
+        # Taille maximale du cache de prédictions
         self.cache_size_limit = 1000
         
-        # Statistiques détaillées
-        self.stats = {
+        # Statistiques détaillées (compteurs répartis par thread: self.stats.inc('cle'))
+        self.stats = Statistiques({
             'messages_traites': 0,
             'temps_reponse_total': 0.0,
             'api_success': 0,
@@ -102,10 +155,14 @@ class ChatbotService:
             'conversations_enregistrees': 0,
             'predictions_precises': 0,
             'predictions_incertaines': 0,
-            'model_loading_time': 0.0,
             'requests_during_loading': 0,
-            'api_used_during_loading': 0
-        }
+            'api_used_during_loading': 0,
+            'ajustements_reussis': 0,
+            'ajustements_echoues': 0
+        }, valeurs={
+            'model_loading_time': 0.0,
+            'derniere_duree_ajustement': 0.0
+        })
         
         logger.info("✅ Service chatbot initialisé avec chargement asynchrone")
         logger.info("🚫 Reformulation désactivée - réponses directes uniquement")
@@ -132,6 +189,35 @@ class ChatbotService:
             if self.model_status in [ModelStatus.LOADING, ModelStatus.NOT_INITIALIZED]:
                 logger.info("🧠 Chargement du modèle Keras en cours pour le fallback...")
     
+    # Lecture seule: une requête lit self.etat une fois plutôt que ces attributs un à un
+    @property
+    def model(self):
+        return self.etat.model
+    
+    @property
+    def words(self) -> Optional[List[str]]:
+        return self.etat.words
+    
+    @property
+    def classes(self) -> Optional[List[str]]:
+        return self.etat.classes
+    
+    @property
+    def training_patterns(self) -> Optional[Dict[str, Any]]:
+        return self.etat.training_patterns
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.etat.version
+    
+    @property
+    def hachage_buckets(self) -> int:
+        return self.etat.hachage_buckets
+    
+    @property
+    def prediction_cache(self) -> Dict[str, Any]:
+        return self.etat.cache
+    
     def _demarrer_chargement_modele_async(self):
         """Démarre le chargement du modèle Keras en arrière-plan"""
         if self.model_loading_thread and self.model_loading_thread.is_alive():
@@ -153,52 +239,23 @@ class ChatbotService:
         try:
             logger.info("🧠 Début du chargement asynchrone du modèle Keras...")
             
-            # Vérifier l'existence des fichiers
-            files_to_check = [
-                (self.config.MODEL_PATH, "Modèle Keras"),
-                (self.config.WORDS_PATH, "Vocabulaire"),
-                (self.config.CLASSES_PATH, "Classes")
-            ]
-            
-            missing_files = []
-            for file_path, description in files_to_check:
-                if not os.path.exists(file_path):
-                    missing_files.append(f"{description} ({file_path})")
-            
-            if missing_files:
-                raise FileNotFoundError(f"Fichiers manquants: {', '.join(missing_files)}")
-            
-            # Charger le modèle
-            logger.info(f"📂 Chargement du modèle: {self.config.MODEL_PATH}")
-            self.model = load_model(self.config.MODEL_PATH)
-            logger.info("✅ Modèle Keras chargé")
-            
-            # Charger les mots
-            logger.info(f"📂 Chargement du vocabulaire: {self.config.WORDS_PATH}")
-            with open(self.config.WORDS_PATH, 'rb') as f:
-                self.words = pickle.load(f)
-            logger.info(f"✅ Vocabulaire chargé: {len(self.words)} mots")
-            
-            # Charger les classes
-            logger.info(f"📂 Chargement des classes: {self.config.CLASSES_PATH}")
-            with open(self.config.CLASSES_PATH, 'rb') as f:
-                self.classes = pickle.load(f)
-            logger.info(f"✅ Classes chargées: {len(self.classes)} catégories")
-            
-            # Charger les patterns d'entraînement (optionnel)
-            patterns_path = os.path.join(self.config.BASE_DIR, "training_patterns.pkl")
-            if os.path.exists(patterns_path):
+            # Bundle versionné en priorité, fichiers historiques sinon
+            bundle_path = getattr(self.config, 'MODEL_BUNDLE_PATH', None)
+            bundle_charge = False
+            if bundle_path and os.path.exists(bundle_path):
                 try:
-                    with open(patterns_path, 'rb') as f:
-                        self.training_patterns = pickle.load(f)
-                    logger.info(f"✅ Patterns d'entraînement chargés: {len(self.training_patterns)} catégories")
-                except Exception as e:
-                    logger.warning(f"⚠️ Erreur chargement patterns: {e}")
-                    self.training_patterns = None
+                    self._charger_bundle(bundle_path)
+                    bundle_charge = True
+                except BundleError as e:
+                    logger.warning(f"⚠️ {e} - tentative avec les fichiers historiques")
+            
+            if not bundle_charge:
+                self._charger_fichiers_historiques()
             
             # Test rapide du modèle
-            test_input = np.zeros((1, len(self.words)), dtype=np.float32)
-            test_prediction = self.model.predict(test_input, verbose=0)
+            etat = self.etat
+            test_input = np.zeros((1, etat.dimension_entree()), dtype=np.float32)
+            test_prediction = etat.model.predict(test_input, verbose=0)
             logger.info(f"🧪 Test du modèle réussi (sortie: {test_prediction.shape})")
             
             # Marquer comme prêt
@@ -216,15 +273,99 @@ class ChatbotService:
             self.model_error_message = str(e)
             
             # Nettoyer les ressources partiellement chargées
-            self.model = None
-            self.words = None
-            self.classes = None
-            self.training_patterns = None
+            self.etat = EtatModele()
             
             logger.error(f"❌ Erreur lors du chargement asynchrone du modèle: {e}")
             logger.error(f"⏱️ Temps avant échec: {loading_time:.2f}s")
             logger.info("🌐 L'application continuera avec l'API uniquement")
     
+    def _charger_bundle(self, bundle_path: str):
+        """Charge modèle, vocabulaire, classes et réponses depuis le bundle (une seule lecture)"""
+        logger.info(f"📦 Chargement du bundle: {bundle_path}")
+        bundle = ModelBundle.charger(bundle_path)
+        model = bundle.construire_modele()
+        
+        hachage_buckets = int(bundle.preprocessing.get('hachage', {}).get('buckets', 0))
+        colonnes_mots_cles = None
+        if hachage_buckets:
+            colonnes_mots_cles = np.zeros(hachage_buckets, dtype=bool)
+            colonnes_mots_cles[colonnes_hachees(bundle.preprocessing.get('mots_cles', []), hachage_buckets)] = True
+        
+        # Remplacement en une affectation (rechargement à chaud pendant que le service répond)
+        self.etat = EtatModele(
+            model=model,
+            words=bundle.words,
+            classes=bundle.classes,
+            training_patterns={tag: {'responses': r} for tag, r in bundle.responses.items()},
+            version=bundle.version,
+            hachage_buckets=hachage_buckets,
+            ponderation=bundle.preprocessing.get('ponderation'),
+            colonnes_mots_cles=colonnes_mots_cles,
+            quantification=bundle.quantization.get('mode') if bundle.quantization else None
+        )
+        
+        entrees = f"{hachage_buckets} colonnes hachées" if hachage_buckets else f"{len(bundle.words)} mots"
+        logger.info(
+            f"✅ Bundle {bundle.version} chargé: {entrees}, "
+            f"{len(bundle.classes)} catégories (checksum {bundle.checksum[:12]})"
+        )
+    
+    def _dimension_entree(self) -> int:
+        """Largeur de l'entrée du modèle (buckets de hachage ou taille du vocabulaire)"""
+        return self.etat.dimension_entree()
+    
+    def _charger_fichiers_historiques(self):
+        """Charge les fichiers séparés (chatbot_model.keras, words.pkl, classes.pkl)"""
+        # Vérifier l'existence des fichiers
+        files_to_check = [
+            (self.config.MODEL_PATH, "Modèle Keras"),
+            (self.config.WORDS_PATH, "Vocabulaire"),
+            (self.config.CLASSES_PATH, "Classes")
+        ]
+        
+        missing_files = []
+        for file_path, description in files_to_check:
+            if not os.path.exists(file_path):
+                missing_files.append(f"{description} ({file_path})")
+        
+        if missing_files:
+            raise FileNotFoundError(f"Fichiers manquants: {', '.join(missing_files)}")
+        
+        # Charger le modèle
+        logger.info(f"📂 Chargement du modèle: {self.config.MODEL_PATH}")
+        model = load_model(self.config.MODEL_PATH)
+        logger.info("✅ Modèle Keras chargé")
+        
+        # Charger les mots
+        logger.info(f"📂 Chargement du vocabulaire: {self.config.WORDS_PATH}")
+        with open(self.config.WORDS_PATH, 'rb') as f:
+            words = pickle.load(f)
+        logger.info(f"✅ Vocabulaire chargé: {len(words)} mots")
+        
+        # Charger les classes
+        logger.info(f"📂 Chargement des classes: {self.config.CLASSES_PATH}")
+        with open(self.config.CLASSES_PATH, 'rb') as f:
+            classes = pickle.load(f)
+        logger.info(f"✅ Classes chargées: {len(classes)} catégories")
+        
+        # Charger les patterns d'entraînement (optionnel)
+        training_patterns = None
+        patterns_path = os.path.join(self.config.BASE_DIR, "training_patterns.pkl")
+        if os.path.exists(patterns_path):
+            try:
+                with open(patterns_path, 'rb') as f:
+                    training_patterns = pickle.load(f)
+                logger.info(f"✅ Patterns d'entraînement chargés: {len(training_patterns)} catégories")
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur chargement patterns: {e}")
+                training_patterns = None
+        
+        self.etat = EtatModele(model=model, words=words, classes=classes, training_patterns=training_patterns)
+    
+    def niveau_derniere_reponse(self) -> Optional[str]:
+        """Niveau de la dernière réponse du thread courant (api, keras, keras_cache, chargement, defaut, erreur)"""
+        return getattr(_contexte_requete, 'niveau', None)
+    
     def get_model_status(self) -> Dict[str, Any]:
         """Obtenir le statut actuel du modèle"""
         status_messages = {
@@ -234,24 +375,28 @@ class ChatbotService:
             ModelStatus.ERROR: f"Erreur: {self.model_error_message}",
             ModelStatus.DISABLED: "Désactivé"
         }
+        etat = self.etat
         
         return {
             "status": self.model_status.value,
             "message": status_messages[self.model_status],
             "loading_time": self.stats.get('model_loading_time', 0.0),
+            "model_version": etat.version,
+            "feature_hashing_buckets": etat.hachage_buckets,
             "files_loaded": {
-                "model": self.model is not None,
-                "words": self.words is not None,
-                "classes": self.classes is not None,
-                "patterns": self.training_patterns is not None
+                "model": etat.model is not None,
+                "words": etat.words is not None,
+                "classes": etat.classes is not None,
+                "patterns": etat.training_patterns is not None
             },
             "is_ready": self.model_status == ModelStatus.READY,
-            "can_fallback": self.model_status == ModelStatus.READY and self.model is not None
+            "can_fallback": self.model_status == ModelStatus.READY and etat.model is not None
         }
     
     def obtenir_reponse(self, message: str, session_id: str) -> str:
         """Obtenir une réponse du chatbot - SANS REFORMULATION"""
         start_time = time.time()
+        _contexte_requete.niveau = None
         
         try:
             # Validation et nettoyage du message
@@ -263,16 +408,16 @@ class ChatbotService:
             
             # Statistiques pour les requêtes pendant le chargement
             if self.model_status == ModelStatus.LOADING:
-                self.stats['requests_during_loading'] += 1
+                self.stats.inc('requests_during_loading')
             
             # 1. Tentative via API externe (priorité)
             reponse_api = self._obtenir_reponse_api(message, session_id)
             response_time = (time.time() - start_time) * 1000
             
             if reponse_api:
-                self.stats['api_success'] += 1
+                self.stats.inc('api_success')
                 if self.model_status == ModelStatus.LOADING:
-                    self.stats['api_used_during_loading'] += 1
+                    self.stats.inc('api_used_during_loading')
                 
                 # Enregistrer la conversation via l'API française
                 self._enregistrer_conversation_api(
@@ -286,16 +431,18 @@ class ChatbotService:
                 
                 # RÉPONSE DIRECTE SANS REFORMULATION
                 reponse_finale = reponse_api['reponse'].strip()
+                _contexte_requete.niveau = "api"
                 
                 logger.info(f"🌐 Réponse obtenue via API: {len(reponse_finale)} caractères")
                 return reponse_finale
             
             # 2. Fallback sur le modèle Keras local si disponible
             elif self.model_status == ModelStatus.READY and self.model is not None:
-                self.stats['api_failures'] += 1
-                self.stats['keras_fallback_used'] += 1
+                self.stats.inc('api_failures')
+                self.stats.inc('keras_fallback_used')
                 
                 logger.info("🧠 API indisponible - utilisation du modèle Keras (prêt)")
+                _contexte_requete.niveau = "keras"
                 reponse_keras = self._obtenir_reponse_keras_amelioree(message)
                 
                 if reponse_keras:
@@ -314,11 +461,12 @@ class ChatbotService:
             
             # 3. Gestion du cas où le modèle est en cours de chargement
             elif self.model_status == ModelStatus.LOADING:
-                self.stats['api_failures'] += 1
+                self.stats.inc('api_failures')
                 logger.info("🔄 API indisponible et modèle en cours de chargement...")
                 
                 # Réponse temporaire intelligente
                 reponse_temporaire = self._reponse_chargement_en_cours(message)
+                _contexte_requete.niveau = "chargement"
                 
                 response_time = (time.time() - start_time) * 1000
                 self._enregistrer_conversation_api(
@@ -334,9 +482,10 @@ class ChatbotService:
             
             # 4. Réponse par défaut en dernier recours
             else:
-                self.stats['api_failures'] += 1
+                self.stats.inc('api_failures')
                 logger.warning("⚠️ API et Keras indisponibles - utilisation des réponses par défaut")
                 reponse_defaut = self._reponse_par_defaut(message)
+                _contexte_requete.niveau = "defaut"
                 
                 response_time = (time.time() - start_time) * 1000
                 self._enregistrer_conversation_api(
@@ -352,13 +501,15 @@ class ChatbotService:
             
         except Exception as e:
             logger.error(f"Erreur dans obtenir_reponse: {e}")
+            _contexte_requete.niveau = "erreur"
             return "Désolé, une erreur s'est produite. Veuillez réessayer."
         
         finally:
             # Mise à jour des statistiques
             response_time = (time.time() - start_time) * 1000
-            self.stats['messages_traites'] += 1
-            self.stats['temps_reponse_total'] += response_time
+            self.stats.inc('messages_traites')
+            self.stats.inc('temps_reponse_total', response_time)
+            REPONSES_PAR_NIVEAU.inc(_contexte_requete.niveau or "inconnu")
     
     def _reponse_chargement_en_cours(self, message: str) -> str:
         """Réponse intelligente pendant le chargement du modèle"""
@@ -392,6 +543,7 @@ class ChatbotService:
         
         return random.choice(reponses)
     
+    @etape("nettoyage")
     def _nettoyer_message_utilisateur(self, message: str) -> str:
         """Nettoyage amélioré du message utilisateur pour le domaine du streaming"""
         # Normalisation des termes spécialisés
@@ -414,6 +566,7 @@ class ChatbotService:
         
         return message_normalise
     
+    @etape("appel_api")
     def _obtenir_reponse_api(self, message: str, session_id: str) -> Optional[Dict]:
         """Obtenir une réponse via l'API externe - une seule tentative"""
         try:
@@ -433,43 +586,50 @@ class ChatbotService:
         
         return None
     
+    @etape("keras")
     def _obtenir_reponse_keras_amelioree(self, message: str) -> Optional[str]:
         """Obtenir une réponse via le modèle Keras local - SANS REFORMULATION"""
         try:
-            if not self.model or not self.words or not self.classes:
+            # Une seule lecture de l'état: modèle, classes et cache de la même version
+            etat = self.etat
+            if not etat.model or not (etat.words or etat.hachage_buckets) or not etat.classes:
                 logger.warning("🧠 Modèle Keras non entièrement chargé")
                 return None
             
             # Vérifier le cache de prédictions
             cache_key = self._generer_cache_key(message)
-            if cache_key in self.prediction_cache:
-                cached_result = self.prediction_cache[cache_key]
-                self.stats['keras_predictions_cached'] += 1
+            cached_result = etat.cache.get(cache_key)
+            if cached_result is not None:
+                self.stats.inc('keras_predictions_cached')
+                CACHE_PREDICTIONS.inc("hit")
+                _contexte_requete.niveau = "keras_cache"
                 logger.debug(f"💾 Prédiction récupérée du cache")
                 return self._generer_reponse_par_classe_amelioree(
                     cached_result['intent'], 
                     message, 
-                    float(cached_result['probability'])
+                    float(cached_result['probability']),
+                    etat
                 )
             
             # Prédire la classe avec le modèle amélioré
-            ints = self._predire_classe_keras_amelioree(message)
+            CACHE_PREDICTIONS.inc("miss")
+            ints = self._predire_classe_keras_amelioree(message, etat)
             if not ints:
                 return None
             
             # Mettre en cache le résultat
-            self._mettre_en_cache_prediction(cache_key, ints[0])
+            self._mettre_en_cache_prediction(cache_key, ints[0], etat)
             
             # Générer la réponse DIRECTE SANS REFORMULATION
             intent = ints[0]['intent']
             confidence = ints[0]['probability']
             
             if confidence > 0.5:
-                self.stats['predictions_precises'] += 1
+                self.stats.inc('predictions_precises')
             else:
-                self.stats['predictions_incertaines'] += 1
+                self.stats.inc('predictions_incertaines')
             
-            reponse = self._generer_reponse_par_classe_amelioree(intent, message, confidence)
+            reponse = self._generer_reponse_par_classe_amelioree(intent, message, confidence, etat)
             
             # RETOUR DIRECT SANS REFORMULATION
             return reponse.strip() if reponse else None
@@ -484,26 +644,32 @@ class ChatbotService:
         message_simple = re.sub(r'[^\w\s]', '', message.lower()).strip()
         return hashlib.md5(message_simple.encode()).hexdigest()[:16]
     
-    def _mettre_en_cache_prediction(self, cache_key: str, prediction: dict):
-        """Mettre en cache une prédiction"""
-        if len(self.prediction_cache) >= self.cache_size_limit:
+    def _mettre_en_cache_prediction(self, cache_key: str, prediction: dict, etat: Optional[EtatModele] = None):
+        """Mettre en cache une prédiction (dans le cache de l'état qui l'a produite)"""
+        cache = (etat or self.etat).cache
+        if len(cache) >= self.cache_size_limit:
             # Supprimer la plus ancienne entrée
-            oldest_key = next(iter(self.prediction_cache))
-            del self.prediction_cache[oldest_key]
+            oldest_key = next(iter(cache))
+            cache.pop(oldest_key, None)
         
-        self.prediction_cache[cache_key] = prediction
+        cache[cache_key] = prediction
     
-    def _predire_classe_keras_amelioree(self, message: str) -> Optional[list]:
+    def _predire_classe_keras_amelioree(self, message: str, etat: Optional[EtatModele] = None) -> Optional[list]:
         """Prédiction de classe améliorée avec seuils adaptatifs"""
+        etat = etat or self.etat
         try:
-            # Nettoyage de la phrase avec améliorations
-            mots_phrase = self._nettoyer_phrase_amelioree(message)
-            
-            # Créer le bag of words
-            bag = self._creer_bag_of_words_ameliore(mots_phrase)
+            with span("keras.pretraitement"):
+                # Nettoyage de la phrase avec améliorations
+                mots_phrase = self._nettoyer_phrase_amelioree(message)
+                
+                # Créer le bag of words
+                bag = self._creer_bag_of_words_ameliore(mots_phrase, etat)
             
             # Prédiction avec le modèle
-            res = self.model.predict(np.array([bag]), verbose=0)[0]
+            with span("keras.inference"):
+                lot = np.array([bag])
+                TAILLE_LOT_INFERENCE.observer(len(lot))
+                res = etat.model.predict(lot, verbose=0)[0]
             
             # Seuils adaptatifs selon la longueur et le contenu du message
             seuil = self._calculer_seuil_adaptatif(message, mots_phrase)
@@ -522,7 +688,7 @@ class ChatbotService:
             
             if resultats:
                 predictions = [
-                    {"intent": self.classes[r[0]], "probability": float(r[1])} 
+                    {"intent": etat.classes[r[0]], "probability": float(r[1])} 
                     for r in resultats[:3]  # Top 3 prédictions
                 ]
                 
@@ -618,10 +784,11 @@ class ChatbotService:
             logger.error(f"Erreur nettoyage phrase amélioré: {e}")
             return phrase.lower().split()
     
-    def _creer_bag_of_words_ameliore(self, mots_phrase: list) -> np.ndarray:
+    def _creer_bag_of_words_ameliore(self, mots_phrase: list, etat: Optional[EtatModele] = None) -> np.ndarray:
         """Création d'un bag of words avec pondération des termes importants"""
+        etat = etat or self.etat
         try:
-            bag = np.zeros(len(self.words), dtype=np.float32)
+            bag = np.zeros(etat.dimension_entree(), dtype=np.float32)
             
             # Mots-clés importants pour le domaine
             mots_cles_importants = [
@@ -629,8 +796,20 @@ class ChatbotService:
                 'plusieurs', 'ordinateur', 'simultanément', 'aide'
             ]
             
+            # Features hachées: colonne calculée, aucune recherche dans le vocabulaire.
+            # Même comptage et même pondération qu'à l'entraînement (tokens éligibles,
+            # mots-clés du bundle reconnus par leur colonne)
+            if etat.hachage_buckets:
+                colonnes = colonnes_hachees(
+                    (mot for mot in mots_phrase if mot.isalpha() and len(mot) > 1), etat.hachage_buckets
+                )
+                occurrences = np.bincount(colonnes, minlength=etat.hachage_buckets)
+                presentes = occurrences > 0
+                bag[presentes] = ponderer(occurrences[presentes], etat.colonnes_mots_cles[presentes], etat.ponderation)
+                return bag
+            
             for mot in mots_phrase:
-                for i, word in enumerate(self.words):
+                for i, word in enumerate(etat.words):
                     if word == mot:
                         # Pondération spéciale pour les mots-clés
                         if mot in mots_cles_importants:
@@ -643,19 +822,22 @@ class ChatbotService:
             
         except Exception as e:
             logger.error(f"Erreur création bag of words amélioré: {e}")
-            return np.zeros(len(self.words) if self.words else 0, dtype=np.float32)
+            return np.zeros(etat.hachage_buckets or (len(etat.words) if etat.words else 0), dtype=np.float32)
     
+    @etape("keras.selection")
     def _generer_reponse_par_classe_amelioree(
         self, 
         classe_predite: str, 
         message: str, 
-        confidence: float
+        confidence: float,
+        etat: Optional[EtatModele] = None
     ) -> Optional[str]:
         """Génération de réponse DIRECTE utilisant les patterns d'entraînement"""
+        training_patterns = (etat or self.etat).training_patterns
         try:
             # Utiliser les patterns d'entraînement si disponibles
-            if self.training_patterns and classe_predite in self.training_patterns:
-                responses = self.training_patterns[classe_predite].get('responses', [])
+            if training_patterns and classe_predite in training_patterns:
+                responses = training_patterns[classe_predite].get('responses', [])
                 if responses:
                     reponse = random.choice(responses)
                     logger.info(f"🧠 Réponse depuis patterns d'entraînement: {classe_predite}")
@@ -726,6 +908,7 @@ class ChatbotService:
             logger.error(f"Erreur génération réponse par classe améliorée: {e}")
             return "Je comprends votre question, mais je ne peux pas y répondre précisément. Pouvez-vous reformuler ?"
     
+    @etape("journal")
     def _enregistrer_conversation_api(self, session_id: str, question: str, reponse: str,
                                      id_connaissance: Optional[int] = None,
                                      score_confiance: Optional[float] = None,
@@ -749,14 +932,15 @@ class ChatbotService:
             )
             
             if success:
-                self.stats['conversations_enregistrees'] += 1
-                logger.debug(f"📝 Conversation enregistrée (total: {self.stats['conversations_enregistrees']})")
+                self.stats.inc('conversations_enregistrees')
+                logger.debug("📝 Conversation enregistrée")  # Total: lecture des cellules, pas sur le chemin de requête
             else:
                 logger.warning("⚠️ Échec enregistrement conversation via API")
                 
         except Exception as e:
             logger.error(f"Erreur enregistrement conversation API: {e}")
     
+    @etape("reponse_defaut")
     def _reponse_par_defaut(self, message: str) -> str:
         """Réponses par défaut contextuelles pour le domaine du streaming"""
         message_lower = message.lower()
@@ -799,7 +983,15 @@ class ChatbotService:
         return "minimal"
     
     def test_api_connection(self) -> bool:
-        """Tester la connexion à l'API avec timeout approprié"""
+        """Connexion à l'API: dernier résultat de la sonde si elle est attachée, sinon test direct"""
+        if not self.config.USE_API:
+            return False
+        if self.sonde_api is not None:
+            return self.sonde_api.ok
+        return self.sonder_api()
+    
+    def sonder_api(self) -> bool:
+        """Tester la connexion à l'API avec timeout approprié (appel réseau)"""
         if not self.config.USE_API:
             return False
         
@@ -811,33 +1003,34 @@ class ChatbotService:
     
     def obtenir_statistiques(self) -> Dict[str, Any]:
         """Obtenir les statistiques complètes du service"""
+        stats = self.stats.instantane()
         temps_moyen = (
-            self.stats['temps_reponse_total'] / self.stats['messages_traites']
-            if self.stats['messages_traites'] > 0 else 0
+            stats['temps_reponse_total'] / stats['messages_traites']
+            if stats['messages_traites'] > 0 else 0
         )
         
         # Calcul du taux de précision des prédictions Keras
-        total_predictions = self.stats['predictions_precises'] + self.stats['predictions_incertaines']
+        total_predictions = stats['predictions_precises'] + stats['predictions_incertaines']
         taux_precision = (
-            self.stats['predictions_precises'] / total_predictions * 100
+            stats['predictions_precises'] / total_predictions * 100
             if total_predictions > 0 else 0
         )
         
         # Calcul du taux d'utilisation de l'API pendant le chargement
         taux_api_pendant_chargement = (
-            self.stats['api_used_during_loading'] / self.stats['requests_during_loading'] * 100
-            if self.stats['requests_during_loading'] > 0 else 0
+            stats['api_used_during_loading'] / stats['requests_during_loading'] * 100
+            if stats['requests_during_loading'] > 0 else 0
         )
         
         return {
-            'messages_traites': self.stats['messages_traites'],
+            'messages_traites': stats['messages_traites'],
             'temps_reponse_moyen': temps_moyen,
-            'api_success': self.stats['api_success'],
-            'api_failures': self.stats['api_failures'],
-            'keras_fallback_used': self.stats['keras_fallback_used'],
-            'keras_predictions_cached': self.stats['keras_predictions_cached'],
-            'predictions_precises': self.stats['predictions_precises'],
-            'predictions_incertaines': self.stats['predictions_incertaines'],
+            'api_success': stats['api_success'],
+            'api_failures': stats['api_failures'],
+            'keras_fallback_used': stats['keras_fallback_used'],
+            'keras_predictions_cached': stats['keras_predictions_cached'],
+            'predictions_precises': stats['predictions_precises'],
+            'predictions_incertaines': stats['predictions_incertaines'],
             'taux_precision_keras': round(taux_precision, 1),
             'conversations_cache': 0,  # Pas de cache local
             'mode_actuel': self.current_mode,
@@ -854,14 +1047,99 @@ class ChatbotService:
             
             # Nouvelles statistiques pour le chargement asynchrone
             'model_status': self.model_status.value,
-            'model_loading_time': self.stats['model_loading_time'],
-            'requests_during_loading': self.stats['requests_during_loading'],
-            'api_used_during_loading': self.stats['api_used_during_loading'],
+            'model_loading_time': stats['model_loading_time'],
+            'requests_during_loading': stats['requests_during_loading'],
+            'api_used_during_loading': stats['api_used_during_loading'],
             'taux_api_pendant_chargement': round(taux_api_pendant_chargement, 1),
             'chargement_asynchrone': True,
             'model_error_message': self.model_error_message
         }
     
+    def planifier_ajustement(self) -> bool:
+        """Lance l'ajustement incrémental (train.py --fine-tune) dans un processus séparé
+        
+        Un seul ajustement tourne à la fois; un feedback reçu pendant l'exécution
+        déclenche une nouvelle passe à la fin. Le bundle publié est ensuite rechargé.
+        Un bundle quantifié ne peut pas être ajusté: aucun processus n'est lancé.
+        """
+        if not getattr(self.config, 'FEEDBACK_FINETUNE', False):
+            return False
+        
+        quantification = self.etat.quantification
+        if quantification:
+            if not self._ajustement_impossible_signale:
+                self._ajustement_impossible_signale = True
+                logger.warning(
+                    f"⚠️ Bundle {self.model_version} quantifié ({quantification}) - "
+                    "ajustement incrémental désactivé jusqu'au prochain bundle float32"
+                )
+            return False
+        self._ajustement_impossible_signale = False
+        
+        with self._ajustement_lock:
+            if self._ajustement_en_cours:
+                self._ajustement_relance = True
+                return False
+            self._ajustement_en_cours = True
+        
+        threading.Thread(target=self._executer_ajustements, daemon=True, name="FineTune").start()
+        logger.info("🔧 Ajustement incrémental du modèle planifié")
+        return True
+    
+    def _executer_ajustements(self):
+        """Enchaîne les ajustements tant que de nouveaux feedbacks arrivent"""
+        while True:
+            debut = time.time()
+            try:
+                resultat = subprocess.run(
+                    [sys.executable, os.path.join(self.config.BASE_DIR, "train.py"), "--fine-tune"],
+                    cwd=self.config.BASE_DIR,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    errors='replace',
+                    timeout=getattr(self.config, 'FEEDBACK_FINETUNE_TIMEOUT', 600)
+                )
+                succes = resultat.returncode == 0
+                if not succes:
+                    # Les logs de train.py vont sur stderr: leur fin donne la cause de l'échec
+                    fin = "\n".join(resultat.stderr.strip().splitlines()[-self.LIGNES_ERREUR_AJUSTEMENT:])
+                    logger.error(f"❌ train.py --fine-tune a échoué (code {resultat.returncode}):\n{fin}")
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.error(f"❌ Ajustement incrémental interrompu: {e}")
+                succes = False
+            
+            self.stats['derniere_duree_ajustement'] = time.time() - debut
+            if succes:
+                self.stats.inc('ajustements_reussis')
+                self.recharger_bundle()
+            else:
+                self.stats.inc('ajustements_echoues')
+                logger.warning("⚠️ Ajustement incrémental échoué - modèle actuel conservé")
+            
+            with self._ajustement_lock:
+                if not self._ajustement_relance:
+                    self._ajustement_en_cours = False
+                    return
+                self._ajustement_relance = False
+    
+    def recharger_bundle(self) -> bool:
+        """Recharge le bundle s'il a changé de version (après un ajustement ou un entraînement)"""
+        bundle_path = getattr(self.config, 'MODEL_BUNDLE_PATH', None)
+        if not bundle_path or not os.path.exists(bundle_path):
+            return False
+        try:
+            if ModelBundle.lire_entete(bundle_path)['version'] == self.model_version:
+                return False
+            # Nouvel état avec un cache vide: les prédictions de l'ancien modèle disparaissent avec lui
+            self._charger_bundle(bundle_path)
+            self.model_status = ModelStatus.READY
+            logger.info(f"🔄 Modèle rechargé à chaud: bundle {self.model_version}")
+            return True
+        except BundleError as e:
+            logger.error(f"❌ Rechargement du bundle impossible: {e}")
+            return False
+    
     def vider_cache_predictions(self):
         """Vider le cache des prédictions"""
         self.prediction_cache.clear()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Évaluation hors-ligne vectorisée du modèle - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Toutes les questions sont encodées dans une seule matrice puis prédites par
+grands lots; matrice de confusion, précision et rappel par classe sont
+calculés en numpy, sans boucle Python par question ni appel réseau.
+"""
+
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+def predire_par_lots(predire: Callable[[np.ndarray], Any], entrees: np.ndarray, taille_lot: int = 1024) -> np.ndarray:
+    """Probabilités de toutes les lignes, calculées par lots de taille_lot"""
+    if len(entrees) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.concatenate([
+        np.asarray(predire(entrees[i:i + taille_lot]))
+        for i in range(0, len(entrees), taille_lot)
+    ])
+
+def matrice_confusion(cibles: np.ndarray, predictions: np.ndarray, nb_classes: int) -> np.ndarray:
+    """Matrice de confusion (lignes: classe attendue, colonnes: classe prédite)"""
+    cibles = np.asarray(cibles, dtype=np.int64)
+    predictions = np.asarray(predictions, dtype=np.int64)
+    return np.bincount(
+        cibles * nb_classes + predictions, minlength=nb_classes * nb_classes
+    ).reshape(nb_classes, nb_classes)
+
+def metriques_par_classe(matrice: np.ndarray) -> Dict[str, np.ndarray]:
+    """Précision, rappel, F1 et support de chaque classe (0 quand indéfini)"""
+    vrais_positifs = np.diag(matrice).astype(np.float64)
+    predits = matrice.sum(axis=0)
+    support = matrice.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predits > 0, vrais_positifs / predits, 0.0)
+        rappel = np.where(support > 0, vrais_positifs / support, 0.0)
+        f1 = np.where(precision + rappel > 0, 2 * precision * rappel / (precision + rappel), 0.0)
+    return {'precision': precision, 'rappel': rappel, 'f1': f1, 'support': support}
+
+def rapport_evaluation(matrice: np.ndarray, classes: List[str], nb_confusions: int = 10) -> Dict[str, Any]:
+    """Rapport complet: précision globale, moyennes macro, détail par classe et confusions principales"""
+    metriques = metriques_par_classe(matrice)
+    presentes = metriques['support'] > 0
+    total = int(matrice.sum())
+
+    hors_diagonale = matrice.copy()
+    np.fill_diagonal(hors_diagonale, 0)
+    plus_frequentes = np.argsort(hors_diagonale, axis=None)[::-1][:nb_confusions]
+    confusions = [
+        {'attendu': classes[i], 'predit': classes[j], 'nombre': int(hors_diagonale[i, j])}
+        for i, j in zip(*np.unravel_index(plus_frequentes, matrice.shape))
+        if hors_diagonale[i, j] > 0
+    ]
+
+    return {
+        'questions': total,
+        'classes_evaluees': int(presentes.sum()),
+        'precision_globale': round(float(np.trace(matrice) / total), 4) if total else 0.0,
+        'precision_macro': round(float(metriques['precision'][presentes].mean()), 4) if presentes.any() else 0.0,
+        'rappel_macro': round(float(metriques['rappel'][presentes].mean()), 4) if presentes.any() else 0.0,
+        'f1_macro': round(float(metriques['f1'][presentes].mean()), 4) if presentes.any() else 0.0,
+        'par_classe': [
+            {
+                'classe': classes[i],
+                'precision': round(float(metriques['precision'][i]), 4),
+                'rappel': round(float(metriques['rappel'][i]), 4),
+                'f1': round(float(metriques['f1'][i]), 4),
+                'support': int(metriques['support'][i])
+            }
+            for i in np.flatnonzero(presentes)
+        ],
+        'confusions_principales': confusions
+    }
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hachage des features (feature hashing) - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Alternative au vocabulaire (words.pkl): chaque lemme est projeté sur une
+colonne parmi un nombre fixe de buckets par CRC32. La largeur d'entrée du
+modèle ne dépend plus des données; l'inférence n'a besoin d'aucune table de
+vocabulaire. Le CRC32 est stable d'un processus à l'autre, contrairement à
+hash() (aléatoire par processus), ce qui garantit les mêmes colonnes à
+l'entraînement et au service.
+
+La pondération des occurrences (ponderer) est elle aussi partagée: le service
+applique celle enregistrée dans le bundle (preprocessing['ponderation']).
+"""
+
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+FONCTION_HACHAGE = "crc32"
+
+# (facteur par occurrence, plafond) des mots et des mots-clés du domaine
+PONDERATION_DEFAUT = {'mot': [0.6, 1.0], 'mot_cle': [0.8, 1.5]}
+
+def colonne_hachee(lemme: str, nb_buckets: int) -> int:
+    """Colonne d'un lemme dans l'espace haché"""
+    return zlib.crc32(lemme.encode('utf-8')) % nb_buckets
+
+def colonnes_hachees(lemmes: Iterable[str], nb_buckets: int) -> np.ndarray:
+    """Colonnes d'une liste de lemmes (une par lemme, dans l'ordre)"""
+    return np.fromiter((colonne_hachee(l, nb_buckets) for l in lemmes), dtype=np.int64)
+
+def statistiques_collisions(lemmes: Iterable[str], nb_buckets: int) -> Dict[str, Any]:
+    """Part des lemmes distincts qui partagent leur colonne avec au moins un autre"""
+    lemmes = sorted(set(lemmes))
+    occupation = np.bincount(colonnes_hachees(lemmes, nb_buckets), minlength=nb_buckets)
+    en_collision = int(occupation[occupation > 1].sum())
+    return {
+        'buckets': nb_buckets,
+        'lemmes': len(lemmes),
+        'buckets_occupes': int(np.count_nonzero(occupation)),
+        'lemmes_en_collision': en_collision,
+        'taux_collision': round(en_collision / len(lemmes), 4) if lemmes else 0.0
+    }
+
+def ponderer(
+    occurrences: np.ndarray,
+    est_mot_cle: np.ndarray,
+    ponderation: Optional[Dict[str, Any]] = None
+) -> np.ndarray:
+    """Poids de chaque colonne: min(plafond, facteur × occurrences), mots-clés à part"""
+    ponderation = ponderation or PONDERATION_DEFAUT
+    facteur_mot, plafond_mot = ponderation['mot']
+    facteur_cle, plafond_cle = ponderation['mot_cle']
+    occurrences = np.asarray(occurrences, dtype=np.float32)
+    return np.where(
+        est_mot_cle,
+        np.minimum(plafond_cle, occurrences * facteur_cle),
+        np.minimum(plafond_mot, occurrences * facteur_mot)
+    ).astype(np.float32)
@@ -14,6 +14,7 @@ from typing import Optional, List, Dict
 import logging
 import threading
 from .api_client import ApiClient
+from .metriques import Statistiques
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,9 @@ class FeedbackService:
     def __init__(self, config):
         self.config = config
         self.feedback_local_path = os.path.join(config.BASE_DIR, "data", "user_feedback.json")
+        # Corrections acceptées (API ou local), lues par train.py --fine-tune
+        self.corrections_path = os.path.join(config.BASE_DIR, "data", "feedback_corrections.jsonl")
+        self._corrections_lock = threading.Lock()
         
         # Initialiser le client API
         self.api_client = ApiClient(config)
@@ -31,13 +35,14 @@ class FeedbackService:
         os.makedirs(os.path.dirname(self.feedback_local_path), exist_ok=True)
         
         # Statistiques de debugging
-        self.stats = {
+        self.stats = Statistiques({
             'feedbacks_envoyes': 0,
             'feedbacks_success': 0,
             'feedbacks_failed': 0,
             'feedbacks_api_success': 0,
-            'feedbacks_local_fallback': 0
-        }
+            'feedbacks_local_fallback': 0,
+            'corrections_enregistrees': 0
+        })
         
         logger.info("✅ Service feedback initialisé avec API française")
         
@@ -49,8 +54,9 @@ class FeedbackService:
             # Essayer d'abord via l'API française
             success_api = self._soumettre_feedback_api(question, reponse_attendue, reponse_actuelle)
             if success_api:
-                self.stats['feedbacks_api_success'] += 1
-                self.stats['feedbacks_success'] += 1
+                self.stats.inc('feedbacks_api_success')
+                self.stats.inc('feedbacks_success')
+                self._enregistrer_correction(question, reponse_attendue)
                 logger.info("✅ Feedback envoyé avec succès via API française")
                 return True
             else:
@@ -58,24 +64,25 @@ class FeedbackService:
                 logger.warning("⚠️ API feedback indisponible, fallback vers stockage local")
                 success_local = self._sauvegarder_feedback_local(question, reponse_attendue, reponse_actuelle)
                 if success_local:
-                    self.stats['feedbacks_local_fallback'] += 1
-                    self.stats['feedbacks_success'] += 1
+                    self.stats.inc('feedbacks_local_fallback')
+                    self.stats.inc('feedbacks_success')
+                    self._enregistrer_correction(question, reponse_attendue)
                     logger.info("✅ Feedback sauvegardé localement (fallback)")
                     return True
                 else:
-                    self.stats['feedbacks_failed'] += 1
+                    self.stats.inc('feedbacks_failed')
                     return False
         except Exception as e:
             logger.error(f"Erreur soumission feedback: {e}")
-            self.stats['feedbacks_failed'] += 1
+            self.stats.inc('feedbacks_failed')
             return False
             
         except Exception as e:
             logger.error(f"Erreur lors de la soumission du feedback: {e}")
-            self.stats['feedbacks_failed'] += 1
+            self.stats.inc('feedbacks_failed')
             return False
         finally:
-            self.stats['feedbacks_envoyes'] += 1
+            self.stats.inc('feedbacks_envoyes')
     
     def _soumettre_feedback_api(self, question: str, reponse_attendue: str, reponse_actuelle: str) -> bool:
         """Soumettre le feedback via l'API française"""
@@ -120,6 +127,22 @@ class FeedbackService:
             logger.error(f"Erreur sauvegarde feedback local: {e}")
             return False
     
+    def _enregistrer_correction(self, question: str, reponse_attendue: str) -> bool:
+        """Ajoute la correction au journal JSONL utilisé pour l'ajustement incrémental du modèle"""
+        correction = {
+            'question': question,
+            'expected_response': reponse_attendue,
+            'date_creation': datetime.now().isoformat()
+        }
+        try:
+            with self._corrections_lock, open(self.corrections_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(correction, ensure_ascii=False) + "\n")
+            self.stats.inc('corrections_enregistrees')
+            return True
+        except Exception as e:
+            logger.error(f"Erreur enregistrement correction: {e}")
+            return False
+    
     def _charger_feedbacks_locaux(self) -> List[Dict]:
         """Charger les feedbacks stockés localement"""
         try:
@@ -152,7 +175,7 @@ class FeedbackService:
                     'api_erreur': total - local_seulement
                 },
                 'api_status': 'ERREUR_500',
-                'stats_envoi': self.stats,
+                'stats_envoi': self.stats.instantane(),
                 'message': 'Feedbacks stockés localement uniquement (API indisponible)'
             }
             
@@ -162,7 +185,7 @@ class FeedbackService:
                 'total_feedbacks': 0,
                 'mode': 'LOCAL_SEULEMENT',
                 'api_status': 'ERREUR_500',
-                'stats_envoi': self.stats,
+                'stats_envoi': self.stats.instantane(),
                 'message': 'Erreur de lecture des feedbacks locaux'
             }
     
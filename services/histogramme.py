@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Histogramme de latence log-linéaire - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Intervalles de largeur relative fixe (1 % par défaut) de 0,01 ms à 10 min:
+mémoire constante quel que soit le nombre de mesures, percentiles sans
+tri et correction optionnelle de l'omission coordonnée. Partagé par les
+traces des requêtes (services/tracing.py) et les outils de charge (tests/).
+"""
+
+import math
+import threading
+from typing import Any, Dict, Optional
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+class HistogrammeLatence:
+    """Histogramme log-linéaire des latences en ms (précision relative fixe), thread-safe"""
+
+    def __init__(self, min_ms: float = 0.01, max_ms: float = 600000.0, precision: float = 0.01):
+        self.min_ms = min_ms
+        self.facteur = math.log1p(precision)
+        self.comptes = [0] * (int(math.log(max_ms / min_ms) / self.facteur) + 2)
+        self.total = 0
+        self.somme = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+        self.lock = threading.Lock()
+
+    def _indice(self, valeur_ms: float) -> int:
+        if valeur_ms <= self.min_ms:
+            return 0
+        return min(int(math.log(valeur_ms / self.min_ms) / self.facteur) + 1, len(self.comptes) - 1)
+
+    def _borne(self, indice: int) -> float:
+        """Borne haute de l'intervalle (les percentiles ne sous-estiment jamais)"""
+        return self.min_ms * math.exp(self.facteur * indice)
+
+    def _ajouter(self, valeur_ms: float):
+        self.comptes[self._indice(valeur_ms)] += 1
+        self.total += 1
+        self.somme += valeur_ms
+        self.minimum = min(self.minimum, valeur_ms)
+        self.maximum = max(self.maximum, valeur_ms)
+
+    def enregistrer(self, valeur_ms: float, intervalle_attendu_ms: Optional[float] = None):
+        """Ajoute une latence; avec un intervalle attendu, ajoute aussi les requêtes
+        qui auraient dû partir pendant la réponse lente (latences décroissantes)"""
+        with self.lock:
+            self._ajouter(valeur_ms)
+            if intervalle_attendu_ms and intervalle_attendu_ms > 0:
+                manquante = valeur_ms - intervalle_attendu_ms
+                while manquante >= intervalle_attendu_ms:
+                    self._ajouter(manquante)
+                    manquante -= intervalle_attendu_ms
+
+    def percentile(self, p: float) -> float:
+        with self.lock:
+            if not self.total:
+                return 0.0
+            rang = max(1, math.ceil(self.total * p / 100))
+            cumul = 0
+            for indice, compte in enumerate(self.comptes):
+                cumul += compte
+                if cumul >= rang:
+                    return min(self._borne(indice), self.maximum)
+        return self.maximum
+
+    def resume(self, avec_intervalles: bool = True) -> Dict[str, Any]:
+        resume = {
+            'total': self.total,
+            'moyenne_ms': round(self.somme / self.total, 3) if self.total else 0.0,
+            'min_ms': round(self.minimum, 3) if self.total else 0.0,
+            'max_ms': round(self.maximum, 3),
+            'percentiles_ms': {f"p{p:g}": round(self.percentile(p), 3) for p in PERCENTILES}
+        }
+        if avec_intervalles:
+            with self.lock:
+                resume['histogramme'] = [
+                    [round(self._borne(i), 3), c] for i, c in enumerate(self.comptes) if c
+                ]
+        return resume
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comptabilité mémoire (GET /debug/memory) - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Pour attribuer une croissance du RSS sur de longues sessions de stream:
+- taille approximative de chaque magasin interne enregistré (cache de
+  prédictions, caches des réponses API, sessions, tampon de capture...),
+  parcours récursif des conteneurs, extrapolé au-delà de max_elements entrées;
+- RSS du processus, objets suivis par le ramasse-miettes (types les plus
+  nombreux) et threads vivants regroupés par nom (threads de feedback oubliés);
+- avec tracemalloc actif, les lignes dont les allocations ont le plus augmenté
+  depuis le rapport précédent (chaque rapport devient la nouvelle référence).
+
+tracemalloc ralentit toutes les allocations: il n'est démarré qu'à la demande.
+"""
+
+import os
+import re
+import gc
+import sys
+import threading
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CONTENEURS = (list, tuple, set, frozenset, deque)
+_ATOMES = (str, bytes, bytearray, int, float, bool, type(None))
+
+def rss_octets() -> Optional[int]:
+    """RSS du processus (/proc sous Linux, psutil sinon; None si indisponible)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+def _taille_profonde(racines: List[Any], vus: set, profondeur_max: int) -> int:
+    """Parcours itératif (pas de fermeture récursive: aucun cycle qui retiendrait vus)"""
+    total = 0
+    pile = [(racine, 0) for racine in racines]
+    while pile:
+        o, profondeur = pile.pop()
+        if id(o) in vus:
+            continue
+        vus.add(id(o))
+        nbytes = getattr(o, 'nbytes', None)  # Tableaux numpy
+        if isinstance(nbytes, int):
+            total += max(sys.getsizeof(o, 0), nbytes)
+            continue
+        total += sys.getsizeof(o, 0)
+        if profondeur >= profondeur_max or isinstance(o, _ATOMES):
+            continue
+        # Copies (atomiques sous le GIL): les magasins sont modifiés par les threads de requête
+        if isinstance(o, dict):
+            enfants = [e for paire in o.copy().items() for e in paire]
+        elif isinstance(o, _CONTENEURS):
+            enfants = list(o)
+        elif hasattr(o, '__dict__') and not isinstance(o, type):
+            enfants = [vars(o)]
+        else:
+            continue
+        pile.extend((e, profondeur + 1) for e in enfants)
+    return total
+
+def taille_approx(objet: Any, max_elements: int = 10000, profondeur_max: int = 8) -> int:
+    """Taille approximative en octets d'un objet et de son contenu
+
+    Au premier niveau, seules max_elements entrées sont mesurées et le total est
+    extrapolé; les objets partagés ne sont comptés qu'une fois.
+    """
+    if isinstance(objet, dict):
+        entrees = list(objet.copy().items())
+    elif isinstance(objet, _CONTENEURS):
+        entrees = list(objet)
+    else:
+        return _taille_profonde([objet], set(), profondeur_max)
+    if not entrees:
+        return sys.getsizeof(objet)
+    echantillon = entrees[:max_elements]
+    vus = {id(objet)}
+    racines = [e for paire in echantillon for e in paire] if isinstance(objet, dict) else echantillon
+    mesure = _taille_profonde(racines, vus, profondeur_max - 1 if profondeur_max else 0)
+    return sys.getsizeof(objet) + int(mesure * len(entrees) / len(echantillon))
+
+def _nombre_elements(objet: Any) -> Optional[int]:
+    try:
+        return len(objet)
+    except TypeError:
+        return None
+
+def mesure_poids_modele(model: Any) -> Dict[str, int]:
+    """Poids du modèle servi: taille réelle pour le réseau numpy (int8, float16),
+    float32 pour Keras (le graphe et les buffers TensorFlow n'apparaissent que dans le RSS)"""
+    if model is None:
+        return {'elements': 0, 'octets_approx': 0}
+    if hasattr(model, 'octets_poids'):
+        return {'elements': model.nombre_poids(), 'octets_approx': model.octets_poids()}
+    parametres = model.count_params()
+    return {'elements': parametres, 'octets_approx': parametres * 4}
+
+class ComptableMemoire:
+    """Rapport mémoire des magasins enregistrés et du processus"""
+
+    def __init__(self, max_elements: int = 10000):
+        self.max_elements = max_elements
+        self._magasins: Dict[str, Callable[[], Any]] = {}
+        self._mesures: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._reference: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def enregistrer(self, nom: str, fournisseur: Callable[[], Any]):
+        """Magasin mesuré par taille_approx (le fournisseur retourne l'objet courant)"""
+        self._magasins[nom] = fournisseur
+
+    def enregistrer_mesure(self, nom: str, mesure: Callable[[], Dict[str, Any]]):
+        """Magasin dont la taille est calculée par le fournisseur ({'elements', 'octets_approx'})"""
+        self._mesures[nom] = mesure
+
+    def demarrer_tracemalloc(self, frames: int = 10):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                logger.info(f"🧮 tracemalloc démarré ({frames} frames)")
+            self._reference = tracemalloc.take_snapshot()
+
+    def arreter_tracemalloc(self):
+        with self._lock:
+            self._reference = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+                logger.info("🧮 tracemalloc arrêté")
+
+    def magasins(self) -> Dict[str, Dict[str, Any]]:
+        resultat = {}
+        for nom, fournisseur in self._magasins.items():
+            try:
+                objet = fournisseur()
+                resultat[nom] = {
+                    'elements': _nombre_elements(objet),
+                    'octets_approx': taille_approx(objet, self.max_elements)
+                }
+            except Exception as e:
+                resultat[nom] = {'erreur': str(e)}
+        for nom, mesure in self._mesures.items():
+            try:
+                resultat[nom] = mesure()
+            except Exception as e:
+                resultat[nom] = {'erreur': str(e)}
+        return resultat
+
+    @staticmethod
+    def threads() -> Dict[str, int]:
+        """Threads vivants regroupés par nom (numéros remplacés par N)"""
+        return dict(Counter(re.sub(r'\d+', 'N', t.name) for t in threading.enumerate()).most_common())
+
+    @staticmethod
+    def objets_gc(top: int) -> Dict[str, Any]:
+        objets = gc.get_objects()
+        types = Counter(type(o).__name__ for o in objets)
+        return {
+            'suivis': len(objets),
+            'generations': list(gc.get_count()),
+            'types_plus_nombreux': dict(types.most_common(top))
+        }
+
+    def _diff_tracemalloc(self, top: int) -> Dict[str, Any]:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                return {'actif': False}
+            filtres = [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),  # Mesures du rapport lui-même
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ]
+            instantane = tracemalloc.take_snapshot().filter_traces(filtres)
+            reference, self._reference = self._reference, instantane
+        courant, pic = tracemalloc.get_traced_memory()
+        resultat = {'actif': True, 'trace_ko': round(courant / 1024, 1), 'pic_ko': round(pic / 1024, 1)}
+        if reference is not None:
+            resultat['plus_fortes_hausses'] = [
+                {
+                    'ligne': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'diff_ko': round(stat.size_diff / 1024, 1),
+                    'total_ko': round(stat.size / 1024, 1),
+                    'diff_blocs': stat.count_diff
+                }
+                for stat in instantane.compare_to(reference.filter_traces(filtres), 'lineno')[:top]
+            ]
+        return resultat
+
+    def rapport(self, top: int = 15) -> Dict[str, Any]:
+        """Magasins, processus, ramasse-miettes et différence tracemalloc depuis le rapport précédent"""
+        rss = rss_octets()
+        return {
+            'rss_mo': round(rss / 1024 ** 2, 1) if rss is not None else None,
+            'magasins': self.magasins(),
+            'threads': self.threads(),
+            'gc': self.objets_gc(top),
+            'tracemalloc': self._diff_tracemalloc(top)
+        }
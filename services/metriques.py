@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métriques au format d'exposition Prometheus - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Compteurs et histogrammes sans verrou sur le chemin de requête: chaque thread
+écrit uniquement dans sa propre cellule (un dictionnaire), la lecture (/metrics)
+additionne les cellules. Les cellules des threads terminés (werkzeug crée un
+thread par connexion) sont repliées dans une cellule commune, sous verrou, à
+la lecture ou quand elles deviennent trop nombreuses.
+
+Les jauges sont calculées à la lecture par une fonction (statut du modèle,
+sessions, file des feedbacks...).
+
+Les métriques sont déclarées au niveau module par le code qui les alimente et
+enregistrées dans le registre global REGISTRE, exposé par GET /metrics.
+
+Statistiques applique les mêmes cellules aux dictionnaires de statistiques des
+services (ChatbotService.stats, FeedbackService.stats...): stats.inc('cle')
+remplace stats['cle'] += 1, qui perd des mises à jour entre threads.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BORNES_LATENCE_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _CelluleLocale(threading.local):
+    cellule: Optional[Dict[Any, float]] = None
+
+class CellulesParThread:
+    """Valeurs additives réparties par thread: écriture sans verrou, lecture par somme"""
+
+    MAX_CELLULES = 256
+
+    def __init__(self):
+        self._local = _CelluleLocale()
+        self._cellules: List[Tuple[threading.Thread, Dict[Any, float]]] = []
+        self._repliee: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+
+    def cellule(self) -> Dict[Any, float]:
+        """Cellule du thread courant (créée au premier appel du thread)"""
+        cellule = self._local.cellule
+        if cellule is None:
+            cellule = self._local.cellule = {}
+            with self._lock:
+                self._cellules.append((threading.current_thread(), cellule))
+                if len(self._cellules) > self.MAX_CELLULES:
+                    self._replier()
+        return cellule
+
+    def ajouter(self, cle: Any, valeur: float = 1.0):
+        cellule = self.cellule()
+        cellule[cle] = cellule.get(cle, 0.0) + valeur
+
+    def _replier(self):
+        """Replie les cellules des threads terminés (appelé sous verrou)"""
+        vivantes = []
+        for thread, cellule in self._cellules:
+            if thread.is_alive():
+                vivantes.append((thread, cellule))
+            else:
+                for cle, valeur in cellule.copy().items():
+                    self._repliee[cle] = self._repliee.get(cle, 0.0) + valeur
+        self._cellules = vivantes
+
+    def valeurs(self) -> Dict[Any, float]:
+        """Somme de toutes les cellules"""
+        with self._lock:
+            self._replier()
+            total = dict(self._repliee)
+            cellules = [cellule for _, cellule in self._cellules]
+        for cellule in cellules:
+            for cle, valeur in cellule.copy().items():  # copy(): atomique sous le GIL
+                total[cle] = total.get(cle, 0.0) + valeur
+        return total
+
+    def reinitialiser(self):
+        with self._lock:
+            self._repliee = {}
+            for _, cellule in self._cellules:
+                cellule.clear()
+
+def _format_valeur(valeur: float) -> str:
+    if math.isinf(valeur):
+        return "+Inf" if valeur > 0 else "-Inf"
+    return repr(float(valeur)) if valeur != int(valeur) else str(int(valeur))
+
+def _echapper(valeur: Any) -> str:
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_etiquettes(noms: Tuple[str, ...], valeurs: Tuple[Any, ...], extra: str = "") -> str:
+    paires = [f'{nom}="{_echapper(valeur)}"' for nom, valeur in zip(noms, valeurs)]
+    if extra:
+        paires.append(extra)
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+class Compteur:
+    """Compteur monotone, avec étiquettes optionnelles (valeurs positionnelles)"""
+
+    type_prometheus = "counter"
+
+    def __init__(self, nom: str, aide: str, etiquettes: Tuple[str, ...] = ()):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self._cellules = CellulesParThread()
+
+    def inc(self, *valeurs_etiquettes: Any, n: float = 1.0):
+        self._cellules.ajouter(valeurs_etiquettes, n)
+
+    def valeur(self, *valeurs_etiquettes: Any) -> float:
+        return self._cellules.valeurs().get(valeurs_etiquettes, 0.0)
+
+    def valeurs(self) -> Dict[Tuple[Any, ...], float]:
+        return self._cellules.valeurs()
+
+    def echantillons(self) -> List[str]:
+        return [
+            f"{self.nom}{_format_etiquettes(self.etiquettes, cle)} {_format_valeur(v)}"
+            for cle, v in sorted(self.valeurs().items(), key=lambda e: tuple(map(str, e[0])))
+        ]
+
+class Histogramme:
+    """Histogramme à bornes fixes (seaux cumulés, somme et nombre à la lecture)"""
+
+    type_prometheus = "histogram"
+
+    def __init__(self, nom: str, aide: str, bornes: Tuple[float, ...] = BORNES_LATENCE_S,
+                 etiquettes: Tuple[str, ...] = ()):
+        self.nom = nom
+        self.aide = aide
+        self.bornes = tuple(sorted(bornes))
+        self.etiquettes = tuple(etiquettes)
+        self._cellules = CellulesParThread()
+
+    def observer(self, valeur: float, *valeurs_etiquettes: Any):
+        cellule = self._cellules.cellule()
+        cle_seau = (valeurs_etiquettes, bisect_left(self.bornes, valeur))
+        cellule[cle_seau] = cellule.get(cle_seau, 0.0) + 1
+        cle_somme = (valeurs_etiquettes, 'somme')
+        cellule[cle_somme] = cellule.get(cle_somme, 0.0) + valeur
+
+    def par_etiquettes(self) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
+        """{valeurs d'étiquettes: {'seaux': effectifs par borne puis +Inf, 'nombre', 'somme'}}"""
+        brutes: Dict[Tuple[Any, ...], Dict[Any, float]] = {}
+        for (etiquettes, cle), valeur in self._cellules.valeurs().items():
+            brutes.setdefault(etiquettes, {})[cle] = valeur
+        resultat = {}
+        for etiquettes, valeurs in brutes.items():
+            seaux = [int(valeurs.get(i, 0)) for i in range(len(self.bornes) + 1)]
+            resultat[etiquettes] = {'seaux': seaux, 'nombre': sum(seaux), 'somme': valeurs.get('somme', 0.0)}
+        return resultat
+
+    def echantillons(self) -> List[str]:
+        par_etiquettes = self.par_etiquettes()
+        lignes = []
+        for etiquettes in sorted(par_etiquettes, key=lambda e: tuple(map(str, e))):
+            resume = par_etiquettes[etiquettes]
+            cumul = 0
+            for effectif, borne in zip(resume['seaux'], self.bornes + (math.inf,)):
+                cumul += effectif
+                le = f'le="{_format_valeur(borne)}"'
+                lignes.append(f"{self.nom}_bucket{_format_etiquettes(self.etiquettes, etiquettes, le)} {cumul}")
+            lignes.append(f"{self.nom}_sum{_format_etiquettes(self.etiquettes, etiquettes)} {_format_valeur(resume['somme'])}")
+            lignes.append(f"{self.nom}_count{_format_etiquettes(self.etiquettes, etiquettes)} {resume['nombre']}")
+        return lignes
+
+class Jauge:
+    """Valeur instantanée calculée à la lecture: nombre, ou {valeurs d'étiquettes: nombre}"""
+
+    type_prometheus = "gauge"
+
+    def __init__(self, nom: str, aide: str, fonction: Callable[[], Any], etiquettes: Tuple[str, ...] = ()):
+        self.nom = nom
+        self.aide = aide
+        self.fonction = fonction
+        self.etiquettes = tuple(etiquettes)
+
+    def echantillons(self) -> List[str]:
+        valeur = self.fonction()
+        if valeur is None:
+            return []
+        if not isinstance(valeur, dict):
+            return [f"{self.nom} {_format_valeur(float(valeur))}"]
+        return [
+            f"{self.nom}{_format_etiquettes(self.etiquettes, cle if isinstance(cle, tuple) else (cle,))} {_format_valeur(float(v))}"
+            for cle, v in valeur.items()
+        ]
+
+class Statistiques(Mapping):
+    """Statistiques d'un service: compteurs répartis par thread (inc) et valeurs simples (affectation)
+
+    La lecture (stats['cle'], dict(stats)) additionne les cellules; un compteur garde
+    le type de sa valeur initiale (int ou float). L'ensemble des compteurs est fixé à
+    la création: une clé inconnue lève KeyError au lieu de créer une entrée.
+    """
+
+    def __init__(self, compteurs: Dict[str, float], valeurs: Optional[Dict[str, Any]] = None):
+        self._initiales = dict(compteurs)
+        self._cellules = CellulesParThread()
+        self._valeurs = dict(valeurs or {})
+
+    def inc(self, cle: str, n: float = 1):
+        if cle not in self._initiales:
+            raise KeyError(f"Compteur inconnu: {cle}")
+        self._cellules.ajouter(cle, n)
+
+    def __getitem__(self, cle: str) -> Any:
+        if cle in self._initiales:
+            initiale = self._initiales[cle]
+            return type(initiale)(initiale + self._cellules.valeurs().get(cle, 0))
+        return self._valeurs[cle]
+
+    def __setitem__(self, cle: str, valeur: Any):
+        if cle in self._initiales:
+            raise TypeError(f"{cle} est un compteur: utiliser inc() (+= perd des mises à jour entre threads)")
+        self._valeurs[cle] = valeur
+
+    def __iter__(self):
+        return iter(list(self._initiales) + [cle for cle in self._valeurs if cle not in self._initiales])
+
+    def __len__(self) -> int:
+        return len(self._initiales) + len(self._valeurs)
+
+    def instantane(self) -> Dict[str, Any]:
+        """Toutes les valeurs, cellules additionnées une seule fois"""
+        totaux = self._cellules.valeurs()
+        resultat = {cle: type(v)(v + totaux.get(cle, 0)) for cle, v in self._initiales.items()}
+        resultat.update(self._valeurs)
+        return resultat
+
+    def reinitialiser(self):
+        self._cellules.reinitialiser()
+
+class Registre:
+    """Ensemble des métriques exposées par /metrics"""
+
+    def __init__(self):
+        self._metriques: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def enregistrer(self, metrique):
+        """Ajoute une métrique (une jauge déjà déclarée est remplacée: nouvelle instance de l'application)"""
+        with self._lock:
+            existante = self._metriques.get(metrique.nom)
+            if existante is not None and not isinstance(metrique, Jauge):
+                return existante
+            self._metriques[metrique.nom] = metrique
+        return metrique
+
+    def compteur(self, nom: str, aide: str, etiquettes: Tuple[str, ...] = ()) -> Compteur:
+        return self.enregistrer(Compteur(nom, aide, etiquettes))
+
+    def histogramme(self, nom: str, aide: str, bornes: Tuple[float, ...] = BORNES_LATENCE_S,
+                    etiquettes: Tuple[str, ...] = ()) -> Histogramme:
+        return self.enregistrer(Histogramme(nom, aide, bornes, etiquettes))
+
+    def jauge(self, nom: str, aide: str, fonction: Callable[[], Any], etiquettes: Tuple[str, ...] = ()) -> Jauge:
+        return self.enregistrer(Jauge(nom, aide, fonction, etiquettes))
+
+    def exposition(self) -> str:
+        """Texte au format d'exposition Prometheus 0.0.4"""
+        with self._lock:
+            metriques = list(self._metriques.values())
+        lignes = []
+        for metrique in metriques:
+            try:
+                echantillons = metrique.echantillons()
+            except Exception as e:  # Une jauge en erreur ne doit pas masquer les autres
+                lignes.append(f"# {metrique.nom} indisponible: {e}")
+                continue
+            lignes.append(f"# HELP {metrique.nom} {metrique.aide}")
+            lignes.append(f"# TYPE {metrique.nom} {metrique.type_prometheus}")
+            lignes.extend(echantillons)
+        return "\n".join(lignes) + "\n"
+
+REGISTRE = Registre()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
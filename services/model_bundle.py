@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bundle de modèle versionné - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Un seul fichier .npz remplace chatbot_model.keras, words.pkl, classes.pkl et
+training_patterns.pkl: poids du réseau, architecture, vocabulaire, classes,
+table des réponses et configuration du prétraitement, protégés par une somme
+de contrôle SHA-256. L'écriture est atomique (fichier temporaire puis rename)
+et la lecture se fait en une passe, sans pickle.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Version du format de fichier (pas du modèle)
+BUNDLE_FORMAT_VERSION = 1
+
+BUNDLE_FILENAME = "chatbot_bundle.npz"
+
+# Erreurs d'un fichier absent, tronqué ou altéré (np.load lit une archive zip)
+ERREURS_LECTURE = (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile)
+
+class BundleError(Exception):
+    """Bundle illisible, incomplet ou corrompu"""
+    pass
+
+@dataclass
+class ModelBundle:
+    """Modèle entraîné et tout ce qu'il faut pour le servir"""
+    version: str
+    words: List[str]
+    classes: List[str]
+    responses: Dict[str, List[str]]
+    architecture: str
+    weights: List[np.ndarray]
+    preprocessing: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    quantization: Dict[str, Any] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    checksum: str = ""
+
+    @classmethod
+    def depuis_modele(
+        cls,
+        model,
+        words: List[str],
+        classes: List[str],
+        responses: Dict[str, List[str]],
+        version: str,
+        preprocessing: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "ModelBundle":
+        """Crée un bundle à partir d'un modèle Keras entraîné"""
+        return cls(
+            version=version,
+            words=list(words),
+            classes=list(classes),
+            responses={tag: list(r) for tag, r in responses.items()},
+            architecture=model.to_json(),
+            weights=[np.asarray(w) for w in model.get_weights()],
+            preprocessing=dict(preprocessing or {}),
+            metadata=dict(metadata or {})
+        )
+
+    def construire_modele(self):
+        """Reconstruit le modèle pour l'inférence (Keras en float32, numpy si quantifié)"""
+        if self.quantization:
+            from .quantization import ReseauNumpy
+            return ReseauNumpy(self)
+
+        from tensorflow.keras.models import model_from_json
+
+        model = model_from_json(self.architecture)
+        model.set_weights(self.weights)
+        return model
+
+    def _manifeste(self) -> Dict[str, Any]:
+        """Partie JSON du bundle (tout sauf les poids)"""
+        return {
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'version': self.version,
+            'created_at': self.created_at,
+            'words': self.words,
+            'classes': self.classes,
+            'responses': self.responses,
+            'architecture': self.architecture,
+            'preprocessing': self.preprocessing,
+            'metadata': self.metadata,
+            'quantization': self.quantization,
+            'weights': [{'dtype': str(w.dtype), 'shape': list(w.shape)} for w in self.weights]
+        }
+
+    def calculer_checksum(self) -> str:
+        """SHA-256 du manifeste canonique et des octets de chaque tableau de poids"""
+        empreinte = hashlib.sha256()
+        empreinte.update(json.dumps(self._manifeste(), sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        for poids in self.weights:
+            empreinte.update(np.ascontiguousarray(poids).tobytes())
+        return empreinte.hexdigest()
+
+    def sauvegarder(self, path: str) -> str:
+        """Écrit le bundle de manière atomique et retourne sa somme de contrôle"""
+        self.checksum = self.calculer_checksum()
+        manifeste = dict(self._manifeste(), checksum=self.checksum)
+        tableaux = {f"poids_{i:03d}": w for i, w in enumerate(self.weights)}
+
+        dossier = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dossier, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".bundle_", suffix=".tmp", dir=dossier)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, manifest=np.array(json.dumps(manifeste, ensure_ascii=False)), **tableaux)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        logger.info(f"📦 Bundle {self.version} écrit: {os.path.basename(path)} ({self.checksum[:12]})")
+        return self.checksum
+
+    @classmethod
+    def charger(cls, path: str, verifier: bool = True) -> "ModelBundle":
+        """Charge le bundle en une passe et vérifie sa somme de contrôle"""
+        try:
+            with np.load(path, allow_pickle=False) as contenu:
+                manifeste = json.loads(str(contenu['manifest']))
+                weights = [contenu[f"poids_{i:03d}"] for i in range(len(manifeste['weights']))]
+        except ERREURS_LECTURE as e:
+            raise BundleError(f"Bundle illisible ({path}): {e}") from e
+
+        if manifeste.get('format_version') != BUNDLE_FORMAT_VERSION:
+            raise BundleError(f"Format de bundle non supporté: {manifeste.get('format_version')}")
+
+        bundle = cls(
+            version=manifeste['version'],
+            words=manifeste['words'],
+            classes=manifeste['classes'],
+            responses=manifeste['responses'],
+            architecture=manifeste['architecture'],
+            weights=weights,
+            preprocessing=manifeste.get('preprocessing', {}),
+            metadata=manifeste.get('metadata', {}),
+            quantization=manifeste.get('quantization', {}),
+            created_at=manifeste.get('created_at', ''),
+            checksum=manifeste.get('checksum', '')
+        )
+
+        if verifier and bundle.calculer_checksum() != bundle.checksum:
+            raise BundleError(f"Somme de contrôle invalide pour le bundle {bundle.version}")
+
+        return bundle
+
+    @staticmethod
+    def lire_entete(path: str) -> Dict[str, Any]:
+        """Lit uniquement le manifeste (version, métadonnées) sans charger les poids"""
+        try:
+            with np.load(path, allow_pickle=False) as contenu:
+                manifeste = json.loads(str(contenu['manifest']))
+        except ERREURS_LECTURE as e:
+            raise BundleError(f"Bundle illisible ({path}): {e}") from e
+
+        for cle in ('words', 'responses', 'architecture'):
+            manifeste.pop(cle, None)
+        return manifeste
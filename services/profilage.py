@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profilage à la demande - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Deux usages, réservés à l'administrateur (clé PROFILAGE_CLE_ADMIN):
+- une requête isolée, avec l'en-tête X-Profile: "cprofile" (profil déterministe
+  .prof, lisible avec pstats ou snakeviz) ou "sampling" (échantillons de la pile
+  du seul thread de la requête, .collapsed);
+- tout le processus pendant une durée bornée (POST /debug/profile): échantillons
+  de la pile de chaque thread au format "piles repliées" (une ligne
+  "racine;appelant;appelé nombre"), compatible flamegraph.pl et speedscope.
+
+Les fichiers sont écrits dans profiles/; seuls les plus récents sont conservés.
+Sans clé configurée, le profileur n'est pas créé: aucun coût par requête.
+"""
+
+import os
+import re
+import sys
+import hmac
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODES_REQUETE = ("cprofile", "sampling")
+EXTENSIONS = (".prof", ".collapsed")
+NOM_INVALIDE = re.compile(r'[^\w.-]+')
+
+def verifier_cle_admin(fournie: Optional[str], attendue: Optional[str]) -> bool:
+    """Comparaison en temps constant (False si aucune clé n'est configurée)"""
+    if not fournie or not attendue:
+        return False
+    return hmac.compare_digest(fournie.encode('utf-8'), attendue.encode('utf-8'))
+
+class EchantillonneurPiles:
+    """Relève périodiquement la pile des threads et compte les piles identiques"""
+
+    def __init__(self, intervalle_s: float = 0.005, thread_id: Optional[int] = None):
+        self.intervalle_s = intervalle_s
+        self.thread_id = thread_id  # None: tous les threads (nom du thread en racine)
+        self.piles: Counter = Counter()
+        self.echantillons = 0
+        self._libelles: Dict[object, str] = {}
+        self._arret = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _libelle(self, code) -> str:
+        libelle = self._libelles.get(code)
+        if libelle is None:
+            libelle = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._libelles[code] = libelle
+        return libelle
+
+    def _pile(self, frame) -> List[str]:
+        pile = []
+        while frame is not None:
+            pile.append(self._libelle(frame.f_code))
+            frame = frame.f_back
+        pile.reverse()
+        return pile
+
+    def _relever(self):
+        moi = threading.get_ident()
+        frames = sys._current_frames()
+        if self.thread_id is not None:
+            frame = frames.get(self.thread_id)
+            if frame is not None:
+                self.piles[";".join(self._pile(frame))] += 1
+        else:
+            noms = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident != moi:
+                    self.piles[";".join([noms.get(ident, str(ident))] + self._pile(frame))] += 1
+        self.echantillons += 1
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle_s):
+            self._relever()
+
+    def demarrer(self) -> "EchantillonneurPiles":
+        self._thread = threading.Thread(target=self._boucle, daemon=True, name="EchantillonneurPiles")
+        self._thread.start()
+        return self
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def piles_repliees(self) -> str:
+        return "".join(f"{pile} {nombre}\n" for pile, nombre in self.piles.most_common())
+
+class ProfilRequete:
+    """Profil en cours d'une requête (à terminer dans le même thread)"""
+
+    def __init__(self, profileur: "ProfileurRequetes", mode: str, nom: str):
+        self.profileur = profileur
+        self.mode = mode
+        self.nom = nom
+        self.debut = time.perf_counter()
+        if mode == "cprofile":
+            self._outil = cProfile.Profile()
+            self._outil.enable()
+        else:
+            self._outil = EchantillonneurPiles(profileur.intervalle_s, threading.get_ident()).demarrer()
+
+    def terminer(self) -> str:
+        """Arrête le profil, l'écrit dans le dossier et retourne le nom du fichier"""
+        duree_ms = (time.perf_counter() - self.debut) * 1000
+        if self.mode == "cprofile":
+            self._outil.disable()
+            fichier = self.profileur.chemin(self.nom, ".prof")
+            pstats.Stats(self._outil).dump_stats(fichier)
+        else:
+            self._outil.arreter()
+            fichier = self.profileur.chemin(self.nom, ".collapsed")
+            self.profileur.ecrire(fichier, self._outil.piles_repliees())
+        self.profileur.appliquer_retention()
+        logger.info(f"🔬 Profil {self.mode} ({duree_ms:.0f} ms): {os.path.basename(fichier)}")
+        return os.path.basename(fichier)
+
+class ProfileurRequetes:
+    """Profils de requêtes et échantillonnage du processus, écrits dans un dossier à rétention bornée"""
+
+    def __init__(self, dossier: str, retention: int = 50, duree_max_s: int = 30, intervalle_s: float = 0.005):
+        self.dossier = dossier
+        self.retention = retention
+        self.duree_max_s = duree_max_s
+        self.intervalle_s = intervalle_s
+        self._processus_lock = threading.Lock()
+
+    def chemin(self, nom: str, extension: str) -> str:
+        os.makedirs(self.dossier, exist_ok=True)
+        horodatage = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        return os.path.join(self.dossier, f"{horodatage}_{nom}{extension}")
+
+    @staticmethod
+    def ecrire(fichier: str, contenu: str):
+        with open(fichier, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+
+    def profils(self) -> List[str]:
+        """Fichiers de profil, du plus ancien au plus récent"""
+        if not os.path.isdir(self.dossier):
+            return []
+        fichiers = [
+            os.path.join(self.dossier, f) for f in os.listdir(self.dossier) if f.endswith(EXTENSIONS)
+        ]
+        return sorted(fichiers, key=lambda f: (os.path.getmtime(f), f))
+
+    def appliquer_retention(self):
+        """Supprime les profils les plus anciens au-delà de la rétention"""
+        fichiers = self.profils()
+        for fichier in fichiers[:max(0, len(fichiers) - self.retention)]:
+            try:
+                os.remove(fichier)
+            except OSError:
+                pass
+
+    def demarrer_requete(self, mode: str, route: str) -> Optional[ProfilRequete]:
+        """Démarre le profil de la requête courante (None si le mode est inconnu ou cProfile indisponible)"""
+        if mode not in MODES_REQUETE:
+            return None
+        nom = f"{NOM_INVALIDE.sub('_', route.strip('/')) or 'racine'}_{mode}"
+        try:
+            return ProfilRequete(self, mode, nom)
+        except ValueError as e:  # cProfile: un autre outil de profilage est déjà actif
+            logger.warning(f"⚠️ Profilage impossible: {e}")
+            return None
+
+    def echantillonner_processus(self, duree_s: float, intervalle_s: Optional[float] = None) -> Optional[Dict]:
+        """Échantillonne tous les threads pendant duree_s (bornée); None si un échantillonnage est en cours"""
+        if not self._processus_lock.acquire(blocking=False):
+            return None
+        try:
+            duree_s = min(max(duree_s, 0.1), self.duree_max_s)
+            echantillonneur = EchantillonneurPiles(intervalle_s or self.intervalle_s).demarrer()
+            time.sleep(duree_s)
+            echantillonneur.arreter()
+            fichier = self.chemin("processus", ".collapsed")
+            piles = echantillonneur.piles_repliees()
+            self.ecrire(fichier, piles)
+            self.appliquer_retention()
+            logger.info(f"🔬 Échantillonnage du processus ({duree_s:.1f}s, {echantillonneur.echantillons} relevés): "
+                        f"{os.path.basename(fichier)}")
+            return {'fichier': os.path.basename(fichier), 'echantillons': echantillonneur.echantillons, 'piles': piles}
+        finally:
+            self._processus_lock.release()
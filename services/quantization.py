@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Quantification post-entraînement du modèle de fallback - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Les noyaux des couches Dense sont exportés en int8 (échelle par canal de
+sortie, symétrique) ou en float16; biais et BatchNormalization restent en
+float32. L'inférence se fait en numpy, sans TensorFlow:
+- première couche: seules les lignes du noyau correspondant aux mots présents
+  dans le bag-of-words sont déquantifiées (entrée très creuse)
+- couches suivantes: noyaux déquantifiés une fois au chargement (leur taille
+  ne dépend pas du vocabulaire)
+"""
+
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .model_bundle import ModelBundle
+
+logger = logging.getLogger(__name__)
+
+MODES_QUANTIFICATION = ("int8", "float16")
+
+def _couches_sequentielles(architecture: str) -> List[Dict[str, Any]]:
+    """Couches du modèle Sequential avec les indices de leurs poids dans get_weights()"""
+    config = json.loads(architecture)
+    if config.get('class_name') != 'Sequential':
+        raise ValueError(f"Architecture non supportée: {config.get('class_name')}")
+
+    couches = []
+    indice = 0
+    for couche in config['config']['layers']:
+        type_couche, cfg = couche['class_name'], couche['config']
+        if type_couche == 'Dense':
+            nb_poids = 2 if cfg.get('use_bias', True) else 1
+        elif type_couche == 'BatchNormalization':
+            nb_poids = int(cfg.get('scale', True)) + int(cfg.get('center', True)) + 2
+        elif type_couche in ('InputLayer', 'Dropout'):
+            nb_poids = 0
+        else:
+            raise ValueError(f"Couche non supportée pour l'inférence numpy: {type_couche}")
+        couches.append({'type': type_couche, 'config': cfg, 'poids': list(range(indice, indice + nb_poids))})
+        indice += nb_poids
+    return couches
+
+def quantifier_noyau_int8(noyau: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantification symétrique int8 avec une échelle par canal de sortie (colonne)"""
+    echelles = np.abs(noyau).max(axis=0) / 127.0
+    echelles[echelles == 0] = 1.0
+    quantifie = np.clip(np.rint(noyau / echelles), -127, 127).astype(np.int8)
+    return quantifie, echelles.astype(np.float32)
+
+def quantifier_bundle(bundle: ModelBundle, mode: str = "int8") -> ModelBundle:
+    """Exporte un bundle float32 en bundle quantifié (int8 + échelles, ou float16)"""
+    if mode not in MODES_QUANTIFICATION:
+        raise ValueError(f"Mode de quantification inconnu: {mode}")
+    if bundle.quantization:
+        raise ValueError(f"Bundle {bundle.version} déjà quantifié ({bundle.quantization['mode']})")
+
+    weights = [np.asarray(w) for w in bundle.weights]
+    echelles = {}
+    for couche in _couches_sequentielles(bundle.architecture):
+        if couche['type'] != 'Dense':
+            continue
+        i = couche['poids'][0]
+        if mode == "int8":
+            weights[i], echelle = quantifier_noyau_int8(weights[i])
+            echelles[str(i)] = len(weights)
+            weights.append(echelle)
+        else:
+            weights[i] = weights[i].astype(np.float16)
+
+    return ModelBundle(
+        version=f"{bundle.version}-{mode}",
+        words=bundle.words,
+        classes=bundle.classes,
+        responses=bundle.responses,
+        architecture=bundle.architecture,
+        weights=weights,
+        preprocessing=bundle.preprocessing,
+        metadata=dict(bundle.metadata, source_version=bundle.version),
+        quantization={'mode': mode, 'echelles': echelles}
+    )
+
+class ReseauNumpy:
+    """Inférence numpy d'un bundle (quantifié ou float32), interface compatible predict()"""
+
+    def __init__(self, bundle: ModelBundle):
+        self.quantization = bundle.quantization.get('mode') if bundle.quantization else None
+        echelles = bundle.quantization.get('echelles', {}) if bundle.quantization else {}
+        self.etapes = []
+
+        premiere_dense = True
+        for couche in _couches_sequentielles(bundle.architecture):
+            cfg, poids = couche['config'], [bundle.weights[i] for i in couche['poids']]
+
+            if couche['type'] == 'Dense':
+                noyau = poids[0]
+                echelle = bundle.weights[echelles[str(couche['poids'][0])]] if str(couche['poids'][0]) in echelles else None
+                biais = poids[1].astype(np.float32) if len(poids) > 1 else np.zeros(noyau.shape[1], dtype=np.float32)
+                if not premiere_dense:
+                    # Couches cachées: déquantification unique au chargement
+                    noyau = noyau.astype(np.float32) * (echelle if echelle is not None else 1.0)
+                    echelle = None
+                self.etapes.append(('dense', noyau, echelle, biais, cfg.get('activation', 'linear')))
+                premiere_dense = False
+
+            elif couche['type'] == 'BatchNormalization':
+                poids = list(poids)
+                gamma = poids.pop(0) if cfg.get('scale', True) else 1.0
+                beta = poids.pop(0) if cfg.get('center', True) else 0.0
+                moyenne, variance = poids
+                facteur = (gamma / np.sqrt(variance + cfg.get('epsilon', 1e-3))).astype(np.float32)
+                decalage = (beta - moyenne * facteur).astype(np.float32)
+                self.etapes.append(('affine', facteur, decalage))
+
+    @staticmethod
+    def _activation(x: np.ndarray, activation: str) -> np.ndarray:
+        if activation == 'relu':
+            return np.maximum(x, 0.0)
+        if activation == 'softmax':
+            x = np.exp(x - x.max(axis=-1, keepdims=True))
+            return x / x.sum(axis=-1, keepdims=True)
+        if activation == 'linear':
+            return x
+        raise ValueError(f"Activation non supportée: {activation}")
+
+    def _premiere_couche(self, x: np.ndarray, noyau: np.ndarray, echelle: Optional[np.ndarray]) -> np.ndarray:
+        """x @ noyau en ne déquantifiant que les lignes des entrées non nulles"""
+        sortie = np.empty((x.shape[0], noyau.shape[1]), dtype=np.float32)
+        for r in range(x.shape[0]):
+            actifs = np.flatnonzero(x[r])
+            sortie[r] = x[r, actifs] @ noyau[actifs].astype(np.float32)
+        if echelle is not None:
+            sortie *= echelle
+        return sortie
+
+    def predict(self, x: np.ndarray, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        """Probabilités par classe (mêmes entrées/sorties que Keras Model.predict)"""
+        x = np.asarray(x, dtype=np.float32)
+        premiere = True
+        for etape in self.etapes:
+            if etape[0] == 'dense':
+                _, noyau, echelle, biais, activation = etape
+                if premiere:
+                    x = self._premiere_couche(x, noyau, echelle)
+                    premiere = False
+                else:
+                    x = x @ noyau
+                x = self._activation(x + biais, activation)
+            else:
+                _, facteur, decalage = etape
+                x = x * facteur + decalage
+        return x
+
+    def octets_poids(self) -> int:
+        """Mémoire occupée par les poids en inférence"""
+        return sum(
+            a.nbytes for etape in self.etapes for a in etape[1:]
+            if isinstance(a, np.ndarray)
+        )
+
+    def nombre_poids(self) -> int:
+        """Nombre de valeurs des poids en inférence (échelles et BatchNormalization repliée comprises)"""
+        return sum(
+            a.size for etape in self.etapes for a in etape[1:]
+            if isinstance(a, np.ndarray)
+        )
+
+def mesurer_latence_ms(predire, entrees: np.ndarray) -> Dict[str, float]:
+    """Latence d'une requête unique (une ligne à la fois), en millisecondes"""
+    predire(entrees[:1])  # Préchauffage
+    durees = []
+    for ligne in entrees:
+        debut = time.perf_counter()
+        predire(ligne[np.newaxis, :])
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees = np.array(durees)
+    return {
+        'p50_ms': round(float(np.percentile(durees, 50)), 4),
+        'p95_ms': round(float(np.percentile(durees, 95)), 4),
+        'p99_ms': round(float(np.percentile(durees, 99)), 4)
+    }
+
+def rapport_quantification(
+    bundle_float32: ModelBundle,
+    bundle_quantifie: ModelBundle,
+    train_x: np.ndarray,
+    train_y: np.ndarray,
+    nb_requetes_latence: int = 200
+) -> Dict[str, Any]:
+    """Compare précision, mémoire et latence du modèle quantifié au float32 sur les patterns d'entraînement"""
+    reference = bundle_float32.construire_modele()
+    reference_numpy = ReseauNumpy(bundle_float32)
+    quantifie = ReseauNumpy(bundle_quantifie)
+    cibles = train_y.argmax(axis=1)
+
+    probas_ref = reference.predict(train_x, verbose=0)
+    probas_q = quantifie.predict(train_x)
+    pred_ref, pred_q = probas_ref.argmax(axis=1), probas_q.argmax(axis=1)
+
+    echantillon = train_x[:nb_requetes_latence]
+    rapport = {
+        'mode': bundle_quantifie.quantization['mode'],
+        'version': bundle_quantifie.version,
+        'patterns': int(train_x.shape[0]),
+        'precision_float32': round(float((pred_ref == cibles).mean()), 4),
+        'precision_quantifiee': round(float((pred_q == cibles).mean()), 4),
+        'accord_predictions': round(float((pred_ref == pred_q).mean()), 4),
+        'ecart_max_probabilite': round(float(np.abs(probas_ref - probas_q).max()), 6),
+        'octets_poids_float32': int(sum(np.asarray(w).nbytes for w in bundle_float32.weights)),
+        'octets_poids_quantifies': int(sum(np.asarray(w).nbytes for w in bundle_quantifie.weights)),
+        'octets_inference_float32': reference_numpy.octets_poids(),
+        'octets_inference_quantifiee': quantifie.octets_poids(),
+        'latence_keras_float32': mesurer_latence_ms(lambda x: reference.predict(x, verbose=0), echantillon),
+        'latence_numpy_float32': mesurer_latence_ms(reference_numpy.predict, echantillon),
+        'latence_numpy_quantifiee': mesurer_latence_ms(quantifie.predict, echantillon)
+    }
+    rapport['perte_precision'] = round(rapport['precision_float32'] - rapport['precision_quantifiee'], 4)
+    return rapport
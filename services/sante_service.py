@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sonde de santé de l'API en arrière-plan - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Le répartiteur de charge et l'interface interrogent /health souvent; chaque
+appel déclenchait un GET /health vers le NAS. La sonde interroge l'API à
+intervalle fixe dans un thread et garde le dernier résultat: /health et
+ChatbotService.test_api_connection() le lisent sans appel réseau. L'âge du
+résultat est exposé; au-delà de trois intervalles il est signalé périmé
+(sonde bloquée).
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SondeSante:
+    """Exécute une sonde (fonction -> bool) périodiquement et garde le dernier résultat"""
+
+    def __init__(self, sonde: Callable[[], bool], intervalle_s: float = 10.0, nom: str = "API"):
+        self.sonde = sonde
+        self.intervalle_s = intervalle_s
+        self.nom = nom
+        self.sondages = 0
+        self.echecs_consecutifs = 0
+        # Remplacé en un seul bloc par le thread de la sonde: lecture sans verrou
+        self._dernier: Optional[Dict[str, Any]] = None
+        self._arret = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def demarrer(self) -> "SondeSante":
+        """Lance le thread de sondage (premier sondage immédiat)"""
+        self._thread = threading.Thread(target=self._boucle, daemon=True, name=f"Sonde{self.nom}")
+        self._thread.start()
+        logger.info(f"🩺 Sonde {self.nom} démarrée (intervalle: {self.intervalle_s}s)")
+        return self
+
+    def sonder(self) -> Dict[str, Any]:
+        """Exécute la sonde une fois et publie le résultat"""
+        debut = time.perf_counter()
+        erreur = None
+        try:
+            ok = bool(self.sonde())
+        except Exception as e:
+            ok, erreur = False, str(e)
+        self.sondages += 1
+        self.echecs_consecutifs = 0 if ok else self.echecs_consecutifs + 1
+        if not ok and self.echecs_consecutifs == 1:
+            logger.warning(f"⚠️ Sonde {self.nom}: échec{f' ({erreur})' if erreur else ''}")
+        elif ok and self._dernier is not None and not self._dernier['ok']:
+            logger.info(f"✅ Sonde {self.nom}: rétablie")
+        self._dernier = {
+            'ok': ok,
+            'horodatage': time.time(),
+            'duree_ms': round((time.perf_counter() - debut) * 1000, 1),
+            'echecs_consecutifs': self.echecs_consecutifs,
+            'erreur': erreur
+        }
+        return self._dernier
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            self.sonder()
+            self._arret.wait(self.intervalle_s)
+
+    @property
+    def ok(self) -> bool:
+        """Dernier résultat (False tant qu'aucun sondage n'est terminé)"""
+        dernier = self._dernier
+        return bool(dernier and dernier['ok'])
+
+    def instantane(self) -> Dict[str, Any]:
+        """Dernier résultat avec son âge (ok=None avant le premier sondage)"""
+        dernier = self._dernier
+        if dernier is None:
+            return {'ok': None, 'age_s': None, 'perime': False, 'intervalle_s': self.intervalle_s}
+        age_s = time.time() - dernier['horodatage']
+        return {
+            **dernier,
+            'age_s': round(age_s, 1),
+            'perime': age_s > 3 * self.intervalle_s,
+            'intervalle_s': self.intervalle_s
+        }
+
+    def fermer(self):
+        self._arret.set()
+        if self._thread:
+            self._thread.join(timeout=5)
@@ -15,8 +15,12 @@ from datetime import datetime, timedelta
 from typing import Dict, Optional
 import logging
 
+from .metriques import REGISTRE
+
 logger = logging.getLogger(__name__)
 
+SESSIONS_CREEES = REGISTRE.compteur("mila_sessions_creees_total", "Sessions utilisateur créées")
+
 class SessionService:
     """Service de gestion des sessions utilisateur - CORRIGÉ"""
     
@@ -37,6 +41,7 @@ class SessionService:
             'average_response_time': 0.0
         }
         
+        SESSIONS_CREEES.inc()
         logger.info(f"Nouvelle session créée: {session_id}")
         return session_id
     
@@ -101,6 +106,10 @@ class SessionService:
         self.cleanup_expired_sessions()
         return len(self._sessions)
     
+    def nombre_sessions(self) -> int:
+        """Nombre de sessions en mémoire, sans nettoyage (lecture des métriques)"""
+        return len(self._sessions)
+    
     def get_session_stats(self) -> dict:
         """Obtenir les statistiques des sessions"""
         self.cleanup_expired_sessions()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Traces par requête (étapes chronométrées) - VERSION RNCP-6
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+
+Une trace est attachée au thread qui traite la requête; chaque étape
+instrumentée (span("api"), @etape("journal")...) y ajoute un noeud daté,
+imbriqué sous l'étape en cours. Sans trace active, span() retourne un
+gestionnaire de contexte inerte partagé: le coût se limite à une lecture
+d'attribut du thread.
+
+En fin de requête, la trace donne l'en-tête Server-Timing (durée cumulée par
+étape), alimente un histogramme par étape (affiché sur /stats) et, au-delà
+d'un seuil, est écrite en entier (arbre des étapes) dans le journal des
+requêtes lentes.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from .histogramme import HistogrammeLatence
+
+logger = logging.getLogger(__name__)
+
+class _Contexte(threading.local):
+    # Valeur par défaut de classe: pas d'AttributeError levée (et rattrapée) à chaque lecture
+    trace: Optional["Trace"] = None
+
+_contexte = _Contexte()
+
+class Etape:
+    """Noeud de l'arbre des étapes d'une requête"""
+
+    __slots__ = ('nom', 'debut', 'fin', 'enfants')
+
+    def __init__(self, nom: str):
+        self.nom = nom
+        self.debut = time.perf_counter()
+        self.fin: Optional[float] = None
+        self.enfants: List["Etape"] = []
+
+    @property
+    def duree_ms(self) -> float:
+        return ((self.fin or time.perf_counter()) - self.debut) * 1000
+
+    def en_dict(self, origine: float) -> Dict[str, Any]:
+        noeud = {
+            'nom': self.nom,
+            'debut_ms': round((self.debut - origine) * 1000, 3),
+            'duree_ms': round(self.duree_ms, 3)
+        }
+        if self.enfants:
+            noeud['enfants'] = [e.en_dict(origine) for e in self.enfants]
+        return noeud
+
+class Trace:
+    """Arbre des étapes d'une requête et pile des étapes en cours"""
+
+    def __init__(self, nom: str):
+        self.racine = Etape(nom)
+        self.pile = [self.racine]
+
+    def etapes(self) -> List[Etape]:
+        """Toutes les étapes sauf la racine, en profondeur"""
+        resultat, a_visiter = [], list(reversed(self.racine.enfants))
+        while a_visiter:
+            etape = a_visiter.pop()
+            resultat.append(etape)
+            a_visiter.extend(reversed(etape.enfants))
+        return resultat
+
+    def server_timing(self) -> str:
+        """Valeur de l'en-tête Server-Timing: durée cumulée par étape puis total"""
+        cumuls: Dict[str, float] = {}
+        for etape in self.etapes():
+            cumuls[etape.nom] = cumuls.get(etape.nom, 0.0) + etape.duree_ms
+        cumuls['total'] = self.racine.duree_ms
+        return ", ".join(f"{nom};dur={duree:.2f}" for nom, duree in cumuls.items())
+
+    def en_dict(self) -> Dict[str, Any]:
+        return self.racine.en_dict(self.racine.debut)
+
+class _EtapeInerte:
+    """Gestionnaire de contexte sans effet (aucune trace active)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+_INERTE = _EtapeInerte()
+
+class _EtapeActive:
+    __slots__ = ('trace', 'etape')
+
+    def __init__(self, trace: Trace, nom: str):
+        self.trace = trace
+        self.etape = Etape(nom)
+
+    def __enter__(self) -> Etape:
+        self.trace.pile[-1].enfants.append(self.etape)
+        self.trace.pile.append(self.etape)
+        return self.etape
+
+    def __exit__(self, *exc):
+        self.etape.fin = time.perf_counter()
+        self.trace.pile.pop()
+        return False
+
+def span(nom: str):
+    """Chronomètre un bloc dans la trace du thread courant (sans effet hors trace)"""
+    trace = _contexte.trace
+    if trace is None:
+        return _INERTE
+    return _EtapeActive(trace, nom)
+
+def etape(nom: str) -> Callable:
+    """Décorateur: chronomètre chaque appel de la fonction sous le nom donné"""
+    def decorateur(fonction: Callable) -> Callable:
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with span(nom):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorateur
+
+def trace_courante() -> Optional[Trace]:
+    return _contexte.trace
+
+class TraceurRequetes:
+    """Démarre et clôt les traces, agrège les durées par étape et journalise les requêtes lentes"""
+
+    def __init__(self, actif: bool = False, seuil_lent_ms: int = 0, chemin_lentes: Optional[str] = None):
+        self.actif = actif
+        self.seuil_lent_ms = seuil_lent_ms
+        self.chemin_lentes = chemin_lentes
+        self.histogrammes: Dict[str, HistogrammeLatence] = {}
+        self.lock = threading.Lock()
+        self.requetes_lentes = 0
+
+    def demarrer(self, nom: str) -> Optional[Trace]:
+        """Attache une nouvelle trace au thread courant (None si le traçage est désactivé)"""
+        if not self.actif:
+            return None
+        trace = Trace(nom)
+        _contexte.trace = trace
+        return trace
+
+    def terminer(self, trace: Trace) -> Trace:
+        """Clôt la trace, l'agrège et la détache du thread"""
+        trace.racine.fin = time.perf_counter()
+        _contexte.trace = None
+
+        for etape in [trace.racine] + trace.etapes():
+            nom = 'total' if etape is trace.racine else etape.nom
+            histogramme = self.histogrammes.get(nom)
+            if histogramme is None:
+                with self.lock:
+                    histogramme = self.histogrammes.setdefault(nom, HistogrammeLatence())
+            histogramme.enregistrer(etape.duree_ms)
+
+        if self.seuil_lent_ms and self.chemin_lentes and trace.racine.duree_ms >= self.seuil_lent_ms:
+            self._journaliser_lente(trace)
+        return trace
+
+    def _journaliser_lente(self, trace: Trace):
+        entree = {'date': datetime.now().isoformat(), **trace.en_dict()}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.chemin_lentes)), exist_ok=True)
+            with open(self.chemin_lentes, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entree, ensure_ascii=False) + "\n")
+            with self.lock:
+                self.requetes_lentes += 1
+        except OSError as e:
+            logger.warning(f"⚠️ Journal des requêtes lentes inaccessible: {e}")
+
+    @staticmethod
+    def detacher():
+        """Retire une trace restée attachée au thread (requête interrompue)"""
+        _contexte.trace = None
+
+    def resume(self) -> Dict[str, Dict[str, Any]]:
+        """Résumé de l'histogramme de chaque étape (total en premier)"""
+        with self.lock:
+            histogrammes = dict(self.histogrammes)
+        noms = sorted(histogrammes, key=lambda n: (n != 'total', n))
+        return {nom: histogrammes[nom].resume(avec_intervalles=False) for nom in noms}
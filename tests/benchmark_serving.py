@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DES ÉTAPES DE SERVICE - MILA ASSIST
+=============================================
+
+Mesure hors-ligne (sans API ni réseau) de chaque étape du fallback local de
+ChatbotService, sur les vrais patterns de la dernière sauvegarde, avec
+préchauffage puis plusieurs passes répétées sur tous les messages.
+
+Étapes mesurées (durée par message):
+- nettoyage_message: _nettoyer_message_utilisateur (termes spécialisés)
+- nettoyage_phrase: _nettoyer_phrase_amelioree (tokenisation et lemmatisation)
+- bag_of_words: _creer_bag_of_words_ameliore
+- inference: prédiction du modèle pour un message
+- selection_reponse: _generer_reponse_par_classe_amelioree
+- cle_cache: _generer_cache_key
+- cache_hit: _obtenir_reponse_keras_amelioree avec la prédiction en cache
+- cache_miss: _obtenir_reponse_keras_amelioree cache vide (chemin complet)
+
+Les résultats sont écrits en JSON; la commande compare signale les étapes
+dont la médiane se dégrade au-delà d'un seuil de bruit entre deux exécutions.
+
+Usage:
+    python tests/benchmark_serving.py run [--bundle chatbot_bundle.npz] [--repetitions 5] [--sortie resultats.json]
+    python tests/benchmark_serving.py run --trafic data/traffic_capture.jsonl
+    python tests/benchmark_serving.py compare ancien.json nouveau.json [--seuil 0.10]
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import logging
+import platform
+import statistics
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from services import chatbot_service
+from services.chatbot_service import ChatbotService, EtatModele
+from services.metriques import Statistiques
+from services.model_bundle import ModelBundle, BUNDLE_FILENAME
+
+class LemmatiseurSimple:
+    """Lemmatisation identité (sans ressources NLTK)"""
+
+    def lemmatize(self, word, pos='n'):
+        return word.lower()
+
+def creer_bundle_synthetique(donnees_tags: Dict[str, Any]) -> ModelBundle:
+    """Bundle non entraîné aux dimensions réelles (les durées ne dépendent pas des poids)"""
+    import train
+    train.NLTK_AVAILABLE = chatbot_service.NLTK_AVAILABLE
+    trainer = train.ModelTrainer(train.ConfigurationManager())
+    features = trainer.preparer_features(donnees_tags)
+    model = trainer.construire_modele(len(features.words), len(features.classes))
+    return ModelBundle.depuis_modele(
+        model, features.words, features.classes,
+        {tag: d['responses'] for tag, d in donnees_tags.items()},
+        version="synthetique"
+    )
+
+def creer_service(bundle_path: str, donnees_tags: Dict[str, Any]) -> ChatbotService:
+    """Service chatbot avec le bundle chargé, sans client API ni chargement asynchrone"""
+    service = ChatbotService.__new__(ChatbotService)
+    service.lemmatizer = chatbot_service.WordNetLemmatizer() if chatbot_service.NLTK_AVAILABLE else LemmatiseurSimple()
+    service.cache_size_limit = 1000
+    service.stats = Statistiques({'keras_predictions_cached': 0, 'predictions_precises': 0, 'predictions_incertaines': 0})
+
+    if os.path.exists(bundle_path):
+        service._charger_bundle(bundle_path)
+    else:
+        print(f"ℹ️ {bundle_path} absent - bundle synthétique non entraîné depuis les patterns")
+        bundle = creer_bundle_synthetique(donnees_tags)
+        service.etat = EtatModele(
+            model=bundle.construire_modele(), words=bundle.words, classes=bundle.classes,
+            training_patterns={tag: {'responses': r} for tag, r in bundle.responses.items()},
+            version=bundle.version
+        )
+    return service
+
+def mesurer(fonction: Callable[[Any], Any], entrees: List[Any], repetitions: int, prechauffage: int,
+            avant_passe: Callable[[], None] = lambda: None) -> Dict[str, Any]:
+    """Durée par appel (µs) de chaque passe complète sur les entrées, après préchauffage"""
+    for _ in range(prechauffage):
+        avant_passe()
+        for entree in entrees:
+            fonction(entree)
+
+    par_appel = []
+    for _ in range(repetitions):
+        avant_passe()
+        debut = time.perf_counter()
+        for entree in entrees:
+            fonction(entree)
+        par_appel.append((time.perf_counter() - debut) / len(entrees) * 1e6)
+
+    mediane = statistics.median(par_appel)
+    return {
+        'mediane_us': round(mediane, 3),
+        'min_us': round(min(par_appel), 3),
+        'max_us': round(max(par_appel), 3),
+        # Dispersion relative entre passes: bruit de la mesure sur cette machine
+        'bruit_relatif': round(statistics.pstdev(par_appel) / mediane, 4) if mediane else 0.0,
+        'passes_us': [round(t, 3) for t in par_appel]
+    }
+
+def executer(bundle_path: str, chemin_patterns: Optional[str], repetitions: int, prechauffage: int,
+             nb_messages: int, tokenisation_simple: bool, chemin_trafic: Optional[str] = None) -> Dict[str, Any]:
+    """Mesure toutes les étapes de service et retourne le rapport"""
+    if tokenisation_simple:
+        chatbot_service.NLTK_AVAILABLE = False
+
+    import train
+    donnees_tags = train.charger_patterns_entrainement(chemin_patterns, BASE_DIR)
+    if donnees_tags is None:
+        raise FileNotFoundError("Aucun patterns d'entraînement sauvegardé (data/Backup): entraîner d'abord ou utiliser --patterns")
+    service = creer_service(bundle_path, donnees_tags)
+
+    if chemin_trafic:
+        # Messages réels dans l'ordre de capture (répétitions comprises)
+        from rejeu_trafic import charger_capture
+        messages = [e['message'] for e in charger_capture(chemin_trafic)][:nb_messages]
+    else:
+        messages = list(dict.fromkeys(p for d in donnees_tags.values() for p in d['patterns'] if p.strip()))
+        random.Random(42).shuffle(messages)
+        messages = messages[:nb_messages]
+
+    # Entrées de chaque étape calculées une fois, hors mesure
+    normalises = [service._nettoyer_message_utilisateur(m) for m in messages]
+    mots = [service._nettoyer_phrase_amelioree(m) for m in normalises]
+    bags = [service._creer_bag_of_words_ameliore(m)[np.newaxis, :] for m in mots]
+    probas = [service.model.predict(b, verbose=0)[0] for b in bags]
+    predites = [(m, service.classes[int(p.argmax())], float(p.max())) for m, p in zip(normalises, probas)]
+
+    def remplir_cache():
+        # Prédiction de chaque message en cache (même un message sous le seuil est servi depuis le cache)
+        for m, classe, probabilite in predites:
+            service.prediction_cache[service._generer_cache_key(m)] = {'intent': classe, 'probability': probabilite}
+
+    etapes = {
+        'nettoyage_message': (service._nettoyer_message_utilisateur, messages, None),
+        'nettoyage_phrase': (service._nettoyer_phrase_amelioree, normalises, None),
+        'bag_of_words': (service._creer_bag_of_words_ameliore, mots, None),
+        'inference': (lambda b: service.model.predict(b, verbose=0), bags, None),
+        'selection_reponse': (lambda p: service._generer_reponse_par_classe_amelioree(*p), predites, None),
+        'cle_cache': (service._generer_cache_key, normalises, None),
+        'cache_hit': (service._obtenir_reponse_keras_amelioree, normalises, remplir_cache),
+        'cache_miss': (service._obtenir_reponse_keras_amelioree, normalises, service.prediction_cache.clear)
+    }
+
+    resultats = {}
+    for nom, (fonction, entrees, avant_passe) in etapes.items():
+        resultats[nom] = mesurer(fonction, entrees, repetitions, prechauffage, avant_passe or (lambda: None))
+        print(f"{nom:>18} | {resultats[nom]['mediane_us']:12.1f} | {resultats[nom]['min_us']:12.1f} | "
+              f"{resultats[nom]['bruit_relatif']:7.1%}", flush=True)
+
+    return {
+        'date': datetime.now().isoformat(),
+        'environnement': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plateforme': platform.platform(),
+            'cpus': os.cpu_count(),
+            'nltk': chatbot_service.NLTK_AVAILABLE
+        },
+        'bundle': service.model_version,
+        'entrees': service._dimension_entree(),
+        'classes': len(service.classes),
+        'messages': len(messages),
+        'source_messages': chemin_trafic or chemin_patterns or "patterns sauvegardés",
+        'repetitions': repetitions,
+        'prechauffage': prechauffage,
+        'etapes': resultats
+    }
+
+def comparer(ancien: Dict[str, Any], nouveau: Dict[str, Any], seuil: float) -> List[Dict[str, Any]]:
+    """Écart des médianes par étape; régression si le ralentissement dépasse le seuil et le bruit mesuré"""
+    lignes = []
+    for nom, mesure in nouveau['etapes'].items():
+        reference = ancien['etapes'].get(nom)
+        if not reference or not reference['mediane_us']:
+            continue
+        ecart = mesure['mediane_us'] / reference['mediane_us'] - 1
+        tolerance = max(seuil, 2 * max(reference['bruit_relatif'], mesure['bruit_relatif']))
+        lignes.append({
+            'etape': nom,
+            'ancien_us': reference['mediane_us'],
+            'nouveau_us': mesure['mediane_us'],
+            'ecart': round(ecart, 4),
+            'tolerance': round(tolerance, 4),
+            'regression': ecart > tolerance
+        })
+    return lignes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des étapes de service du fallback local")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    run = commandes.add_parser("run", help="Mesurer les étapes et écrire le rapport JSON")
+    run.add_argument("--bundle", default=os.path.join(BASE_DIR, BUNDLE_FILENAME),
+                     help="Bundle servi (bundle synthétique non entraîné s'il est absent)")
+    run.add_argument("--patterns",
+                     help="Patterns utilisés comme messages (.json ou .pkl, dernière sauvegarde par défaut)")
+    run.add_argument("--messages", type=int, default=100, help="Nombre de messages distincts")
+    run.add_argument("--trafic", help="Messages tirés d'une capture (data/traffic_capture.jsonl)")
+    run.add_argument("--repetitions", type=int, default=5, help="Passes mesurées par étape")
+    run.add_argument("--prechauffage", type=int, default=1, help="Passes de préchauffage par étape")
+    run.add_argument("--tokenisation-simple", action="store_true",
+                     help="Tokenisation par espaces (sans ressources NLTK)")
+    run.add_argument("--sortie", help="Fichier JSON (logs/benchmark_serving_<date>.json par défaut)")
+
+    compare = commandes.add_parser("compare", help="Comparer deux rapports et signaler les régressions")
+    compare.add_argument("ancien", help="Rapport de référence")
+    compare.add_argument("nouveau", help="Rapport à comparer")
+    compare.add_argument("--seuil", type=float, default=0.10,
+                         help="Ralentissement relatif toléré (relevé si le bruit mesuré est plus grand)")
+    args = parser.parse_args()
+
+    # Les journaux par réponse fausseraient les mesures
+    logging.getLogger(chatbot_service.__name__).setLevel(logging.WARNING)
+
+    if args.commande == "run":
+        print(f"{'étape':>18} | {'médiane (µs)':>12} | {'min (µs)':>12} | {'bruit':>7}")
+        print("-" * 60)
+        rapport = executer(args.bundle, args.patterns, args.repetitions, args.prechauffage,
+                           args.messages, args.tokenisation_simple, args.trafic)
+        sortie = args.sortie or os.path.join(
+            BASE_DIR, "logs", f"benchmark_serving_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+        with open(sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        print(f"\n📝 Rapport: {sortie}")
+        return
+
+    with open(args.ancien, 'r', encoding='utf-8') as f:
+        ancien = json.load(f)
+    with open(args.nouveau, 'r', encoding='utf-8') as f:
+        nouveau = json.load(f)
+    if ancien.get('environnement') != nouveau.get('environnement'):
+        print("⚠️ Environnements différents: comparaison indicative")
+
+    lignes = comparer(ancien, nouveau, args.seuil)
+    print(f"{'étape':>18} | {'ancien (µs)':>11} | {'nouveau (µs)':>12} | {'écart':>7} | {'tolérance':>9}")
+    print("-" * 72)
+    for l in lignes:
+        print(f"{l['etape']:>18} | {l['ancien_us']:11.1f} | {l['nouveau_us']:12.1f} | {l['ecart']:+7.1%} | "
+              f"{l['tolerance']:9.1%}{'  ❌ RÉGRESSION' if l['regression'] else ''}")
+    sys.exit(1 if any(l['regression'] for l in lignes) else 0)
+
+if __name__ == "__main__":
+    main()
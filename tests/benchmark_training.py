@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DES ÉTAPES D'ENTRAÎNEMENT - MILA ASSIST
+=================================================
+
+Mesure hors-ligne (sans API ni TensorFlow fit) du temps de construction
+des données d'entraînement sur des jeux synthétiques de 1k, 10k et 100k patterns.
+
+Étapes mesurées:
+- matrice: construction du bag-of-words pondéré (CSR puis dense)
+  comparée à l'implémentation historique (boucle words × pattern.count)
+- deduplication: conversion + augmentation de DataProcessor (ensembles ordonnés)
+  comparées aux implémentations historiques (test d'appartenance sur liste)
+- pretraitement: préparation des features depuis le corpus d'identifiants de lemmes
+  (séquentiel, pool de processus, corpus en cache) comparée à la double lemmatisation historique
+- modes: entraînement standard et rapide (--fast) sur les patterns de la
+  dernière sauvegarde, durée du fit comparée à la précision d'entraînement et de validation
+- hachage: vocabulaire (words) comparé au hachage des features sur ces patterns,
+  taux de collision, largeur d'entrée, taille du modèle et précision
+
+Usage:
+    python tests/benchmark_training.py matrice [--tailles 1000 10000 100000]
+    python tests/benchmark_training.py deduplication [--tailles 1000 10000 100000]
+    python tests/benchmark_training.py pretraitement [--tailles ...] [--workers 4] [--tokenisation-simple]
+    python tests/benchmark_training.py modes [--patterns patterns.json] [--tokenisation-simple]
+    python tests/benchmark_training.py hachage [--buckets 256 512 1024 2048] [--tokenisation-simple]
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import train
+
+# Au-delà, l'implémentation historique prendrait plusieurs minutes
+LIMITE_HISTORIQUE = 10000
+
+def generer_donnees_synthetiques(nb_patterns: int, graine: int = 42) -> Dict[str, Any]:
+    """Génère des données au format donnees_tags (≈10 patterns par tag, 500 tags max, loi de Zipf)"""
+    rng = random.Random(graine)
+    lexique = [f"mot{i}" for i in range(max(200, nb_patterns // 10))] + list(train.ModelTrainer.MOTS_CLES)
+    poids = [1.0 / (rang + 1) for rang in range(len(lexique))]
+
+    donnees_tags = {}
+    nb_tags = max(1, min(nb_patterns // 10, 500))
+    for i in range(nb_patterns):
+        tag = f"tag_{i % nb_tags}"
+        mots = rng.choices(lexique, weights=poids, k=rng.randint(3, 12))
+        donnees = donnees_tags.setdefault(tag, {'patterns': [], 'responses': [f"réponse {tag}"]})
+        donnees['patterns'].append(' '.join(mots))
+    return donnees_tags
+
+def construction_historique(documents_lemmes: List[List[str]], tags: List[str],
+                            words: List[str], classes: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Implémentation d'origine de ModelTrainer (référence de comparaison)"""
+    mots_cles = train.ModelTrainer.MOTS_CLES
+    training_data = []
+    output_empty = [0] * len(classes)
+
+    for pattern_words, tag in zip(documents_lemmes, tags):
+        bag = []
+        for w in words:
+            count = pattern_words.count(w)
+            if count > 0:
+                if w in mots_cles:
+                    bag.append(min(1.5, count * 0.8))
+                else:
+                    bag.append(min(1.0, count * 0.6))
+            else:
+                bag.append(0.0)
+
+        output_row = list(output_empty)
+        output_row[classes.index(tag)] = 1
+        training_data.append([bag, output_row])
+
+    train_x = np.array([item[0] for item in training_data], dtype=np.float32)
+    train_y = np.array([item[1] for item in training_data], dtype=np.float32)
+    return train_x, train_y
+
+def preparer_documents(donnees_tags: Dict[str, Any]) -> Tuple[List[List[str]], List[str], List[str], List[str]]:
+    """Tokenisation simple + vocabulaire identique à preparer_features"""
+    documents, tags = [], []
+    for tag, donnees in donnees_tags.items():
+        for pattern in donnees['patterns']:
+            documents.append(pattern.lower().split())
+            tags.append(tag)
+
+    frequences = {}
+    for doc in documents:
+        for w in doc:
+            frequences[w] = frequences.get(w, 0) + 1
+    words = sorted(w for w, f in frequences.items() if f >= 2 or w in train.ModelTrainer.MOTS_CLES)
+    classes = sorted(donnees_tags)
+    return documents, tags, words, classes
+
+def generer_connaissances_synthetiques(nb_patterns: int, graine: int = 42) -> List[Dict[str, Any]]:
+    """Génère des enregistrements API (≈10 tags, ~20% de doublons, synonymes fréquents)"""
+    rng = random.Random(graine)
+    lexique = [f"mot{i}" for i in range(200)] + list(train.DataProcessor.SYNONYMES)
+    questions = [' '.join(rng.choices(lexique, k=rng.randint(3, 8))) for _ in range(int(nb_patterns * 0.8))]
+    connaissances = []
+    for i in range(nb_patterns):
+        indice = i if i < len(questions) else rng.randrange(len(questions))
+        connaissances.append({
+            'tag': f"tag_{indice % 10}",
+            'question': questions[indice],
+            'response': f"réponse {i % 50}"
+        })
+    return connaissances
+
+def conversion_historique(processor: train.DataProcessor, connaissances: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Conversion d'origine de DataProcessor (déduplication par liste, O(n²))"""
+    donnees_par_tag = {}
+    for connaissance in connaissances:
+        tag = connaissance.get('tag', 'general').strip()
+        question = processor.nettoyer_texte(connaissance.get('question', ''))
+        reponse = connaissance.get('response', '').strip()
+        if not tag or not question or not reponse or len(question) < 3 or len(reponse) < 3:
+            continue
+        donnees = donnees_par_tag.setdefault(tag, {'patterns': [], 'responses': []})
+        if question not in donnees['patterns']:
+            donnees['patterns'].append(question)
+        if reponse not in donnees['responses']:
+            donnees['responses'].append(reponse)
+    return donnees_par_tag
+
+def augmentation_historique(donnees_tags: Dict[str, Any]) -> Dict[str, Any]:
+    """Augmentation d'origine de DataProcessor (déduplication par liste, O(n²))"""
+    synonymes = train.DataProcessor.SYNONYMES
+    donnees_augmentees = {}
+    for tag, donnees in donnees_tags.items():
+        patterns = donnees['patterns'].copy()
+        for pattern in donnees['patterns']:
+            mots = pattern.split()
+            for i, mot in enumerate(mots):
+                for synonyme in synonymes.get(mot, [])[:2]:
+                    nouveau_pattern = ' '.join(mots[:i] + [synonyme] + mots[i + 1:])
+                    if nouveau_pattern not in patterns:
+                        patterns.append(nouveau_pattern)
+        donnees_augmentees[tag] = {'patterns': patterns, 'responses': donnees['responses'].copy()}
+    return donnees_augmentees
+
+def preparation_historique(trainer: train.ModelTrainer, donnees_tags: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+    """Préparation d'origine: tokenisation par pattern et lemmatisation en double"""
+    lemmatizer = train.WordNetLemmatizer() if train.NLTK_AVAILABLE else None
+    lemmatiser = lemmatizer.lemmatize if lemmatizer else (lambda w: w)
+    words, documents = [], []
+    for tag, donnees in donnees_tags.items():
+        for pattern in donnees['patterns']:
+            word_list = train.word_tokenize(pattern, language='french') if train.NLTK_AVAILABLE else pattern.split()
+            words.extend(word_list)
+            documents.append((word_list, tag))
+    frequences = {}
+    for w in words:
+        if w not in train.MOTS_IGNORES and len(w) > 1 and w.isalpha():
+            lemme = lemmatiser(w.lower())
+            frequences[lemme] = frequences.get(lemme, 0) + 1
+    words = sorted(w for w, f in frequences.items() if f >= 2 or w in train.ModelTrainer.MOTS_CLES)
+    random.shuffle(documents)
+    documents_lemmes = [[lemmatiser(w.lower()) for w in doc] for doc, _ in documents]
+    return words, trainer.construire_matrice_bow(documents_lemmes, words).toarray()
+
+def chronometrer(fonction, *args) -> Tuple[float, Any]:
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return time.perf_counter() - debut, resultat
+
+def benchmark_matrice(tailles: List[int]):
+    """Compare la construction vectorisée à l'implémentation historique"""
+    encodeur = train.EncodeurBagOfWords(train.ModelTrainer.MOTS_CLES)
+
+    print("📊 Construction de la matrice d'entraînement")
+    print(f"{'patterns':>9} | {'vocab':>6} | {'classes':>7} | {'CSR (s)':>8} | {'dense (s)':>9} | "
+          f"{'classes (s)':>11} | {'historique (s)':>14} | {'gain':>7}")
+    print("-" * 94)
+
+    for taille in tailles:
+        documents, tags, words, classes = preparer_documents(generer_donnees_synthetiques(taille))
+
+        t_csr, csr = chronometrer(encodeur.construire_matrice_bow, documents, words)
+        taille_dense_mo = csr.shape[0] * csr.shape[1] * 4 / 1e6
+        if taille_dense_mo < 2000:
+            t_dense, train_x = chronometrer(csr.toarray)
+        else:
+            t_dense, train_x = float('nan'), None
+        t_classes, train_y = chronometrer(train.ModelTrainer.encoder_classes, tags, classes)
+
+        if taille <= LIMITE_HISTORIQUE:
+            t_historique, (ref_x, ref_y) = chronometrer(construction_historique, documents, tags, words, classes)
+            np.testing.assert_allclose(train_x, ref_x)
+            np.testing.assert_array_equal(train_y, ref_y)
+            gain = f"x{t_historique / (t_csr + t_dense + t_classes):.0f}"
+            historique = f"{t_historique:14.3f}"
+        else:
+            historique, gain = f"{'(ignoré)':>14}", "-"
+
+        print(f"{taille:>9} | {len(words):>6} | {len(classes):>7} | {t_csr:8.3f} | {t_dense:9.3f} | "
+              f"{t_classes:11.3f} | {historique} | {gain:>7}")
+        print(f"{'':>9}   nnz={csr.nnz}, dense={taille_dense_mo:.0f} Mo")
+
+def benchmark_deduplication(tailles: List[int]):
+    """Compare la déduplication par ensemble ordonné à l'implémentation historique"""
+    processor = train.DataProcessor()
+
+    print("📊 Conversion + augmentation (déduplication)")
+    print(f"{'patterns':>9} | {'uniques':>8} | {'augmentés':>9} | {'conv. (s)':>9} | {'augm. (s)':>9} | "
+          f"{'µs/pattern':>10} | {'historique (s)':>14} | {'gain':>7}")
+    print("-" * 96)
+
+    for taille in tailles:
+        connaissances = generer_connaissances_synthetiques(taille)
+
+        t_conversion, donnees = chronometrer(processor.convertir_donnees_vers_format_entrainement, connaissances)
+        t_augmentation, augmentees = chronometrer(processor.augmenter_donnees, donnees)
+        total = t_conversion + t_augmentation
+        nb_uniques = sum(len(d['patterns']) for d in donnees.values())
+        nb_augmentes = sum(len(d['patterns']) for d in augmentees.values())
+
+        if taille <= LIMITE_HISTORIQUE:
+            t_conv_hist, ref_donnees = chronometrer(conversion_historique, processor, connaissances)
+            t_augm_hist, ref_augmentees = chronometrer(augmentation_historique, ref_donnees)
+            assert donnees == ref_donnees and augmentees == ref_augmentees
+            t_historique = t_conv_hist + t_augm_hist
+            historique, gain = f"{t_historique:14.3f}", f"x{t_historique / total:.0f}"
+        else:
+            historique, gain = f"{'(ignoré)':>14}", "-"
+
+        print(f"{taille:>9} | {nb_uniques:>8} | {nb_augmentes:>9} | {t_conversion:9.3f} | {t_augmentation:9.3f} | "
+              f"{total / taille * 1e6:10.1f} | {historique} | {gain:>7}")
+
+def benchmark_pretraitement(tailles: List[int], workers: int):
+    """Compare le prétraitement unique (séquentiel, pool, cache) à la préparation historique"""
+    trainer = train.ModelTrainer(train.ConfigurationManager())
+    sequentiel = train.TextPreprocessor(workers=1)
+    parallele = train.TextPreprocessor(workers=workers)
+    mode = "NLTK" if train.NLTK_AVAILABLE else "split (NLTK indisponible)"
+
+    print(f"📊 Prétraitement + features ({mode}, {workers} processus)")
+    print(f"{'patterns':>9} | {'séq. (s)':>8} | {'pool (s)':>8} | {'cache (s)':>9} | "
+          f"{'features (s)':>12} | {'historique (s)':>14} | {'gain':>7}")
+    print("-" * 88)
+
+    for taille in tailles:
+        donnees_tags = generer_donnees_synthetiques(taille)
+        patterns = [p for d in donnees_tags.values() for p in d['patterns']]
+
+        t_sequentiel, corpus = chronometrer(sequentiel.pretraiter, patterns)
+        t_pool, corpus_pool = chronometrer(parallele.pretraiter, patterns)
+        t_cache, _ = chronometrer(parallele.pretraiter, patterns, corpus)
+        assert corpus_pool.token_ids.tolist() == corpus.token_ids.tolist()
+
+        random.seed(0)
+        t_features, features = chronometrer(trainer.preparer_features, donnees_tags, corpus)
+
+        if taille <= LIMITE_HISTORIQUE:
+            random.seed(0)
+            t_historique, (ref_words, ref_x) = chronometrer(preparation_historique, trainer, donnees_tags)
+            assert ref_words == features.words
+            np.testing.assert_array_equal(ref_x, features.train_x)
+            historique = f"{t_historique:14.3f}"
+            gain = f"x{t_historique / (min(t_sequentiel, t_pool) + t_features):.1f}"
+        else:
+            historique, gain = f"{'(ignoré)':>14}", "-"
+
+        print(f"{taille:>9} | {t_sequentiel:8.3f} | {t_pool:8.3f} | {t_cache:9.3f} | "
+              f"{t_features:12.3f} | {historique} | {gain:>7}")
+
+def charger_patterns(chemin_patterns: Optional[str]) -> Dict[str, Any]:
+    """Patterns du fichier donné, sinon de la dernière sauvegarde d'entraînement"""
+    donnees_tags = train.charger_patterns_entrainement(chemin_patterns)
+    if donnees_tags is None:
+        raise SystemExit("❌ Aucun patterns d'entraînement sauvegardé (data/Backup): entraîner d'abord ou utiliser --patterns")
+    return donnees_tags
+
+def benchmark_modes(chemin_patterns: Optional[str]):
+    """Compare durée et précision des entraînements standard et rapide sur les vrais patterns"""
+    donnees_tags = charger_patterns(chemin_patterns)
+    donnees = train.DataProcessor().augmenter_donnees(donnees_tags)
+
+    config = train.ConfigurationManager()
+    train.configurer_threads_tensorflow(config.TRAINING_THREADS or os.cpu_count() or 1)
+    features = train.ModelTrainer(config).preparer_features(donnees)
+
+    print(f"📊 Entraînement ({len(features.train_x)} patterns, {len(features.words)} mots, "
+          f"{len(features.classes)} classes)")
+    print(f"{'mode':>9} | {'epochs':>6} | {'fit (s)':>8} | {'précision':>9} | {'validation':>10}")
+    print("-" * 55)
+
+    for rapide in (False, True):
+        train.tf.keras.utils.set_random_seed(42)
+        trainer = train.ModelTrainer(config)
+        _, _, _, metriques = trainer.entrainer_modele(donnees, features, rapide=rapide)
+        print(f"{metriques.training_mode:>9} | {metriques.epochs_completed:>6} | {metriques.training_seconds:8.2f} | "
+              f"{metriques.model_accuracy:9.4f} | {metriques.validation_accuracy:10.4f}")
+
+def benchmark_hachage(chemin_patterns: Optional[str], liste_buckets: List[int]):
+    """Compare le vocabulaire words au hachage des features (collisions, taille, précision)"""
+    donnees_tags = charger_patterns(chemin_patterns)
+    donnees = train.DataProcessor().augmenter_donnees(donnees_tags)
+
+    config = train.ConfigurationManager()
+    train.configurer_threads_tensorflow(config.TRAINING_THREADS or os.cpu_count() or 1)
+    corpus = train.TextPreprocessor(workers=1).pretraiter(
+        p for d in donnees.values() for p in d['patterns']
+    )
+
+    print(f"📊 Vocabulaire vs hachage ({sum(len(d['patterns']) for d in donnees.values())} patterns, "
+          f"{len(corpus.lexique)} lemmes, entraînement rapide)")
+    print(f"{'entrée':>12} | {'largeur':>7} | {'collisions':>10} | {'poids (Ko)':>10} | "
+          f"{'précision':>9} | {'validation':>10}")
+    print("-" * 76)
+
+    for nb_buckets in [0] + liste_buckets:
+        trainer = train.ModelTrainer(config)
+        trainer.nb_buckets = nb_buckets
+        random.seed(0)
+        features = trainer.preparer_features(donnees, corpus)
+        train.tf.keras.utils.set_random_seed(42)
+        _, _, model, metriques = trainer.entrainer_modele(donnees, features, rapide=True)
+
+        nom = f"hachage {nb_buckets}" if nb_buckets else "words"
+        collisions = f"{features.collisions['taux_collision']:10.1%}" if nb_buckets else f"{'-':>10}"
+        octets = sum(w.nbytes for w in model.get_weights())
+        print(f"{nom:>12} | {features.train_x.shape[1]:>7} | {collisions} | {octets / 1024:10.0f} | "
+              f"{metriques.model_accuracy:9.4f} | {metriques.validation_accuracy:10.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des étapes d'entraînement")
+    parser.add_argument("etape", choices=["matrice", "deduplication", "pretraitement", "modes", "hachage"], help="Étape à mesurer")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Nombres de patterns synthétiques")
+    parser.add_argument("--workers", type=int, default=4, help="Processus du pool de prétraitement")
+    parser.add_argument("--tokenisation-simple", action="store_true",
+                        help="Tokenisation par espaces (sans ressources NLTK)")
+    parser.add_argument("--patterns",
+                        help="Patterns des étapes modes et hachage (.json ou .pkl, dernière sauvegarde par défaut)")
+    parser.add_argument("--buckets", type=int, nargs="+", default=[256, 512, 1024, 2048],
+                        help="Nombres de colonnes hachées comparés au vocabulaire")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.tokenisation_simple:
+        train.NLTK_AVAILABLE = False
+
+    if args.etape == "matrice":
+        benchmark_matrice(args.tailles)
+    elif args.etape == "deduplication":
+        benchmark_deduplication(args.tailles)
+    elif args.etape == "pretraitement":
+        benchmark_pretraitement(args.tailles, args.workers)
+    elif args.etape == "modes":
+        benchmark_modes(args.patterns)
+    elif args.etape == "hachage":
+        benchmark_hachage(args.patterns, args.buckets)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GÉNÉRATEUR DE CHARGE DE LA ROUTE /get - MILA ASSIST
+===================================================
+
+Deux modes de génération:
+- boucle ouverte (--debit): arrivées à débit fixe (constant ou poisson),
+  indépendantes des réponses; la latence corrigée est mesurée depuis l'instant
+  d'envoi prévu, donc le temps passé en file d'attente côté client est compté
+- boucle fermée (--utilisateurs): N utilisateurs virtuels qui envoient, attendent
+  la réponse puis réfléchissent (--reflexion-ms) avant le message suivant; la
+  latence corrigée ajoute les requêtes qu'un utilisateur n'a pas pu envoyer
+  pendant une réponse lente (correction de l'omission coordonnée, intervalle
+  attendu = médiane du préchauffage + temps de réflexion)
+
+Chaque utilisateur virtuel garde sa connexion HTTP (keep-alive) et son
+session_id, comme l'interface web. Les messages suivent un mélange réaliste:
+questions connues (patterns de la dernière sauvegarde d'entraînement),
+variantes (casse, ponctuation, fautes), messages hors sujet et messages longs.
+
+Le préchauffage n'est pas mesuré. Le rapport donne p50/p90/p99/p99.9 (latence
+de service et latence corrigée), débit, taux d'erreur par type et les
+histogrammes (précision relative de 1 %).
+
+--app-locale démarre Mila Assist dans le processus avec l'API NAS simulée
+(tests/stub_api_nas.py) saine, ou en panne (--api panne: port fermé, bascule
+sur le modèle local).
+
+Usage:
+    python tests/charge_get.py --app-locale --utilisateurs 10 --duree 30
+    python tests/charge_get.py --app-locale --api panne --debit 20 --duree 30
+    python tests/charge_get.py --url http://127.0.0.1:5000 --debit 50 --arrivees poisson
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from services.histogramme import HistogrammeLatence
+
+REPONSE_REPLI = "Désolé, je n'ai pas pu traiter votre demande"
+
+MESSAGES_HORS_SUJET = [
+    "quelle est la capitale de l'australie", "donne moi une recette de crêpes",
+    "qui a gagné le match hier", "combien font 17 fois 23", "asdfghjkl", "?",
+    "tu préfères les chats ou les chiens", "il fait beau aujourd'hui"
+]
+
+def charger_melange_trafic(chemin_capture: str) -> List[Tuple[str, str, float]]:
+    """Mélange tiré du trafic capturé (tests/rejeu_trafic.py): poids = fréquence de chaque message"""
+    from rejeu_trafic import charger_capture
+    frequences = Counter(e['message'] for e in charger_capture(chemin_capture))
+    return [('trafic', message, float(n)) for message, n in frequences.items()]
+
+def charger_melange(chemin_patterns: Optional[str] = None, graine: int = 42) -> List[Tuple[str, str, float]]:
+    """Mélange de messages (catégorie, message, poids): 70 % connues, 15 % variantes,
+    10 % hors sujet, 5 % longs"""
+    rng = random.Random(graine)
+    connues = ["bonjour", "comment configurer obs", "qui es-tu", "merci", "au revoir"]
+    if chemin_patterns is None or os.path.exists(chemin_patterns):
+        import train  # Patterns de la dernière sauvegarde par défaut (BackupManager)
+        donnees_tags = train.charger_patterns_entrainement(chemin_patterns, BASE_DIR) or {}
+        connues = [p for d in donnees_tags.values() for p in d.get('patterns', []) if p.strip()] or connues
+
+    def variante(message: str) -> str:
+        transformations = [
+            str.upper, str.capitalize, lambda m: m + " ?", lambda m: m + " !!",
+            lambda m: m.replace('e', 'é', 1), lambda m: m[:-1] if len(m) > 4 else m,
+            lambda m: "euh " + m, lambda m: m + " stp"
+        ]
+        return rng.choice(transformations)(message)
+
+    def long_message() -> str:
+        message = " ".join(rng.choice(connues) for _ in range(12))
+        return message[:480]
+
+    melange = [('connue', m, 0.70 / len(connues)) for m in connues]
+    variantes = [variante(rng.choice(connues)) for _ in range(max(10, len(connues) // 4))]
+    melange += [('variante', m, 0.15 / len(variantes)) for m in variantes]
+    melange += [('hors_sujet', m, 0.10 / len(MESSAGES_HORS_SUJET)) for m in MESSAGES_HORS_SUJET]
+    longs = [long_message() for _ in range(10)]
+    melange += [('long', m, 0.05 / len(longs)) for m in longs]
+    return melange
+
+class GenerateurCharge:
+    """Envoi de messages à /get et agrégation des mesures (préchauffage exclu)"""
+
+    def __init__(self, url: str, melange: List[Tuple[str, str, float]], timeout_s: float = 10.0, graine: int = 42):
+        self.url = url.rstrip('/') + "/get"
+        self.melange = melange
+        self.poids = [p for _, _, p in melange]
+        self.timeout_s = timeout_s
+        self.graine = graine
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self.prechauffage = HistogrammeLatence()
+        self.service = HistogrammeLatence()
+        self.corrigee = HistogrammeLatence()
+        self.issues: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.envoyees = 0
+
+    def _session_http(self) -> requests.Session:
+        """Une connexion keep-alive par thread"""
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def tirer_message(self, rng: random.Random) -> Tuple[str, str]:
+        categorie, message, _ = rng.choices(self.melange, weights=self.poids)[0]
+        return categorie, message
+
+    def envoyer(self, message: str, session_id: str) -> str:
+        """Envoie un message et retourne l'issue (ok, http_<code>, timeout, connexion, repli)"""
+        try:
+            reponse = self._session_http().post(
+                self.url, data={'msg': message, 'session_id': session_id}, timeout=self.timeout_s
+            )
+        except requests.exceptions.Timeout:
+            return "timeout"
+        except requests.exceptions.RequestException:
+            self.local.__dict__.pop('session', None)  # Connexion à rouvrir
+            return "connexion"
+        if reponse.status_code != 200:
+            return f"http_{reponse.status_code}"
+        if not reponse.text.strip() or reponse.text.startswith(REPONSE_REPLI):
+            return "repli"
+        return "ok"
+
+    def _enregistrer(self, categorie: str, issue: str, service_ms: float, corrigee_ms: float,
+                     intervalle_attendu_ms: Optional[float] = None):
+        self.service.enregistrer(service_ms)
+        self.corrigee.enregistrer(corrigee_ms, intervalle_attendu_ms)
+        with self.lock:
+            self.issues[issue] += 1
+            self.categories[categorie] += 1
+
+    def boucle_ouverte(self, debit: float, duree_s: float, prechauffage_s: float = 5.0,
+                       max_concurrence: int = 64, arrivees: str = "constant", sessions: int = 50) -> Dict[str, Any]:
+        """Arrivées planifiées à débit fixe; latence corrigée depuis l'instant d'envoi prévu"""
+        self._reinitialiser()
+        rng = random.Random(self.graine)
+        ids_sessions = [f"session_charge_{self.graine}_{i}" for i in range(sessions)]
+
+        def requete(prevue: float, mesuree: bool, categorie: str, message: str, session_id: str):
+            debut = time.perf_counter()
+            issue = self.envoyer(message, session_id)
+            fin = time.perf_counter()
+            if mesuree:
+                self._enregistrer(categorie, issue, (fin - debut) * 1000, (fin - prevue) * 1000)
+            else:
+                self.prechauffage.enregistrer((fin - debut) * 1000)
+
+        debut = time.perf_counter()
+        debut_mesure = debut + prechauffage_s
+        fin = debut_mesure + duree_s
+        prevue, numero = debut, 0
+        with ThreadPoolExecutor(max_workers=max_concurrence, thread_name_prefix="charge") as executeur:
+            while prevue < fin:
+                attente = prevue - time.perf_counter()
+                if attente > 0:
+                    time.sleep(attente)
+                categorie, message = self.tirer_message(rng)
+                mesuree = prevue >= debut_mesure
+                if mesuree:
+                    self.envoyees += 1
+                executeur.submit(requete, prevue, mesuree, categorie, message, rng.choice(ids_sessions))
+                numero += 1
+                prevue = prevue + rng.expovariate(debit) if arrivees == "poisson" else debut + numero / debit
+        duree_reelle = time.perf_counter() - debut_mesure
+
+        return self._rapport("ouverte", duree_reelle, {
+            'debit_cible': debit, 'arrivees': arrivees, 'max_concurrence': max_concurrence, 'sessions': sessions
+        })
+
+    def boucle_fermee(self, utilisateurs: int, duree_s: float, prechauffage_s: float = 5.0,
+                      reflexion_ms: float = 0.0, intervalle_attendu_ms: Optional[float] = None) -> Dict[str, Any]:
+        """N utilisateurs virtuels (une session et une connexion chacun), réflexion entre messages"""
+        self._reinitialiser()
+        debut = time.perf_counter()
+        debut_mesure = debut + prechauffage_s
+        fin = debut_mesure + duree_s
+        intervalle = {'ms': intervalle_attendu_ms}
+
+        def intervalle_calibre() -> float:
+            with self.lock:
+                if intervalle['ms'] is None:
+                    intervalle['ms'] = (self.prechauffage.percentile(50) if self.prechauffage.total else 0.0) + reflexion_ms
+                return intervalle['ms']
+
+        def utilisateur(indice: int):
+            rng = random.Random(self.graine + indice)
+            session_id = f"session_charge_{self.graine}_{indice}"
+            while True:
+                debut_requete = time.perf_counter()
+                if debut_requete >= fin:
+                    break
+                categorie, message = self.tirer_message(rng)
+                issue = self.envoyer(message, session_id)
+                latence_ms = (time.perf_counter() - debut_requete) * 1000
+                if debut_requete >= debut_mesure:
+                    with self.lock:
+                        self.envoyees += 1
+                    self._enregistrer(categorie, issue, latence_ms, latence_ms, intervalle_calibre())
+                else:
+                    self.prechauffage.enregistrer(latence_ms)
+                if reflexion_ms > 0:
+                    time.sleep(rng.expovariate(1000.0 / reflexion_ms))
+
+        threads = [
+            threading.Thread(target=utilisateur, args=(i,), name=f"utilisateur-{i}", daemon=True)
+            for i in range(utilisateurs)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duree_reelle = time.perf_counter() - debut_mesure
+
+        return self._rapport("fermee", duree_reelle, {
+            'utilisateurs': utilisateurs, 'reflexion_ms': reflexion_ms,
+            'intervalle_attendu_ms': round(intervalle['ms'] or 0.0, 3)
+        })
+
+    def _rapport(self, mode: str, duree_s: float, parametres: Dict[str, Any]) -> Dict[str, Any]:
+        terminees = sum(self.issues.values())
+        erreurs = terminees - self.issues.get('ok', 0)
+        return {
+            'date': datetime.now().isoformat(),
+            'url': self.url,
+            'mode': mode,
+            'parametres': parametres,
+            'duree_mesure_s': round(duree_s, 3),
+            'envoyees': self.envoyees,
+            'terminees': terminees,
+            'debit_rps': round(terminees / duree_s, 2) if duree_s > 0 else 0.0,
+            'debit_ok_rps': round(self.issues.get('ok', 0) / duree_s, 2) if duree_s > 0 else 0.0,
+            'taux_erreur': round(erreurs / terminees, 4) if terminees else 0.0,
+            'issues': {
+                issue: {'nombre': n, 'taux': round(n / terminees, 4)} for issue, n in sorted(self.issues.items())
+            },
+            'categories': dict(self.categories),
+            'prechauffage': self.prechauffage.resume(avec_intervalles=False),
+            'latence_service': self.service.resume(),
+            'latence_corrigee': self.corrigee.resume()
+        }
+
+def port_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def demarrer_app_locale(api: str = "saine", scenario: Optional[Dict[str, Any]] = None,
+                        attente_modele_s: float = 120.0) -> Tuple[str, Any]:
+    """Démarre Mila Assist dans le processus (serveur werkzeug multi-thread) avec l'API
+    simulée saine ou en panne; retourne (url, fonction d'arrêt)"""
+    from werkzeug.serving import make_server
+    from stub_api_nas import ApiNasSimulee
+
+    stub = None
+    if api == "saine":
+        stub = ApiNasSimulee(scenario=scenario).demarrer()
+        os.environ['API_URL'] = stub.url
+    else:
+        os.environ['API_URL'] = f"http://127.0.0.1:{port_libre()}/api"  # Port fermé: connexion refusée
+    os.environ.setdefault('API_KEY', 'cle-api-test-charge-locale')
+
+    from app import create_app
+    application = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # Pas de journal d'accès par requête
+    serveur = make_server("127.0.0.1", 0, application.app, threaded=True)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True, name="MilaAssist")
+    thread.start()
+
+    limite = time.time() + attente_modele_s
+    while time.time() < limite:
+        statut = application.services['chatbot'].get_model_status()['status']
+        if statut not in ("loading", "not_initialized"):
+            break
+        time.sleep(0.2)
+    print(f"🧠 Modèle local: {application.services['chatbot'].get_model_status()['message']}")
+
+    def arreter():
+        serveur.shutdown()
+        application.shutdown()
+        if stub:
+            stub.arreter()
+
+    return f"http://127.0.0.1:{serveur.server_port}", arreter
+
+def afficher_rapport(rapport: Dict[str, Any]):
+    titre = {'ouverte': "Boucle ouverte", 'fermee': "Boucle fermée", 'rejeu': "Rejeu"}[rapport['mode']]
+    print(f"\n📊 {titre} - {rapport['terminees']} requêtes en {rapport['duree_mesure_s']:.1f}s "
+          f"({rapport['debit_rps']:.1f} req/s, {rapport['debit_ok_rps']:.1f} ok/s)")
+    print(f"   ❌ Taux d'erreur: {rapport['taux_erreur']:.2%} "
+          + ", ".join(f"{issue}={d['nombre']}" for issue, d in rapport['issues'].items()))
+    print(f"   {'':<12}" + "".join(f"{p:>10}" for p in rapport['latence_service']['percentiles_ms']))
+    for nom in ('latence_service', 'latence_corrigee'):
+        valeurs = rapport[nom]['percentiles_ms'].values()
+        print(f"   {nom.split('_')[1]:<12}" + "".join(f"{v:>8.1f}ms" for v in valeurs))
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de la route /get")
+    cible = parser.add_mutually_exclusive_group(required=True)
+    cible.add_argument("--url", help="URL de l'application (ex: http://127.0.0.1:5000)")
+    cible.add_argument("--app-locale", action="store_true", help="Démarrer l'application dans le processus")
+    parser.add_argument("--api", choices=("saine", "panne"), default="saine",
+                        help="Avec --app-locale: API simulée saine ou en panne")
+    parser.add_argument("--scenario-api", help="Scénario JSON de l'API simulée (latence, pannes)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--debit", type=float, help="Boucle ouverte: requêtes par seconde")
+    mode.add_argument("--utilisateurs", type=int, help="Boucle fermée: nombre d'utilisateurs virtuels")
+    parser.add_argument("--arrivees", choices=("constant", "poisson"), default="constant")
+    parser.add_argument("--max-concurrence", type=int, default=64, help="Boucle ouverte: requêtes simultanées max")
+    parser.add_argument("--sessions", type=int, default=50, help="Boucle ouverte: sessions réutilisées")
+    parser.add_argument("--reflexion-ms", type=float, default=0.0, help="Boucle fermée: réflexion moyenne")
+    parser.add_argument("--intervalle-attendu-ms", type=float,
+                        help="Boucle fermée: intervalle de correction (médiane du préchauffage + réflexion par défaut)")
+    parser.add_argument("--duree", type=float, default=30.0, help="Durée mesurée en secondes")
+    parser.add_argument("--prechauffage", type=float, default=5.0, help="Préchauffage non mesuré en secondes")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Timeout client par requête")
+    parser.add_argument("--patterns", help="Patterns du mélange de messages (.json ou .pkl, dernière sauvegarde par défaut)")
+    parser.add_argument("--trafic", help="Mélange tiré d'une capture (data/traffic_capture.jsonl)")
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--sortie", help="Fichier JSON (logs/charge_get_<date>.json par défaut)")
+    args = parser.parse_args()
+
+    arreter = None
+    url = args.url
+    if args.app_locale:
+        scenario = None
+        if args.scenario_api:
+            with open(args.scenario_api, 'r', encoding='utf-8') as f:
+                scenario = json.load(f)
+        url, arreter = demarrer_app_locale(args.api, scenario)
+        print(f"🚀 Application locale sur {url} (API {args.api})")
+
+    try:
+        melange = charger_melange_trafic(args.trafic) if args.trafic else charger_melange(args.patterns, args.graine)
+        generateur = GenerateurCharge(url, melange, args.timeout, args.graine)
+        if args.debit:
+            rapport = generateur.boucle_ouverte(args.debit, args.duree, args.prechauffage,
+                                                args.max_concurrence, args.arrivees, args.sessions)
+        else:
+            rapport = generateur.boucle_fermee(args.utilisateurs, args.duree, args.prechauffage,
+                                               args.reflexion_ms, args.intervalle_attendu_ms)
+        if args.app_locale:
+            rapport['api'] = args.api
+    finally:
+        if arreter:
+            arreter()
+
+    afficher_rapport(rapport)
+    sortie = args.sortie or os.path.join(
+        BASE_DIR, "logs", f"charge_get_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+    with open(sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    print(f"💾 Rapport: {sortie}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+REJEU DU TRAFIC CAPTURÉ - MILA ASSIST
+=====================================
+
+Rejoue les messages /get capturés par l'application (CAPTURE_TRAFIC=true,
+data/traffic_capture.jsonl) contre une instance locale, en respectant les
+écarts entre messages:
+- --vitesse 1: temps réel
+- --vitesse N: N fois plus vite
+- --vitesse max: sans attente (limité par --max-concurrence)
+
+Chaque session capturée (hachée) garde sa propre session de rejeu. Les
+latences sont mesurées depuis l'instant d'envoi prévu (pas d'omission
+coordonnée) et comparées par niveau de réponse capturé.
+
+La commande analyser décrit la capture hors-ligne: messages distincts (au
+sens de la clé du cache de prédictions), messages les plus fréquents,
+répartition par niveau et taux de succès du cache de prédictions simulé
+(même clé et même éviction FIFO que ChatbotService) pour plusieurs tailles.
+
+Les entrées /feedback sont conservées dans la capture pour l'analyse mais ne
+sont pas rejouées (la réponse attendue n'est pas capturée).
+
+Usage:
+    python tests/rejeu_trafic.py rejouer --app-locale [--api panne] [--vitesse 10]
+    python tests/rejeu_trafic.py rejouer --url http://127.0.0.1:5000 --vitesse max
+    python tests/rejeu_trafic.py analyser [--capacites 100,1000]
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from charge_get import GenerateurCharge, HistogrammeLatence, afficher_rapport, demarrer_app_locale
+from services.chatbot_service import ChatbotService
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTURE_PAR_DEFAUT = os.path.join(BASE_DIR, "data", "traffic_capture.jsonl")
+
+def charger_capture(chemin: str = CAPTURE_PAR_DEFAUT, routes: tuple = ("/get",)) -> List[Dict[str, Any]]:
+    """Entrées de la capture triées par horodatage (lignes tronquées ignorées)"""
+    entrees = []
+    with open(chemin, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            try:
+                entree = json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
+            if entree.get('route', '/get') in routes and entree.get('message'):
+                entrees.append(entree)
+    entrees.sort(key=lambda e: e.get('horodatage', 0.0))
+    return entrees
+
+def cle_cache(message: str) -> str:
+    """Clé du cache de prédictions de ChatbotService pour un message brut"""
+    service = ChatbotService.__new__(ChatbotService)
+    return service._generer_cache_key(service._nettoyer_message_utilisateur(message))
+
+def simuler_cache(cles: List[str], capacite: int) -> float:
+    """Taux de succès d'un cache FIFO de cette capacité (éviction de ChatbotService)"""
+    cache: "OrderedDict[str, None]" = OrderedDict()
+    succes = 0
+    for cle in cles:
+        if cle in cache:
+            succes += 1
+            continue
+        if len(cache) >= capacite:
+            cache.popitem(last=False)
+        cache[cle] = None
+    return succes / len(cles) if cles else 0.0
+
+def analyser(entrees: List[Dict[str, Any]], capacites: List[int], nb_frequents: int = 10) -> Dict[str, Any]:
+    """Distribution des questions et taux de succès du cache simulé"""
+    cles = [cle_cache(e['message']) for e in entrees]
+    frequences = Counter(cles)
+    exemple = {}
+    for cle, entree in zip(cles, entrees):
+        exemple.setdefault(cle, entree['message'])
+    duree = entrees[-1]['horodatage'] - entrees[0]['horodatage'] if len(entrees) > 1 else 0.0
+    return {
+        'messages': len(entrees),
+        'distincts': len(frequences),
+        'sessions': len({e.get('session') for e in entrees}),
+        'duree_capture_s': round(duree, 1),
+        'debit_moyen_rps': round(len(entrees) / duree, 3) if duree > 0 else 0.0,
+        'niveaux': dict(Counter(e.get('niveau') or 'inconnu' for e in entrees)),
+        'plus_frequents': [
+            {'message': exemple[cle], 'nombre': n} for cle, n in frequences.most_common(nb_frequents)
+        ],
+        'cache_simule': {str(c): round(simuler_cache(cles, c), 4) for c in capacites}
+    }
+
+def rejouer(url: str, entrees: List[Dict[str, Any]], vitesse: Optional[float], max_concurrence: int = 64,
+            timeout_s: float = 10.0) -> Dict[str, Any]:
+    """Rejoue les entrées à l'échelle de temps demandée (None: au plus vite)"""
+    generateur = GenerateurCharge(url, [('trafic', '', 1.0)], timeout_s)
+    par_niveau: Dict[str, HistogrammeLatence] = {}
+    verrou = threading.Lock()
+
+    def requete(prevue: float, entree: Dict[str, Any]):
+        debut = time.perf_counter()
+        issue = generateur.envoyer(entree['message'], f"session_rejeu_{entree.get('session') or 'anonyme'}")
+        fin = time.perf_counter()
+        generateur._enregistrer(entree.get('niveau') or 'inconnu', issue, (fin - debut) * 1000, (fin - prevue) * 1000)
+        with verrou:
+            histogramme = par_niveau.setdefault(entree.get('niveau') or 'inconnu', HistogrammeLatence())
+        histogramme.enregistrer((fin - debut) * 1000)
+
+    origine = entrees[0].get('horodatage', 0.0) if entrees else 0.0
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrence, thread_name_prefix="rejeu") as executeur:
+        for entree in entrees:
+            prevue = debut + ((entree.get('horodatage', origine) - origine) / vitesse if vitesse else 0.0)
+            attente = prevue - time.perf_counter()
+            if attente > 0:
+                time.sleep(attente)
+            generateur.envoyees += 1
+            executeur.submit(requete, prevue if vitesse else time.perf_counter(), entree)
+    duree = time.perf_counter() - debut
+
+    rapport = generateur._rapport("rejeu", duree, {
+        'vitesse': vitesse or 'max', 'max_concurrence': max_concurrence, 'messages': len(entrees)
+    })
+    rapport['niveaux_captures'] = rapport.pop('categories')
+    rapport['latence_par_niveau_capture'] = {
+        niveau: h.resume(avec_intervalles=False) for niveau, h in sorted(par_niveau.items())
+    }
+    return rapport
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu et analyse du trafic capturé")
+    parser.add_argument("--capture", default=CAPTURE_PAR_DEFAUT, help="Fichier de capture JSONL")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    rejeu = commandes.add_parser("rejouer", help="Rejouer la capture contre une instance")
+    cible = rejeu.add_mutually_exclusive_group(required=True)
+    cible.add_argument("--url", help="URL de l'application (ex: http://127.0.0.1:5000)")
+    cible.add_argument("--app-locale", action="store_true", help="Démarrer l'application dans le processus")
+    rejeu.add_argument("--api", choices=("saine", "panne"), default="saine")
+    rejeu.add_argument("--vitesse", default="1", help="Facteur d'accélération (1, 10...) ou max")
+    rejeu.add_argument("--max-concurrence", type=int, default=64)
+    rejeu.add_argument("--limite", type=int, help="Nombre maximal de messages rejoués")
+    rejeu.add_argument("--timeout", type=float, default=10.0)
+    rejeu.add_argument("--sortie", help="Fichier JSON (logs/rejeu_trafic_<date>.json par défaut)")
+
+    analyse = commandes.add_parser("analyser", help="Distribution des questions et cache simulé")
+    analyse.add_argument("--capacites", default="100,1000,10000", help="Tailles de cache simulées")
+    args = parser.parse_args()
+
+    entrees = charger_capture(args.capture)
+    if not entrees:
+        print(f"❌ Aucun message /get dans {args.capture} (activez CAPTURE_TRAFIC=true)")
+        sys.exit(1)
+
+    if args.commande == "analyser":
+        rapport = analyser(entrees, [int(c) for c in args.capacites.split(',')])
+        print(json.dumps(rapport, indent=2, ensure_ascii=False))
+        return
+
+    entrees = entrees[:args.limite] if args.limite else entrees
+    vitesse = None if args.vitesse == "max" else float(args.vitesse)
+    arreter = None
+    url = args.url
+    if args.app_locale:
+        url, arreter = demarrer_app_locale(args.api)
+    try:
+        rapport = rejouer(url, entrees, vitesse, args.max_concurrence, args.timeout)
+    finally:
+        if arreter:
+            arreter()
+
+    afficher_rapport(rapport)
+    sortie = args.sortie or os.path.join(
+        BASE_DIR, "logs", f"rejeu_trafic_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+    with open(sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    print(f"💾 Rapport: {sortie}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TEST D'ENDURANCE MÉMOIRE (SOAK) - MILA ASSIST
+=============================================
+
+Envoie du trafic à /get pendant des heures, à débit fixe (boucle ouverte de
+tests/charge_get.py), et relève /debug/memory à intervalle régulier: RSS,
+taille de chaque magasin interne, objets suivis par le ramasse-miettes,
+threads vivants et, avec --tracemalloc, les lignes dont les allocations ont le
+plus augmenté depuis le relevé précédent.
+
+Le trafic est rejoué depuis la capture (data/traffic_capture.jsonl, voir
+tests/rejeu_trafic.py) si elle existe, sinon tiré du mélange de charge_get.
+
+En fin de test, la pente du RSS (Mo/heure, moindres carrés après la phase de
+montée en charge) et la croissance de chaque magasin désignent les suspects.
+Le code de sortie est 1 si la pente dépasse --seuil-mo-h (test d'au moins une
+heure: en deçà, la pente reflète surtout le remplissage des caches).
+
+Usage:
+    python tests/soak_memoire.py --app-locale --duree 4h --debit 5 --intervalle 5m
+    python tests/soak_memoire.py --url http://127.0.0.1:5000 --cle-admin <clé> --duree 30m --tracemalloc 10
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import secrets
+import argparse
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+
+import requests
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from charge_get import GenerateurCharge, charger_melange, charger_melange_trafic, demarrer_app_locale
+from rejeu_trafic import CAPTURE_PAR_DEFAUT
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UNITES = {'s': 1, 'm': 60, 'h': 3600}
+
+def lire_duree(texte: str) -> float:
+    """'90s', '30m', '4h' ou un nombre de secondes"""
+    texte = texte.strip().lower()
+    if texte and texte[-1] in UNITES:
+        return float(texte[:-1]) * UNITES[texte[-1]]
+    return float(texte)
+
+def pente_par_heure(points: List[tuple]) -> float:
+    """Pente (unité par heure) de la droite des moindres carrés sur (secondes, valeur)"""
+    if len(points) < 2:
+        return 0.0
+    moyenne_t = sum(t for t, _ in points) / len(points)
+    moyenne_v = sum(v for _, v in points) / len(points)
+    variance = sum((t - moyenne_t) ** 2 for t, _ in points)
+    if variance == 0:
+        return 0.0
+    covariance = sum((t - moyenne_t) * (v - moyenne_v) for t, v in points)
+    return covariance / variance * 3600
+
+def analyser_echantillons(echantillons: List[Dict[str, Any]], part_montee: float = 0.1) -> Dict[str, Any]:
+    """Pente du RSS hors montée en charge et croissance des magasins, objets et threads"""
+    if not echantillons:
+        return {}
+    debut = max(1, int(len(echantillons) * part_montee)) if len(echantillons) > 2 else 0
+    stables = echantillons[debut:]
+    premier, dernier = stables[0], stables[-1]
+    rss = [e['rss_mo'] for e in echantillons if e.get('rss_mo') is not None]
+
+    magasins = {}
+    for nom, fin in dernier.get('magasins', {}).items():
+        depart = premier.get('magasins', {}).get(nom, {})
+        if 'octets_approx' not in fin:
+            continue
+        magasins[nom] = {
+            'octets_fin': fin['octets_approx'],
+            'croissance_octets': fin['octets_approx'] - depart.get('octets_approx', 0),
+            'croissance_elements': (fin.get('elements') or 0) - (depart.get('elements') or 0),
+            'pente_ko_h': round(pente_par_heure([
+                (e['t_s'], e['magasins'][nom]['octets_approx'] / 1024)
+                for e in stables if 'octets_approx' in e.get('magasins', {}).get(nom, {})
+            ]), 1)
+        }
+
+    types_depart = premier.get('gc', {}).get('types_plus_nombreux', {})
+    types_fin = dernier.get('gc', {}).get('types_plus_nombreux', {})
+    croissance_types = {
+        nom: n - types_depart[nom] for nom, n in types_fin.items() if nom in types_depart
+    }
+    threads_depart, threads_fin = premier.get('threads', {}), dernier.get('threads', {})
+
+    return {
+        'echantillons': len(echantillons),
+        'duree_h': round(dernier['t_s'] / 3600, 2),
+        'rss_mo': {
+            'debut': rss[0] if rss else None,
+            'fin': rss[-1] if rss else None,
+            'max': max(rss) if rss else None,
+            'pente_mo_h': round(pente_par_heure([
+                (e['t_s'], e['rss_mo']) for e in stables if e.get('rss_mo') is not None
+            ]), 2)
+        },
+        'magasins': dict(sorted(magasins.items(), key=lambda m: -m[1]['croissance_octets'])),
+        'objets_gc': {
+            'croissance': dernier.get('gc', {}).get('suivis', 0) - premier.get('gc', {}).get('suivis', 0),
+            'types_en_hausse': dict(sorted(
+                ((n, d) for n, d in croissance_types.items() if d > 0), key=lambda e: -e[1]
+            )[:10])
+        },
+        'threads': {
+            nom: {'debut': threads_depart.get(nom, 0), 'fin': n}
+            for nom, n in threads_fin.items() if n != threads_depart.get(nom, 0)
+        }
+    }
+
+def relever(session: requests.Session, url: str, cle_admin: str, top: int, timeout_s: float = 60.0) -> Dict[str, Any]:
+    reponse = session.get(f"{url}/debug/memory", params={'top': top},
+                          headers={'X-Admin-Key': cle_admin}, timeout=timeout_s)
+    reponse.raise_for_status()
+    return reponse.json()
+
+def endurance(url: str, cle_admin: str, melange, debit: float, duree_s: float, intervalle_s: float,
+              fichier_echantillons: str, tracemalloc_frames: int = 0, top: int = 10,
+              max_concurrence: int = 32) -> Dict[str, Any]:
+    """Trafic à débit fixe pendant duree_s, relevé mémoire toutes les intervalle_s"""
+    session = requests.Session()
+    if tracemalloc_frames:
+        session.post(f"{url}/debug/memory", params={'tracemalloc': 'start', 'frames': tracemalloc_frames},
+                     headers={'X-Admin-Key': cle_admin}, timeout=60).raise_for_status()
+
+    generateur = GenerateurCharge(url, melange)
+    resultat: Dict[str, Any] = {}
+    charge = threading.Thread(
+        target=lambda: resultat.update(generateur.boucle_ouverte(debit, duree_s, 0.0, max_concurrence)),
+        daemon=True, name="soak-charge"
+    )
+
+    echantillons = []
+    os.makedirs(os.path.dirname(os.path.abspath(fichier_echantillons)), exist_ok=True)
+    debut = time.perf_counter()
+    charge.start()
+    with open(fichier_echantillons, 'w', encoding='utf-8') as f:
+        prochain = debut
+        while True:
+            termine = not charge.is_alive()
+            echantillon = relever(session, url, cle_admin, top)
+            echantillon['t_s'] = round(time.perf_counter() - debut, 1)
+            echantillon['requetes_envoyees'] = generateur.envoyees
+            echantillons.append(echantillon)
+            f.write(json.dumps(echantillon, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"⏱️ {echantillon['t_s'] / 60:7.1f} min  RSS {echantillon['rss_mo']} Mo  "
+                  f"objets {echantillon['gc']['suivis']}  requêtes {generateur.envoyees}")
+            if termine:
+                break
+            prochain += intervalle_s
+            charge.join(max(0.0, prochain - time.perf_counter()))
+
+    return {'analyse': analyser_echantillons(echantillons), 'charge': resultat}
+
+def main():
+    parser = argparse.ArgumentParser(description="Test d'endurance mémoire de la route /get")
+    cible = parser.add_mutually_exclusive_group(required=True)
+    cible.add_argument("--url", help="URL de l'application (ex: http://127.0.0.1:5000)")
+    cible.add_argument("--app-locale", action="store_true", help="Démarrer l'application dans le processus")
+    parser.add_argument("--api", choices=("saine", "panne"), default="saine")
+    parser.add_argument("--cle-admin", default=os.getenv('PROFILAGE_CLE_ADMIN'),
+                        help="Clé admin de /debug/memory (PROFILAGE_CLE_ADMIN)")
+    parser.add_argument("--trafic", default=CAPTURE_PAR_DEFAUT, help="Capture à rejouer (mélange par défaut si absente)")
+    parser.add_argument("--debit", type=float, default=5.0, help="Requêtes par seconde")
+    parser.add_argument("--duree", default="1h", help="Durée du test (90s, 30m, 4h)")
+    parser.add_argument("--intervalle", default="1m", help="Intervalle entre relevés mémoire")
+    parser.add_argument("--tracemalloc", type=int, default=0, help="Démarrer tracemalloc avec N frames")
+    parser.add_argument("--top", type=int, default=10, help="Lignes tracemalloc et types d'objets par relevé")
+    parser.add_argument("--seuil-mo-h", type=float, default=5.0, help="Pente du RSS au-delà de laquelle le test échoue")
+    parser.add_argument("--sortie", help="Préfixe des fichiers (logs/soak_memoire_<date> par défaut)")
+    args = parser.parse_args()
+
+    arreter = None
+    url, cle_admin = args.url, args.cle_admin
+    if args.app_locale:
+        cle_admin = cle_admin or secrets.token_hex(16)
+        os.environ['PROFILAGE_CLE_ADMIN'] = cle_admin
+        url, arreter = demarrer_app_locale(args.api)
+        print(f"🚀 Application locale sur {url} (API {args.api})")
+    if not cle_admin:
+        print("❌ Clé admin requise (--cle-admin ou PROFILAGE_CLE_ADMIN)")
+        sys.exit(2)
+
+    if os.path.exists(args.trafic):
+        melange = charger_melange_trafic(args.trafic)
+        print(f"🎙️ Trafic rejoué depuis {args.trafic} ({len(melange)} messages distincts)")
+    else:
+        melange = charger_melange()
+    prefixe = args.sortie or os.path.join(BASE_DIR, "logs", f"soak_memoire_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    try:
+        rapport = endurance(url, cle_admin, melange, args.debit, lire_duree(args.duree), lire_duree(args.intervalle),
+                            f"{prefixe}.jsonl", args.tracemalloc, args.top)
+    finally:
+        if arreter:
+            arreter()
+
+    analyse = rapport['analyse']
+    print(f"\n📈 RSS: {analyse['rss_mo']['debut']} → {analyse['rss_mo']['fin']} Mo "
+          f"(max {analyse['rss_mo']['max']}, pente {analyse['rss_mo']['pente_mo_h']} Mo/h)")
+    for nom, magasin in analyse['magasins'].items():
+        print(f"   {nom:<22} {magasin['octets_fin'] / 1024:10.1f} Ko  ({magasin['croissance_octets'] / 1024:+.1f} Ko, "
+              f"{magasin['croissance_elements']:+d} éléments, {magasin['pente_ko_h']:+.1f} Ko/h)")
+    if analyse['threads']:
+        print(f"   🧵 Threads: {analyse['threads']}")
+    print(f"   🧮 Objets suivis: {analyse['objets_gc']['croissance']:+d} {analyse['objets_gc']['types_en_hausse']}")
+
+    with open(f"{prefixe}.json", 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    print(f"💾 Relevés: {prefixe}.jsonl - Rapport: {prefixe}.json")
+    if analyse['duree_h'] < 1:
+        print("⚠️ Test trop court pour conclure sur la pente du RSS")
+        sys.exit(0)
+    sys.exit(1 if analyse['rss_mo']['pente_mo_h'] > args.seuil_mo_h else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API NAS SIMULÉE - MILA ASSIST
+=============================
+
+Serveur local (bibliothèque standard uniquement) qui remplace l'API du NAS
+pour les tests de bout en bout hors-ligne: mêmes routes et mêmes formes JSON
+que celles consommées par services/api_client.py et train.py.
+
+Routes: /health, /chat, /journal_conversation, /feedback, /search (avec ETag),
+/stats, /fr/statistiques, /knowledge (GET liste, POST ajout).
+
+Pannes scriptables par scénario (global et par route):
+- latence_ms: {"distribution": "fixe", "valeur": 20}
+              {"distribution": "uniforme", "min": 5, "max": 50}
+              {"distribution": "normale", "moyenne": 30, "ecart_type": 10}
+              {"distribution": "lognormale", "mediane": 20, "sigma": 0.5}
+              {"distribution": "exponentielle", "moyenne": 15}
+- taux_erreur (+ code_erreur, 500 par défaut): réponse HTTP d'erreur
+- taux_timeout (+ duree_timeout_s): réponse retardée au-delà du timeout client
+- taux_reset: connexion coupée (RST) sans réponse
+
+Exemple de scénario:
+    {"graine": 42,
+     "defaut": {"latence_ms": {"distribution": "lognormale", "mediane": 20, "sigma": 0.5}},
+     "routes": {"chat": {"taux_erreur": 0.1, "code_erreur": 503, "taux_reset": 0.05}}}
+
+Le scénario se change à chaud (POST /_stub/scenario) et les compteurs par
+route et par issue se lisent sur GET /_stub/stats (remis à zéro par DELETE).
+
+Usage:
+    python tests/stub_api_nas.py [--port 8765] [--prefixe /api] [--scenario scenario.json]
+    API_URL=http://127.0.0.1:8765/api python app.py
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import math
+import pickle
+import random
+import socket
+import struct
+import hashlib
+import argparse
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ISSUES = ("ok", "erreur", "timeout", "reset")
+
+def tirer_latence_ms(loi: Optional[Dict[str, Any]], rng: random.Random) -> float:
+    """Latence tirée selon la distribution décrite (0 si aucune)"""
+    if not loi:
+        return 0.0
+    distribution = loi.get('distribution', 'fixe')
+    if distribution == 'fixe':
+        latence = loi.get('valeur', 0.0)
+    elif distribution == 'uniforme':
+        latence = rng.uniform(loi.get('min', 0.0), loi.get('max', 0.0))
+    elif distribution == 'normale':
+        latence = rng.gauss(loi.get('moyenne', 0.0), loi.get('ecart_type', 0.0))
+    elif distribution == 'lognormale':
+        latence = rng.lognormvariate(math.log(max(loi.get('mediane', 1.0), 1e-6)), loi.get('sigma', 0.0))
+    elif distribution == 'exponentielle':
+        latence = rng.expovariate(1.0 / loi['moyenne']) if loi.get('moyenne') else 0.0
+    else:
+        raise ValueError(f"Distribution de latence inconnue: {distribution}")
+    return max(0.0, float(latence))
+
+class ScenarioPannes:
+    """Latences et pannes par route, tirées avec une graine fixe (reproductible)"""
+
+    def __init__(self, scenario: Optional[Dict[str, Any]] = None):
+        self.scenario = scenario or {}
+        self.rng = random.Random(self.scenario.get('graine', 42))
+        self.lock = threading.Lock()
+
+    def regles(self, route: str) -> Dict[str, Any]:
+        """Règles de la route (surcharge des règles par défaut)"""
+        return {**self.scenario.get('defaut', {}), **self.scenario.get('routes', {}).get(route, {})}
+
+    def tirer(self, route: str) -> Tuple[str, float, Dict[str, Any]]:
+        """Issue de la requête ('ok', 'erreur', 'timeout', 'reset'), latence injectée (ms) et règles"""
+        regles = self.regles(route)
+        with self.lock:
+            latence = tirer_latence_ms(regles.get('latence_ms'), self.rng)
+            tirage = self.rng.random()
+        seuil = 0.0
+        for issue in ("reset", "timeout", "erreur"):
+            seuil += regles.get(f"taux_{issue}", 0.0)
+            if tirage < seuil:
+                return issue, latence, regles
+        return "ok", latence, regles
+
+def connaissances_snapshot(chemin: str) -> List[Dict[str, Any]]:
+    """Entrées de l'API enregistrées dans le snapshot des recherches de train.py (sans doublon)"""
+    with open(chemin, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    connaissances, vues = [], set()
+    for entree in snapshot.get('requetes', {}).values():
+        for resultat in entree.get('results', []):
+            cle = (resultat.get('tag', '').strip(), resultat.get('question', '').strip())
+            if all(cle) and resultat.get('response') and cle not in vues:
+                vues.add(cle)
+                connaissances.append(resultat)
+    return [
+        dict(c, id=c['id'] if isinstance(c.get('id'), int) else i + 1)
+        for i, c in enumerate(connaissances)
+    ]
+
+def charger_connaissances(chemin: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Base de connaissances de la simulation: liste JSON d'entrées, .pkl de patterns, ou par
+    défaut le snapshot des connaissances de l'entraînement (FETCH_SNAPSHOT_PATH)"""
+    if not chemin:
+        snapshot = os.getenv('FETCH_SNAPSHOT_PATH', os.path.join(BASE_DIR, "data", "Cache", "knowledge_snapshot.json"))
+        if not os.path.exists(snapshot):
+            raise FileNotFoundError(
+                f"Snapshot des connaissances absent ({snapshot}): lancer train.py ou passer --connaissances"
+            )
+        return connaissances_snapshot(snapshot)
+    if chemin.endswith('.json'):
+        with open(chemin, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    with open(chemin, 'rb') as f:
+        donnees_tags = pickle.load(f)
+    return [
+        {'id': i + 1, 'tag': tag, 'question': question, 'response': donnees['responses'][0]}
+        for i, (tag, donnees, question) in enumerate(
+            (tag, d, q) for tag, d in donnees_tags.items() for q in d['patterns'] if d['responses']
+        )
+    ]
+
+class EtatApi:
+    """Données de l'API simulée: connaissances, conversations, feedbacks et compteurs"""
+
+    def __init__(self, connaissances: List[Dict[str, Any]], scenario: ScenarioPannes):
+        self.connaissances = list(connaissances)
+        self.scenario = scenario
+        self.conversations: List[Dict[str, Any]] = []
+        self.feedbacks: List[Dict[str, Any]] = []
+        self.compteurs: Dict[str, Counter] = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _mots(texte: str) -> set:
+        return {m for m in ''.join(c if c.isalnum() else ' ' for c in texte.lower()).split() if len(m) > 1}
+
+    def rechercher(self, requete: str, top_k: int, seuil: float) -> List[Dict[str, Any]]:
+        """Résultats triés par score (part des mots de la requête présents dans la connaissance)"""
+        mots_requete = self._mots(requete)
+        with self.lock:
+            connaissances = list(self.connaissances)
+        if not mots_requete:
+            return [dict(c, score=1.0) for c in connaissances][:top_k]
+
+        resultats = []
+        for c in connaissances:
+            score = len(mots_requete & self._mots(f"{c['question']} {c['response']}")) / len(mots_requete)
+            if score > 0 and score >= seuil:
+                resultats.append(dict(c, score=round(score, 4)))
+        resultats.sort(key=lambda r: -r['score'])
+        return resultats[:top_k]
+
+    def repondre(self, message: str, seuil: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Connaissance dont la question ressemble le plus au message (Jaccard) et son score"""
+        mots_message = self._mots(message)
+        meilleure, meilleur_score = None, 0.0
+        with self.lock:
+            connaissances = list(self.connaissances)
+        for c in connaissances:
+            mots_question = self._mots(c['question'])
+            if mots_message and mots_question:
+                score = len(mots_message & mots_question) / len(mots_message | mots_question)
+                if score > meilleur_score:
+                    meilleure, meilleur_score = c, score
+        return (meilleure if meilleur_score >= seuil else None), meilleur_score
+
+    def statistiques(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'total_connaissances': len(self.connaissances),
+                'total_conversations': len(self.conversations),
+                'total_feedbacks': len(self.feedbacks),
+                'requetes_par_route': {route: sum(c.values()) for route, c in self.compteurs.items()}
+            }
+
+class GestionnaireApi(BaseHTTPRequestHandler):
+    """Routes de l'API simulée; latence et pannes appliquées avant chaque réponse"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # En-têtes et corps écrits séparément: sans TCP_NODELAY, +40 ms par appel keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def etat(self) -> EtatApi:
+        return self.server.etat
+
+    def _route(self) -> str:
+        chemin = self.path.split('?', 1)[0]
+        prefixe = self.server.prefixe
+        if prefixe and chemin.startswith(prefixe):
+            chemin = chemin[len(prefixe):]
+        return chemin.strip('/')
+
+    def _lire_json(self) -> Dict[str, Any]:
+        longueur = int(self.headers.get('Content-Length') or 0)
+        if not longueur:
+            return {}
+        try:
+            return json.loads(self.rfile.read(longueur) or b'{}')
+        except ValueError:
+            return {}
+
+    def _envoyer(self, code: int, donnees: Optional[Dict[str, Any]] = None, entetes: Optional[Dict[str, str]] = None):
+        corps = json.dumps(donnees, ensure_ascii=False).encode('utf-8') if donnees is not None else b''
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corps)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _couper_connexion(self):
+        """Fermeture immédiate avec RST (SO_LINGER à 0), sans réponse"""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+    def _traiter(self, methode: str):
+        route = self._route()
+        corps = self._lire_json()
+
+        if route.startswith('_stub/'):
+            return self._administrer(methode, route, corps)
+
+        cle_api = self.server.cle_api
+        if cle_api and self.headers.get('X-API-Key') != cle_api:
+            return self._envoyer(401, {'success': False, 'error': 'Clé API invalide'})
+
+        issue, latence_ms, regles = self.etat.scenario.tirer(route)
+        with self.etat.lock:
+            self.etat.compteurs[route][issue] += 1
+
+        if issue == 'reset':
+            time.sleep(latence_ms / 1000)
+            return self._couper_connexion()
+        if issue == 'timeout':
+            time.sleep(regles.get('duree_timeout_s', 30.0))
+        else:
+            time.sleep(latence_ms / 1000)
+        if issue == 'erreur':
+            code = regles.get('code_erreur', 500)
+            return self._envoyer(code, {'success': False, 'error': f"Erreur simulée {code}"})
+
+        gestionnaire = self.server.routes.get((methode, route))
+        if gestionnaire is None:
+            return self._envoyer(404, {'success': False, 'error': f"Route inconnue: {methode} /{route}"})
+        code, donnees, entetes = gestionnaire(self, corps, latence_ms)
+        self._envoyer(code, donnees, entetes)
+
+    def _administrer(self, methode: str, route: str, corps: Dict[str, Any]):
+        if route == '_stub/scenario' and methode == 'POST':
+            self.server.etat.scenario = ScenarioPannes(corps)
+            return self._envoyer(200, {'success': True, 'scenario': corps})
+        if route == '_stub/scenario' and methode == 'GET':
+            return self._envoyer(200, {'success': True, 'scenario': self.etat.scenario.scenario})
+        if route == '_stub/stats' and methode == 'GET':
+            with self.etat.lock:
+                compteurs = {r: {issue: c[issue] for issue in ISSUES} for r, c in self.etat.compteurs.items()}
+            return self._envoyer(200, {'success': True, 'compteurs': compteurs})
+        if route == '_stub/stats' and methode == 'DELETE':
+            with self.etat.lock:
+                self.etat.compteurs.clear()
+            return self._envoyer(200, {'success': True})
+        self._envoyer(404, {'success': False, 'error': f"Route d'administration inconnue: {route}"})
+
+    def do_GET(self):
+        self._traiter('GET')
+
+    def do_POST(self):
+        self._traiter('POST')
+
+    def do_DELETE(self):
+        self._traiter('DELETE')
+
+    # === ROUTES DE L'API ===
+
+    def route_health(self, corps, latence_ms):
+        return 200, {'status': 'healthy', 'timestamp': datetime.now().isoformat(), 'version': 'stub'}, None
+
+    def route_chat(self, corps, latence_ms):
+        message = (corps.get('message') or '').strip()
+        if not message or not corps.get('session_id'):
+            return 400, {'success': False, 'error': 'message et session_id requis'}, None
+        connaissance, score = self.etat.repondre(message, float(corps.get('threshold', 0.7)))
+        if connaissance is None:
+            return 200, {'success': False, 'error': 'Aucune réponse au-dessus du seuil', 'confidence': round(score, 4)}, None
+        return 200, {
+            'success': True,
+            'response': connaissance['response'],
+            'confidence': round(score, 4),
+            'knowledge_id': connaissance['id'],
+            'response_time_ms': round(latence_ms, 2),
+            'source': 'api'
+        }, None
+
+    def route_journal_conversation(self, corps, latence_ms):
+        if not all(corps.get(c) for c in ('id_session', 'question', 'reponse')):
+            return 400, {'success': False, 'error': 'id_session, question et reponse requis'}, None
+        with self.etat.lock:
+            self.etat.conversations.append(corps)
+            identifiant = len(self.etat.conversations)
+        return 200, {'success': True, 'id': identifiant}, None
+
+    def route_feedback(self, corps, latence_ms):
+        if not corps.get('question') or not corps.get('reponse_attendue'):
+            return 400, {'success': False, 'error': 'question et reponse_attendue requises'}, None
+        with self.etat.lock:
+            self.etat.feedbacks.append(corps)
+            identifiant = len(self.etat.feedbacks)
+        return 200, {'success': True, 'id': identifiant}, None
+
+    def route_search(self, corps, latence_ms):
+        resultats = self.etat.rechercher(
+            corps.get('query', ''), int(corps.get('top_k', 5)), float(corps.get('threshold', 0.5))
+        )
+        etag = '"' + hashlib.sha256(json.dumps(resultats, sort_keys=True).encode('utf-8')).hexdigest()[:32] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            return 304, None, {'ETag': etag}
+        return 200, {'success': True, 'results': resultats, 'count': len(resultats)}, {'ETag': etag}
+
+    def route_stats(self, corps, latence_ms):
+        return 200, {'success': True, 'stats': self.etat.statistiques()}, None
+
+    def route_statistiques(self, corps, latence_ms):
+        return 200, {'success': True, 'statistiques': self.etat.statistiques()}, None
+
+    def route_knowledge_liste(self, corps, latence_ms):
+        with self.etat.lock:
+            connaissances = list(self.etat.connaissances)
+        return 200, {'success': True, 'knowledge': connaissances, 'count': len(connaissances)}, None
+
+    def route_knowledge_ajout(self, corps, latence_ms):
+        if not all(corps.get(c) for c in ('tag', 'question', 'response')):
+            return 400, {'success': False, 'error': 'tag, question et response requis'}, None
+        with self.etat.lock:
+            identifiant = max((c['id'] for c in self.etat.connaissances), default=0) + 1
+            self.etat.connaissances.append({
+                'id': identifiant, 'tag': corps['tag'], 'question': corps['question'], 'response': corps['response']
+            })
+        return 200, {'success': True, 'id': identifiant}, None
+
+ROUTES = {
+    ('GET', 'health'): GestionnaireApi.route_health,
+    ('POST', 'chat'): GestionnaireApi.route_chat,
+    ('POST', 'journal_conversation'): GestionnaireApi.route_journal_conversation,
+    ('POST', 'feedback'): GestionnaireApi.route_feedback,
+    ('POST', 'search'): GestionnaireApi.route_search,
+    ('GET', 'stats'): GestionnaireApi.route_stats,
+    ('GET', 'fr/statistiques'): GestionnaireApi.route_statistiques,
+    ('GET', 'knowledge'): GestionnaireApi.route_knowledge_liste,
+    ('POST', 'knowledge'): GestionnaireApi.route_knowledge_ajout,
+}
+
+class ServeurApi(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread; les déconnexions côté client (timeout, reset) ne sont pas des erreurs"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionError, socket.timeout)):
+            super().handle_error(request, client_address)
+
+class ApiNasSimulee:
+    """Serveur de l'API simulée dans un thread (utilisable comme gestionnaire de contexte)"""
+
+    def __init__(self, scenario: Optional[Dict[str, Any]] = None, connaissances: Optional[List[Dict[str, Any]]] = None,
+                 hote: str = "127.0.0.1", port: int = 0, prefixe: str = "/api", cle_api: Optional[str] = None):
+        self.serveur = ServeurApi((hote, port), GestionnaireApi)
+        self.serveur.etat = EtatApi(
+            connaissances if connaissances is not None else charger_connaissances(), ScenarioPannes(scenario)
+        )
+        self.serveur.routes = ROUTES
+        self.serveur.prefixe = prefixe.rstrip('/')
+        self.serveur.cle_api = cle_api
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL à utiliser comme API_URL"""
+        hote, port = self.serveur.server_address[:2]
+        return f"http://{hote}:{port}{self.serveur.prefixe}"
+
+    @property
+    def etat(self) -> EtatApi:
+        return self.serveur.etat
+
+    def configurer(self, scenario: Dict[str, Any]):
+        """Remplace le scénario de pannes à chaud"""
+        self.serveur.etat.scenario = ScenarioPannes(scenario)
+
+    def demarrer(self) -> "ApiNasSimulee":
+        self.thread = threading.Thread(target=self.serveur.serve_forever, daemon=True, name="ApiNasSimulee")
+        self.thread.start()
+        return self
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+    def __enter__(self) -> "ApiNasSimulee":
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
+
+def main():
+    parser = argparse.ArgumentParser(description="API NAS simulée avec latence et pannes scriptables")
+    parser.add_argument("--hote", default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=8765, help="Port d'écoute")
+    parser.add_argument("--prefixe", default="/api", help="Préfixe des routes (comme API_URL)")
+    parser.add_argument("--scenario", help="Scénario de pannes (JSON)")
+    parser.add_argument("--connaissances",
+                        help="Connaissances (liste .json ou .pkl de patterns, snapshot de train.py par défaut)")
+    parser.add_argument("--cle-api", default=None, help="Exiger cette valeur dans X-API-Key")
+    args = parser.parse_args()
+
+    scenario = None
+    if args.scenario:
+        with open(args.scenario, 'r', encoding='utf-8') as f:
+            scenario = json.load(f)
+
+    api = ApiNasSimulee(scenario, charger_connaissances(args.connaissances), args.hote, args.port,
+                        args.prefixe, args.cle_api)
+    print(f"🧪 API NAS simulée: {api.url} ({len(api.etat.connaissances)} connaissances)")
+    print(f"💡 API_URL={api.url}")
+    try:
+        api.serveur.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt de l'API simulée")
+    finally:
+        api.serveur.server_close()
+
+if __name__ == "__main__":
+    main()
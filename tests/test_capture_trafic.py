@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DE LA CAPTURE ET DU REJEU DU TRAFIC - MILA ASSIST
+=======================================================
+
+- Anonymisation des messages et hachage salé des sessions
+- Écriture tamponnée: vidage par bloc, à la fermeture, abandon au-delà de la capacité
+- Lecture de la capture et simulation du cache de prédictions
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.capture_service import CaptureTraficService, anonymiser_message
+from rejeu_trafic import analyser, charger_capture, simuler_cache
+
+class TestCaptureTrafic(unittest.TestCase):
+    """Tests du service de capture"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.chemin = os.path.join(self.temp_dir, "data", "traffic_capture.jsonl")
+
+    def lire(self):
+        with open(self.chemin, 'r', encoding='utf-8') as f:
+            return [json.loads(ligne) for ligne in f]
+
+    def test_anonymisation(self):
+        """E-mails, URL, pseudos et numéros sont masqués; la session n'apparaît qu'en hachage"""
+        self.assertEqual(
+            anonymiser_message("écris à moi@exemple.fr ou @streameur, voir https://twitch.tv/x au 06 12 34 56 78"),
+            "écris à <email> ou <pseudo>, voir <url> au <numero>"
+        )
+        capture = CaptureTraficService(self.chemin, sel="sel")
+        capture.enregistrer("/get", "session_123", "bonjour", "api", duree_ms=12.5)
+        capture.fermer()
+        entree = self.lire()[0]
+        self.assertEqual(entree['session'], hashlib.sha256(b"selsession_123").hexdigest()[:16])
+        self.assertNotIn("session_123", json.dumps(entree))
+        self.assertEqual((entree['route'], entree['message'], entree['niveau'], entree['duree_ms']),
+                         ("/get", "bonjour", "api", 12.5))
+
+    def test_ecriture_tamponnee(self):
+        """Rien n'est écrit avant un bloc complet; la fermeture vide le reste; le tampon est borné"""
+        capture = CaptureTraficService(self.chemin, taille_bloc=1000, intervalle_vidage_s=60, capacite_tampon=5)
+        for i in range(7):
+            capture.enregistrer("/get", f"s{i}", f"message {i}")
+        self.assertFalse(os.path.exists(self.chemin))
+        capture.fermer()
+        self.assertEqual([e['message'] for e in self.lire()], [f"message {i}" for i in range(5)])
+        self.assertEqual(capture.get_stats()['perdues'], 2)
+
+class TestRejeuTrafic(unittest.TestCase):
+    """Tests de la lecture et de l'analyse de la capture"""
+
+    def test_lecture_et_cache_simule(self):
+        """Seules les entrées /get complètes sont relues, triées; le cache FIFO est simulé"""
+        with tempfile.NamedTemporaryFile('w', suffix=".jsonl", delete=False, encoding='utf-8') as f:
+            f.write(json.dumps({'horodatage': 2.0, 'route': '/get', 'message': 'Bonjour !', 'niveau': 'api'}) + "\n")
+            f.write(json.dumps({'horodatage': 1.0, 'route': '/get', 'message': 'merci', 'niveau': 'keras'}) + "\n")
+            f.write(json.dumps({'horodatage': 3.0, 'route': '/feedback', 'message': 'bonjour'}) + "\n")
+            f.write(json.dumps({'horodatage': 4.0, 'route': '/get', 'message': 'bonjour', 'niveau': 'keras_cache'}) + "\n")
+            f.write('{"horodatage": 5.0, "route": "/get", "mess')
+        self.addCleanup(os.remove, f.name)
+
+        entrees = charger_capture(f.name)
+        self.assertEqual([e['message'] for e in entrees], ['merci', 'Bonjour !', 'bonjour'])
+        rapport = analyser(entrees, [1, 10])
+        self.assertEqual(rapport['distincts'], 2)  # "Bonjour !" et "bonjour" partagent la clé du cache
+        self.assertEqual(rapport['cache_simule'], {'1': round(1 / 3, 4), '10': round(1 / 3, 4)})
+        self.assertEqual(simuler_cache(['a', 'b', 'a', 'c', 'a'], 2), 0.2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DU GÉNÉRATEUR DE CHARGE - MILA ASSIST
+===========================================
+
+- Histogramme de latence: percentiles à 1 % près, correction de l'omission coordonnée
+- Boucle fermée: une session et une connexion par utilisateur virtuel
+- Boucle ouverte: la file d'attente côté client apparaît dans la latence corrigée
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+from flask import Flask, request
+from werkzeug.serving import make_server
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from charge_get import GenerateurCharge, HistogrammeLatence
+
+MELANGE = [('connue', 'bonjour', 0.8), ('hors_sujet', 'erreur', 0.2)]
+
+class TestHistogrammeLatence(unittest.TestCase):
+    """Tests de l'histogramme log-linéaire"""
+
+    def test_percentiles(self):
+        """Percentiles à la précision relative près, jamais sous-estimés"""
+        histogramme = HistogrammeLatence()
+        for valeur in range(1, 1001):
+            histogramme.enregistrer(float(valeur))
+        for p, attendu in ((50, 500), (90, 900), (99, 990), (99.9, 999)):
+            self.assertGreaterEqual(histogramme.percentile(p), attendu)
+            self.assertLessEqual(histogramme.percentile(p), attendu * 1.01)
+        self.assertEqual(histogramme.percentile(100), 1000)
+
+    def test_correction_omission_coordonnee(self):
+        """Une réponse de 100 ms à 10 ms d'intervalle ajoute les 9 requêtes qui attendaient"""
+        histogramme = HistogrammeLatence()
+        for _ in range(90):
+            histogramme.enregistrer(5.0, intervalle_attendu_ms=10.0)
+        histogramme.enregistrer(100.0, intervalle_attendu_ms=10.0)
+        self.assertEqual(histogramme.total, 100)
+        self.assertGreater(histogramme.percentile(95), 50)
+
+class TestGenerateurCharge(unittest.TestCase):
+    """Tests des deux boucles contre une route /get minimale"""
+
+    def setUp(self):
+        self.sessions = set()
+        self.verrou = threading.Lock()
+        app = Flask(__name__)
+
+        @app.route("/get", methods=["POST"])
+        def get():
+            self.sessions.add(request.form['session_id'])
+            if request.form['msg'] == 'erreur':
+                return "Erreur", 503
+            with self.verrou:  # Un seul traitement à la fois, 20 ms chacun
+                time.sleep(0.02)
+            return "Bonjour !"
+
+        self.serveur = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.addCleanup(self.serveur.shutdown)
+        self.generateur = GenerateurCharge(f"http://127.0.0.1:{self.serveur.server_port}", MELANGE)
+
+    def test_boucle_fermee(self):
+        """Sessions réutilisées, préchauffage exclu et erreurs comptées par type"""
+        rapport = self.generateur.boucle_fermee(2, duree_s=0.5, prechauffage_s=0.2)
+        self.assertEqual(self.sessions, {"session_charge_42_0", "session_charge_42_1"})
+        self.assertEqual(rapport['terminees'], rapport['latence_service']['total'])
+        self.assertEqual(set(rapport['issues']), {'ok', 'http_503'})
+        self.assertGreater(rapport['prechauffage']['total'], 0)
+        self.assertGreater(rapport['parametres']['intervalle_attendu_ms'], 0)
+
+    def test_boucle_ouverte_surcharge(self):
+        """100 req/s sur une capacité de 50 req/s: la latence corrigée croît, pas celle de service"""
+        rapport = self.generateur.boucle_ouverte(100, duree_s=0.5, prechauffage_s=0.0, max_concurrence=1)
+        self.assertEqual(rapport['envoyees'], 50)
+        self.assertEqual(rapport['terminees'], 50)
+        service = rapport['latence_service']['percentiles_ms']['p90']
+        corrigee = rapport['latence_corrigee']['percentiles_ms']['p90']
+        self.assertLess(service, 100)
+        self.assertGreater(corrigee, 2 * service)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DE L'ÉVALUATION HORS-LIGNE - MILA ASSIST
+==============================================
+
+- Matrice de confusion vectorisée
+- Précision, rappel et F1 par classe, moyennes macro et confusions principales
+- Prédiction par lots identique à la prédiction d'un seul bloc
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.evaluation import matrice_confusion, metriques_par_classe, predire_par_lots, rapport_evaluation
+
+class TestEvaluation(unittest.TestCase):
+    """Tests des métriques d'évaluation en numpy"""
+
+    def setUp(self):
+        self.cibles = np.array([0, 0, 0, 1, 1, 2])
+        self.predictions = np.array([0, 0, 1, 1, 1, 1])
+
+    def test_matrice_et_metriques(self):
+        """Lignes = attendu, colonnes = prédit; classes sans prédiction à 0 sans avertissement"""
+        matrice = matrice_confusion(self.cibles, self.predictions, 4)
+        np.testing.assert_array_equal(matrice[:3, :3], [[2, 1, 0], [0, 2, 0], [0, 1, 0]])
+        self.assertEqual(matrice.sum(), 6)
+
+        metriques = metriques_par_classe(matrice)
+        np.testing.assert_allclose(metriques['precision'], [1.0, 0.5, 0.0, 0.0])
+        np.testing.assert_allclose(metriques['rappel'], [2 / 3, 1.0, 0.0, 0.0])
+        np.testing.assert_array_equal(metriques['support'], [3, 2, 1, 0])
+
+    def test_rapport(self):
+        """La classe sans question est exclue des moyennes; confusions triées par fréquence"""
+        rapport = rapport_evaluation(matrice_confusion(self.cibles, self.predictions, 4), list("abcd"))
+        self.assertEqual(rapport['precision_globale'], round(4 / 6, 4))
+        self.assertEqual(rapport['classes_evaluees'], 3)
+        self.assertEqual(rapport['rappel_macro'], round((2 / 3 + 1.0) / 3, 4))
+        self.assertEqual([c['classe'] for c in rapport['par_classe']], list("abc"))
+        self.assertEqual(
+            {(c['attendu'], c['predit'], c['nombre']) for c in rapport['confusions_principales']},
+            {('a', 'b', 1), ('c', 'b', 1)}
+        )
+
+    def test_prediction_par_lots(self):
+        """Le découpage en lots ne change pas les sorties"""
+        poids = np.random.default_rng(0).normal(size=(5, 3))
+        entrees = np.random.default_rng(1).normal(size=(10, 5))
+        np.testing.assert_allclose(predire_par_lots(lambda x: x @ poids, entrees, taille_lot=3), entrees @ poids)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
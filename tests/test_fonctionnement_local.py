@@ -113,6 +113,7 @@ class TestFallbackKeras(unittest.TestCase):
         self.config.MODEL_PATH = os.path.join(self.temp_dir, "chatbot_model.keras")
         self.config.WORDS_PATH = os.path.join(self.temp_dir, "words.pkl")
         self.config.CLASSES_PATH = os.path.join(self.temp_dir, "classes.pkl")
+        self.config.MODEL_BUNDLE_PATH = os.path.join(self.temp_dir, "chatbot_bundle.npz")
         
         # Créer des fichiers mock si nécessaire
         self._create_mock_model_files()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DE LA COMPTABILITÉ MÉMOIRE - MILA ASSIST
+==============================================
+
+- Taille approximative: extrapolation, tableaux numpy, objets partagés comptés une fois
+- Rapport: magasins, threads regroupés par nom, différence tracemalloc entre rapports
+- Analyse des relevés du test d'endurance (pente du RSS, magasins en croissance)
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.memoire import ComptableMemoire, taille_approx
+from soak_memoire import analyser_echantillons, lire_duree
+
+class TestTailleApprox(unittest.TestCase):
+    """Tests de la mesure des magasins"""
+
+    def test_extrapolation_numpy_et_partage(self):
+        """Au-delà de max_elements le total est extrapolé; un objet partagé n'est compté qu'une fois"""
+        cache = {f"cle_{i}": f"{i:04d}" * 250 for i in range(1000)}
+        complet = taille_approx(cache)
+        extrapole = taille_approx(cache, max_elements=100)
+        self.assertGreater(complet, 1000 * 1000)
+        self.assertAlmostEqual(extrapole, complet, delta=complet * 0.05)
+
+        tableau = np.zeros(100000, dtype=np.float32)
+        self.assertGreaterEqual(taille_approx({'poids': tableau}), tableau.nbytes)
+
+        partage = "y" * 100000
+        self.assertLess(taille_approx([partage] * 50), 2 * 100000)
+
+class TestComptableMemoire(unittest.TestCase):
+    """Tests du rapport mémoire"""
+
+    def test_rapport_et_diff_tracemalloc(self):
+        """Le magasin qui grossit et la ligne qui alloue apparaissent dans le rapport suivant"""
+        magasin = {}
+        comptable = ComptableMemoire()
+        comptable.enregistrer("cache", lambda: magasin)
+        comptable.enregistrer("defaillant", lambda: 1 / 0)
+        comptable.enregistrer_mesure("modele", lambda: {'elements': 3, 'octets_approx': 12})
+        comptable.demarrer_tracemalloc(1)
+        self.addCleanup(comptable.arreter_tracemalloc)
+
+        rapport = comptable.rapport(top=5)
+        self.assertEqual(rapport['magasins']['cache']['elements'], 0)
+        self.assertIn('erreur', rapport['magasins']['defaillant'])
+        self.assertEqual(rapport['magasins']['modele']['octets_approx'], 12)
+        self.assertTrue(rapport['tracemalloc']['actif'])
+        self.assertGreater(rapport['gc']['suivis'], 0)
+
+        for i in range(2000):
+            magasin[i] = bytearray(1024)  # Allocation de ~2 Mo sur cette ligne
+        rapport = comptable.rapport(top=5)
+        self.assertEqual(rapport['magasins']['cache']['elements'], 2000)
+        self.assertGreater(rapport['magasins']['cache']['octets_approx'], 2000 * 1024)
+        ligne = rapport['tracemalloc']['plus_fortes_hausses'][0]
+        self.assertIn("test_memoire.py", ligne['ligne'])
+        self.assertGreater(ligne['diff_ko'], 1500)
+
+        comptable.arreter_tracemalloc()
+        self.assertEqual(comptable.rapport()['tracemalloc'], {'actif': False})
+
+    def test_threads_regroupes(self):
+        """Les threads homonymes à un numéro près sont comptés ensemble"""
+        arret = threading.Event()
+        threads = [threading.Thread(target=arret.wait, name=f"feedback-{i}") for i in range(3)]
+        for thread in threads:
+            thread.start()
+        self.addCleanup(lambda: (arret.set(), [t.join() for t in threads]))
+        self.assertEqual(ComptableMemoire.threads()['feedback-N'], 3)
+
+class TestAnalyseEndurance(unittest.TestCase):
+    """Tests de l'analyse du test d'endurance"""
+
+    def test_pente_et_croissance(self):
+        """Pente du RSS en Mo/h hors montée en charge; magasins triés par croissance"""
+        echantillons = [
+            {
+                't_s': 600 * i,
+                'rss_mo': (500.0 if i == 0 else 300.0 + 2 * i),  # Pic de démarrage ignoré, puis +12 Mo/h
+                'magasins': {
+                    'sessions': {'elements': 10 * i, 'octets_approx': 4096 * i},
+                    'cache_predictions': {'elements': 100, 'octets_approx': 50000},
+                    'modele_keras': {'erreur': "indisponible"}
+                },
+                'gc': {'suivis': 1000 + 50 * i, 'types_plus_nombreux': {'dict': 500 + 40 * i, 'list': 300}},
+                'threads': {'MainThread': 1, 'feedback-N': i}
+            }
+            for i in range(10)
+        ]
+        analyse = analyser_echantillons(echantillons)
+        self.assertAlmostEqual(analyse['rss_mo']['pente_mo_h'], 12.0, places=1)
+        self.assertEqual((analyse['rss_mo']['debut'], analyse['rss_mo']['max']), (500.0, 500.0))
+        self.assertEqual(list(analyse['magasins']), ['sessions', 'cache_predictions'])
+        self.assertEqual(analyse['magasins']['sessions']['croissance_elements'], 80)
+        self.assertEqual(analyse['objets_gc']['types_en_hausse'], {'dict': 320})
+        self.assertEqual(analyse['threads'], {'feedback-N': {'debut': 1, 'fin': 9}})
+        self.assertEqual(analyse['duree_h'], 1.5)
+
+    def test_lire_duree(self):
+        self.assertEqual([lire_duree(d) for d in ("90s", "30m", "4h", "12")], [90, 1800, 14400, 12])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DES MÉTRIQUES PROMETHEUS - MILA ASSIST
+============================================
+
+- Compteurs répartis par thread: somme exacte, repli des threads terminés
+- Histogrammes: seaux cumulés, somme et nombre
+- Format d'exposition (échappement, jauges, jauge en erreur)
+- Statistiques des services et PerformanceMonitor (endpoints bornés)
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_client import PerformanceMonitor
+from services.metriques import Registre, CellulesParThread, Statistiques
+
+class TestMetriques(unittest.TestCase):
+    """Tests des compteurs, histogrammes et de l'exposition"""
+
+    def setUp(self):
+        self.registre = Registre()
+
+    def test_compteur_concurrent(self):
+        """Incréments depuis plusieurs threads: aucune perte, cellules des threads terminés repliées"""
+        compteur = self.registre.compteur("mila_test_total", "Test", etiquettes=("niveau",))
+
+        def travail():
+            for _ in range(5000):
+                compteur.inc("api")
+            compteur.inc("keras", n=2)
+
+        threads = [threading.Thread(target=travail) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        compteur.inc("api")
+
+        self.assertEqual(compteur.valeur("api"), 40001)
+        self.assertEqual(compteur.valeur("keras"), 16)
+        self.assertEqual(len(compteur._cellules._cellules), 1)  # seul le thread principal reste vivant
+        self.assertEqual(compteur.valeur("api"), 40001)  # le repli ne compte rien deux fois
+
+    def test_repli_au_dela_du_maximum(self):
+        """Les threads de connexion terminés ne font pas grossir la liste des cellules"""
+        cellules = CellulesParThread()
+        cellules.MAX_CELLULES = 4
+        for _ in range(20):
+            thread = threading.Thread(target=cellules.ajouter, args=("cle",))
+            thread.start()
+            thread.join()
+        self.assertLessEqual(len(cellules._cellules), 5)
+        self.assertEqual(cellules.valeurs(), {"cle": 20.0})
+
+    def test_exposition(self):
+        """HELP/TYPE, étiquettes échappées, seaux cumulés jusqu'à +Inf, jauges calculées à la lecture"""
+        compteur = self.registre.compteur("mila_reponses_total", "Réponses", etiquettes=("niveau",))
+        compteur.inc('a"b')
+        histogramme = self.registre.histogramme("mila_duree_secondes", "Durée", bornes=(0.1, 1.0))
+        for valeur in (0.05, 0.1, 0.5, 3.0):
+            histogramme.observer(valeur)
+        self.registre.jauge("mila_statut", "Statut", lambda: {"ready": 1, "loading": 0}, etiquettes=("statut",))
+        self.registre.jauge("mila_panne", "Jauge en erreur", lambda: 1 / 0)
+
+        lignes = self.registre.exposition().splitlines()
+        self.assertIn("# TYPE mila_reponses_total counter", lignes)
+        self.assertIn('mila_reponses_total{niveau="a\\"b"} 1', lignes)
+        self.assertIn("# TYPE mila_duree_secondes histogram", lignes)
+        self.assertEqual(
+            [l for l in lignes if l.startswith("mila_duree_secondes")],
+            ['mila_duree_secondes_bucket{le="0.1"} 2', 'mila_duree_secondes_bucket{le="1"} 3',
+             'mila_duree_secondes_bucket{le="+Inf"} 4', 'mila_duree_secondes_sum 3.65',
+             'mila_duree_secondes_count 4']
+        )
+        self.assertIn('mila_statut{statut="ready"} 1', lignes)
+        self.assertFalse(any(l.startswith("mila_panne ") for l in lignes))
+
+class TestStatistiquesServices(unittest.TestCase):
+    """Tests des statistiques des services"""
+
+    def test_statistiques(self):
+        """Types conservés, valeurs simples affectables, += et clés inconnues refusés"""
+        stats = Statistiques({'messages_traites': 0, 'temps_reponse_total': 0.0}, valeurs={'model_loading_time': 0.0})
+        threads = [
+            threading.Thread(target=lambda: [stats.inc('messages_traites') for _ in range(1000)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats.inc('temps_reponse_total', 2.5)
+        stats['model_loading_time'] = 1.5
+
+        self.assertEqual(stats['messages_traites'], 4000)
+        self.assertIsInstance(stats['messages_traites'], int)
+        self.assertEqual(dict(stats), {'messages_traites': 4000, 'temps_reponse_total': 2.5, 'model_loading_time': 1.5})
+        self.assertEqual(stats.instantane(), dict(stats))
+        with self.assertRaises(TypeError):
+            stats['messages_traites'] += 1
+        with self.assertRaises(KeyError):
+            stats.inc('inconnu')
+
+    def test_performance_monitor_borne(self):
+        """Totaux et statistiques par endpoint dérivés de l'histogramme; endpoints au-delà du maximum regroupés"""
+        moniteur = PerformanceMonitor()
+        moniteur.MAX_ENDPOINTS = 2
+        moniteur.record_request("chat", 0.010, True)
+        moniteur.record_request("chat", 0.030, False)
+        moniteur.record_request("health", 0.001, True)
+        for i in range(10):
+            moniteur.record_request(f"search/{i}", 0.002, True)
+        moniteur.record_cache_hit()
+        moniteur.record_cache_miss()
+
+        metriques = moniteur.metrics
+        self.assertEqual(set(metriques['endpoints_stats']), {"chat", "health", "autre"})
+        self.assertEqual(metriques['endpoints_stats']['chat'],
+                         {'requests': 2, 'successes': 1, 'failures': 1, 'total_time': 0.04})
+        self.assertEqual(metriques['endpoints_stats']['autre']['requests'], 10)
+        self.assertEqual((metriques['total_requests'], metriques['failed_requests']), (13, 1))
+        self.assertEqual(moniteur.get_cache_hit_rate(), 50.0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
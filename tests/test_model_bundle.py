@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DU BUNDLE DE MODÈLE - MILA ASSIST
+=======================================
+
+- Aller-retour complet (poids, vocabulaire, classes, réponses)
+- Détection d'un bundle corrompu via la somme de contrôle
+- Écriture atomique et lecture de l'en-tête seul
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.model_bundle import ModelBundle, BundleError
+
+try:
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Input
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+@unittest.skipUnless(TENSORFLOW_AVAILABLE, "TensorFlow requis")
+class TestModelBundle(unittest.TestCase):
+    """Tests d'écriture et de lecture du bundle versionné"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "chatbot_bundle.npz")
+        model = Sequential([Input(shape=(3,)), Dense(4, activation='relu'), Dense(2, activation='softmax')])
+        self.bundle = ModelBundle.depuis_modele(
+            model,
+            words=['ailicia', 'bonjour', 'obscapture'],
+            classes=['salutation', 'obs'],
+            responses={'salutation': ['Bonjour !'], 'obs': ['Ouvrez OBS.']},
+            version='20250916-120000-abcdef12',
+            preprocessing={'nltk': False},
+            metadata={'accuracy': 0.9}
+        )
+        self.model = model
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_aller_retour(self):
+        """Le bundle rechargé reproduit les prédictions et les tables"""
+        checksum = self.bundle.sauvegarder(self.path)
+        charge = ModelBundle.charger(self.path)
+
+        self.assertEqual(charge.checksum, checksum)
+        self.assertEqual(charge.words, self.bundle.words)
+        self.assertEqual(charge.classes, self.bundle.classes)
+        self.assertEqual(charge.responses['obs'], ['Ouvrez OBS.'])
+
+        entree = np.array([[1.0, 0.0, 0.6]], dtype=np.float32)
+        np.testing.assert_allclose(
+            charge.construire_modele().predict(entree, verbose=0),
+            self.model.predict(entree, verbose=0),
+            rtol=1e-6
+        )
+
+    def test_bundle_corrompu(self):
+        """Des poids modifiés sont détectés par la somme de contrôle"""
+        self.bundle.sauvegarder(self.path)
+        with np.load(self.path) as contenu:
+            tableaux = {cle: contenu[cle] for cle in contenu.files}
+        tableaux['poids_000'] = tableaux['poids_000'] + 1.0
+        with open(self.path, 'wb') as f:
+            np.savez(f, **tableaux)
+
+        with self.assertRaises(BundleError):
+            ModelBundle.charger(self.path)
+
+    def test_bundle_tronque(self):
+        """Un fichier tronqué (copie interrompue) lève BundleError, pas une erreur zip"""
+        self.bundle.sauvegarder(self.path)
+        with open(self.path, 'rb') as f:
+            contenu = f.read()
+        for taille in (0, 10, len(contenu) // 2, len(contenu) - 30):
+            with open(self.path, 'wb') as f:
+                f.write(contenu[:taille])
+            with self.assertRaises(BundleError):
+                ModelBundle.charger(self.path)
+            with self.assertRaises(BundleError):
+                ModelBundle.lire_entete(self.path)
+
+    def test_ecriture_atomique_et_entete(self):
+        """Aucun fichier temporaire ne subsiste; l'en-tête se lit sans les poids"""
+        self.bundle.sauvegarder(self.path)
+        self.assertEqual(os.listdir(self.temp_dir), ["chatbot_bundle.npz"])
+
+        entete = ModelBundle.lire_entete(self.path)
+        self.assertEqual(entete['version'], '20250916-120000-abcdef12')
+        self.assertEqual(entete['metadata']['accuracy'], 0.9)
+        self.assertNotIn('architecture', entete)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DU PROFILAGE À LA DEMANDE - MILA ASSIST
+=============================================
+
+- Profil cProfile d'une requête (fichier .prof lisible par pstats)
+- Échantillonnage du seul thread de la requête, puis de tout le processus (piles repliées)
+- Rétention des profils et vérification de la clé admin
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import time
+import pstats
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.profilage import ProfileurRequetes, verifier_cle_admin
+
+def calcul_intensif(duree_s: float = 0.15):
+    fin = time.perf_counter() + duree_s
+    total = 0
+    while time.perf_counter() < fin:
+        total += sum(range(200))
+    return total
+
+class TestProfilage(unittest.TestCase):
+    """Tests du profileur de requêtes"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.profileur = ProfileurRequetes(os.path.join(self.temp_dir, "profiles"), retention=3, duree_max_s=1)
+
+    def test_requete_cprofile_et_echantillons(self):
+        """Les deux modes produisent un fichier nommé d'après la route; mode inconnu ignoré"""
+        self.assertIsNone(self.profileur.demarrer_requete("inconnu", "get_response"))
+
+        profil = self.profileur.demarrer_requete("cprofile", "get_response")
+        calcul_intensif(0.05)
+        fichier = profil.terminer()
+        self.assertTrue(fichier.endswith("_get_response_cprofile.prof"))
+        fonctions = {f[2] for f in pstats.Stats(os.path.join(self.profileur.dossier, fichier)).stats}
+        self.assertIn("calcul_intensif", fonctions)
+
+        # Un autre thread occupé n'apparaît pas dans le profil de la requête
+        autre = threading.Thread(target=calcul_intensif, args=(0.3,))
+        autre.start()
+        profil = self.profileur.demarrer_requete("sampling", "../get")
+        calcul_intensif()
+        fichier = profil.terminer()
+        autre.join()
+        self.assertTrue(fichier.endswith("_get_sampling.collapsed"))
+        with open(os.path.join(self.profileur.dossier, fichier), 'r', encoding='utf-8') as f:
+            lignes = f.read().splitlines()
+        self.assertTrue(lignes)
+        self.assertTrue(all(l.rsplit(" ", 1)[1].isdigit() for l in lignes))
+        self.assertTrue(any("test_requete_cprofile_et_echantillons" in l and "calcul_intensif" in l for l in lignes))
+        self.assertFalse(any(l.startswith("Thread") or "run (threading.py" in l for l in lignes))
+
+    def test_processus_et_retention(self):
+        """Tous les threads, nom du thread en racine; durée bornée; seuls les plus récents sont gardés"""
+        autre = threading.Thread(target=calcul_intensif, args=(0.3,), name="Calcul")
+        autre.start()
+        debut = time.perf_counter()
+        resultat = self.profileur.echantillonner_processus(5.0, 0.002)
+        autre.join()
+        self.assertLess(time.perf_counter() - debut, 2.0)  # borné par duree_max_s
+        self.assertGreater(resultat['echantillons'], 10)
+        self.assertTrue(any(l.startswith("Calcul;") and "calcul_intensif" in l for l in resultat['piles'].splitlines()))
+
+        for _ in range(4):
+            self.profileur.demarrer_requete("sampling", "get").terminer()
+        fichiers = [os.path.basename(f) for f in self.profileur.profils()]
+        self.assertEqual(len(fichiers), 3)
+        self.assertFalse(any("processus" in f for f in fichiers))
+
+    def test_cle_admin(self):
+        self.assertTrue(verifier_cle_admin("cle-admin-profilage", "cle-admin-profilage"))
+        self.assertFalse(verifier_cle_admin("mauvaise", "cle-admin-profilage"))
+        self.assertFalse(verifier_cle_admin("", None))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DE LA QUANTIFICATION DU MODÈLE - MILA ASSIST
+==================================================
+
+- Quantification int8 par canal de sortie
+- Inférence numpy identique à Keras (Dense, BatchNormalization, Dropout)
+- Bundle quantifié: aller-retour sur disque et prédictions proches du float32
+- Taille des poids rapportée par /debug/memory (numpy quantifié ou Keras)
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.memoire import mesure_poids_modele
+from services.model_bundle import ModelBundle
+from services.quantization import ReseauNumpy, quantifier_bundle, quantifier_noyau_int8
+
+try:
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Dropout, Input, BatchNormalization
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+class TestQuantificationInt8(unittest.TestCase):
+    """Tests de la quantification symétrique int8"""
+
+    def test_erreur_bornee_par_canal(self):
+        """L'erreur de reconstruction reste sous une demi-échelle de chaque colonne"""
+        rng = np.random.default_rng(0)
+        noyau = rng.normal(size=(50, 8)).astype(np.float32) * np.linspace(0.01, 2.0, 8, dtype=np.float32)
+        noyau[:, 0] = 0.0
+
+        quantifie, echelles = quantifier_noyau_int8(noyau)
+        self.assertEqual(quantifie.dtype, np.int8)
+        self.assertEqual(echelles.shape, (8,))
+        erreur = np.abs(quantifie * echelles - noyau)
+        self.assertTrue(np.all(erreur <= echelles / 2 + 1e-7))
+
+@unittest.skipUnless(TENSORFLOW_AVAILABLE, "TensorFlow requis")
+class TestReseauNumpy(unittest.TestCase):
+    """Tests de l'inférence numpy des bundles"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(1)
+        tf.keras.utils.set_random_seed(1)
+        model = Sequential([
+            Input(shape=(40,)),
+            Dense(32, activation='relu'), BatchNormalization(), Dropout(0.3),
+            Dense(16, activation='relu'), Dropout(0.1),
+            Dense(5, activation='softmax')
+        ])
+        # Statistiques de BatchNormalization non triviales
+        poids = model.get_weights()
+        poids[4] = rng.normal(size=32).astype(np.float32)
+        poids[5] = rng.uniform(0.5, 2.0, size=32).astype(np.float32)
+        model.set_weights(poids)
+
+        self.model = model
+        self.bundle = ModelBundle.depuis_modele(
+            model, words=[f"mot{i}" for i in range(40)], classes=list("abcde"),
+            responses={}, version="test"
+        )
+        self.entrees = (rng.random((20, 40)) < 0.1).astype(np.float32)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_numpy_float32_identique_a_keras(self):
+        """Sans quantification, l'inférence numpy reproduit Keras"""
+        np.testing.assert_allclose(
+            ReseauNumpy(self.bundle).predict(self.entrees),
+            self.model.predict(self.entrees, verbose=0),
+            rtol=1e-4, atol=1e-6
+        )
+
+    def test_bundle_quantifie(self):
+        """Le bundle int8 est plus léger, se recharge et prédit les mêmes classes"""
+        path = os.path.join(self.temp_dir, "chatbot_bundle.npz")
+        quantifie = quantifier_bundle(self.bundle, "int8")
+        quantifie.sauvegarder(path)
+
+        charge = ModelBundle.charger(path)
+        self.assertEqual(charge.quantization['mode'], "int8")
+        self.assertLess(
+            sum(w.nbytes for w in charge.weights),
+            sum(w.nbytes for w in self.bundle.weights) / 2
+        )
+
+        reseau = charge.construire_modele()
+        self.assertIsInstance(reseau, ReseauNumpy)
+        attendu = self.model.predict(self.entrees, verbose=0)
+        # Modèle non entraîné: les quasi-égalités entre classes peuvent basculer à l'arrondi int8
+        tri = np.sort(attendu, axis=1)
+        nettes = tri[:, -1] - tri[:, -2] > 0.01
+        self.assertGreater(nettes.sum(), len(attendu) // 2)
+        np.testing.assert_array_equal(
+            reseau.predict(self.entrees).argmax(axis=1)[nettes], attendu.argmax(axis=1)[nettes]
+        )
+
+    def test_mesure_poids_modele(self):
+        """Réseau numpy: taille réelle des poids quantifiés; Keras: paramètres en float32"""
+        keras = mesure_poids_modele(self.model)
+        self.assertEqual(keras, {'elements': self.model.count_params(), 'octets_approx': self.model.count_params() * 4})
+
+        reseau = quantifier_bundle(self.bundle, "int8").construire_modele()
+        mesure = mesure_poids_modele(reseau)
+        self.assertEqual(mesure['octets_approx'], reseau.octets_poids())
+        self.assertLess(mesure['octets_approx'], keras['octets_approx'])
+        self.assertGreater(mesure['elements'], 40 * 32)
+        self.assertEqual(mesure_poids_modele(None), {'elements': 0, 'octets_approx': 0})
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
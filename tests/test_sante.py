@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DE LA SONDE DE SANTÉ - MILA ASSIST
+========================================
+
+- Sondage périodique en arrière-plan, âge et échecs consécutifs
+- Exception de la sonde traitée comme un échec
+- test_api_connection() lit la sonde sans appel réseau
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.chatbot_service import ChatbotService
+from services.sante_service import SondeSante
+
+class TestSondeSante(unittest.TestCase):
+    """Tests de la sonde de santé"""
+
+    def test_sondage_periodique(self):
+        """La sonde tourne en arrière-plan; la lecture ne l'appelle pas"""
+        appels = []
+        sonde = SondeSante(lambda: appels.append(time.time()) or True, intervalle_s=0.05)
+        self.assertEqual(sonde.instantane()['ok'], None)
+        self.assertFalse(sonde.ok)
+
+        sonde.demarrer()
+        self.addCleanup(sonde.fermer)
+        time.sleep(0.3)
+        nombre = len(appels)
+        self.assertGreaterEqual(nombre, 3)
+        for _ in range(100):
+            instantane = sonde.instantane()
+        self.assertLessEqual(len(appels), nombre + 1)
+        self.assertTrue(instantane['ok'])
+        self.assertLess(instantane['age_s'], 1.0)
+        self.assertFalse(instantane['perime'])
+
+    def test_echecs_et_exception(self):
+        """Échecs consécutifs comptés, exception enregistrée, remise à zéro au rétablissement"""
+        resultats = iter([False, ConnectionError("refusée"), True])
+
+        def sonde_api():
+            resultat = next(resultats)
+            if isinstance(resultat, Exception):
+                raise resultat
+            return resultat
+
+        sonde = SondeSante(sonde_api, intervalle_s=60)
+        sonde.sonder()
+        instantane = sonde.sonder()
+        self.assertEqual((instantane['ok'], instantane['echecs_consecutifs']), (False, 2))
+        self.assertEqual(instantane['erreur'], "refusée")
+        self.assertEqual(sonde.sonder()['echecs_consecutifs'], 0)
+        self.assertTrue(sonde.ok)
+
+    def test_chatbot_lit_la_sonde(self):
+        """Avec une sonde attachée, test_api_connection() ne teste plus l'API directement"""
+        service = ChatbotService.__new__(ChatbotService)
+        service.config = SimpleNamespace(USE_API=True)
+        service.api_client = SimpleNamespace(test_connection=lambda: self.fail("appel réseau"))
+        service.sonde_api = SondeSante(lambda: True)
+        service.sonde_api.sonder()
+        self.assertTrue(service.test_api_connection())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DE L'API NAS SIMULÉE - MILA ASSIST
+========================================
+
+- Formes JSON compatibles avec ApiClient (santé, chat, journal, feedback, recherche, stats)
+- Recherche conditionnelle (ETag / 304)
+- Latence injectée, erreurs HTTP, timeouts et connexions coupées
+- Connaissances par défaut: snapshot des recherches de train.py
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import requests
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.api_client import ApiClient
+from stub_api_nas import ApiNasSimulee, ScenarioPannes, charger_connaissances
+
+CONNAISSANCES = [
+    {'id': 1, 'tag': 'salutation', 'question': 'bonjour mila', 'response': 'Bonjour !'},
+    {'id': 2, 'tag': 'obs', 'question': 'comment configurer obs studio', 'response': 'Ouvrez les paramètres OBS.'}
+]
+
+class ConfigTest:
+    """Configuration minimale attendue par ApiClient"""
+
+    def __init__(self, url: str):
+        self.API_URL = url
+        self.API_TIMEOUT = 2
+
+    def get_api_headers(self):
+        return {'Content-Type': 'application/json'}
+
+class TestApiNasSimulee(unittest.TestCase):
+    """Tests de l'API simulée avec le vrai client API"""
+
+    def setUp(self):
+        self.api = ApiNasSimulee(connaissances=CONNAISSANCES).demarrer()
+        self.addCleanup(self.api.arreter)
+        self.client = ApiClient(ConfigTest(self.api.url))
+
+    def test_routes_nominales(self):
+        """Chaque méthode du client obtient une réponse exploitable"""
+        self.assertTrue(self.client.test_connection())
+
+        reponse = self.client.obtenir_reponse_chatbot("Comment configurer OBS Studio ?", "session-test", seuil=0.3)
+        self.assertEqual(reponse['reponse'], 'Ouvrez les paramètres OBS.')
+        self.assertEqual(reponse['id_connaissance'], 2)
+        self.assertIsNone(self.client.obtenir_reponse_chatbot("pizza", "session-test"))
+
+        self.assertTrue(self.client.enregistrer_conversation("session-test", "bonjour", "Bonjour !"))
+        self.assertTrue(self.client.soumettre_feedback("bonjour", "Salut !"))
+        self.assertEqual([r['id'] for r in self.client.rechercher_connaissances("obs")], [2])
+        self.assertTrue(self.client.ajouter_connaissance("merci", "merci mila", "Avec plaisir !"))
+        stats = self.client.obtenir_statistiques()
+        self.assertEqual(
+            (stats['total_connaissances'], stats['total_conversations'], stats['total_feedbacks']), (3, 1, 1)
+        )
+
+    def test_recherche_conditionnelle(self):
+        """Même ETag -> 304 sans corps, comme attendu par la récupération incrémentale de train.py"""
+        url = f"{self.api.url}/search"
+        premiere = requests.post(url, json={'query': '', 'top_k': 1000, 'threshold': 0.0})
+        self.assertEqual(len(premiere.json()['results']), 2)
+        seconde = requests.post(url, json={'query': '', 'top_k': 1000, 'threshold': 0.0},
+                                headers={'If-None-Match': premiere.headers['ETag']})
+        self.assertEqual(seconde.status_code, 304)
+
+    def test_pannes(self):
+        """Latence, erreur, timeout et reset sont vus par le client comme sur le vrai réseau"""
+        self.api.configurer({'routes': {'health': {'latence_ms': {'distribution': 'fixe', 'valeur': 200}}}})
+        debut = time.perf_counter()
+        self.assertTrue(self.client.test_connection())
+        self.assertGreaterEqual(time.perf_counter() - debut, 0.2)
+
+        for panne in ('erreur', 'timeout', 'reset'):
+            self.api.configurer({'routes': {'chat': {f'taux_{panne}': 1.0, 'duree_timeout_s': 1.5}}})
+            debut = time.perf_counter()
+            self.assertIsNone(self.client.obtenir_reponse_chatbot("bonjour mila", "session-test"))
+            self.assertLess(time.perf_counter() - debut, 1.4, panne)  # Timeout client de 1 s sur /chat
+
+        compteurs = requests.get(f"{self.api.url}/_stub/stats").json()['compteurs']
+        self.assertEqual(compteurs['chat'], {'ok': 0, 'erreur': 1, 'timeout': 1, 'reset': 1})
+
+    def test_scenario_reproductible(self):
+        """Même graine -> mêmes issues et mêmes latences"""
+        scenario = {'graine': 7, 'defaut': {
+            'latence_ms': {'distribution': 'lognormale', 'mediane': 20, 'sigma': 0.5}, 'taux_erreur': 0.3
+        }}
+        sequences = [ScenarioPannes(scenario), ScenarioPannes(scenario)]
+        tirages = [[s.tirer('chat') for _ in range(20)] for s in sequences]
+        self.assertEqual(tirages[0], tirages[1])
+        self.assertIn('erreur', [t[0] for t in tirages[0]])
+
+    def test_connaissances_snapshot(self):
+        """Par défaut, les entrées du snapshot de train.py, sans doublon entre requêtes"""
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "knowledge_snapshot.json")
+            with open(chemin, 'w', encoding='utf-8') as f:
+                json.dump({'requetes': {
+                    'obs': {'results': CONNAISSANCES[1:]},
+                    '': {'results': CONNAISSANCES + [{'tag': 'vide', 'question': 'sans réponse'}]}
+                }}, f)
+            with patch.dict(os.environ, {'FETCH_SNAPSHOT_PATH': chemin}):
+                self.assertEqual(sorted(charger_connaissances(), key=lambda c: c['id']), CONNAISSANCES)
+            with patch.dict(os.environ, {'FETCH_SNAPSHOT_PATH': os.path.join(dossier, "absent.json")}):
+                self.assertRaises(FileNotFoundError, charger_connaissances)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DES TRACES PAR REQUÊTE - MILA ASSIST
+==========================================
+
+- Étapes imbriquées, en-tête Server-Timing et histogrammes par étape
+- Aucun effet sans trace active, isolation entre threads
+- Journal des requêtes lentes (arbre complet)
+- Étapes des appels HTTP de ApiClient
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.api_client import ApiClient
+from services.tracing import TraceurRequetes, etape, span, trace_courante
+from stub_api_nas import ApiNasSimulee
+from test_stub_api_nas import CONNAISSANCES, ConfigTest
+
+@etape("decoree")
+def fonction_decoree():
+    with span("interne"):
+        time.sleep(0.002)
+    return 42
+
+class TestTracing(unittest.TestCase):
+    """Tests des traces et de leur agrégation"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.chemin_lentes = os.path.join(self.temp_dir, "requetes_lentes.jsonl")
+
+    def test_sans_trace(self):
+        """Traçage désactivé: ni trace ni étape enregistrée, la fonction décorée fonctionne"""
+        traceur = TraceurRequetes(actif=False)
+        self.assertIsNone(traceur.demarrer("POST /get"))
+        with span("api") as e:
+            self.assertIsNone(e)
+        self.assertEqual(fonction_decoree(), 42)
+        self.assertIsNone(trace_courante())
+
+    def test_arbre_server_timing_et_histogrammes(self):
+        """Étapes imbriquées, durées cumulées par nom, une mesure par occurrence"""
+        traceur = TraceurRequetes(actif=True, seuil_lent_ms=1, chemin_lentes=self.chemin_lentes)
+        trace = traceur.demarrer("POST /get")
+        with span("session"):
+            pass
+        self.assertEqual(fonction_decoree(), 42)
+        with span("session"):
+            pass
+        traceur.terminer(trace)
+        self.assertIsNone(trace_courante())
+
+        entetes = dict(m.split(";dur=") for m in trace.server_timing().split(", "))
+        self.assertEqual(list(entetes), ["session", "decoree", "interne", "total"])
+        self.assertGreaterEqual(float(entetes["interne"]), 2.0)
+        self.assertLessEqual(float(entetes["interne"]), float(entetes["decoree"]))
+
+        resume = traceur.resume()
+        self.assertEqual(list(resume)[0], "total")
+        self.assertEqual(resume["session"]["total"], 2)
+
+        with open(self.chemin_lentes, 'r', encoding='utf-8') as f:
+            lente = json.loads(f.readline())
+        self.assertEqual([e['nom'] for e in lente['enfants']], ["session", "decoree", "session"])
+        self.assertEqual(lente['enfants'][1]['enfants'][0]['nom'], "interne")
+        self.assertEqual(traceur.requetes_lentes, 1)
+
+    def test_isolation_threads(self):
+        """La trace d'un thread ne reçoit pas les étapes d'un autre"""
+        traceur = TraceurRequetes(actif=True)
+        trace = traceur.demarrer("POST /get")
+        autre = threading.Thread(target=lambda: span("ailleurs").__enter__())
+        autre.start()
+        autre.join()
+        traceur.terminer(trace)
+        self.assertEqual(trace.etapes(), [])
+
+    def test_etapes_api_client(self):
+        """Chaque appel de ApiClient apparaît comme étape api.<route>"""
+        api = ApiNasSimulee(connaissances=CONNAISSANCES).demarrer()
+        self.addCleanup(api.arreter)
+        client = ApiClient(ConfigTest(api.url))
+
+        traceur = TraceurRequetes(actif=True)
+        trace = traceur.demarrer("POST /get")
+        client.obtenir_reponse_chatbot("bonjour mila", "session-test")
+        client.enregistrer_conversation("session-test", "bonjour mila", "Bonjour !")
+        traceur.terminer(trace)
+        self.assertEqual([e.nom for e in trace.etapes()], ["api.chat", "api.journal_conversation"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TESTS DU PIPELINE D'ENTRAÎNEMENT - MILA ASSIST
+==============================================
+
+Tests hors-ligne des étapes de train.py (sans appel API ni entraînement complet):
+- Conversion et augmentation des données (déduplication ordonnée)
+- Empreinte des données et cache des features
+- Historique JSONL des métriques: lecture depuis la fin et compaction
+- Construction vectorisée de la matrice bag-of-words (vocabulaire ou hachage)
+- Construction du modèle à partir de la configuration
+- Front de Pareto et choix de la recherche d'architecture
+- Ajustement incrémental depuis les corrections des feedbacks
+- Sauvegardes adressées par contenu: déduplication, manifestes et rétention
+- Versions comparées et promotion atomique d'une sauvegarde
+
+Auteur: Samuel VERSCHUEREN
+Date: 16-09-2025
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import threading
+import subprocess
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import train
+from services.model_bundle import ModelBundle
+from services import chatbot_service
+from services.chatbot_service import ChatbotService
+from services.metriques import Statistiques
+from services.quantization import quantifier_bundle
+from services.feature_hashing import colonne_hachee, statistiques_collisions
+
+DONNEES_TEST = {
+    'salutation': {
+        'patterns': ['bonjour', 'salut mila', 'bonjour mila'],
+        'responses': ['Bonjour !']
+    },
+    'ailicia_config': {
+        'patterns': ['comment configurer ailicia', 'configurer ailicia sur obs'],
+        'responses': ['Ouvrez le panneau de configuration.']
+    }
+}
+
+class TestDataProcessor(unittest.TestCase):
+    """Tests de la conversion et de l'augmentation des données"""
+
+    def setUp(self):
+        patcher = patch.object(train, 'NLTK_AVAILABLE', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.processor = train.DataProcessor()
+
+    def test_conversion_dedupliquee_ordonnee(self):
+        """Doublons supprimés, ordre de première apparition conservé"""
+        connaissances = [
+            {'tag': 'obs', 'question': 'Configurer OBS ?', 'response': 'Réponse A'},
+            {'tag': 'obs', 'question': 'installer le tts', 'response': 'Réponse B'},
+            {'tag': 'obs', 'question': 'configurer obs', 'response': 'Réponse A'},
+            {'tag': 'vide', 'question': 'ok', 'response': 'Réponse C'}
+        ]
+        donnees = self.processor.convertir_donnees_vers_format_entrainement(iter(connaissances))
+        self.assertEqual(donnees, {
+            'obs': {
+                'patterns': ['configurer obscapture', 'installer le texttospeech'],
+                'responses': ['Réponse A', 'Réponse B']
+            }
+        })
+
+    def test_augmentation_sans_doublon(self):
+        """Variantes synonymes ajoutées après les patterns d'origine, sans doublon"""
+        donnees = {'aide': {'patterns': ['comment configurer', 'paramétrer'], 'responses': ['R']}}
+        augmentees = self.processor.augmenter_donnees(donnees)
+        self.assertEqual(augmentees['aide']['patterns'], [
+            'comment configurer', 'paramétrer',
+            'de quelle manière configurer', 'comment faire configurer',
+            'comment paramétrer', 'comment régler'
+        ])
+        self.assertEqual(donnees['aide']['patterns'], ['comment configurer', 'paramétrer'])
+
+class TestTrainingCache(unittest.TestCase):
+    """Tests de l'empreinte des données et du cache de features"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = train.TrainingCache(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_hash_independant_de_l_ordre(self):
+        """L'ordre des tags et des patterns ne change pas l'empreinte"""
+        inverse = {
+            tag: {
+                'patterns': list(reversed(d['patterns'])),
+                'responses': list(d['responses'])
+            }
+            for tag, d in reversed(list(DONNEES_TEST.items()))
+        }
+        self.assertEqual(
+            self.cache.calculer_hash_donnees(DONNEES_TEST),
+            self.cache.calculer_hash_donnees(inverse)
+        )
+
+    def test_hash_change_avec_les_donnees(self):
+        """Un pattern ajouté change l'empreinte"""
+        modifiees = {tag: {k: list(v) for k, v in d.items()} for tag, d in DONNEES_TEST.items()}
+        modifiees['salutation']['patterns'].append('coucou')
+        self.assertNotEqual(
+            self.cache.calculer_hash_donnees(DONNEES_TEST),
+            self.cache.calculer_hash_donnees(modifiees)
+        )
+
+    def test_aller_retour_features(self):
+        """Les features en cache sont rechargées uniquement pour la même empreinte"""
+        features = train.TrainingFeatures(
+            words=['ailicia', 'bonjour'],
+            classes=['ailicia_config', 'salutation'],
+            train_x=np.eye(2, dtype=np.float32),
+            train_y=np.eye(2, dtype=np.float32)
+        )
+        self.cache.sauvegarder_features('abc', features)
+
+        rechargees = self.cache.charger_features('abc')
+        self.assertIsNotNone(rechargees)
+        self.assertEqual(rechargees.words, features.words)
+        self.assertEqual(rechargees.classes, features.classes)
+        np.testing.assert_array_equal(rechargees.train_x, features.train_x)
+
+        self.assertIsNone(self.cache.charger_features('autre'))
+
+    def test_etat(self):
+        """L'état mémorise les empreintes du dernier entraînement"""
+        self.assertEqual(self.cache.charger_etat(), {})
+        self.cache.sauvegarder_etat('data', 'config')
+        etat = self.cache.charger_etat()
+        self.assertEqual(etat['data_hash'], 'data')
+        self.assertEqual(etat['config_hash'], 'config')
+
+@unittest.skipUnless(train.TENSORFLOW_AVAILABLE, "TensorFlow requis")
+class TestTrainingLogger(unittest.TestCase):
+    """Tests du flux JSONL des métriques d'entraînement"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.log_dir = os.path.join(self.temp_dir, 'logs')
+        self.training_logger = train.TrainingLogger(self.log_dir)
+
+    def test_ajout_et_lecture_depuis_la_fin(self):
+        """Chaque run ajoute une ligne; une ligne tronquée est ignorée à la lecture"""
+        for i in range(5):
+            metrics = train.TrainingMetrics(start_time=0.0, end_time=1.0 + i, model_accuracy=i / 10)
+            with metrics.chronometre('fit'):
+                pass
+            self.training_logger.log_metrics(metrics)
+        with open(os.path.join(self.log_dir, train.TrainingLogger.METRICS_FILENAME), 'a') as f:
+            f.write('{"model_accuracy": 0.9')
+
+        historique = train.TrainingLogger.lire_historique(3, champs=('model_accuracy', 'duration_seconds'), log_dir=self.log_dir)
+        self.assertEqual(historique, [
+            {'model_accuracy': 0.2, 'duration_seconds': 3.0},
+            {'model_accuracy': 0.3, 'duration_seconds': 4.0},
+            {'model_accuracy': 0.4, 'duration_seconds': 5.0}
+        ])
+        self.assertIn('fit', train.TrainingLogger.lire_historique(1, log_dir=self.log_dir)[0]['stage_seconds'])
+        self.assertEqual(len(train.lire_dernieres_lignes(
+            os.path.join(self.log_dir, train.TrainingLogger.METRICS_FILENAME), 100, taille_bloc=16
+        )), 6)
+
+    def test_compaction_et_migration(self):
+        """L'ancien historique JSON est migré; au-delà du seuil, seules les dernières lignes restent"""
+        with open(os.path.join(self.log_dir, 'training_metrics_history.json'), 'w') as f:
+            f.write('[{"model_accuracy": 0.5}]')
+        self.training_logger.HISTORIQUE_MAX = 3
+        self.training_logger.TAILLE_COMPACTION = 2000
+
+        for i in range(10):
+            self.training_logger.log_metrics(train.TrainingMetrics(start_time=0.0, model_accuracy=i / 10))
+        self.assertFalse(os.path.exists(os.path.join(self.log_dir, 'training_metrics_history.json')))
+
+        historique = train.TrainingLogger.lire_historique(50, champs=('model_accuracy',), log_dir=self.log_dir)
+        self.assertLess(len(historique), 10)
+        self.assertEqual(historique[-1], {'model_accuracy': 0.9})
+
+class TestModelTrainer(unittest.TestCase):
+    """Tests de la préparation des features et de la construction du modèle"""
+
+    def setUp(self):
+        # Tokenisation simple: les tests ne dépendent pas des ressources NLTK
+        patcher = patch.object(train, 'NLTK_AVAILABLE', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.trainer = train.ModelTrainer(train.ConfigurationManager())
+
+    def test_preparation_features(self):
+        """Les matrices ont une ligne par pattern et une colonne par mot/classe"""
+        features = self.trainer.preparer_features(DONNEES_TEST)
+        self.assertEqual(features.train_x.shape, (5, len(features.words)))
+        self.assertEqual(features.train_y.shape, (5, 2))
+        self.assertIn('ailicia', features.words)
+        np.testing.assert_array_equal(features.train_y.sum(axis=1), np.ones(5))
+
+    def test_corpus_reutilise(self):
+        """Patterns uniques prétraités une fois; le corpus précédent évite de retraiter"""
+        patterns = ['bonjour mila', 'salut mila', 'bonjour mila']
+        corpus = self.trainer.preprocessor.pretraiter(patterns)
+        self.assertEqual(corpus.patterns, ['bonjour mila', 'salut mila'])
+        self.assertEqual(corpus.offsets.tolist(), [0, 2, 4])
+
+        with patch.object(self.trainer.preprocessor, '_traiter', wraps=self.trainer.preprocessor._traiter) as traiter:
+            suivant = self.trainer.preprocessor.pretraiter(patterns + ['coucou'], corpus)
+        traiter.assert_called_once_with(['coucou'])
+        self.assertEqual(suivant.lemmes_par_pattern()['salut mila'], (['salut', 'mila'], [True, True]))
+
+    def test_features_hachees(self):
+        """Largeur fixe sans vocabulaire; colonnes identiques à celles calculées au service"""
+        self.trainer.nb_buckets = 64
+        features = self.trainer.preparer_features(DONNEES_TEST)
+        self.assertEqual(features.words, [])
+        self.assertEqual(features.train_x.shape, (5, 64))
+        self.assertEqual(features.collisions['lemmes'], 8)
+
+        colonne = colonne_hachee('ailicia', 64)
+        lignes_ailicia = features.train_y[:, features.classes.index('ailicia_config')] == 1
+        self.assertTrue(np.all(features.train_x[lignes_ailicia, colonne] >= 0.8))
+
+        # Au service, le bag haché reçoit la pondération enregistrée dans le bundle
+        ponderation = {'mot': [0.5, 0.9], 'mot_cle': [0.7, 1.4]}
+        self.trainer.encodeur.ponderation = ponderation
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        chemin = os.path.join(temp_dir, train.BUNDLE_FILENAME)
+        ModelBundle.depuis_modele(
+            self.trainer.construire_modele(64, len(features.classes)), [], features.classes, {},
+            version='v1', preprocessing=self.trainer.configuration_pretraitement()
+        ).sauvegarder(chemin)
+        service = ChatbotService.__new__(ChatbotService)
+        service._charger_bundle(chemin)
+        question = 'ailicia ailicia ailicia bonjour bonjour mila'
+        attendu = self.trainer.matrice_questions([question], ModelBundle.charger(chemin))[0]
+        np.testing.assert_allclose(service._creer_bag_of_words_ameliore(question.split()), attendu)
+        self.assertAlmostEqual(float(attendu[colonne]), 1.4, places=5)
+
+        stats = statistiques_collisions(['a', 'b', 'c'], 1)
+        self.assertEqual((stats['lemmes_en_collision'], stats['taux_collision']), (3, 1.0))
+
+    def test_ponderation_matrice_bow(self):
+        """Pondération identique à l'historique: 0.6/occurrence (max 1.0), 0.8 pour les mots-clés (max 1.5)"""
+        words = ['ailicia', 'bonjour', 'mila']
+        documents = [['ailicia', 'ailicia', 'bonjour', 'bonjour', 'inconnu'], ['mila', 'ailicia'], []]
+        matrice = self.trainer.construire_matrice_bow(documents, words)
+        np.testing.assert_allclose(matrice.toarray(), [
+            [1.5, 1.0, 0.0],
+            [0.8, 0.0, 0.6],
+            [0.0, 0.0, 0.0]
+        ])
+        self.assertEqual(matrice.nnz, 4)
+        self.assertEqual(matrice.indptr.tolist(), [0, 2, 4, 4])
+
+    def test_encodeur_independant(self):
+        """Un encodeur construit depuis le bundle reproduit les features de l'entraîneur, sans toucher NLTK_AVAILABLE"""
+        bundle = ModelBundle(
+            version='v1', words=['ailicia', 'bonjour', 'mila'], classes=['salutation'], responses={},
+            architecture='{}', weights=[], preprocessing=self.trainer.configuration_pretraitement()
+        )
+        questions = ['bonjour mila', 'ailicia ailicia bonjour']
+        with patch.object(train, 'NLTK_AVAILABLE', True):
+            encodeur = train.EncodeurBagOfWords.pour_bundle(bundle, utiliser_nltk=False)
+            self.assertTrue(train.NLTK_AVAILABLE)
+        self.assertEqual(encodeur.preprocessor.signature(encodeur.preprocessor.utiliser_nltk), 'v1-split')
+        np.testing.assert_array_equal(
+            encodeur.matrice_questions(questions, bundle),
+            self.trainer.matrice_questions(questions, bundle)
+        )
+
+    def test_encodage_classes(self):
+        """Encodage one-hot par index de classe"""
+        train_y = self.trainer.encoder_classes(['b', 'a', 'b'], ['a', 'b'])
+        np.testing.assert_array_equal(train_y, [[0, 1], [1, 0], [0, 1]])
+
+    def test_modele_depuis_configuration(self):
+        """L'architecture suit la configuration (couches cachées + sortie)"""
+        self.trainer.model_config['couches'] = [{'units': 16, 'dropout': 0.1}]
+        model = self.trainer.construire_modele(10, 3)
+        denses = [c for c in model.layers if c.__class__.__name__ == 'Dense']
+        self.assertEqual([c.units for c in denses], [16, 3])
+
+    def test_mode_rapide_batch_et_warmup(self):
+        """Batch en puissance de 2 borné; learning rate croissant puis décroissant"""
+        self.assertEqual(self.trainer.taille_batch_adaptative(50), 16)
+        self.assertEqual(self.trainer.taille_batch_adaptative(1300), 64)
+        self.assertEqual(self.trainer.taille_batch_adaptative(10 ** 6), 256)
+
+        planning = self.trainer.planning_warmup(0.01, 5, 100)
+        lrs = [planning(epoch, 0.0) for epoch in range(100)]
+        self.assertAlmostEqual(lrs[0], 0.002)
+        self.assertAlmostEqual(lrs[4], 0.01)
+        self.assertTrue(all(a >= b for a, b in zip(lrs[4:], lrs[5:])))
+        self.assertLess(lrs[-1], 0.0001)
+
+class TestArchitectureSearch(unittest.TestCase):
+    """Tests du front de Pareto et du choix sous budget de latence"""
+
+    @staticmethod
+    def _resultat(nom, precision, latence, octets):
+        return {'nom': nom, 'precision_validation': precision,
+                'latence_ms': {'p50_ms': latence}, 'octets_poids': octets}
+
+    def setUp(self):
+        self.resultats = [
+            self._resultat('grand', 0.90, 0.50, 4000),
+            self._resultat('moyen', 0.88, 0.10, 1000),
+            self._resultat('domine', 0.85, 0.20, 2000),
+            self._resultat('petit', 0.70, 0.05, 500)
+        ]
+
+    def test_front_pareto(self):
+        """Les candidats dominés sont exclus; le front est trié par latence"""
+        front = train.ArchitectureSearch.front_pareto(self.resultats)
+        self.assertEqual([r['nom'] for r in front], ['petit', 'moyen', 'grand'])
+
+    def test_choix_sous_budget(self):
+        """Le plus précis sous le budget est retenu, sinon le plus rapide"""
+        recherche = train.ArchitectureSearch(train.ConfigurationManager(), workers=1)
+        front = train.ArchitectureSearch.front_pareto(self.resultats)
+
+        recherche.budget_ms = 0.2
+        self.assertEqual(recherche.choisir(front)['nom'], 'moyen')
+        recherche.budget_ms = 0.01
+        self.assertEqual(recherche.choisir(front)['nom'], 'petit')
+
+    def test_grille_inclut_configuration_actuelle(self):
+        """L'architecture par défaut fait partie des candidats"""
+        configs = [c['config']['couches'] for c in train.ArchitectureSearch.generer_candidats()]
+        self.assertIn(train.ModelTrainer.MODEL_CONFIG['couches'], configs)
+
+@unittest.skipUnless(train.TENSORFLOW_AVAILABLE, "TensorFlow requis")
+class TestIncrementalTrainer(unittest.TestCase):
+    """Tests de l'ajustement incrémental du bundle publié"""
+
+    def setUp(self):
+        patcher = patch.object(train, 'NLTK_AVAILABLE', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+
+        config = train.ConfigurationManager()
+        config.FINETUNE_STEPS = 20
+        config.FINETUNE_MAX_ACCURACY_DROP = 1.0  # Modèle non entraîné: seule la mécanique est testée ici
+        self.ajusteur = train.IncrementalTrainer(config, self.temp_dir)
+        trainer = self.ajusteur.model_trainer
+        self.features = features = trainer.preparer_features(DONNEES_TEST)
+        model = trainer.construire_modele(len(features.words), len(features.classes))
+        self.bundle = ModelBundle.depuis_modele(
+            model, features.words, features.classes,
+            {tag: d['responses'] for tag, d in DONNEES_TEST.items()},
+            version='source', metadata={'model_config': trainer.model_config}
+        )
+
+    def test_corrections_et_tags(self):
+        """Dernière correction par question; réponse connue -> tag existant, sinon nouveau tag"""
+        os.makedirs(os.path.join(self.temp_dir, 'data'))
+        with open(os.path.join(self.temp_dir, 'data', 'feedback_corrections.jsonl'), 'w', encoding='utf-8') as f:
+            f.write('{"question": "Salut Mila", "expected_response": "Autre", "date_creation": "2025-01-01"}\n')
+            f.write('{"question": "salut mila", "expected_response": "Bonjour !", "date_creation": "2025-01-02"}\n')
+            f.write('{"question": "tu aimes les pixels", "expected_response": "Oui !", "date_creation": "2025-01-03"}\n')
+
+        corrections = self.ajusteur.charger_corrections()
+        self.assertEqual([c['reponse'] for c in corrections], ['Bonjour !', 'Oui !'])
+
+        couples, nouveaux = train.IncrementalTrainer.associer_tags(corrections, self.bundle)
+        self.assertEqual(couples[0], ('salut mila', 'salutation'))
+        self.assertEqual(list(nouveaux.values()), [['Oui !']])
+        self.assertEqual(couples[1][1], next(iter(nouveaux)))
+
+    def test_ajustement_elargit_la_sortie(self):
+        """Même largeur d'entrée, une classe de plus par nouveau tag, source tracée"""
+        train.TrainingCache(self.temp_dir).sauvegarder_features('donnees', self.features)
+        corrections = [{'question': 'tu aimes les pixels', 'reponse': 'Oui !', 'tag': ''}]
+        nouveau, rapport = self.ajusteur.ajuster(self.bundle, corrections)
+
+        self.assertEqual(nouveau.words, self.bundle.words)
+        self.assertEqual(len(nouveau.classes), len(self.bundle.classes) + 1)
+        self.assertEqual(nouveau.responses[nouveau.classes[-1]], ['Oui !'])
+        self.assertEqual(nouveau.metadata['source_version'], 'source')
+        model = nouveau.construire_modele()
+        self.assertEqual(model.input_shape[-1], len(self.bundle.words))
+        self.assertEqual(model.output_shape[-1], 3)
+        self.assertEqual(rapport['corrections'], 1)
+        self.assertEqual((rapport['rejeu'], rapport['rejeu_verifie']), (5, True))
+
+        # Ajustement suivant: les features du dernier entraînement complet restent rejouées
+        rejeu = self.ajusteur._rejeu(nouveau)
+        self.assertEqual(rejeu.classes, nouveau.classes)
+        self.assertEqual(rejeu.train_y.shape, (5, 3))
+        self.assertFalse(rejeu.train_y[:, 2].any())
+        corrections.append({'question': 'tu joues a quoi', 'reponse': 'A tout !', 'tag': ''})
+        suivant, rapport = self.ajusteur.ajuster(nouveau, corrections)
+        self.assertEqual(len(suivant.classes), 4)
+        self.assertTrue(rapport['rejeu_verifie'])
+
+    def test_sans_rejeu_refuse(self):
+        """Sans features à rejouer, le bundle n'est publié que sur autorisation explicite"""
+        corrections = [{'question': 'tu aimes les pixels', 'reponse': 'Oui !', 'tag': ''}]
+        nouveau, rapport = self.ajusteur.ajuster(self.bundle, corrections)
+        self.assertIsNone(nouveau)
+        self.assertIn('refus', rapport)
+
+        nouveau, rapport = self.ajusteur.ajuster(self.bundle, corrections, sans_rejeu=True)
+        self.assertEqual(len(nouveau.classes), 3)
+        self.assertFalse(rapport['rejeu_verifie'])
+
+    def test_rechargement_a_chaud(self):
+        """Modèle, classes et cache remplacés d'un bloc; une requête en cours garde l'ancien état"""
+        chemin = os.path.join(self.temp_dir, train.BUNDLE_FILENAME)
+        self.bundle.sauvegarder(chemin)
+        service = ChatbotService.__new__(ChatbotService)
+        service.config = SimpleNamespace(MODEL_BUNDLE_PATH=chemin)
+        service.cache_size_limit = 10
+        service._charger_bundle(chemin)
+        avant = service.etat
+        service._mettre_en_cache_prediction('cle', {'intent': 'salutation', 'probability': 0.9})
+
+        train.TrainingCache(self.temp_dir).sauvegarder_features('donnees', self.features)
+        corrections = [{'question': 'tu aimes les pixels', 'reponse': 'Oui !', 'tag': ''}]
+        nouveau, _ = self.ajusteur.ajuster(self.bundle, corrections)
+        nouveau.sauvegarder(chemin)
+        self.assertTrue(service.recharger_bundle())
+
+        apres = service.etat
+        self.assertEqual((len(avant.classes), len(apres.classes)), (2, 3))
+        self.assertEqual(apres.model.output_shape[-1], len(apres.classes))
+        self.assertEqual(avant.model.output_shape[-1], len(avant.classes))
+        self.assertEqual(service.prediction_cache, {})
+        service._mettre_en_cache_prediction('ancienne', {'intent': 'salutation', 'probability': 0.9}, avant)
+        self.assertNotIn('ancienne', service.prediction_cache)
+
+    def test_ajustement_bundle_quantifie(self):
+        """Bundle quantifié: aucun processus lancé, une seule alerte; un échec journalise la fin de stderr"""
+        chemin = os.path.join(self.temp_dir, train.BUNDLE_FILENAME)
+        quantifier_bundle(self.bundle, 'int8').sauvegarder(chemin)
+        service = ChatbotService.__new__(ChatbotService)
+        service.config = SimpleNamespace(FEEDBACK_FINETUNE=True, BASE_DIR=self.temp_dir, FEEDBACK_FINETUNE_TIMEOUT=5)
+        service.stats = Statistiques({'ajustements_reussis': 0, 'ajustements_echoues': 0},
+                                     valeurs={'derniere_duree_ajustement': 0.0})
+        service._ajustement_lock = threading.Lock()
+        service._ajustement_en_cours = service._ajustement_relance = service._ajustement_impossible_signale = False
+        service._charger_bundle(chemin)
+
+        with patch.object(chatbot_service.threading, 'Thread', side_effect=AssertionError("processus lancé")), \
+                self.assertLogs(chatbot_service.logger, 'WARNING') as journaux:
+            self.assertFalse(service.planifier_ajustement())
+            self.assertFalse(service.planifier_ajustement())
+        self.assertEqual(len(journaux.output), 1)
+        self.assertIn("int8", journaux.output[0])
+
+        echec = subprocess.CompletedProcess([], 1, stderr="\n".join(f"ligne {i}" for i in range(50)) + "\n❌ cause")
+        with patch.object(chatbot_service.subprocess, 'run', return_value=echec), \
+                self.assertLogs(chatbot_service.logger, 'ERROR') as journaux:
+            service._ajustement_en_cours = True
+            service._executer_ajustements()
+        self.assertIn("❌ cause", journaux.output[0])
+        self.assertNotIn("ligne 10\n", journaux.output[0])
+        self.assertEqual(service.stats['ajustements_echoues'], 1)
+
+class TestBackupManager(unittest.TestCase):
+    """Tests du stockage des sauvegardes adressé par contenu"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.backups = train.BackupManager(self.temp_dir, max_backups=2)
+        self.objets = lambda: sorted(p.name for p in self.backups.objects_dir.glob("*/*"))
+
+    def publier(self, version, poids=1.0):
+        ModelBundle(
+            version=version, words=['bonjour'], classes=['salutation'], responses={},
+            architecture='{}', weights=[np.full((1, 1), poids, dtype=np.float32)]
+        ).sauvegarder(os.path.join(self.temp_dir, train.BUNDLE_FILENAME))
+        self.assertTrue(self.backups.backup_bundle())
+
+    def test_deduplication(self):
+        """Une version déjà enregistrée et des patterns identiques ne créent aucun objet"""
+        self.publier('v1')
+        self.assertTrue(self.backups.backup_training_patterns(DONNEES_TEST))
+        objets = self.objets()
+        self.assertEqual(len(objets), 2)
+
+        self.assertTrue(self.backups.backup_bundle())
+        self.publier('v2', poids=2.0)
+        self.assertTrue(self.backups.backup_training_patterns(dict(reversed(list(DONNEES_TEST.items())))))
+        self.assertEqual(len(self.objets()), 3)
+
+        manifestes = {m['version']: m for m in self.backups.charger_manifestes()}
+        self.assertEqual(
+            manifestes['v1']['artefacts']['patterns']['sha256'],
+            manifestes['v2']['artefacts']['patterns']['sha256']
+        )
+        self.assertEqual(self.backups.charger_patterns(), DONNEES_TEST)
+
+    def test_retention_par_manifeste(self):
+        """Seuls les max_backups manifestes récents sont gardés, avec leurs seuls objets"""
+        for i, version in enumerate(('v1', 'v2', 'v3')):
+            self.publier(version, poids=float(i))
+        self.assertEqual([m['version'] for m in self.backups.charger_manifestes()], ['v3', 'v2'])
+        references = sorted(
+            a['sha256'] for m in self.backups.charger_manifestes() for a in m['artefacts'].values()
+        )
+        self.assertEqual(self.objets(), references)
+        self.assertEqual(self.backups.get_backup_summary()['Bundle'], 2)
+
+    def test_patterns_par_defaut(self):
+        """Sans fichier désigné, l'évaluation lit les patterns de la dernière sauvegarde"""
+        vide = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, vide, True)
+        self.assertIsNone(train.charger_patterns_entrainement(base_dir=vide))
+        self.assertFalse(os.path.exists(os.path.join(vide, "data")))
+
+        self.publier('v1')
+        self.assertTrue(self.backups.backup_training_patterns(DONNEES_TEST))
+        self.assertEqual(train.charger_patterns_entrainement(base_dir=self.temp_dir), DONNEES_TEST)
+        bundle = ModelBundle.charger(os.path.join(self.temp_dir, train.BUNDLE_FILENAME))
+        questions, tags = train.charger_questions_evaluation(None, bundle, self.temp_dir)
+        self.assertEqual(len(questions), sum(len(d['patterns']) for d in DONNEES_TEST.values()))
+        self.assertEqual(set(tags), set(DONNEES_TEST))
+
+class TestModelSelection(unittest.TestCase):
+    """Tests de l'inventaire des versions et de la promotion"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.selection = train.ModelSelection(train.ConfigurationManager(), self.temp_dir, workers=1)
+
+        for version in ('v1', 'v2'):
+            ModelBundle(
+                version=version, words=['bonjour'], classes=['salutation'], responses={},
+                architecture='{}', weights=[np.ones((1, 1), dtype=np.float32)]
+            ).sauvegarder(os.path.join(self.temp_dir, train.BUNDLE_FILENAME))
+            self.selection.backup_manager.backup_bundle()
+
+    def test_versions_et_promotion(self):
+        """La sauvegarde promue devient le bundle publié; la version remplacée est sauvegardée"""
+        self.assertEqual(sorted(self.selection.versions()), ['v1', 'v2'])
+        self.assertEqual(self.selection.versions()['v2'], self.selection.bundle_path)
+
+        self.assertTrue(self.selection.promouvoir('v1'))
+        self.assertEqual(ModelBundle.lire_entete(str(self.selection.bundle_path))['version'], 'v1')
+        self.assertEqual(sorted(self.selection.versions()), ['v1', 'v2'])
+        self.assertNotIn('.tmp', ' '.join(os.listdir(self.temp_dir)))
+        self.assertFalse(self.selection.promouvoir('v3'))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -14,7 +14,7 @@ TRAIN_V2.PY - ENTRAÎNEMENT UNIFIÉ POUR MILA ASSIST (VERSION RNCP6)
 Fonctionnalités:
 - Récupération des données depuis l'API/base de données
 - Entraînement du modèle Keras pour le fallback local
-- Mise à jour automatique de words.pkl et classes.pkl
+- Publication d'un bundle versionné unique (poids, vocabulaire, classes, réponses)
 - Sauvegarde et versioning intelligent des modèles
 - Architecture robuste avec gestion d'erreurs
 
@@ -26,8 +26,14 @@ import os
 import sys
 import json
 import pickle
+import re
+import math
 import random
 import shutil
+import tempfile
+import hashlib
+import threading
+import multiprocessing
 import requests
 import urllib3
 import numpy as np
@@ -35,18 +41,32 @@ import nltk
 import logging
 import time
 from datetime import datetime
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator
 from collections import Counter
-from dataclasses import dataclass, asdict
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict, field, replace
 from pathlib import Path
 from dotenv import load_dotenv
 
+from services.model_bundle import ModelBundle, BundleError, BUNDLE_FILENAME
+from services.feature_hashing import (
+    FONCTION_HACHAGE, PONDERATION_DEFAUT, colonnes_hachees, ponderer, statistiques_collisions
+)
+from services.evaluation import matrice_confusion, predire_par_lots, rapport_evaluation
+from services.quantization import (
+    MODES_QUANTIFICATION, ReseauNumpy, mesurer_latence_ms, quantifier_bundle, rapport_quantification
+)
+
 # Imports TensorFlow avec gestion d'erreur
 try:
+    import tensorflow as tf
     from tensorflow.keras.models import Sequential
     from tensorflow.keras.layers import Dense, Dropout, Input, BatchNormalization
     from tensorflow.keras.optimizers import Adam
-    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, LearningRateScheduler
     from tensorflow.keras.regularizers import l2
     TENSORFLOW_AVAILABLE = True
 except ImportError as e:
@@ -83,11 +103,32 @@ class TrainingMetrics:
     training_loss: float = 0.0
     epochs_completed: int = 0
     data_augmentation_factor: float = 0.0
+    training_skipped: bool = False
+    features_from_cache: bool = False
+    quantization: str = ""
+    quantized_accuracy: float = 0.0
+    selected_architecture: Dict[str, Any] = field(default_factory=dict)
+    training_mode: str = "standard"
+    training_seconds: float = 0.0
+    validation_accuracy: float = 0.0
+    hashing_buckets: int = 0
+    hashing_collision_rate: float = 0.0
+    bundle_version: str = ""
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
     
     @property
     def duration(self) -> float:
         return self.end_time - self.start_time if self.end_time > 0 else 0.0
     
+    @contextmanager
+    def chronometre(self, etape: str):
+        """Cumule la durée d'une étape (fetch, preprocess, fit, save...) dans stage_seconds"""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[etape] = round(self.stage_seconds.get(etape, 0.0) + time.perf_counter() - debut, 3)
+    
     def to_dict(self) -> dict:
         return {
             **asdict(self),
@@ -95,8 +136,31 @@ class TrainingMetrics:
             'timestamp': datetime.now().isoformat()
         }
 
+def lire_dernieres_lignes(path: Path, n: int, taille_bloc: int = 8192) -> List[str]:
+    """n dernières lignes non vides d'un fichier, lues par blocs depuis la fin"""
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        donnees = b''
+        while position > 0 and donnees.count(b'\n') <= n:
+            lecture = min(taille_bloc, position)
+            position -= lecture
+            f.seek(position)
+            donnees = f.read(lecture) + donnees
+    lignes = [ligne for ligne in donnees.split(b'\n') if ligne.strip()]
+    return [ligne.decode('utf-8', errors='replace') for ligne in lignes[-n:]] if n > 0 else []
+
 class TrainingLogger:
-    """Logger centralisé pour l'entraînement avec historique"""
+    """Logger centralisé pour l'entraînement avec historique
+    
+    L'historique des métriques est un flux JSONL en ajout seul (une ligne par
+    entraînement): aucun run n'oblige à relire ni réécrire les précédents. Le
+    fichier est compacté aux HISTORIQUE_MAX dernières lignes quand il dépasse
+    TAILLE_COMPACTION octets.
+    """
+    
+    METRICS_FILENAME = "training_metrics.jsonl"
+    HISTORIQUE_MAX = 50
+    TAILLE_COMPACTION = 256 * 1024
     
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = Path(log_dir)
@@ -118,27 +182,18 @@ class TrainingLogger:
         self.logger.info(f"🚀 Démarrage du logging d'entraînement v2.0")
     
     def log_metrics(self, metrics: TrainingMetrics):
-        """Sauvegarde les métriques d'entraînement avec historique"""
-        metrics_file = self.log_dir / "training_metrics_history.json"
+        """Ajoute les métriques d'entraînement au flux JSONL de l'historique"""
+        metrics_file = self.log_dir / self.METRICS_FILENAME
         
         try:
-            # Charger l'historique existant
-            if metrics_file.exists():
-                with open(metrics_file, 'r', encoding='utf-8') as f:
-                    all_metrics = json.load(f)
-            else:
-                all_metrics = []
-            
-            # Ajouter les nouvelles métriques
-            all_metrics.append(metrics.to_dict())
+            self._migrer_historique_json()
             
-            # Limiter l'historique (garder les 50 derniers entraînements)
-            if len(all_metrics) > 50:
-                all_metrics = all_metrics[-50:]
+            # Une ligne complète par écriture: les lignes précédentes ne sont jamais relues
+            with open(metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(metrics.to_dict(), ensure_ascii=False) + "\n")
             
-            # Sauvegarder
-            with open(metrics_file, 'w', encoding='utf-8') as f:
-                json.dump(all_metrics, f, indent=2, ensure_ascii=False)
+            if metrics_file.stat().st_size > self.TAILLE_COMPACTION:
+                self._compacter_historique()
                 
             self.logger.info(f"📊 Métriques sauvegardées: précision={metrics.model_accuracy:.4f}, durée={metrics.duration:.2f}s")
             
@@ -148,6 +203,54 @@ class TrainingLogger:
         except Exception as e:
             self.logger.error(f"❌ Erreur sauvegarde métriques: {e}")
     
+    def _migrer_historique_json(self):
+        """Convertit l'ancien historique JSON (réécrit à chaque run) en flux JSONL"""
+        ancien = self.log_dir / "training_metrics_history.json"
+        if not ancien.exists() or (self.log_dir / self.METRICS_FILENAME).exists():
+            return
+        with open(ancien, 'r', encoding='utf-8') as f:
+            entrees = json.load(f)
+        with open(self.log_dir / self.METRICS_FILENAME, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in entrees[-self.HISTORIQUE_MAX:])
+        ancien.unlink()
+        self.logger.info(f"🔄 Historique des métriques migré en JSONL ({len(entrees)} entrées)")
+    
+    def _compacter_historique(self):
+        """Ne garde que les HISTORIQUE_MAX dernières lignes (remplacement atomique)"""
+        metrics_file = self.log_dir / self.METRICS_FILENAME
+        lignes = lire_dernieres_lignes(metrics_file, self.HISTORIQUE_MAX)
+        tmp_path = metrics_file.with_name(metrics_file.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(ligne + "\n" for ligne in lignes)
+        os.replace(tmp_path, metrics_file)
+        self.logger.info(f"🗜️ Historique des métriques compacté ({len(lignes)} dernières entrées)")
+    
+    @classmethod
+    def lire_historique(cls, n: int = 10, champs: Optional[Iterable[str]] = None,
+                        log_dir: str = "logs") -> List[Dict[str, Any]]:
+        """n derniers entraînements (du plus ancien au plus récent), lus depuis la fin du flux"""
+        metrics_file = Path(log_dir) / cls.METRICS_FILENAME
+        if not metrics_file.exists():
+            return []
+        
+        # Une ligne de plus: seule la dernière peut être tronquée par un arrêt brutal
+        entrees = []
+        for ligne in lire_dernieres_lignes(metrics_file, n + 1):
+            try:
+                entree = json.loads(ligne)
+            except ValueError:
+                continue
+            entrees.append({c: entree.get(c) for c in champs} if champs else entree)
+        return entrees[-n:] if n > 0 else []
+    
+    def log_rapport(self, nom: str, rapport: Dict[str, Any]) -> Path:
+        """Enregistre un rapport JSON (quantification, recherche d'architecture...)"""
+        rapport_file = self.log_dir / f"{nom}.json"
+        with open(rapport_file, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        self.logger.info(f"📝 Rapport enregistré: {rapport_file.name}")
+        return rapport_file
+    
     def _cleanup_old_logs(self):
         """Nettoie les anciens fichiers de log"""
         try:
@@ -163,172 +266,211 @@ class TrainingLogger:
             self.logger.warning(f"⚠️ Erreur nettoyage logs: {e}")
 
 class BackupManager:
-    """Gestionnaire de sauvegardes intelligent avec limitation automatique"""
+    """Sauvegardes adressées par contenu, avec un manifeste par version publiée
+    
+    Chaque artefact (bundle, patterns) est stocké une seule fois sous
+    objects/<sha256[:2]>/<sha256>: un contenu déjà présent n'est ni recopié ni
+    réécrit, et le bundle est lié physiquement (hardlink) quand le système le permet.
+    Un manifeste par version référence ses artefacts; la rétention conserve les
+    max_backups manifestes les plus récents et supprime les objets orphelins.
+    """
     
     def __init__(self, base_dir: str, max_backups: int = 3):
         self.base_dir = Path(base_dir)
         self.backup_dir = self.base_dir / "data" / "Backup"
+        self.objects_dir = self.backup_dir / "objects"
+        self.manifests_dir = self.backup_dir / "manifests"
         self.max_backups = max_backups
         self.logger = logging.getLogger(__name__)
+        # Version dont le manifeste reçoit les patterns sauvegardés ensuite
+        self.version_courante: Optional[str] = None
         self._create_backup_structure()
     
     def _create_backup_structure(self):
         """Crée la structure des répertoires de sauvegarde"""
-        backup_dirs = [
-            "Model", "Words", "Classes", "Patterns", "Metrics"
-        ]
-        
-        for dir_name in backup_dirs:
-            dir_path = self.backup_dir / dir_name
+        for dir_path in (self.objects_dir, self.manifests_dir):
             dir_path.mkdir(parents=True, exist_ok=True)
-            
-        self.logger.info(f"📁 Structure de backup créée dans {self.backup_dir}")
     
-    def _get_backup_files(self, backup_type: str, pattern: str) -> List[Path]:
-        """Récupère la liste des fichiers de backup d'un type donné"""
-        backup_path = self.backup_dir / backup_type
-        return sorted(backup_path.glob(pattern), key=lambda x: x.stat().st_mtime, reverse=True)
+    @staticmethod
+    def _empreinte_fichier(path: Path) -> str:
+        empreinte = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for bloc in iter(lambda: f.read(1 << 20), b''):
+                empreinte.update(bloc)
+        return empreinte.hexdigest()
+    
+    def _chemin_objet(self, empreinte: str) -> Path:
+        return self.objects_dir / empreinte[:2] / empreinte
+    
+    def _stocker_fichier(self, source: Path) -> Tuple[str, bool]:
+        """Stocke un fichier par son contenu; retourne (empreinte, nouvel objet)"""
+        empreinte = self._empreinte_fichier(source)
+        objet = self._chemin_objet(empreinte)
+        if objet.exists():
+            return empreinte, False
+        
+        objet.parent.mkdir(exist_ok=True)
+        try:
+            os.link(source, objet)  # Le fichier publié est remplacé par rename, jamais réécrit sur place
+        except FileExistsError:
+            return empreinte, False
+        except OSError:
+            tmp_path = objet.with_name(objet.name + ".tmp")
+            shutil.copy2(source, tmp_path)
+            os.replace(tmp_path, objet)
+        return empreinte, True
+    
+    def _stocker_octets(self, contenu: bytes) -> Tuple[str, bool]:
+        """Stocke un contenu en mémoire par son empreinte; retourne (empreinte, nouvel objet)"""
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        objet = self._chemin_objet(empreinte)
+        if objet.exists():
+            return empreinte, False
+        
+        objet.parent.mkdir(exist_ok=True)
+        tmp_path = objet.with_name(objet.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(contenu)
+        os.replace(tmp_path, objet)
+        return empreinte, True
+    
+    def _chemin_manifeste(self, version: str) -> Path:
+        return self.manifests_dir / f"{version}.json"
+    
+    def charger_manifestes(self) -> List[Dict[str, Any]]:
+        """Manifestes lisibles, du plus récent au plus ancien"""
+        manifestes = []
+        for path in self.manifests_dir.glob("*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    manifestes.append(json.load(f))
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"⚠️ Manifeste illisible {path.name}: {e}")
+        return sorted(manifestes, key=lambda m: m.get('date', ''), reverse=True)
+    
+    def _ecrire_manifeste(self, manifeste: Dict[str, Any]):
+        path = self._chemin_manifeste(manifeste['version'])
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifeste, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
     
-    def _cleanup_old_backups(self, backup_type: str, pattern: str):
-        """Supprime les anciens backups au-delà de la limite"""
-        backup_files = self._get_backup_files(backup_type, pattern)
+    def _ajouter_artefact(self, nom: str, empreinte: str, taille: int, nouveau: bool, **infos):
+        """Rattache un artefact au manifeste de la version courante (créé si besoin)"""
+        if self.version_courante is None:
+            self.version_courante = "run-" + datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = self._chemin_manifeste(self.version_courante)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                manifeste = json.load(f)
+        else:
+            manifeste = {'version': self.version_courante, 'date': datetime.now().isoformat(), 'artefacts': {}}
         
-        if len(backup_files) > self.max_backups:
-            files_to_remove = backup_files[self.max_backups:]
-            
-            for old_file in files_to_remove:
-                try:
-                    old_file.unlink()
-                    self.logger.info(f"🗑️ Ancien backup supprimé: {old_file.name}")
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Erreur suppression {old_file.name}: {e}")
-            
-            self.logger.info(f"🧹 Nettoyage {backup_type}: {len(files_to_remove)} fichiers supprimés")
+        manifeste['artefacts'][nom] = {'sha256': empreinte, 'taille': taille, **infos}
+        self._ecrire_manifeste(manifeste)
+        self.logger.info(
+            f"💾 {nom} {'sauvegardé' if nouveau else 'déjà présent (dédupliqué)'}: "
+            f"{empreinte[:12]} ({taille // 1024} Ko) -> manifeste {self.version_courante}"
+        )
     
-    def backup_model(self) -> bool:
-        """Sauvegarde le modèle existant avec gestion automatique des versions"""
-        model_path = self.base_dir / "chatbot_model.keras"
+    def chemin_artefact(self, manifeste: Dict[str, Any], nom: str) -> Optional[Path]:
+        """Fichier de l'objet d'un artefact du manifeste (None s'il manque)"""
+        artefact = manifeste.get('artefacts', {}).get(nom)
+        if not artefact:
+            return None
+        objet = self._chemin_objet(artefact['sha256'])
+        return objet if objet.exists() else None
+    
+    def backup_bundle(self) -> bool:
+        """Sauvegarde le bundle publié s'il n'a pas encore de manifeste (aucune copie sinon)"""
+        bundle_path = self.base_dir / BUNDLE_FILENAME
         
-        if not model_path.exists():
-            self.logger.info("ℹ️ Aucun modèle existant à sauvegarder")
+        if not bundle_path.exists():
+            self.logger.info("ℹ️ Aucun bundle existant à sauvegarder")
             return False
         
-        timestamp = datetime.now().strftime("%d-%m-%Y_%Hh%Mmin%Ss")
-        backup_path = self.backup_dir / "Model" / f"chatbot_model_{timestamp}.keras"
+        try:
+            version = ModelBundle.lire_entete(str(bundle_path))['version']
+        except BundleError as e:
+            self.logger.warning(f"⚠️ Bundle courant illisible, sauvegarde horodatée: {e}")
+            version = datetime.now().strftime("%Y%m%d-%H%M%S") + "-illisible"
+        
+        self.version_courante = version
+        manifeste_path = self._chemin_manifeste(version)
+        if manifeste_path.exists():
+            self.logger.info(f"ℹ️ Bundle {version} déjà sauvegardé")
+            return True
         
         try:
-            shutil.copy2(model_path, backup_path)
-            self.logger.info(f"💾 Modèle sauvegardé: {backup_path.name}")
-            
-            # Nettoyage automatique
-            self._cleanup_old_backups("Model", "chatbot_model_*.keras")
+            empreinte, nouveau = self._stocker_fichier(bundle_path)
+            self._ajouter_artefact(
+                'bundle', empreinte, bundle_path.stat().st_size, nouveau, fichier=BUNDLE_FILENAME
+            )
+            self._appliquer_retention()
             return True
             
         except Exception as e:
-            self.logger.error(f"❌ Erreur sauvegarde modèle: {e}")
+            self.logger.error(f"❌ Erreur sauvegarde bundle: {e}")
             return False
     
-    def backup_vocabulary_files(self) -> bool:
-        """Sauvegarde words.pkl et classes.pkl avec gestion des versions"""
-        timestamp = datetime.now().strftime("%d-%m-%Y_%Hh%Mmin%Ss")
-        success = True
-        
-        files_to_backup = [
-            ("words.pkl", "Words"),
-            ("classes.pkl", "Classes")
-        ]
-        
-        for filename, backup_type in files_to_backup:
-            source_path = self.base_dir / filename
-            
-            if source_path.exists():
-                backup_path = self.backup_dir / backup_type / f"{filename}_{timestamp}"
-                
-                try:
-                    shutil.copy2(source_path, backup_path)
-                    self.logger.info(f"💾 {filename} sauvegardé: {backup_path.name}")
-                    
-                    # Nettoyage automatique
-                    self._cleanup_old_backups(backup_type, f"{filename}_*")
-                    
-                except Exception as e:
-                    self.logger.error(f"❌ Erreur sauvegarde {filename}: {e}")
-                    success = False
-            else:
-                self.logger.info(f"ℹ️ {filename} n'existe pas encore")
-        
-        return success
-    
     def backup_training_patterns(self, donnees_tags: Dict[str, Any]) -> bool:
-        """Sauvegarde les patterns d'entraînement avec métadonnées"""
-        timestamp = datetime.now().strftime("%d-%m-%Y_%Hh%Mmin%Ss")
-        
-        # Préparer les données avec métadonnées
-        backup_data = {
-            "timestamp": timestamp,
-            "total_tags": len(donnees_tags),
-            "total_patterns": sum(len(d['patterns']) for d in donnees_tags.values()),
-            "total_responses": sum(len(d['responses']) for d in donnees_tags.values()),
-            "data": donnees_tags
-        }
-        
-        backup_path = self.backup_dir / "Patterns" / f"training_patterns_{timestamp}.pkl"
-        
+        """Sauvegarde les patterns d'entraînement (JSON canonique: mêmes données, même objet)"""
         try:
-            with open(backup_path, 'wb') as f:
-                pickle.dump(backup_data, f)
-            
-            self.logger.info(f"💾 Patterns sauvegardés: {backup_path.name}")
-            
-            # Nettoyage automatique
-            self._cleanup_old_backups("Patterns", "training_patterns_*.pkl")
-            
-            # Mise à jour du fichier actuel
-            current_path = self.base_dir / "training_patterns.pkl"
-            with open(current_path, 'wb') as f:
-                pickle.dump(donnees_tags, f)
-            
+            contenu = json.dumps(donnees_tags, sort_keys=True, ensure_ascii=False).encode('utf-8')
+            empreinte, nouveau = self._stocker_octets(contenu)
+            self._ajouter_artefact(
+                'patterns', empreinte, len(contenu), nouveau,
+                total_tags=len(donnees_tags),
+                total_patterns=sum(len(d['patterns']) for d in donnees_tags.values()),
+                total_responses=sum(len(d['responses']) for d in donnees_tags.values())
+            )
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Erreur sauvegarde patterns: {e}")
             return False
     
-    def backup_metrics(self, metrics: TrainingMetrics) -> bool:
-        """Sauvegarde les métriques d'entraînement"""
-        timestamp = datetime.now().strftime("%d-%m-%Y_%Hh%Mmin%Ss")
-        backup_path = self.backup_dir / "Metrics" / f"training_metrics_{timestamp}.json"
+    def charger_patterns(self) -> Optional[Dict[str, Any]]:
+        """Patterns de la sauvegarde la plus récente qui en contient"""
+        for manifeste in self.charger_manifestes():
+            path = self.chemin_artefact(manifeste, 'patterns')
+            if path is not None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        return None
+    
+    def _appliquer_retention(self):
+        """Conserve les max_backups manifestes les plus récents puis supprime les objets orphelins"""
+        manifestes = self.charger_manifestes()
+        for manifeste in manifestes[self.max_backups:]:
+            try:
+                self._chemin_manifeste(manifeste['version']).unlink()
+                self.logger.info(f"🗑️ Ancienne sauvegarde supprimée: {manifeste['version']}")
+            except OSError as e:
+                self.logger.warning(f"⚠️ Erreur suppression du manifeste {manifeste['version']}: {e}")
         
-        try:
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(metrics.to_dict(), f, indent=2, ensure_ascii=False)
-            
-            self.logger.info(f"📊 Métriques sauvegardées: {backup_path.name}")
-            
-            # Nettoyage automatique
-            self._cleanup_old_backups("Metrics", "training_metrics_*.json")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"❌ Erreur sauvegarde métriques: {e}")
-            return False
+        references = {
+            a['sha256'] for m in manifestes[:self.max_backups] for a in m.get('artefacts', {}).values()
+        }
+        supprimes = 0
+        for objet in self.objects_dir.glob("*/*"):
+            if objet.name not in references:
+                try:
+                    objet.unlink()
+                    supprimes += 1
+                except OSError as e:
+                    self.logger.warning(f"⚠️ Erreur suppression objet {objet.name[:12]}: {e}")
+        if supprimes:
+            self.logger.info(f"🧹 Nettoyage: {supprimes} objets non référencés supprimés")
     
     def get_backup_summary(self) -> Dict[str, int]:
         """Retourne un résumé des sauvegardes disponibles"""
-        summary = {}
-        
-        backup_types = [
-            ("Model", "chatbot_model_*-*-*_*h*min*s.keras"),
-            ("Words", "words.pkl_*-*-*_*h*min*s"),
-            ("Classes", "classes.pkl_*-*-*_*h*min*s"),
-            ("Patterns", "training_patterns_*-*-*_*h*min*s.pkl"),
-            ("Metrics", "training_metrics_*-*-*_*h*min*s.json")
-        ]
-        
-        for backup_type, pattern in backup_types:
-            files = self._get_backup_files(backup_type, pattern)
-            summary[backup_type] = len(files)
-        
+        manifestes = self.charger_manifestes()
+        summary = {
+            nom.capitalize(): sum(1 for m in manifestes if nom in m.get('artefacts', {}))
+            for nom in ('bundle', 'patterns')
+        }
+        summary['Objets'] = sum(1 for _ in self.objects_dir.glob("*/*"))
         return summary
 
 class ConfigurationManager:
@@ -342,7 +484,53 @@ class ConfigurationManager:
         self.DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
         self.MAX_BACKUPS = int(os.getenv('MAX_BACKUPS', '3'))
         self.ENABLE_CROSS_VALIDATION = os.getenv('ENABLE_CROSS_VALIDATION', 'false').lower() == 'true'
-        
+
+        # Récupération des connaissances (parallélisme borné + snapshot local)
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.FETCH_WORKERS = max(1, int(os.getenv('FETCH_WORKERS', '6')))
+        self.FETCH_TIMEOUT = int(os.getenv('FETCH_TIMEOUT', '30'))
+        self.FETCH_SNAPSHOT_PATH = os.getenv(
+            'FETCH_SNAPSHOT_PATH',
+            os.path.join(base_dir, "data", "Cache", "knowledge_snapshot.json")
+        )
+        self.FETCH_FULL_SYNC = os.getenv('FETCH_FULL_SYNC', 'false').lower() == 'true'
+
+        # Quantification post-entraînement du bundle publié ('', 'int8' ou 'float16')
+        self.MODEL_QUANTIZATION = os.getenv('MODEL_QUANTIZATION', '').lower()
+        self.QUANTIZATION_MAX_ACCURACY_DROP = float(os.getenv('QUANTIZATION_MAX_ACCURACY_DROP', '0.01'))
+
+        # Hachage des features (0 = vocabulaire words classique, sinon nombre de colonnes)
+        self.FEATURE_HASHING_BUCKETS = max(0, int(os.getenv('FEATURE_HASHING_BUCKETS', '0')))
+
+        # Ajustement incrémental depuis les feedbacks (train.py --fine-tune)
+        self.FINETUNE_STEPS = max(1, int(os.getenv('FINETUNE_STEPS', '200')))
+        self.FINETUNE_LEARNING_RATE = float(os.getenv('FINETUNE_LEARNING_RATE', '0.0005'))
+        self.FINETUNE_REPLAY_SIZE = max(0, int(os.getenv('FINETUNE_REPLAY_SIZE', '1024')))
+        self.FINETUNE_MAX_ACCURACY_DROP = float(os.getenv('FINETUNE_MAX_ACCURACY_DROP', '0.02'))
+        # Publication sans rejeu (précision non vérifiée) seulement sur demande explicite
+        self.FINETUNE_ALLOW_NO_REPLAY = os.getenv('FINETUNE_ALLOW_NO_REPLAY', 'false').lower() == 'true'
+
+        # Threads TensorFlow (0 = automatique; fixés explicitement en mode rapide)
+        self.TRAINING_THREADS = max(0, int(os.getenv('TRAINING_THREADS', '0')))
+
+        # Recherche d'architecture (train.py --search) et configuration retenue
+        self.SEARCH_WORKERS = max(1, int(os.getenv('SEARCH_WORKERS', str(min(4, os.cpu_count() or 1)))))
+        self.SEARCH_LATENCY_BUDGET_MS = float(os.getenv('SEARCH_LATENCY_BUDGET_MS', '1.0'))
+
+        # Comparaison hors-ligne des versions sauvegardées (train.py --evaluate-backups)
+        self.EVAL_WORKERS = max(1, int(os.getenv('EVAL_WORKERS', str(min(4, os.cpu_count() or 1)))))
+        self.EVAL_HOLDOUT_PATH = os.getenv('EVAL_HOLDOUT_PATH', os.path.join(base_dir, "data", "holdout_set.jsonl"))
+        self.EVAL_TRAFFIC_PATH = os.getenv('EVAL_TRAFFIC_PATH', os.path.join(base_dir, "data", "traffic_capture.jsonl"))
+        self.EVAL_TRAFFIC_SAMPLE = max(1, int(os.getenv('EVAL_TRAFFIC_SAMPLE', '200')))
+        self.MODEL_CONFIG_PATH = os.getenv(
+            'MODEL_CONFIG_PATH',
+            os.path.join(base_dir, "data", "model_config.json")
+        )
+
+        # Prétraitement du texte (pool de processus, lots de patterns)
+        self.PREPROCESS_WORKERS = max(1, int(os.getenv('PREPROCESS_WORKERS', str(min(4, os.cpu_count() or 1)))))
+        self.PREPROCESS_CHUNK_SIZE = max(1, int(os.getenv('PREPROCESS_CHUNK_SIZE', '256')))
+
         # Validation de la configuration
         if not self.USE_LEGACY_FALLBACK:
             print("⚠️ USE_LEGACY_FALLBACK=false - Le fallback Keras ne sera pas utilisé")
@@ -353,14 +541,45 @@ class ConfigurationManager:
 class APIClient:
     """Client API pour récupérer les données d'entraînement"""
     
+    # Requêtes larges pour couvrir le maximum de données
+    REQUETES_RECHERCHE = [
+        "bonjour", "salut", "hello", "comment", "que", "qui", "où", "quand",
+        "pourquoi", "aide", "merci", "ai_licia", "ailicia", "alicia", "mila",
+        "stream", "streaming", "TTS", "OBS", "configuration", "configurer",
+        "utiliser", "plusieurs", "pc", "ordinateur", "audio", "voice", "vocal",
+        "test", "erreur", "problème", "solution", ""  # Requête vide pour tout
+    ]
+    
+    SNAPSHOT_VERSION = 1
+    
     def __init__(self, config: ConfigurationManager):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update({
-            'X-API-Key': config.API_KEY,
+        self.session = self._creer_session()
+        self.logger = logging.getLogger(__name__)
+        
+        # Une session HTTP par thread (requests.Session n'est pas thread-safe)
+        self._sessions_threads = threading.local()
+        self.snapshot_path = Path(config.FETCH_SNAPSHOT_PATH)
+        
+        # Résumé de la dernière synchronisation (requêtes inchangées, modifiées...)
+        self.derniere_synchronisation: Dict[str, Any] = {}
+    
+    def _creer_session(self) -> requests.Session:
+        """Crée une session HTTP configurée avec la clé API"""
+        session = requests.Session()
+        session.headers.update({
+            'X-API-Key': self.config.API_KEY,
             'Content-Type': 'application/json'
         })
-        self.logger = logging.getLogger(__name__)
+        return session
+    
+    def _session_courante(self) -> requests.Session:
+        """Retourne la session HTTP propre au thread courant"""
+        session = getattr(self._sessions_threads, 'session', None)
+        if session is None:
+            session = self._creer_session()
+            self._sessions_threads.session = session
+        return session
     
     def test_connection(self) -> bool:
         """Test de connexion à l'API"""
@@ -376,72 +595,226 @@ class APIClient:
                 self.logger.debug(f"Erreur connexion API: {e}")
             return False
     
-    def recuperer_toutes_connaissances(self) -> List[Dict[str, Any]]:
-        """Récupère toutes les connaissances de la base de données"""
-        self.logger.info("🔍 Récupération des connaissances depuis l'API...")
+    @staticmethod
+    def _hash_contenu(contenu: Any) -> str:
+        """Hash stable (SHA-256) d'un contenu sérialisable en JSON"""
+        donnees = json.dumps(contenu, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(donnees.encode('utf-8')).hexdigest()
+    
+    def _charger_snapshot(self) -> Dict[str, Any]:
+        """Charge le snapshot local des recherches (vide si absent ou invalide)"""
+        snapshot_vide = {'version': self.SNAPSHOT_VERSION, 'requetes': {}, 'enregistrements': {}, 'id_watermark': None}
         
-        toutes_connaissances = []
-        connaissances_vues = set()
+        if self.config.FETCH_FULL_SYNC or not self.snapshot_path.exists():
+            return snapshot_vide
         
-        # Requêtes larges pour couvrir le maximum de données
-        requetes_recherche = [
-            "bonjour", "salut", "hello", "comment", "que", "qui", "où", "quand",
-            "pourquoi", "aide", "merci", "ai_licia", "ailicia", "alicia", "mila",
-            "stream", "streaming", "TTS", "OBS", "configuration", "configurer",
-            "utiliser", "plusieurs", "pc", "ordinateur", "audio", "voice", "vocal",
-            "test", "erreur", "problème", "solution", ""  # Requête vide pour tout
-        ]
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('version') != self.SNAPSHOT_VERSION:
+                self.logger.info("ℹ️ Version de snapshot différente - synchronisation complète")
+                return snapshot_vide
+            return snapshot
+        except Exception as e:
+            self.logger.warning(f"⚠️ Snapshot illisible, synchronisation complète: {e}")
+            return snapshot_vide
+    
+    def _sauvegarder_snapshot(self, snapshot: Dict[str, Any]):
+        """Écrit le snapshot de manière atomique (écriture puis renommage)"""
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            self.logger.info(f"💾 Snapshot des connaissances mis à jour: {self.snapshot_path.name}")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Erreur sauvegarde snapshot: {e}")
+    
+    def _rechercher(self, requete: str, entree_snapshot: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Exécute une recherche conditionnelle (ETag) et retourne (statut, entrée de snapshot)"""
+        headers = {}
+        if entree_snapshot and entree_snapshot.get('etag'):
+            headers['If-None-Match'] = entree_snapshot['etag']
+        
+        payload = {
+            "query": requete,
+            "top_k": 1000,
+            "threshold": 0.0  # Récupérer tout
+        }
         
-        for i, requete in enumerate(requetes_recherche):
-            self.logger.info(f"   📋 Recherche {i+1}/{len(requetes_recherche)}: '{requete}'...")
+        try:
+            response = self._session_courante().post(
+                f"{self.config.API_URL}/search",
+                json=payload,
+                headers=headers,
+                timeout=self.config.FETCH_TIMEOUT,
+                verify=False
+            )
             
-            try:
-                payload = {
-                    "query": requete,
-                    "top_k": 1000,
-                    "threshold": 0.0  # Récupérer tout
-                }
+            if response.status_code == 304 and entree_snapshot:
+                return 'inchange', entree_snapshot
+            
+            if response.status_code == 200:
+                data = response.json()
+                if data.get('success') and 'results' in data:
+                    resultats = data['results']
+                    hash_resultats = self._hash_contenu(resultats)
+                    
+                    if entree_snapshot and entree_snapshot.get('hash') == hash_resultats:
+                        statut = 'inchange'
+                    else:
+                        statut = 'modifie' if entree_snapshot else 'nouveau'
+                    
+                    return statut, {
+                        'etag': response.headers.get('ETag'),
+                        'hash': hash_resultats,
+                        'results': resultats,
+                        'fetched_at': datetime.now().isoformat()
+                    }
                 
-                response = self.session.post(
-                    f"{self.config.API_URL}/search",
-                    json=payload,
-                    timeout=30,
-                    verify=False
+                self.logger.warning(f"Pas de résultats pour '{requete}': {data}")
+            else:
+                self.logger.warning(f"Erreur HTTP {response.status_code} pour '{requete}'")
+                
+        except Exception as e:
+            self.logger.error(f"Erreur requête '{requete}': {e}")
+        
+        # Échec réseau: réutiliser la dernière version connue si disponible
+        if entree_snapshot:
+            return 'cache', entree_snapshot
+        return 'echec', {}
+    
+    def recuperer_toutes_connaissances(self) -> List[Dict[str, Any]]:
+        """Récupère toutes les connaissances de la base de données"""
+        requetes = self.REQUETES_RECHERCHE
+        snapshot = self._charger_snapshot()
+        entrees_precedentes = snapshot.get('requetes', {})
+        
+        self.logger.info(
+            f"🔍 Récupération des connaissances depuis l'API "
+            f"({len(requetes)} requêtes, {self.config.FETCH_WORKERS} en parallèle)..."
+        )
+        debut = time.time()
+        
+        # Lancement concurrent avec un pool borné
+        resultats_par_requete: Dict[str, Dict[str, Any]] = {}
+        statuts = Counter()
+        with ThreadPoolExecutor(max_workers=self.config.FETCH_WORKERS, thread_name_prefix="fetch") as executor:
+            futures = {
+                executor.submit(self._rechercher, requete, entrees_precedentes.get(requete)): requete
+                for requete in requetes
+            }
+            for future in as_completed(futures):
+                requete = futures[future]
+                statut, entree = future.result()
+                statuts[statut] += 1
+                if entree:
+                    resultats_par_requete[requete] = entree
+                self.logger.info(
+                    f"   📋 '{requete}': {statut} ({len(entree.get('results', []))} résultats)"
+                )
+        
+        # Déduplication dans l'ordre des requêtes (résultat déterministe)
+        toutes_connaissances = []
+        connaissances_vues = set()
+        for requete in requetes:
+            for resultat in resultats_par_requete.get(requete, {}).get('results', []):
+                # Créer une clé unique pour éviter les doublons
+                cle_unique = (
+                    resultat.get('tag', '').strip(),
+                    resultat.get('question', '').strip()
                 )
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success') and 'results' in data:
-                        for resultat in data['results']:
-                            # Créer une clé unique pour éviter les doublons
-                            cle_unique = (
-                                resultat.get('tag', '').strip(),
-                                resultat.get('question', '').strip()
-                            )
-                            
-                            if (cle_unique not in connaissances_vues and 
-                                all(cle_unique) and 
-                                len(resultat.get('question', '')) > 2 and
-                                len(resultat.get('response', '')) > 2):
-                                
-                                connaissances_vues.add(cle_unique)
-                                toutes_connaissances.append(resultat)
-                        
-                        self.logger.info(f"      ✅ {len(data['results'])} résultats trouvés")
-                    else:
-                        self.logger.warning(f"Pas de résultats: {data}")
-                else:
-                    self.logger.warning(f"Erreur HTTP {response.status_code}")
+                if (cle_unique not in connaissances_vues and 
+                    all(cle_unique) and 
+                    len(resultat.get('question', '')) > 2 and
+                    len(resultat.get('response', '')) > 2):
                     
-            except Exception as e:
-                self.logger.error(f"Erreur requête: {e}")
+                    connaissances_vues.add(cle_unique)
+                    toutes_connaissances.append(resultat)
+        
+        # Détection des enregistrements modifiés (hash de contenu + watermark d'id)
+        anciens_hashes = snapshot.get('enregistrements', {})
+        nouveaux_hashes = {
+            f"{r.get('tag', '').strip()}::{r.get('question', '').strip()}": self._hash_contenu(r)
+            for r in toutes_connaissances
+        }
+        ids = [r['id'] for r in toutes_connaissances if isinstance(r.get('id'), int)]
+        id_watermark = max(ids) if ids else None
+        ancien_watermark = snapshot.get('id_watermark')
+        
+        self.derniere_synchronisation = {
+            'requetes': dict(statuts),
+            'enregistrements_nouveaux': len(nouveaux_hashes.keys() - anciens_hashes.keys()),
+            'enregistrements_modifies': sum(
+                1 for cle, h in nouveaux_hashes.items()
+                if cle in anciens_hashes and anciens_hashes[cle] != h
+            ),
+            'enregistrements_supprimes': len(anciens_hashes.keys() - nouveaux_hashes.keys()),
+            'ids_au_dela_watermark': (
+                sum(1 for i in ids if i > ancien_watermark) if ancien_watermark is not None else len(ids)
+            ),
+            'duree_secondes': time.time() - debut
+        }
         
+        # Mise à jour du snapshot uniquement si au moins une requête a abouti
+        if statuts['echec'] < len(requetes):
+            self._sauvegarder_snapshot({
+                'version': self.SNAPSHOT_VERSION,
+                'requetes': resultats_par_requete,
+                'enregistrements': nouveaux_hashes,
+                'id_watermark': id_watermark,
+                'updated_at': datetime.now().isoformat()
+            })
+        
+        sync = self.derniere_synchronisation
+        self.logger.info(
+            f"🔄 Synchronisation: {statuts['inchange']} inchangées, {statuts['modifie'] + statuts['nouveau']} mises à jour, "
+            f"{statuts['cache']} depuis le snapshot, {statuts['echec']} en échec ({sync['duree_secondes']:.2f}s)"
+        )
+        self.logger.info(
+            f"📈 Enregistrements: +{sync['enregistrements_nouveaux']} nouveaux, "
+            f"~{sync['enregistrements_modifies']} modifiés, -{sync['enregistrements_supprimes']} supprimés"
+        )
         self.logger.info(f"📊 Total connaissances uniques: {len(toutes_connaissances)}")
         return toutes_connaissances
 
 class DataProcessor:
     """Processeur de données pour l'entraînement"""
     
+    # Normalisation des termes spécialisés du domaine du streaming
+    TERMES_SPECIALISES = {
+        'ai_licia': 'ailicia',
+        'ai-licia': 'ailicia',
+        'ai licia': 'ailicia',
+        'tts': 'texttospeech',
+        'text-to-speech': 'texttospeech',
+        'text to speech': 'texttospeech',
+        'obs': 'obscapture',
+        'obs studio': 'obscapture',
+        'plusieurs pc': 'plusieurspc',
+        'multiples pc': 'plusieurspc',
+        'en même temps': 'simultanement',
+        'même temps': 'simultanement'
+    }
+    
+    # Synonymes contextuels pour l'augmentation (maximum 2 utilisés par mot)
+    SYNONYMES = {
+        'comment': ['de quelle manière', 'comment faire', 'comment puis-je'],
+        'configurer': ['paramétrer', 'régler', 'ajuster', 'installer'],
+        'utiliser': ['employer', 'se servir de', 'faire fonctionner'],
+        'ailicia': ['ia', 'assistant', 'bot', 'chatbot'],
+        'plusieurs': ['multiples', 'différents', 'nombreux'],
+        'ordinateur': ['pc', 'machine', 'poste'],
+        'simultanement': ['en parallèle', 'conjointement'],
+        'aide': ['assistance', 'support', 'aider'],
+        'problème': ['souci', 'erreur', 'bug', 'dysfonctionnement']
+    }
+    
+    _RE_PONCTUATION = re.compile(r'[^\w\s]')
+    _RE_ESPACES = re.compile(r'\s+')
+    
     def __init__(self, debug: bool = False):
         self.debug = debug
         self.lemmatizer = WordNetLemmatizer() if NLTK_AVAILABLE else None
@@ -470,41 +843,20 @@ class DataProcessor:
         texte = texte.lower().strip()
         
         # Normalisation des termes spécialisés
-        termes_specialises = {
-            'ai_licia': 'ailicia',
-            'ai-licia': 'ailicia',
-            'ai licia': 'ailicia',
-            'tts': 'texttospeech',
-            'text-to-speech': 'texttospeech',
-            'text to speech': 'texttospeech',
-            'obs': 'obscapture',
-            'obs studio': 'obscapture',
-            'plusieurs pc': 'plusieurspc',
-            'multiples pc': 'plusieurspc',
-            'en même temps': 'simultanement',
-            'même temps': 'simultanement'
-        }
-        
-        for ancien, nouveau in termes_specialises.items():
+        for ancien, nouveau in self.TERMES_SPECIALISES.items():
             texte = texte.replace(ancien, nouveau)
         
         # Suppression des caractères non pertinents
-        import re
-        texte = re.sub(r'[^\w\s]', ' ', texte)
-        texte = re.sub(r'\s+', ' ', texte)
+        texte = self._RE_PONCTUATION.sub(' ', texte)
+        texte = self._RE_ESPACES.sub(' ', texte)
         
         return texte.strip()
     
-    def convertir_donnees_vers_format_entrainement(
+    def _iterer_connaissances_valides(
         self, 
-        connaissances: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        """Convertit les données de la base vers le format d'entraînement"""
-        self.logger.info("🔄 Conversion des données vers format d'entraînement...")
-        
-        # Grouper par tag
-        donnees_par_tag = {}
-        
+        connaissances: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, str, str]]:
+        """Flux des triplets (tag, question nettoyée, réponse) valides"""
         for connaissance in connaissances:
             tag = connaissance.get('tag', 'general').strip()
             question = self.nettoyer_texte(connaissance.get('question', ''))
@@ -517,24 +869,34 @@ class DataProcessor:
             if len(question) < 3 or len(reponse) < 3:
                 continue
             
-            if tag not in donnees_par_tag:
-                donnees_par_tag[tag] = {
-                    'patterns': [],
-                    'responses': []
-                }
-            
-            # Ajouter si pas déjà présent
-            if question not in donnees_par_tag[tag]['patterns']:
-                donnees_par_tag[tag]['patterns'].append(question)
+            yield tag, question, reponse
+    
+    def convertir_donnees_vers_format_entrainement(
+        self, 
+        connaissances: Iterable[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Convertit les données de la base vers le format d'entraînement"""
+        self.logger.info("🔄 Conversion des données vers format d'entraînement...")
+        
+        # Grouper par tag (dict = ensemble ordonné: déduplication O(1), ordre d'insertion conservé)
+        donnees_par_tag: Dict[str, Dict[str, Dict[str, None]]] = {}
+        
+        for tag, question, reponse in self._iterer_connaissances_valides(connaissances):
+            donnees = donnees_par_tag.get(tag)
+            if donnees is None:
+                donnees = donnees_par_tag[tag] = {'patterns': {}, 'responses': {}}
             
-            if reponse not in donnees_par_tag[tag]['responses']:
-                donnees_par_tag[tag]['responses'].append(reponse)
+            donnees['patterns'][question] = None
+            donnees['responses'][reponse] = None
         
         # Filtrer les tags avec données insuffisantes
         donnees_valides = {}
         for tag, donnees in donnees_par_tag.items():
             if len(donnees['patterns']) > 0 and len(donnees['responses']) > 0:
-                donnees_valides[tag] = donnees
+                donnees_valides[tag] = {
+                    'patterns': list(donnees['patterns']),
+                    'responses': list(donnees['responses'])
+                }
             elif self.debug:
                 self.logger.warning(f"Tag '{tag}' ignoré (données insuffisantes)")
         
@@ -547,48 +909,37 @@ class DataProcessor:
         
         return donnees_valides
     
+    def _generer_variantes(self, pattern: str) -> Iterator[str]:
+        """Variantes d'un pattern obtenues en remplaçant un mot par un synonyme"""
+        mots = pattern.split()
+        
+        # Appliquer les synonymes (maximum 2 par mot)
+        for i, mot in enumerate(mots):
+            synonymes = self.SYNONYMES.get(mot)
+            if synonymes:
+                for synonyme in synonymes[:2]:
+                    yield ' '.join(mots[:i] + [synonyme] + mots[i + 1:])
+    
+    def iterer_donnees_augmentees(self, donnees_tags: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, List[str]]]]:
+        """Flux (tag, données) augmentées: patterns d'origine puis variantes, sans doublon"""
+        for tag, donnees in donnees_tags.items():
+            patterns = dict.fromkeys(donnees['patterns'])
+            
+            # Variantes générées depuis les patterns d'origine uniquement
+            for pattern in donnees['patterns']:
+                for variante in self._generer_variantes(pattern):
+                    patterns.setdefault(variante)
+            
+            yield tag, {
+                'patterns': list(patterns),
+                'responses': donnees['responses'].copy()
+            }
+    
     def augmenter_donnees(self, donnees_tags: Dict[str, Any]) -> Dict[str, Any]:
         """Augmentation intelligente des données d'entraînement"""
         self.logger.info("🔄 Augmentation des données d'entraînement...")
         
-        # Synonymes contextuels pour le domaine
-        synonymes = {
-            'comment': ['de quelle manière', 'comment faire', 'comment puis-je'],
-            'configurer': ['paramétrer', 'régler', 'ajuster', 'installer'],
-            'utiliser': ['employer', 'se servir de', 'faire fonctionner'],
-            'ailicia': ['ia', 'assistant', 'bot', 'chatbot'],
-            'plusieurs': ['multiples', 'différents', 'nombreux'],
-            'ordinateur': ['pc', 'machine', 'poste'],
-            'simultanement': ['en parallèle', 'conjointement'],
-            'aide': ['assistance', 'support', 'aider'],
-            'problème': ['souci', 'erreur', 'bug', 'dysfonctionnement']
-        }
-        
-        donnees_augmentees = {}
-        
-        for tag, donnees in donnees_tags.items():
-            nouvelles_donnees = {
-                'patterns': donnees['patterns'].copy(),
-                'responses': donnees['responses'].copy()
-            }
-            
-            # Créer des variations avec synonymes
-            patterns_originaux = nouvelles_donnees['patterns'].copy()
-            for pattern in patterns_originaux:
-                mots = pattern.split()
-                
-                # Appliquer les synonymes (maximum 2 par mot)
-                for i, mot in enumerate(mots):
-                    if mot in synonymes:
-                        for synonyme in synonymes[mot][:2]:
-                            nouveaux_mots = mots.copy()
-                            nouveaux_mots[i] = synonyme
-                            nouveau_pattern = ' '.join(nouveaux_mots)
-                            
-                            if nouveau_pattern not in nouvelles_donnees['patterns']:
-                                nouvelles_donnees['patterns'].append(nouveau_pattern)
-            
-            donnees_augmentees[tag] = nouvelles_donnees
+        donnees_augmentees = dict(self.iterer_donnees_augmentees(donnees_tags))
         
         # Statistiques de l'augmentation
         patterns_avant = sum(len(d['patterns']) for d in donnees_tags.values())
@@ -599,153 +950,653 @@ class DataProcessor:
         
         return donnees_augmentees
 
-class ModelTrainer:
-    """Entraîneur de modèle Keras optimisé"""
+@dataclass
+class MatriceCSR:
+    """Matrice creuse au format CSR (mêmes champs que scipy.sparse.csr_matrix)"""
+    data: np.ndarray
+    indices: np.ndarray
+    indptr: np.ndarray
+    shape: Tuple[int, int]
     
-    def __init__(self, config: ConfigurationManager):
-        self.config = config
-        self.lemmatizer = WordNetLemmatizer() if NLTK_AVAILABLE else None
+    @property
+    def nnz(self) -> int:
+        return int(self.data.shape[0])
+    
+    def toarray(self) -> np.ndarray:
+        """Conversion en matrice dense float32 (entrée du modèle Keras)"""
+        dense = np.zeros(self.shape, dtype=np.float32)
+        lignes = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[lignes, self.indices] = self.data
+        return dense
+
+@dataclass
+class TrainingFeatures:
+    """Vocabulaire, classes et matrices d'entraînement prêtes pour Keras"""
+    words: List[str]
+    classes: List[str]
+    train_x: np.ndarray
+    train_y: np.ndarray
+    total_documents: int = 0
+    nb_buckets: int = 0
+    collisions: Dict[str, Any] = field(default_factory=dict)
+
+# Ponctuation ignorée lors de la construction du vocabulaire
+MOTS_IGNORES = frozenset(['?', '.', ',', '!', ':', ';', '(', ')', '[', ']', '"', "'"])
+
+# Lemmatiseur propre à chaque processus de prétraitement (créé à la première utilisation)
+_lemmatiseur_processus = None
+
+@lru_cache(maxsize=None)
+def _lemmatiser(mot: str) -> str:
+    """Lemmatisation mémoïsée d'un mot en minuscules (un cache par processus)"""
+    global _lemmatiseur_processus
+    if _lemmatiseur_processus is None:
+        _lemmatiseur_processus = WordNetLemmatizer()
+    return _lemmatiseur_processus.lemmatize(mot)
+
+def _pretraiter_lot(patterns: List[str], utiliser_nltk: bool) -> List[Tuple[List[str], List[bool]]]:
+    """Tokenise et lemmatise un lot de patterns (exécuté dans un processus du pool)
+    
+    Retourne pour chaque pattern ses lemmes et, pour chaque token, s'il est
+    éligible au vocabulaire (alphabétique, plus d'un caractère, hors ponctuation).
+    """
+    resultats = []
+    for pattern in patterns:
+        tokens = word_tokenize(pattern, language='french') if utiliser_nltk else pattern.split()
+        lemmes = [_lemmatiser(w.lower()) if utiliser_nltk else w.lower() for w in tokens]
+        eligibles = [w not in MOTS_IGNORES and len(w) > 1 and w.isalpha() for w in tokens]
+        resultats.append((lemmes, eligibles))
+    return resultats
+
+@dataclass
+class CorpusTokens:
+    """Corpus prétraité: chaque pattern unique sous forme d'identifiants de lemmes
+    
+    Les tokens du pattern i sont token_ids[offsets[i]:offsets[i + 1]], les
+    identifiants renvoyant à lexique.
+    """
+    patterns: List[str]
+    lexique: List[str]
+    token_ids: np.ndarray
+    eligibles: np.ndarray
+    offsets: np.ndarray
+    signature: str = ""
+    
+    @classmethod
+    def depuis_lemmes(
+        cls, 
+        patterns: List[str], 
+        pretraites: List[Tuple[List[str], List[bool]]],
+        signature: str = ""
+    ) -> "CorpusTokens":
+        """Construit le corpus à partir des lemmes de chaque pattern"""
+        index_lexique: Dict[str, int] = {}
+        longueurs = np.fromiter((len(l) for l, _ in pretraites), dtype=np.int64, count=len(pretraites))
+        total = int(longueurs.sum())
+        token_ids = np.fromiter(
+            (index_lexique.setdefault(w, len(index_lexique)) for lemmes, _ in pretraites for w in lemmes),
+            dtype=np.int32, count=total
+        )
+        eligibles = np.fromiter((e for _, elig in pretraites for e in elig), dtype=bool, count=total)
+        offsets = np.zeros(len(pretraites) + 1, dtype=np.int64)
+        np.cumsum(longueurs, out=offsets[1:])
+        return cls(
+            patterns=list(patterns),
+            lexique=list(index_lexique),
+            token_ids=token_ids,
+            eligibles=eligibles,
+            offsets=offsets,
+            signature=signature
+        )
+    
+    def index_patterns(self) -> Dict[str, int]:
+        return {p: i for i, p in enumerate(self.patterns)}
+    
+    def lemmes_par_pattern(self) -> Dict[str, Tuple[List[str], List[bool]]]:
+        """Lemmes et éligibilités de chaque pattern (pour réutilisation incrémentale)"""
+        lemmes = [self.lexique[t] for t in self.token_ids.tolist()]
+        eligibles = self.eligibles.tolist()
+        offsets = self.offsets.tolist()
+        return {
+            pattern: (lemmes[offsets[i]:offsets[i + 1]], eligibles[offsets[i]:offsets[i + 1]])
+            for i, pattern in enumerate(self.patterns)
+        }
+
+class TextPreprocessor:
+    """Étape de prétraitement: chaque pattern unique est tokenisé et lemmatisé une seule fois
+    
+    Les patterns sont répartis par lots sur un pool de processus; les patterns
+    déjà présents dans un corpus précédent (cache) ne sont pas retraités.
+    """
+    
+    # À incrémenter lorsque la tokenisation ou la lemmatisation change
+    PREPROCESS_VERSION = 1
+    
+    def __init__(self, workers: int = 1, taille_lot: int = 256, utiliser_nltk: Optional[bool] = None):
+        self.workers = max(1, workers)
+        self.taille_lot = max(1, taille_lot)
+        self.utiliser_nltk = NLTK_AVAILABLE if utiliser_nltk is None else utiliser_nltk
         self.logger = logging.getLogger(__name__)
     
-    def entrainer_modele(
+    @classmethod
+    def signature(cls, utiliser_nltk: Optional[bool] = None) -> str:
+        """Identifie le prétraitement (un corpus d'une autre signature est ignoré)"""
+        utiliser_nltk = NLTK_AVAILABLE if utiliser_nltk is None else utiliser_nltk
+        return f"v{cls.PREPROCESS_VERSION}-{'nltk' if utiliser_nltk else 'split'}"
+    
+    def pretraiter(
         self, 
-        donnees_tags: Dict[str, Any]
-    ) -> Tuple[List[str], List[str], Optional[object], TrainingMetrics]:
-        """Entraînement du modèle Keras optimisé avec métriques"""
-        
-        if not TENSORFLOW_AVAILABLE:
-            self.logger.error("TensorFlow non disponible - impossible d'entraîner le modèle")
-            return [], [], None, TrainingMetrics(start_time=time.time())
-        
-        # Initialisation des métriques
-        metrics = TrainingMetrics(start_time=time.time())
-        
-        self.logger.info("🤖 Entraînement du modèle Keras...")
+        patterns: Iterable[str], 
+        corpus_existant: Optional[CorpusTokens] = None
+    ) -> CorpusTokens:
+        """Construit le corpus des patterns uniques en réutilisant corpus_existant"""
+        signature = self.signature(self.utiliser_nltk)
+        uniques = list(dict.fromkeys(patterns))
+        
+        deja_traites = {}
+        if corpus_existant is not None and corpus_existant.signature == signature:
+            deja_traites = corpus_existant.lemmes_par_pattern()
+        
+        a_traiter = [p for p in uniques if p not in deja_traites]
+        deja_traites.update(zip(a_traiter, self._traiter(a_traiter)))
+        pretraites = [deja_traites[p] for p in uniques]
+        
+        self.logger.info(
+            f"🔤 Prétraitement: {len(uniques)} patterns uniques "
+            f"({len(a_traiter)} traités, {len(uniques) - len(a_traiter)} depuis le cache)"
+        )
+        return CorpusTokens.depuis_lemmes(uniques, pretraites, signature)
+    
+    def _traiter(self, patterns: List[str]) -> List[Tuple[List[str], List[bool]]]:
+        """Répartit les patterns par lots sur le pool (ou en local pour un petit volume)"""
+        utiliser_nltk = self.utiliser_nltk
+        lots = [patterns[i:i + self.taille_lot] for i in range(0, len(patterns), self.taille_lot)]
         
-        # Préparation des données
-        words = []
-        classes = []
-        documents = []
-        ignore_words = ['?', '.', ',', '!', ':', ';', '(', ')', '[', ']', '"', "'"]
+        if self.workers == 1 or len(lots) <= 1:
+            return [r for lot in lots for r in _pretraiter_lot(lot, utiliser_nltk)]
         
-        # Extraction des features
-        for tag, donnees in donnees_tags.items():
-            for pattern in donnees['patterns']:
-                if NLTK_AVAILABLE:
-                    word_list = word_tokenize(pattern, language='french')
-                else:
-                    word_list = pattern.split()
-                
-                words.extend(word_list)
-                documents.append((word_list, tag))
-            
-            if tag not in classes:
-                classes.append(tag)
-        
-        # Nettoyage et lemmatisation
-        if self.lemmatizer:
-            words_cleaned = [
-                self.lemmatizer.lemmatize(w.lower()) 
-                for w in words 
-                if w not in ignore_words and len(w) > 1 and w.isalpha()
-            ]
-        else:
-            words_cleaned = [
-                w.lower() 
-                for w in words 
-                if w not in ignore_words and len(w) > 1 and w.isalpha()
-            ]
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(lots))) as executor:
+                resultats = executor.map(_pretraiter_lot, lots, [utiliser_nltk] * len(lots))
+                return [r for lot in resultats for r in lot]
+        except (OSError, BrokenProcessPool) as e:
+            self.logger.warning(f"⚠️ Pool de prétraitement indisponible, traitement local: {e}")
+            return [r for lot in lots for r in _pretraiter_lot(lot, utiliser_nltk)]
+
+class TrainingCache:
+    """Empreinte des données d'entraînement et cache des features (.npz)"""
+    
+    # À incrémenter lorsque le prétraitement change (invalide les features en cache)
+    FEATURES_VERSION = 1
+    
+    def __init__(self, base_dir: str):
+        self.cache_dir = Path(base_dir) / "data" / "Cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.cache_dir / "training_state.json"
+        self.features_path = self.cache_dir / "training_features.npz"
+        self.corpus_path = self.cache_dir / "training_corpus.npz"
+        self.logger = logging.getLogger(__name__)
+    
+    @classmethod
+    def calculer_hash_donnees(cls, donnees_tags: Dict[str, Any]) -> str:
+        """Hash des données normalisées (indépendant de l'ordre des tags et des patterns)"""
+        normalisees = {
+            tag.strip(): {
+                'patterns': sorted(p.strip() for p in donnees['patterns']),
+                'responses': sorted(r.strip() for r in donnees['responses'])
+            }
+            for tag, donnees in donnees_tags.items()
+        }
+        contenu = json.dumps(
+            {'features_version': cls.FEATURES_VERSION, 'data': normalisees},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def calculer_hash_config(model_config: Dict[str, Any]) -> str:
+        """Hash de la configuration du modèle (architecture et hyperparamètres)"""
+        contenu = json.dumps(model_config, sort_keys=True)
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+    
+    def charger_etat(self) -> Dict[str, Any]:
+        """Charge l'état du dernier entraînement réussi"""
+        try:
+            if self.state_path.exists():
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"⚠️ État d'entraînement illisible: {e}")
+        return {}
+    
+    def sauvegarder_etat(self, data_hash: str, config_hash: str):
+        """Enregistre les empreintes du dernier entraînement réussi"""
+        etat = {
+            'data_hash': data_hash,
+            'config_hash': config_hash,
+            'timestamp': datetime.now().isoformat()
+        }
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(etat, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+    
+    def charger_features(self, data_hash: Optional[str], nb_buckets: int = 0) -> Optional[TrainingFeatures]:
+        """Recharge les features en cache si elles correspondent aux données (et au mode d'entrée)
         
-        # Filtrage des mots rares (sauf mots-clés importants)
-        mots_cles = ['ailicia', 'texttospeech', 'obscapture', 'simultanement', 'plusieurspc']
-        word_freq = Counter(words_cleaned)
-        words_filtered = [
-            word for word, freq in word_freq.items()
-            if freq >= 2 or word in mots_cles
-        ]
+        data_hash=None accepte les dernières features quelles que soient les données
+        (rejeu lors de l'ajustement incrémental).
+        """
+        if not self.features_path.exists():
+            return None
         
-        words = sorted(list(set(words_filtered)))
-        classes = sorted(list(set(classes)))
+        try:
+            with np.load(self.features_path, allow_pickle=False) as cache:
+                buckets_cache = int(cache['nb_buckets']) if 'nb_buckets' in cache.files else 0
+                if (data_hash is not None and str(cache['data_hash']) != data_hash) or buckets_cache != nb_buckets:
+                    return None
+                features = TrainingFeatures(
+                    words=cache['words'].tolist(),
+                    classes=cache['classes'].tolist(),
+                    train_x=cache['train_x'],
+                    train_y=cache['train_y'],
+                    total_documents=int(cache['train_x'].shape[0]),
+                    nb_buckets=buckets_cache,
+                    collisions=json.loads(str(cache['collisions'])) if 'collisions' in cache.files else {}
+                )
+            self.logger.info(f"♻️ Features réutilisées depuis le cache: X={features.train_x.shape}")
+            return features
+        except Exception as e:
+            self.logger.warning(f"⚠️ Cache de features invalide, reconstruction: {e}")
+            return None
+    
+    def sauvegarder_features(self, data_hash: str, features: TrainingFeatures):
+        """Écrit les features de manière atomique"""
+        tmp_path = self.features_path.with_name(self.features_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    data_hash=np.array(data_hash),
+                    words=np.array(features.words, dtype=str),
+                    classes=np.array(features.classes, dtype=str),
+                    train_x=features.train_x,
+                    train_y=features.train_y,
+                    nb_buckets=np.array(features.nb_buckets),
+                    collisions=np.array(json.dumps(features.collisions))
+                )
+            os.replace(tmp_path, self.features_path)
+            self.logger.info(f"💾 Features mises en cache: {self.features_path.name}")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Erreur mise en cache des features: {e}")
+
+    def charger_corpus(self) -> Optional[CorpusTokens]:
+        """Recharge le dernier corpus prétraité (réutilisé pattern par pattern)"""
+        if not self.corpus_path.exists():
+            return None
         
-        # Mise à jour des métriques
-        metrics.vocabulary_size = len(words)
-        metrics.valid_tags = len(classes)
-        metrics.total_patterns = sum(len(d['patterns']) for d in donnees_tags.values())
+        try:
+            with np.load(self.corpus_path, allow_pickle=False) as cache:
+                return CorpusTokens(
+                    patterns=cache['patterns'].tolist(),
+                    lexique=cache['lexique'].tolist(),
+                    token_ids=cache['token_ids'],
+                    eligibles=cache['eligibles'],
+                    offsets=cache['offsets'],
+                    signature=str(cache['signature'])
+                )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Corpus en cache invalide, prétraitement complet: {e}")
+            return None
+    
+    def sauvegarder_corpus(self, corpus: CorpusTokens):
+        """Écrit le corpus prétraité de manière atomique"""
+        tmp_path = self.corpus_path.with_name(self.corpus_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    signature=np.array(corpus.signature),
+                    patterns=np.array(corpus.patterns, dtype=str),
+                    lexique=np.array(corpus.lexique, dtype=str),
+                    token_ids=corpus.token_ids,
+                    eligibles=corpus.eligibles,
+                    offsets=corpus.offsets
+                )
+            os.replace(tmp_path, self.corpus_path)
+            self.logger.info(f"💾 Corpus prétraité mis en cache: {self.corpus_path.name}")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Erreur mise en cache du corpus: {e}")
+
+def configurer_threads_tensorflow(intra_op: int, inter_op: int = 2) -> bool:
+    """Fixe le nombre de threads TensorFlow (à appeler avant toute opération TF)"""
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+        logging.getLogger(__name__).info(f"🧵 Threads TensorFlow: intra={intra_op}, inter={inter_op}")
+        return True
+    except RuntimeError as e:
+        logging.getLogger(__name__).warning(f"⚠️ Threads TensorFlow non modifiables: {e}")
+        return False
+
+def construire_reseau(model_config: Dict[str, Any], input_dim: int, output_dim: int) -> "Sequential":
+    """Construit et compile le réseau décrit par model_config (couches, learning_rate)"""
+    couches = [Input(shape=(input_dim,))]
+    
+    for couche in model_config['couches']:
+        regularizer = l2(couche['l2']) if couche.get('l2') else None
+        couches.append(Dense(couche['units'], activation='relu', kernel_regularizer=regularizer))
+        if couche.get('batch_norm'):
+            couches.append(BatchNormalization())
+        if couche.get('dropout'):
+            couches.append(Dropout(couche['dropout']))
+    
+    couches.append(Dense(output_dim, activation='softmax'))
+    model = Sequential(couches)
+    
+    # Compilation
+    optimizer = Adam(learning_rate=model_config['learning_rate'], beta_1=0.9, beta_2=0.999)
+    model.compile(
+        loss='categorical_crossentropy',
+        optimizer=optimizer,
+        metrics=['accuracy']
+    )
+    return model
+
+# Mots-clés du domaine conservés même s'ils sont rares (et pondérés plus fort)
+MOTS_CLES_DOMAINE = ('ailicia', 'texttospeech', 'obscapture', 'simultanement', 'plusieurspc')
+
+class EncodeurBagOfWords:
+    """Featurisation bag-of-words pondérée, partagée par l'entraînement et l'évaluation
+    
+    Indépendante de ModelTrainer: les évaluations hors-ligne (versions, recherche
+    d'architecture, --evaluate) la construisent avec leur propre prétraitement.
+    """
+    
+    def __init__(
+        self,
+        mots_cles: Iterable[str] = MOTS_CLES_DOMAINE,
+        preprocessor: Optional[TextPreprocessor] = None,
+        ponderation: Optional[Dict[str, Any]] = None
+    ):
+        self.mots_cles = list(mots_cles)
+        self.preprocessor = preprocessor or TextPreprocessor(workers=1)
+        self.ponderation = ponderation or PONDERATION_DEFAUT
+    
+    @classmethod
+    def pour_bundle(cls, bundle: ModelBundle, utiliser_nltk: Optional[bool] = None) -> "EncodeurBagOfWords":
+        """Encodeur des questions d'évaluation d'un bundle (mots-clés enregistrés à l'entraînement)"""
+        return cls(
+            bundle.preprocessing.get('mots_cles', MOTS_CLES_DOMAINE),
+            TextPreprocessor(workers=1, utiliser_nltk=utiliser_nltk),
+            bundle.preprocessing.get('ponderation')
+        )
+    
+    def construire_matrice_corpus(
+        self, 
+        corpus: CorpusTokens, 
+        indices_patterns: List[int], 
+        words: List[str],
+        nb_buckets: int = 0
+    ) -> "MatriceCSR":
+        """Bag-of-words pondéré des patterns du corpus (une ligne par indice de pattern)
+        
+        Colonnes: position du lemme dans words, ou colonne hachée si nb_buckets > 0
+        (seuls les tokens éligibles au vocabulaire sont alors comptés).
+        """
+        if nb_buckets:
+            colonne_par_lemme = np.append(colonnes_hachees(corpus.lexique, nb_buckets), -1)
+            nb_colonnes = nb_buckets
+            colonnes_mots_cles = colonnes_hachees(self.mots_cles, nb_buckets)
+        else:
+            index_mots = {w: i for i, w in enumerate(words)}
+            colonne_par_lemme = np.array(
+                [index_mots.get(w, -1) for w in corpus.lexique] or [-1], dtype=np.int64
+            )
+            nb_colonnes = len(words)
+            colonnes_mots_cles = [index_mots[m] for m in self.mots_cles if m in index_mots]
+        
+        # Positions des tokens de chaque ligne dans token_ids, sans boucle Python
+        indices_patterns = np.asarray(indices_patterns, dtype=np.int64)
+        debuts = corpus.offsets[indices_patterns]
+        longueurs = corpus.offsets[indices_patterns + 1] - debuts
+        decalages = np.repeat(debuts - (np.cumsum(longueurs) - longueurs), longueurs)
+        positions = decalages + np.arange(int(longueurs.sum()), dtype=np.int64)
+        
+        lignes = np.repeat(np.arange(len(indices_patterns), dtype=np.int64), longueurs)
+        colonnes = colonne_par_lemme[corpus.token_ids[positions]]
+        connus = colonnes >= 0
+        if nb_buckets:
+            connus &= corpus.eligibles[positions]
+        return self._matrice_depuis_indices(
+            lignes[connus], colonnes[connus], len(indices_patterns), nb_colonnes, colonnes_mots_cles
+        )
+    
+    def matrice_questions(self, questions: List[str], bundle: ModelBundle) -> np.ndarray:
+        """Features de questions nettoyées dans l'espace d'entrée d'un bundle (mêmes colonnes, même pondération)"""
+        corpus = self.preprocessor.pretraiter(questions)
+        index_patterns = corpus.index_patterns()
+        nb_buckets = int(bundle.preprocessing.get('hachage', {}).get('buckets', 0))
+        return self.construire_matrice_corpus(
+            corpus, [index_patterns[q] for q in questions], bundle.words, nb_buckets
+        ).toarray()
+    
+    def construire_matrice_bow(self, documents_lemmes: List[List[str]], words: List[str]) -> "MatriceCSR":
+        """Bag-of-words pondéré de documents déjà lemmatisés (listes de mots)"""
+        index_mots = {w: i for i, w in enumerate(words)}
+        
+        # Colonnes de chaque token connu, concaténées, avec la ligne correspondante
+        colonnes_par_doc = [
+            [index_mots[w] for w in doc if w in index_mots]
+            for doc in documents_lemmes
+        ]
+        longueurs = np.fromiter((len(c) for c in colonnes_par_doc), dtype=np.int64, count=len(colonnes_par_doc))
+        colonnes = np.fromiter(
+            (j for c in colonnes_par_doc for j in c), dtype=np.int64, count=int(longueurs.sum())
+        )
+        lignes = np.repeat(np.arange(len(colonnes_par_doc), dtype=np.int64), longueurs)
+        colonnes_mots_cles = [index_mots[m] for m in self.mots_cles if m in index_mots]
+        return self._matrice_depuis_indices(lignes, colonnes, len(colonnes_par_doc), len(words), colonnes_mots_cles)
+    
+    def _matrice_depuis_indices(
+        self, 
+        lignes: np.ndarray, 
+        colonnes: np.ndarray, 
+        nb_lignes: int, 
+        nb_colonnes: int,
+        colonnes_mots_cles: Iterable[int] = ()
+    ) -> "MatriceCSR":
+        """Matrice CSR construite en une seule passe indexée à partir des couples (ligne, colonne)
+        
+        Pondération self.ponderation (par défaut celle de l'implémentation historique:
+        min(1.0, 0.6 × occurrences), min(1.5, 0.8 × occurrences) pour les mots-clés).
+        """
+        largeur = max(nb_colonnes, 1)
+        
+        # Comptage des occurrences par (ligne, colonne): clés triées = ordre CSR
+        cles, occurrences = np.unique(lignes * largeur + colonnes, return_counts=True)
+        lignes_uniques = cles // largeur
+        indices = (cles % largeur).astype(np.int32)
+        
+        # Pondération vectorisée avec boost des mots-clés
+        est_mot_cle = np.zeros(nb_colonnes, dtype=bool)
+        est_mot_cle[np.asarray(list(colonnes_mots_cles), dtype=np.int64)] = True
+        data = ponderer(occurrences, est_mot_cle[indices], self.ponderation)
+        
+        indptr = np.searchsorted(lignes_uniques, np.arange(nb_lignes + 1)).astype(np.int64)
+        return MatriceCSR(data=data, indices=indices, indptr=indptr, shape=(nb_lignes, nb_colonnes))
+
+class ModelTrainer:
+    """Entraîneur de modèle Keras optimisé"""
+    
+    # Architecture et hyperparamètres (toute modification invalide le cache du modèle)
+    MODEL_CONFIG = {
+        'couches': [
+            {'units': 512, 'dropout': 0.4, 'l2': 0.001, 'batch_norm': True},
+            {'units': 256, 'dropout': 0.3, 'l2': 0.001, 'batch_norm': True},
+            {'units': 128, 'dropout': 0.2},
+            {'units': 64, 'dropout': 0.1}
+        ],
+        'learning_rate': 0.001,
+        'epochs': 300,
+        'batch_size': 8,
+        'validation_split': 0.2,
+        'early_stopping_patience': 50
+    }
+    
+    # Mode rapide (train.py --fast): pipeline tf.data, batchs adaptatifs, warm-up du learning rate
+    MODE_RAPIDE = {
+        'epochs': 150,
+        'early_stopping_patience': 15,
+        'learning_rate': 0.003,
+        'warmup_epochs': 5,
+        'batch_min': 16,
+        'batch_max': 256
+    }
+    
+    # Mots-clés du domaine conservés même s'ils sont rares (et pondérés plus fort)
+    MOTS_CLES = list(MOTS_CLES_DOMAINE)
+    
+    def __init__(self, config: ConfigurationManager):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.model_config = json.loads(json.dumps(self.MODEL_CONFIG))
+        self._charger_configuration_retenue()
+        self.preprocessor = TextPreprocessor(config.PREPROCESS_WORKERS, config.PREPROCESS_CHUNK_SIZE)
+        self.encodeur = EncodeurBagOfWords(self.MOTS_CLES, self.preprocessor)
+        self.nb_buckets = getattr(config, 'FEATURE_HASHING_BUCKETS', 0)
+    
+    def _charger_configuration_retenue(self):
+        """Applique la configuration retenue par la recherche d'architecture, si présente"""
+        path = getattr(self.config, 'MODEL_CONFIG_PATH', None)
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                retenue = json.load(f)
+            self.model_config.update({k: v for k, v in retenue.items() if k in self.MODEL_CONFIG})
+            self.logger.info(f"⚙️ Configuration du modèle chargée depuis {path} ({retenue.get('source', 'manuel')})")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Configuration du modèle illisible ({path}): {e}")
+    
+    def configuration_pretraitement(self) -> Dict[str, Any]:
+        """Paramètres du prétraitement nécessaires pour reproduire les features au service"""
+        return {
+            'signature': TextPreprocessor.signature(),
+            'nltk': NLTK_AVAILABLE,
+            'mots_cles': list(self.MOTS_CLES),
+            'mots_ignores': sorted(MOTS_IGNORES),
+            'ponderation': {cle: list(v) for cle, v in self.encodeur.ponderation.items()},
+            'hachage': {'buckets': self.nb_buckets, 'fonction': FONCTION_HACHAGE} if self.nb_buckets else {}
+        }
+    
+    def preparer_features(
+        self, 
+        donnees_tags: Dict[str, Any], 
+        corpus: Optional[CorpusTokens] = None
+    ) -> TrainingFeatures:
+        """Construit le vocabulaire, les classes et les matrices bag-of-words
+        
+        Le vocabulaire et la matrice sont lus depuis le même corpus d'identifiants
+        de lemmes: chaque pattern unique n'est tokenisé et lemmatisé qu'une fois.
+        Avec le hachage des features (nb_buckets > 0), il n'y a pas de vocabulaire:
+        tous les lemmes éligibles sont projetés sur nb_buckets colonnes.
+        """
+        if corpus is None:
+            corpus = self.preprocessor.pretraiter(
+                p for donnees in donnees_tags.values() for p in donnees['patterns']
+            )
+        index_patterns = corpus.index_patterns()
+        
+        # Documents: (indice du pattern dans le corpus, tag)
+        documents = [
+            (index_patterns[pattern], tag)
+            for tag, donnees in donnees_tags.items()
+            for pattern in donnees['patterns']
+        ]
+        classes = sorted(set(donnees_tags))
+        
+        # Fréquence des lemmes éligibles sur l'ensemble des documents
+        multiplicites = np.bincount(
+            np.fromiter((p for p, _ in documents), dtype=np.int64, count=len(documents)),
+            minlength=len(corpus.patterns)
+        )
+        poids_tokens = np.repeat(multiplicites, np.diff(corpus.offsets))
+        frequences = np.bincount(
+            corpus.token_ids[corpus.eligibles],
+            weights=poids_tokens[corpus.eligibles],
+            minlength=len(corpus.lexique)
+        )
         
-        self.logger.info(f"📊 Vocabulaire: {len(words)} mots")
+        # Filtrage des mots rares (sauf mots-clés importants)
+        mots_cles = set(self.MOTS_CLES)
+        words = sorted(
+            mot for mot, freq in zip(corpus.lexique, frequences.tolist())
+            if freq >= 2 or (freq > 0 and mot in mots_cles)
+        )
+        
+        collisions = {}
+        if self.nb_buckets:
+            collisions = statistiques_collisions(
+                (mot for mot, freq in zip(corpus.lexique, frequences.tolist()) if freq > 0), self.nb_buckets
+            )
+            words = []
+            self.logger.info(
+                f"📊 Hachage: {collisions['lemmes']} lemmes -> {self.nb_buckets} colonnes "
+                f"(collisions: {collisions['taux_collision']:.1%})"
+            )
+        else:
+            self.logger.info(f"📊 Vocabulaire: {len(words)} mots")
         self.logger.info(f"📊 Classes: {len(classes)} tags")
         self.logger.info(f"📊 Documents: {len(documents)} exemples")
         
-        # Création des données d'entraînement
-        training_data = []
-        output_empty = [0] * len(classes)
-        
-        for doc in documents:
-            bag = []
-            pattern_words = doc[0]
-            
-            if self.lemmatizer:
-                pattern_words = [self.lemmatizer.lemmatize(w.lower()) for w in pattern_words]
-            else:
-                pattern_words = [w.lower() for w in pattern_words]
-            
-            # Bag of words avec pondération
-            for w in words:
-                count = pattern_words.count(w)
-                if count > 0:
-                    # Boost pour les mots-clés importants
-                    if w in mots_cles:
-                        bag.append(min(1.5, count * 0.8))
-                    else:
-                        bag.append(min(1.0, count * 0.6))
-                else:
-                    bag.append(0.0)
-            
-            # Output vector
-            output_row = list(output_empty)
-            output_row[classes.index(doc[1])] = 1
-            training_data.append([bag, output_row])
+        # Ordre aléatoire des documents comme auparavant
+        random.shuffle(documents)
         
-        # Préparation finale des données
-        random.shuffle(training_data)
-        train_x = np.array([item[0] for item in training_data], dtype=np.float32)
-        train_y = np.array([item[1] for item in training_data], dtype=np.float32)
+        # Création des données d'entraînement en une passe indexée
+        train_x = self.encodeur.construire_matrice_corpus(
+            corpus, [p for p, _ in documents], words, self.nb_buckets
+        ).toarray()
+        train_y = self.encoder_classes([tag for _, tag in documents], classes)
         
         self.logger.info(f"🏋️ Données préparées: X={train_x.shape}, Y={train_y.shape}")
         
-        # Construction du modèle optimisé
-        model = Sequential([
-            Input(shape=(len(train_x[0]),)),
-            Dense(512, activation='relu', kernel_regularizer=l2(0.001)),
-            BatchNormalization(),
-            Dropout(0.4),
-            
-            Dense(256, activation='relu', kernel_regularizer=l2(0.001)),
-            BatchNormalization(),
-            Dropout(0.3),
-            
-            Dense(128, activation='relu'),
-            Dropout(0.2),
-            
-            Dense(64, activation='relu'),
-            Dropout(0.1),
-            
-            Dense(len(train_y[0]), activation='softmax')
-        ])
-        
-        # Compilation
-        optimizer = Adam(learning_rate=0.001, beta_1=0.9, beta_2=0.999)
-        model.compile(
-            loss='categorical_crossentropy',
-            optimizer=optimizer,
-            metrics=['accuracy']
+        return TrainingFeatures(
+            words=words,
+            classes=classes,
+            train_x=train_x,
+            train_y=train_y,
+            total_documents=len(documents),
+            nb_buckets=self.nb_buckets,
+            collisions=collisions
         )
-        
-        # Callbacks pour un entraînement optimal
+    
+    def construire_matrice_bow(self, documents_lemmes: List[List[str]], words: List[str]) -> "MatriceCSR":
+        """Bag-of-words pondéré de documents déjà lemmatisés (voir EncodeurBagOfWords)"""
+        return self.encodeur.construire_matrice_bow(documents_lemmes, words)
+    
+    def matrice_questions(self, questions: List[str], bundle: ModelBundle) -> np.ndarray:
+        """Features de questions dans l'espace d'entrée d'un bundle (voir EncodeurBagOfWords)"""
+        return self.encodeur.matrice_questions(questions, bundle)
+    
+    @staticmethod
+    def encoder_classes(tags: List[str], classes: List[str]) -> np.ndarray:
+        """Encodage one-hot des tags via un index (sans classes.index par document)"""
+        index_classes = {c: i for i, c in enumerate(classes)}
+        train_y = np.zeros((len(tags), len(classes)), dtype=np.float32)
+        train_y[np.arange(len(tags)), [index_classes[t] for t in tags]] = 1.0
+        return train_y
+    
+    def construire_modele(self, input_dim: int, output_dim: int) -> "Sequential":
+        """Construit et compile le réseau décrit par model_config"""
+        return construire_reseau(self.model_config, input_dim, output_dim)
+    
+    def _entrainer_standard(self, model, train_x: np.ndarray, train_y: np.ndarray):
+        """Entraînement historique: tableaux en mémoire, petits batchs, patience longue"""
         callbacks = [
             EarlyStopping(
                 monitor='val_accuracy',
-                patience=50,
+                patience=self.model_config['early_stopping_patience'],
                 restore_best_weights=True,
                 verbose=1
             ),
@@ -758,17 +1609,125 @@ class ModelTrainer:
             )
         ]
         
-        self.logger.info("🚀 Lancement de l'entraînement...")
-        
-        # Entraînement
-        history = model.fit(
+        return model.fit(
             train_x, train_y,
-            epochs=300,
-            batch_size=8,
+            epochs=self.model_config['epochs'],
+            batch_size=self.model_config['batch_size'],
             verbose=1,
-            validation_split=0.2,
+            validation_split=self.model_config['validation_split'],
+            callbacks=callbacks
+        )
+    
+    def taille_batch_adaptative(self, nb_exemples: int) -> int:
+        """Puissance de 2 visant une vingtaine de pas par epoch, bornée par MODE_RAPIDE"""
+        taille = 2 ** int(round(math.log2(max(1, nb_exemples / 20))))
+        return int(min(self.MODE_RAPIDE['batch_max'], max(self.MODE_RAPIDE['batch_min'], taille)))
+    
+    @staticmethod
+    def planning_warmup(lr_base: float, warmup_epochs: int, epochs: int):
+        """Learning rate linéaire pendant le warm-up puis décroissance cosinus"""
+        def planning(epoch: int, lr: float) -> float:
+            if epoch < warmup_epochs:
+                return lr_base * (epoch + 1) / warmup_epochs
+            progression = (epoch - warmup_epochs) / max(1, epochs - warmup_epochs)
+            return lr_base * 0.5 * (1 + math.cos(math.pi * min(1.0, progression)))
+        return planning
+    
+    def _entrainer_rapide(self, model, train_x: np.ndarray, train_y: np.ndarray):
+        """Entraînement rapide: pipeline tf.data en cache et préchargé, batchs adaptatifs"""
+        mode = self.MODE_RAPIDE
+        
+        # Même proportion de validation que le mode standard (découpage mélangé)
+        indices = np.random.default_rng(42).permutation(len(train_x))
+        nb_validation = int(len(train_x) * self.model_config['validation_split'])
+        idx_val, idx_train = indices[:nb_validation], indices[nb_validation:]
+        batch_size = self.taille_batch_adaptative(len(idx_train))
+        
+        ds_train = (
+            tf.data.Dataset.from_tensor_slices((train_x[idx_train], train_y[idx_train]))
+            .cache()
+            .shuffle(len(idx_train), seed=42, reshuffle_each_iteration=True)
+            .batch(batch_size)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        ds_val = (
+            tf.data.Dataset.from_tensor_slices((train_x[idx_val], train_y[idx_val]))
+            .batch(max(batch_size, 256))
+            .cache()
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        
+        self.logger.info(
+            f"⚡ Mode rapide: batch={batch_size}, epochs≤{mode['epochs']}, "
+            f"patience={mode['early_stopping_patience']}, warm-up={mode['warmup_epochs']}"
+        )
+        
+        callbacks = [
+            EarlyStopping(
+                monitor='val_accuracy',
+                patience=mode['early_stopping_patience'],
+                restore_best_weights=True
+            ),
+            LearningRateScheduler(
+                self.planning_warmup(mode['learning_rate'], mode['warmup_epochs'], mode['epochs'])
+            )
+        ]
+        
+        return model.fit(
+            ds_train,
+            validation_data=ds_val,
+            epochs=mode['epochs'],
+            shuffle=False,  # Mélange déjà assuré par le pipeline tf.data
+            verbose=2,
             callbacks=callbacks
         )
+    
+    def entrainer_modele(
+        self, 
+        donnees_tags: Dict[str, Any],
+        features: Optional[TrainingFeatures] = None,
+        rapide: bool = False
+    ) -> Tuple[List[str], List[str], Optional[object], TrainingMetrics]:
+        """Entraînement du modèle Keras optimisé avec métriques"""
+        
+        if not TENSORFLOW_AVAILABLE:
+            self.logger.error("TensorFlow non disponible - impossible d'entraîner le modèle")
+            return [], [], None, TrainingMetrics(start_time=time.time())
+        
+        # Initialisation des métriques
+        metrics = TrainingMetrics(start_time=time.time())
+        
+        self.logger.info("🤖 Entraînement du modèle Keras...")
+        
+        # Features fournies (cache) ou reconstruites
+        if features is None:
+            features = self.preparer_features(donnees_tags)
+        else:
+            metrics.features_from_cache = True
+        
+        words, classes = features.words, features.classes
+        train_x, train_y = features.train_x, features.train_y
+        
+        # Mise à jour des métriques
+        metrics.vocabulary_size = len(words)
+        metrics.hashing_buckets = features.nb_buckets
+        metrics.hashing_collision_rate = features.collisions.get('taux_collision', 0.0)
+        metrics.valid_tags = len(classes)
+        metrics.total_patterns = sum(len(d['patterns']) for d in donnees_tags.values())
+        
+        # Construction du modèle optimisé
+        model = self.construire_modele(train_x.shape[1], train_y.shape[1])
+        
+        self.logger.info(f"🚀 Lancement de l'entraînement ({'rapide' if rapide else 'standard'})...")
+        
+        debut_fit = time.perf_counter()
+        if rapide:
+            history = self._entrainer_rapide(model, train_x, train_y)
+        else:
+            history = self._entrainer_standard(model, train_x, train_y)
+        metrics.training_seconds = round(time.perf_counter() - debut_fit, 2)
+        metrics.training_mode = 'rapide' if rapide else 'standard'
+        metrics.validation_accuracy = float(max(history.history.get('val_accuracy', [0.0])))
         
         # Mise à jour des métriques finales
         final_loss, final_accuracy = model.evaluate(train_x, train_y, verbose=0)
@@ -781,11 +1740,872 @@ class ModelTrainer:
         self.logger.info(f"📊 Précision finale: {final_accuracy:.4f}")
         self.logger.info(f"📊 Perte finale: {final_loss:.4f}")
         self.logger.info(f"📊 Epochs: {metrics.epochs_completed}")
+        self.logger.info(
+            f"⏱️ Entraînement {metrics.training_mode}: {metrics.training_seconds:.2f}s "
+            f"(précision {final_accuracy:.4f}, validation {metrics.validation_accuracy:.4f})"
+        )
         self.logger.info(f"📊 Durée: {metrics.duration:.2f}s")
         
         return words, classes, model, metrics
 
-def main():
+def _evaluer_architecture(
+    candidat: Dict[str, Any],
+    config_base: Dict[str, Any],
+    train_x: np.ndarray,
+    train_y: np.ndarray,
+    indices_validation: np.ndarray,
+    nb_requetes_latence: int = 100
+) -> Dict[str, Any]:
+    """Entraîne et mesure un candidat (exécuté dans un processus dédié, 1 thread CPU)"""
+    configurer_threads_tensorflow(1, 1)
+    tf.keras.utils.set_random_seed(42)
+    
+    debut = time.time()
+    masque_validation = np.zeros(len(train_x), dtype=bool)
+    masque_validation[indices_validation] = True
+    x_train, y_train = train_x[~masque_validation], train_y[~masque_validation]
+    x_val, y_val = train_x[masque_validation], train_y[masque_validation]
+    
+    model_config = dict(config_base, **candidat['config'])
+    model = construire_reseau(model_config, train_x.shape[1], train_y.shape[1])
+    history = model.fit(
+        x_train, y_train,
+        epochs=model_config['epochs'],
+        batch_size=model_config['batch_size'],
+        validation_data=(x_val, y_val),
+        verbose=0,
+        callbacks=[EarlyStopping(
+            monitor='val_accuracy',
+            patience=model_config['early_stopping_patience'],
+            restore_best_weights=True
+        )]
+    )
+    
+    # Latence d'une requête et mémoire des poids sur le chemin d'inférence numpy
+    reseau = ReseauNumpy(ModelBundle.depuis_modele(model, [], [], {}, version="recherche"))
+    echantillon = x_val[:nb_requetes_latence] if len(x_val) else train_x[:nb_requetes_latence]
+    
+    return {
+        'nom': candidat['nom'],
+        'config': candidat['config'],
+        'precision_validation': round(float(model.evaluate(x_val, y_val, verbose=0)[1]), 4),
+        'precision_entrainement': round(float(model.evaluate(x_train, y_train, verbose=0)[1]), 4),
+        'epochs': len(history.history['loss']),
+        'parametres': int(model.count_params()),
+        'octets_poids': reseau.octets_poids(),
+        'latence_ms': mesurer_latence_ms(reseau.predict, echantillon),
+        'latence_keras_ms': mesurer_latence_ms(lambda x: model(x, training=False), echantillon),
+        'duree_s': round(time.time() - debut, 2)
+    }
+
+class ArchitectureSearch:
+    """Recherche d'architecture sous budget de latence (train.py --search)
+    
+    Chaque candidat est entraîné dans un processus séparé sur le même découpage
+    entraînement/validation; le front de Pareto (précision de validation, latence
+    p50 d'une requête, mémoire des poids) est calculé et le candidat le plus
+    précis du front respectant le budget de latence est retenu.
+    """
+    
+    # Largeurs des couches cachées et tailles de batch explorées
+    GRILLE = {
+        'largeurs': [[512, 256, 128, 64], [256, 128], [128, 64], [256], [128], [64]],
+        'batch_size': [8, 32]
+    }
+    
+    def __init__(self, config: ConfigurationManager, workers: Optional[int] = None):
+        self.config = config
+        self.workers = workers or config.SEARCH_WORKERS
+        self.budget_ms = config.SEARCH_LATENCY_BUDGET_MS
+        self.logger = logging.getLogger(__name__)
+    
+    @staticmethod
+    def couches_depuis_largeurs(largeurs: List[int]) -> List[Dict[str, Any]]:
+        """Couches dans le style de MODEL_CONFIG (L2 + BatchNorm sur les deux premières)"""
+        couches = []
+        for i, units in enumerate(largeurs):
+            couche = {'units': units, 'dropout': round(max(0.1, 0.4 - 0.1 * i), 1)}
+            if i < 2:
+                couche.update({'l2': 0.001, 'batch_norm': True})
+            couches.append(couche)
+        return couches
+    
+    @classmethod
+    def generer_candidats(cls) -> List[Dict[str, Any]]:
+        return [
+            {
+                'nom': f"{'-'.join(map(str, largeurs))}/b{batch_size}",
+                'config': {'couches': cls.couches_depuis_largeurs(largeurs), 'batch_size': batch_size}
+            }
+            for largeurs in cls.GRILLE['largeurs']
+            for batch_size in cls.GRILLE['batch_size']
+        ]
+    
+    @staticmethod
+    def front_pareto(resultats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Candidats non dominés (précision ↑, latence p50 ↓, mémoire ↓), triés par latence"""
+        def objectifs(r):
+            return (-r['precision_validation'], r['latence_ms']['p50_ms'], r['octets_poids'])
+        
+        front = []
+        for r in resultats:
+            o = objectifs(r)
+            domine = any(
+                all(a <= b for a, b in zip(objectifs(autre), o)) and objectifs(autre) != o
+                for autre in resultats
+            )
+            if not domine:
+                front.append(r)
+        return sorted(front, key=lambda r: r['latence_ms']['p50_ms'])
+    
+    def choisir(self, front: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Le plus précis du front sous le budget de latence (sinon le plus rapide)"""
+        dans_budget = [r for r in front if r['latence_ms']['p50_ms'] <= self.budget_ms]
+        if not dans_budget:
+            self.logger.warning(f"⚠️ Aucun candidat sous {self.budget_ms} ms - choix du plus rapide")
+            return front[0]
+        return max(dans_budget, key=lambda r: (r['precision_validation'], -r['latence_ms']['p50_ms']))
+    
+    def executer(self, features: TrainingFeatures, config_base: Dict[str, Any]) -> Dict[str, Any]:
+        """Entraîne la grille en parallèle et retourne résultats, front et choix"""
+        candidats = self.generer_candidats()
+        rng = np.random.default_rng(42)
+        nb_validation = max(1, int(len(features.train_x) * config_base['validation_split']))
+        indices_validation = rng.permutation(len(features.train_x))[:nb_validation]
+        
+        self.logger.info(
+            f"🔎 Recherche d'architecture: {len(candidats)} candidats, {self.workers} processus, "
+            f"budget {self.budget_ms} ms"
+        )
+        
+        resultats = []
+        # spawn: TensorFlow ne supporte pas un fork après son initialisation
+        contexte = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=contexte) as executor:
+            futures = {
+                executor.submit(
+                    _evaluer_architecture, c, config_base, features.train_x, features.train_y, indices_validation
+                ): c
+                for c in candidats
+            }
+            for future in as_completed(futures):
+                try:
+                    resultat = future.result()
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Candidat {futures[future]['nom']} en échec: {e}")
+                    continue
+                resultats.append(resultat)
+                self.logger.info(
+                    f"   - {resultat['nom']:<20} précision={resultat['precision_validation']:.4f} "
+                    f"p50={resultat['latence_ms']['p50_ms']:.3f} ms poids={resultat['octets_poids'] // 1024} Ko"
+                )
+        
+        if not resultats:
+            raise RuntimeError("Aucun candidat n'a pu être évalué")
+        
+        front = self.front_pareto(resultats)
+        choix = self.choisir(front)
+        self.logger.info(f"🏆 Front de Pareto: {', '.join(r['nom'] for r in front)}")
+        self.logger.info(f"✅ Architecture retenue: {choix['nom']}")
+        
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'budget_latence_ms': self.budget_ms,
+            'validation': int(nb_validation),
+            'resultats': sorted(resultats, key=lambda r: r['nom']),
+            'front_pareto': [r['nom'] for r in front],
+            'choix': choix
+        }
+    
+    def enregistrer_choix(self, choix: Dict[str, Any]):
+        """Persiste la configuration retenue (rechargée par ModelTrainer aux entraînements suivants)"""
+        path = Path(self.config.MODEL_CONFIG_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        contenu = dict(choix['config'], source=f"architecture_search:{choix['nom']}")
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(contenu, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.logger.info(f"💾 Configuration retenue enregistrée: {path}")
+
+class IncrementalTrainer:
+    """Ajustement incrémental du bundle publié à partir des corrections des utilisateurs
+    
+    Les couples (question, tag) issus des feedbacks sont ajoutés au modèle existant
+    en un nombre borné de pas, sans changer la largeur d'entrée: les questions sont
+    projetées sur le vocabulaire (ou les colonnes hachées) du bundle. Une réponse
+    attendue inconnue crée un tag, et la couche de sortie est élargie d'autant.
+    Un échantillon des features du dernier entraînement complet est rejoué pour
+    limiter l'oubli; le bundle n'est publié que si sa précision sur ce rejeu tient.
+    """
+    
+    # Chaque correction est répétée pour peser face à l'échantillon rejoué
+    REPETITIONS_CORRECTION = 8
+    TAILLE_BATCH = 32
+    
+    def __init__(self, config: ConfigurationManager, base_dir: str):
+        self.config = config
+        self.base_dir = Path(base_dir)
+        self.logger = logging.getLogger(__name__)
+        self.data_processor = DataProcessor(debug=config.DEBUG)
+        self.model_trainer = ModelTrainer(config)
+        self.corrections_paths = [
+            self.base_dir / "data" / "feedback_corrections.jsonl",
+            self.base_dir / "data" / "user_feedback.json"
+        ]
+    
+    def charger_corrections(self) -> List[Dict[str, str]]:
+        """Corrections (question, réponse attendue[, tag]); la plus récente l'emporte par question"""
+        enregistrements = []
+        for path in self.corrections_paths:
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if path.suffix == '.jsonl':
+                        enregistrements.extend(json.loads(ligne) for ligne in f if ligne.strip())
+                    else:
+                        enregistrements.extend(json.load(f))
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"⚠️ Corrections illisibles ({path.name}): {e}")
+        
+        corrections = {}
+        for e in sorted(enregistrements, key=lambda e: e.get('date_creation', '')):
+            question = self.data_processor.nettoyer_texte(e.get('question', ''))
+            reponse = (e.get('expected_response') or e.get('reponse_attendue') or '').strip()
+            if len(question) >= 3 and reponse:
+                corrections[question] = {'question': question, 'reponse': reponse, 'tag': e.get('tag', '')}
+        return list(corrections.values())
+    
+    @staticmethod
+    def empreinte_corrections(corrections: List[Dict[str, str]]) -> str:
+        contenu = json.dumps(sorted((c['question'], c['reponse'], c['tag']) for c in corrections), ensure_ascii=False)
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def associer_tags(
+        corrections: List[Dict[str, str]], 
+        bundle: ModelBundle
+    ) -> Tuple[List[Tuple[str, str]], Dict[str, List[str]]]:
+        """Tag de chaque correction: explicite, sinon celui qui porte la réponse attendue, sinon un nouveau tag"""
+        tag_par_reponse = {r.strip(): tag for tag, reponses in bundle.responses.items() for r in reponses}
+        couples, nouveaux_tags = [], {}
+        for c in corrections:
+            tag = c['tag'] if c['tag'] in bundle.responses else tag_par_reponse.get(c['reponse'])
+            if tag is None:
+                tag = f"feedback_{hashlib.sha1(c['reponse'].encode('utf-8')).hexdigest()[:8]}"
+                nouveaux_tags[tag] = [c['reponse']]
+            couples.append((c['question'], tag))
+        return couples, nouveaux_tags
+    
+    def _modele_elargi(self, bundle: ModelBundle, nb_classes: int):
+        """Modèle du bundle, avec une couche de sortie élargie aux nouveaux tags"""
+        model = bundle.construire_modele()
+        if nb_classes == len(bundle.classes):
+            return model
+        
+        self.model_trainer.model_config.update(bundle.metadata.get('model_config', {}))
+        elargi = self.model_trainer.construire_modele(model.input_shape[-1], nb_classes)
+        poids = elargi.get_weights()
+        anciens = model.get_weights()
+        poids[:-2] = anciens[:-2]
+        poids[-2][:, :len(bundle.classes)] = anciens[-2]
+        poids[-1][:len(bundle.classes)] = anciens[-1]
+        elargi.set_weights(poids)
+        return elargi
+    
+    def _rejeu(self, bundle: ModelBundle) -> Optional[TrainingFeatures]:
+        """Features du dernier entraînement complet, si elles correspondent au bundle
+        
+        Les ajustements précédents ajoutent leurs tags à la fin des classes: des
+        features dont les classes sont un préfixe de celles du bundle restent
+        valides, avec des sorties nulles pour ces tags.
+        """
+        nb_buckets = int(bundle.preprocessing.get('hachage', {}).get('buckets', 0))
+        features = TrainingCache(str(self.base_dir)).charger_features(None, nb_buckets)
+        if features is None or features.words != bundle.words:
+            return None
+        nb_classes = len(features.classes)
+        if bundle.classes[:nb_classes] != features.classes:
+            return None
+        if nb_classes < len(bundle.classes):
+            features = replace(
+                features,
+                classes=list(bundle.classes),
+                train_y=np.pad(features.train_y, ((0, 0), (0, len(bundle.classes) - nb_classes)))
+            )
+        return features
+    
+    def ajuster(
+        self, 
+        bundle: ModelBundle, 
+        corrections: List[Dict[str, str]],
+        sans_rejeu: bool = False
+    ) -> Tuple[Optional[ModelBundle], Dict[str, Any]]:
+        """Ajuste le modèle du bundle; retourne le nouveau bundle (None si refusé) et le rapport
+        
+        Sans features à rejouer, la perte de précision ne peut pas être contrôlée:
+        l'ajustement est refusé, sauf si sans_rejeu l'autorise explicitement.
+        """
+        debut = time.perf_counter()
+        couples, nouveaux_tags = self.associer_tags(corrections, bundle)
+        classes = bundle.classes + list(nouveaux_tags)
+        
+        rejeu = self._rejeu(bundle) if self.config.FINETUNE_REPLAY_SIZE else None
+        if (rejeu is None or not len(rejeu.train_x)) and not sans_rejeu:
+            self.logger.error(
+                "❌ Aucune feature d'entraînement compatible à rejouer - précision non vérifiable, bundle non publié "
+                "(réentraînement complet, ou --allow-no-replay / FINETUNE_ALLOW_NO_REPLAY=true)"
+            )
+            return None, {
+                'source_version': bundle.version,
+                'corrections': len(couples),
+                'nouveaux_tags': nouveaux_tags,
+                'rejeu': 0,
+                'refus': "aucun rejeu compatible",
+                'duree_secondes': round(time.perf_counter() - debut, 2)
+            }
+        
+        correction_x = self.model_trainer.matrice_questions([q for q, _ in couples], bundle)
+        correction_y = ModelTrainer.encoder_classes([t for _, t in couples], classes)
+        
+        # Rejeu d'un échantillon de l'entraînement complet (sorties complétées par les nouveaux tags)
+        if rejeu is not None and len(rejeu.train_x):
+            rng = np.random.default_rng(42)
+            taille = min(len(rejeu.train_x), self.config.FINETUNE_REPLAY_SIZE)
+            indices = rng.choice(len(rejeu.train_x), size=taille, replace=False)
+            rejeu_x = rejeu.train_x[indices]
+            rejeu_y = np.pad(rejeu.train_y[indices], ((0, 0), (0, len(nouveaux_tags))))
+        else:
+            self.logger.warning("⚠️ Aucune feature d'entraînement compatible à rejouer - ajustement sur les corrections seules (autorisé)")
+            rejeu_x = np.zeros((0, correction_x.shape[1]), dtype=np.float32)
+            rejeu_y = np.zeros((0, len(classes)), dtype=np.float32)
+        
+        model = self._modele_elargi(bundle, len(classes))
+        model.compile(
+            loss='categorical_crossentropy',
+            optimizer=Adam(learning_rate=self.config.FINETUNE_LEARNING_RATE),
+            metrics=['accuracy']
+        )
+        precision_rejeu_avant = float(model.evaluate(rejeu_x, rejeu_y, verbose=0)[1]) if len(rejeu_x) else 0.0
+        
+        train_x = np.concatenate([rejeu_x, np.repeat(correction_x, self.REPETITIONS_CORRECTION, axis=0)])
+        train_y = np.concatenate([rejeu_y, np.repeat(correction_y, self.REPETITIONS_CORRECTION, axis=0)])
+        pas_par_epoch = math.ceil(len(train_x) / self.TAILLE_BATCH)
+        epochs = max(1, self.config.FINETUNE_STEPS // pas_par_epoch)
+        model.fit(train_x, train_y, batch_size=self.TAILLE_BATCH, epochs=epochs, shuffle=True, verbose=0)
+        
+        rapport = {
+            'source_version': bundle.version,
+            'corrections': len(couples),
+            'nouveaux_tags': nouveaux_tags,
+            'rejeu': int(len(rejeu_x)),
+            'rejeu_verifie': bool(len(rejeu_x)),
+            'pas': int(epochs * pas_par_epoch),
+            'precision_corrections': round(float(model.evaluate(correction_x, correction_y, verbose=0)[1]), 4),
+            'precision_rejeu_avant': round(precision_rejeu_avant, 4),
+            'precision_rejeu_apres': round(float(model.evaluate(rejeu_x, rejeu_y, verbose=0)[1]), 4) if len(rejeu_x) else 0.0,
+            'duree_secondes': round(time.perf_counter() - debut, 2)
+        }
+        rapport['perte_rejeu'] = round(rapport['precision_rejeu_avant'] - rapport['precision_rejeu_apres'], 4)
+        
+        if len(rejeu_x) and rapport['perte_rejeu'] > self.config.FINETUNE_MAX_ACCURACY_DROP:
+            self.logger.warning(
+                f"⚠️ Perte de précision sur le rejeu {rapport['perte_rejeu']:.4f} > "
+                f"{self.config.FINETUNE_MAX_ACCURACY_DROP} - bundle non publié"
+            )
+            return None, rapport
+        
+        nouveau = ModelBundle.depuis_modele(
+            model,
+            words=bundle.words,
+            classes=classes,
+            responses=dict(bundle.responses, **nouveaux_tags),
+            version=f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-ft{self.empreinte_corrections(corrections)[:8]}",
+            preprocessing=bundle.preprocessing,
+            metadata=dict(
+                bundle.metadata,
+                source_version=bundle.version,
+                corrections_hash=self.empreinte_corrections(corrections),
+                fine_tune=rapport
+            )
+        )
+        return nouveau, rapport
+
+def _evaluer_version(
+    chemin: str,
+    questions: List[str],
+    attendus: List[Dict[str, str]],
+    trafic: List[str],
+    utiliser_nltk: bool
+) -> Dict[str, Any]:
+    """Évalue une version du bundle (exécuté dans un processus dédié, 1 thread CPU)"""
+    configurer_threads_tensorflow(1, 1)
+    
+    try:
+        import psutil
+        processus = psutil.Process()
+    except ImportError:
+        processus = None
+    rss_avant = processus.memory_info().rss if processus else 0
+    
+    debut = time.time()
+    bundle = ModelBundle.charger(chemin)
+    model = bundle.construire_modele()
+    rss_modele = (processus.memory_info().rss - rss_avant) if processus else 0
+    predire = model.predict if isinstance(model, ReseauNumpy) else (lambda x: model(x, training=False))
+    
+    encodeur = EncodeurBagOfWords.pour_bundle(bundle, utiliser_nltk)
+    
+    predites = np.asarray(predire(encodeur.matrice_questions(questions, bundle))).argmax(axis=1)
+    corrects = [
+        bundle.classes[p] == a.get('tag') or a.get('reponse') in bundle.responses.get(bundle.classes[p], [])
+        for p, a in zip(predites.tolist(), attendus)
+    ]
+    entrees_trafic = encodeur.matrice_questions(list(dict.fromkeys(trafic)), bundle)
+    index_trafic = {q: i for i, q in enumerate(dict.fromkeys(trafic))}
+    
+    return {
+        'version': bundle.version,
+        'chemin': chemin,
+        'quantization': bundle.quantization.get('mode', '') if bundle.quantization else '',
+        'pretraitement_compatible': bundle.preprocessing.get('signature') == TextPreprocessor.signature(utiliser_nltk),
+        'classes': len(bundle.classes),
+        'precision_holdout': round(float(np.mean(corrects)), 4) if corrects else 0.0,
+        'latence_ms': mesurer_latence_ms(predire, entrees_trafic[[index_trafic[q] for q in trafic]]),
+        'octets_poids': int(sum(np.asarray(w).nbytes for w in bundle.weights)),
+        'rss_modele_mo': round(rss_modele / 1e6, 1) if processus else None,
+        'duree_s': round(time.time() - debut, 2)
+    }
+
+class ModelSelection:
+    """Comparaison hors-ligne des versions du bundle (publiée + sauvegardées) et promotion
+    
+    Chaque version est évaluée dans un processus dédié sur le même jeu de référence
+    (questions étiquetées) et le même échantillon de trafic rejoué: précision,
+    latence p50/p99 d'une requête et mémoire. La promotion remplace le bundle
+    publié de manière atomique, après sauvegarde de la version remplacée.
+    """
+    
+    TAILLE_HOLDOUT = 200
+    
+    def __init__(self, config: ConfigurationManager, base_dir: str, workers: Optional[int] = None):
+        self.config = config
+        self.base_dir = Path(base_dir)
+        self.workers = workers or config.EVAL_WORKERS
+        self.logger = logging.getLogger(__name__)
+        self.backup_manager = BackupManager(str(self.base_dir), max_backups=config.MAX_BACKUPS)
+        self.bundle_path = self.base_dir / BUNDLE_FILENAME
+    
+    def versions(self) -> Dict[str, Path]:
+        """Version -> fichier, pour le bundle publié et chaque sauvegarde lisible"""
+        chemins = [self.bundle_path] if self.bundle_path.exists() else []
+        chemins += [
+            chemin for chemin in (
+                self.backup_manager.chemin_artefact(m, 'bundle') for m in self.backup_manager.charger_manifestes()
+            ) if chemin is not None
+        ]
+        versions = {}
+        for chemin in chemins:
+            try:
+                versions.setdefault(ModelBundle.lire_entete(str(chemin))['version'], chemin)
+            except BundleError as e:
+                self.logger.warning(f"⚠️ Version ignorée: {e}")
+        return versions
+    
+    def charger_jeu_reference(self) -> List[Dict[str, str]]:
+        """Questions étiquetées (tag ou réponse attendue): jeu de référence + corrections des feedbacks
+        
+        Sans jeu de référence, il est créé une fois depuis la dernière sauvegarde des
+        patterns (tirage fixe), puis réutilisé tel quel pour toutes les comparaisons.
+        """
+        holdout_path = Path(self.config.EVAL_HOLDOUT_PATH)
+        if not holdout_path.exists():
+            self._creer_jeu_reference(holdout_path)
+        
+        processor = DataProcessor()
+        jeu = []
+        for path in (holdout_path, self.base_dir / "data" / "feedback_corrections.jsonl"):
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for ligne in f:
+                    if not ligne.strip():
+                        continue
+                    e = json.loads(ligne)
+                    question = processor.nettoyer_texte(e.get('question', ''))
+                    if question:
+                        jeu.append({
+                            'question': question,
+                            'tag': e.get('tag', ''),
+                            'reponse': e.get('expected_response', '')
+                        })
+        return jeu
+    
+    def _creer_jeu_reference(self, holdout_path: Path):
+        donnees_tags = self.backup_manager.charger_patterns()
+        if donnees_tags is None:
+            self.logger.warning("⚠️ Aucun jeu de référence ni sauvegarde de patterns")
+            return
+        
+        couples = sorted((p, tag) for tag, d in donnees_tags.items() for p in d['patterns'])
+        random.Random(42).shuffle(couples)
+        holdout_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(holdout_path, 'w', encoding='utf-8') as f:
+            for question, tag in couples[:self.TAILLE_HOLDOUT]:
+                f.write(json.dumps({'question': question, 'tag': tag}, ensure_ascii=False) + "\n")
+        self.logger.warning(
+            f"⚠️ Jeu de référence créé depuis les patterns sauvegardés ({min(len(couples), self.TAILLE_HOLDOUT)} questions): "
+            "ces patterns ont servi à l'entraînement, complétez-le avec des questions inédites"
+        )
+    
+    def charger_trafic(self, questions_reference: List[str]) -> List[str]:
+        """Échantillon fixe de messages rejoués (trafic capturé, sinon questions de référence)"""
+        messages = []
+        trafic_path = Path(self.config.EVAL_TRAFFIC_PATH)
+        if trafic_path.exists():
+            processor = DataProcessor()
+            with open(trafic_path, 'r', encoding='utf-8') as f:
+                for ligne in f:
+                    if ligne.strip():
+                        e = json.loads(ligne)
+                        if e.get('route', '/get') != '/get':
+                            continue  # Questions de /feedback: pas du trafic servi
+                        message = processor.nettoyer_texte(e.get('message') or e.get('question') or '')
+                        if message:
+                            messages.append(message)
+        if not messages:
+            messages = list(questions_reference)
+        
+        rng = random.Random(42)
+        return [rng.choice(messages) for _ in range(self.config.EVAL_TRAFFIC_SAMPLE)] if messages else []
+    
+    def executer(self) -> Dict[str, Any]:
+        """Évalue toutes les versions en parallèle et retourne le rapport comparatif"""
+        versions = self.versions()
+        jeu = self.charger_jeu_reference()
+        if not versions or not jeu:
+            raise ValueError("Aucune version ou aucun jeu de référence à évaluer")
+        questions = [e['question'] for e in jeu]
+        trafic = self.charger_trafic(questions)
+        
+        self.logger.info(
+            f"🔬 Évaluation de {len(versions)} versions ({len(jeu)} questions de référence, "
+            f"{len(trafic)} requêtes de trafic, {self.workers} processus)"
+        )
+        resultats = []
+        contexte = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=contexte, max_tasks_per_child=1) as executor:
+            futures = {
+                executor.submit(_evaluer_version, str(chemin), questions, jeu, trafic, NLTK_AVAILABLE): version
+                for version, chemin in versions.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    resultat = future.result()
+                    resultats.append(resultat)
+                    self.logger.info(
+                        f"   {resultat['version']}: précision {resultat['precision_holdout']:.4f}, "
+                        f"p50 {resultat['latence_ms']['p50_ms']:.3f} ms, p99 {resultat['latence_ms']['p99_ms']:.3f} ms"
+                    )
+                except Exception as e:
+                    self.logger.error(f"❌ Évaluation de {futures[future]} échouée: {e}")
+        
+        resultats.sort(key=lambda r: r['version'], reverse=True)
+        return {
+            'date': datetime.now().isoformat(),
+            'version_publiee': ModelBundle.lire_entete(str(self.bundle_path))['version'] if self.bundle_path.exists() else None,
+            'questions_reference': len(jeu),
+            'requetes_trafic': len(trafic),
+            'versions': resultats
+        }
+    
+    def promouvoir(self, version: str) -> bool:
+        """Publie une version sauvegardée à la place du bundle courant (remplacement atomique)"""
+        versions = self.versions()
+        if version not in versions:
+            self.logger.error(f"❌ Version inconnue: {version} (disponibles: {', '.join(sorted(versions))})")
+            return False
+        source = versions[version]
+        if source == self.bundle_path:
+            self.logger.info(f"ℹ️ {version} est déjà la version publiée")
+            return True
+        
+        ModelBundle.charger(str(source))  # Vérifie la somme de contrôle avant publication
+        
+        # Copie préparée à côté du bundle publié avant que la rotation des sauvegardes ne la supprime
+        fd, tmp_path = tempfile.mkstemp(prefix=".bundle_", suffix=".tmp", dir=str(self.base_dir))
+        try:
+            with os.fdopen(fd, 'wb') as f, open(source, 'rb') as src:
+                shutil.copyfileobj(src, f)
+                f.flush()
+                os.fsync(f.fileno())
+            self.backup_manager.backup_bundle()
+            os.replace(tmp_path, self.bundle_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        
+        self.logger.info(f"🚀 Version {version} promue: {BUNDLE_FILENAME} remplacé")
+        return True
+
+def charger_patterns_entrainement(source: Optional[str] = None, base_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Patterns d'entraînement d'un fichier (.json ou .pkl), sinon ceux de la sauvegarde la plus récente
+    
+    L'entraînement n'écrit plus training_patterns.pkl: ses patterns sont sauvegardés
+    par BackupManager. Un training_patterns.pkl historique n'est lu qu'en dernier
+    recours. None si aucun patterns n'est disponible.
+    """
+    if source:
+        if source.endswith('.json'):
+            with open(source, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        with open(source, 'rb') as f:
+            return pickle.load(f)
+    
+    base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+    # Pas de BackupManager sans sauvegarde: son constructeur crée l'arborescence
+    if os.path.isdir(os.path.join(base_dir, "data", "Backup", "manifests")):
+        donnees_tags = BackupManager(base_dir).charger_patterns()
+        if donnees_tags is not None:
+            return donnees_tags
+    
+    historique = os.path.join(base_dir, "training_patterns.pkl")
+    if os.path.exists(historique):
+        with open(historique, 'rb') as f:
+            return pickle.load(f)
+    return None
+
+def charger_questions_evaluation(source: Optional[str], bundle: ModelBundle,
+                                 base_dir: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """Questions et tags attendus d'un jeu étiqueté (.jsonl) ou de patterns d'entraînement
+    
+    Dans un .jsonl, chaque ligne porte une question et un tag, ou une réponse
+    attendue rattachée au tag du bundle qui la contient. Sans source, les patterns
+    de la sauvegarde la plus récente sont utilisés (voir charger_patterns_entrainement).
+    """
+    if source and source.endswith('.jsonl'):
+        tag_par_reponse = {r: tag for tag, reponses in bundle.responses.items() for r in reponses}
+        processor = DataProcessor()
+        questions, tags = [], []
+        with open(source, 'r', encoding='utf-8') as f:
+            for ligne in f:
+                if not ligne.strip():
+                    continue
+                e = json.loads(ligne)
+                question = processor.nettoyer_texte(e.get('question', ''))
+                tag = e.get('tag') or tag_par_reponse.get(e.get('expected_response', ''), '')
+                if question and tag:
+                    questions.append(question)
+                    tags.append(tag)
+        return questions, tags
+    
+    donnees_tags = charger_patterns_entrainement(source, base_dir) or {}
+    couples = [(p, tag) for tag, d in donnees_tags.items() for p in d['patterns'] if p.strip()]
+    return [p for p, _ in couples], [tag for _, tag in couples]
+
+def main_evaluation(source: Optional[str] = None, taille_lot: int = 1024) -> bool:
+    """Évaluation hors-ligne du bundle publié: une matrice, prédiction par lots, confusion en numpy"""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    bundle_path = os.path.join(base_dir, BUNDLE_FILENAME)
+    
+    try:
+        training_logger = TrainingLogger()
+        logger = logging.getLogger(__name__)
+        if source and not os.path.exists(source):
+            logger.error(f"❌ Fichier d'évaluation introuvable: {source}")
+            return False
+        
+        bundle = ModelBundle.charger(bundle_path)
+        if bundle.preprocessing.get('signature') != TextPreprocessor.signature():
+            logger.warning("⚠️ Prétraitement différent de celui du bundle - résultats indicatifs")
+        model = bundle.construire_modele()
+        predire = model.predict if isinstance(model, ReseauNumpy) else (lambda x: model(x, training=False))
+        
+        debut = time.perf_counter()
+        questions, tags = charger_questions_evaluation(source, bundle, base_dir)
+        if not questions and not source:
+            logger.error("❌ Aucun patterns d'entraînement sauvegardé (data/Backup): entraîner d'abord ou fournir un jeu")
+            return False
+        index_classes = {c: i for i, c in enumerate(bundle.classes)}
+        connues = [i for i, tag in enumerate(tags) if tag in index_classes]
+        if not connues:
+            logger.error("❌ Aucune question étiquetée avec une classe du bundle")
+            return False
+        
+        uniques = list(dict.fromkeys(questions[i] for i in connues))
+        entrees = EncodeurBagOfWords.pour_bundle(bundle).matrice_questions(uniques, bundle)
+        duree_encodage = time.perf_counter() - debut
+        
+        debut = time.perf_counter()
+        predites_uniques = predire_par_lots(predire, entrees, taille_lot).argmax(axis=1)
+        duree_prediction = time.perf_counter() - debut
+        
+        debut = time.perf_counter()
+        position = {q: i for i, q in enumerate(uniques)}
+        predictions = predites_uniques[[position[questions[i]] for i in connues]]
+        cibles = np.fromiter((index_classes[tags[i]] for i in connues), dtype=np.int64, count=len(connues))
+        matrice = matrice_confusion(cibles, predictions, len(bundle.classes))
+        rapport = rapport_evaluation(matrice, bundle.classes)
+        duree_metriques = time.perf_counter() - debut
+        
+        rapport.update({
+            'version': bundle.version,
+            'source': os.path.basename(source) if source else "patterns sauvegardés",
+            'questions_ignorees': len(tags) - len(connues),
+            'durees_s': {
+                'encodage': round(duree_encodage, 4),
+                'prediction': round(duree_prediction, 4),
+                'metriques': round(duree_metriques, 4)
+            },
+            'classes': bundle.classes,
+            'matrice_confusion': matrice.tolist()
+        })
+        training_logger.log_rapport(f"evaluation_{datetime.now().strftime('%Y%m%d-%H%M%S')}", rapport)
+        
+        print(f"\n🧪 ÉVALUATION DU BUNDLE {bundle.version} ({rapport['questions']} questions, "
+              f"{rapport['classes_evaluees']} classes, source {rapport['source']})")
+        print(f"📊 Précision globale: {rapport['precision_globale']:.4f}")
+        print(f"📊 Macro: précision {rapport['precision_macro']:.4f}, rappel {rapport['rappel_macro']:.4f}, "
+              f"F1 {rapport['f1_macro']:.4f}")
+        print(f"⏱️ Encodage {duree_encodage:.3f}s, prédiction {duree_prediction:.3f}s, métriques {duree_metriques:.3f}s")
+        if rapport['questions_ignorees']:
+            print(f"⚠️ {rapport['questions_ignorees']} questions ignorées (tag absent du bundle)")
+        
+        print("\n📉 Classes les moins bien reconnues:")
+        for c in sorted(rapport['par_classe'], key=lambda c: (c['f1'], -c['support']))[:10]:
+            print(f"   {c['classe']:<40} précision {c['precision']:.2f} | rappel {c['rappel']:.2f} | "
+                  f"F1 {c['f1']:.2f} | {c['support']} questions")
+        if rapport['confusions_principales']:
+            print("\n🔀 Confusions les plus fréquentes:")
+            for c in rapport['confusions_principales']:
+                print(f"   {c['attendu']} -> {c['predit']}: {c['nombre']}")
+        return True
+        
+    except (OSError, BundleError, ValueError) as e:
+        logging.getLogger(__name__).error(f"❌ Erreur d'évaluation: {e}")
+        return False
+
+def main_historique(n: int = 10) -> bool:
+    """Affiche précision et durées des n derniers entraînements (lecture depuis la fin du flux)"""
+    entrees = TrainingLogger.lire_historique(n, champs=(
+        'timestamp', 'bundle_version', 'training_skipped', 'training_mode',
+        'model_accuracy', 'validation_accuracy', 'duration_seconds', 'stage_seconds'
+    ))
+    if not entrees:
+        print(f"ℹ️ Aucun historique dans logs/{TrainingLogger.METRICS_FILENAME}")
+        return False
+    
+    print(f"\n📈 {len(entrees)} DERNIERS ENTRAÎNEMENTS")
+    print(f"{'date':<19} | {'mode':<8} | précision | validation | durée (s) | étapes (s)")
+    for e in entrees:
+        mode = "ignoré" if e['training_skipped'] else (e['training_mode'] or "")
+        etapes = ", ".join(f"{k} {v:.1f}" for k, v in (e['stage_seconds'] or {}).items())
+        print(
+            f"{(e['timestamp'] or '')[:19]:<19} | {mode:<8} | {e['model_accuracy'] or 0:>9.4f} | "
+            f"{e['validation_accuracy'] or 0:>10.4f} | {e['duration_seconds'] or 0:>9.2f} | {etapes}"
+        )
+    return True
+
+def main_selection(promouvoir: Optional[str] = None) -> bool:
+    """Compare les versions du bundle (train.py --evaluate-backups) ou en promeut une (--promote)"""
+    try:
+        config = ConfigurationManager()
+        training_logger = TrainingLogger()
+        selection = ModelSelection(config, os.path.dirname(os.path.abspath(__file__)))
+        
+        if promouvoir:
+            return selection.promouvoir(promouvoir)
+        
+        rapport = selection.executer()
+        training_logger.log_rapport(f"model_selection_{datetime.now().strftime('%Y%m%d-%H%M%S')}", rapport)
+        
+        print("\n" + "=" * 90)
+        print(f"🔬 COMPARAISON DES VERSIONS ({rapport['questions_reference']} questions, "
+              f"{rapport['requetes_trafic']} requêtes rejouées)")
+        print("=" * 90)
+        print(f"{'version':<36} | {'précision':>9} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'poids (Ko)':>10} | {'RSS (Mo)':>8}")
+        print("-" * 94)
+        for r in rapport['versions']:
+            nom = r['version'] + (" *" if r['version'] == rapport['version_publiee'] else "")
+            rss = f"{r['rss_modele_mo']:8.1f}" if r['rss_modele_mo'] is not None else f"{'-':>8}"
+            print(f"{nom:<36} | {r['precision_holdout']:9.4f} | {r['latence_ms']['p50_ms']:8.3f} | "
+                  f"{r['latence_ms']['p99_ms']:8.3f} | {r['octets_poids'] / 1024:10.0f} | {rss}")
+            if not r['pretraitement_compatible']:
+                print(f"{'':<36}   ⚠️ prétraitement différent de l'actuel: précision non comparable")
+        print("\n* version publiée - promotion: python train.py --promote <version>")
+        return True
+        
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Erreur lors de la comparaison des versions: {e}")
+        return False
+
+def main_ajustement(sans_rejeu: bool = False) -> bool:
+    """Ajustement incrémental du bundle publié depuis les feedbacks (train.py --fine-tune)"""
+    if not TENSORFLOW_AVAILABLE:
+        print("❌ TensorFlow requis pour l'ajustement")
+        return False
+    
+    try:
+        config = ConfigurationManager()
+        training_logger = TrainingLogger()
+        logger = logging.getLogger(__name__)
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        bundle_path = os.path.join(base_dir, BUNDLE_FILENAME)
+        
+        if not os.path.exists(bundle_path):
+            logger.error("❌ Aucun bundle publié à ajuster - lancez d'abord un entraînement complet")
+            return False
+        bundle = ModelBundle.charger(bundle_path)
+        if bundle.quantization:
+            logger.error(f"❌ Bundle {bundle.version} quantifié ({bundle.quantization['mode']}) - ajustement impossible")
+            return False
+        
+        if bundle.preprocessing.get('signature') != TextPreprocessor.signature():
+            logger.error(
+                f"❌ Prétraitement du bundle ({bundle.preprocessing.get('signature')}) différent de "
+                f"l'actuel ({TextPreprocessor.signature()}) - réentraînement complet nécessaire"
+            )
+            return False
+        
+        ajusteur = IncrementalTrainer(config, base_dir)
+        corrections = ajusteur.charger_corrections()
+        if not corrections:
+            logger.info("ℹ️ Aucune correction à intégrer")
+            return True
+        if bundle.metadata.get('corrections_hash') == ajusteur.empreinte_corrections(corrections):
+            logger.info(f"ℹ️ Corrections déjà intégrées au bundle {bundle.version}")
+            return True
+        
+        logger.info(f"🔧 Ajustement du bundle {bundle.version} avec {len(corrections)} corrections...")
+        nouveau, rapport = ajusteur.ajuster(bundle, corrections, sans_rejeu or config.FINETUNE_ALLOW_NO_REPLAY)
+        training_logger.log_rapport(f"fine_tune_{datetime.now().strftime('%Y%m%d-%H%M%S')}", rapport)
+        if nouveau is None:
+            return False
+        
+        backup_manager = BackupManager(base_dir, max_backups=config.MAX_BACKUPS)
+        backup_manager.backup_bundle()
+        nouveau.sauvegarder(bundle_path)
+        backup_manager.backup_bundle()
+        logger.info(
+            f"✅ Bundle ajusté publié: {nouveau.version} en {rapport['duree_secondes']:.2f}s "
+            f"({rapport['corrections']} corrections, {len(rapport['nouveaux_tags'])} nouveaux tags, "
+            f"rejeu {rapport['precision_rejeu_avant']:.4f} -> {rapport['precision_rejeu_apres']:.4f})"
+        )
+        return True
+        
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Erreur lors de l'ajustement: {e}")
+        return False
+
+def main(
+    force: bool = False,
+    quantize: Optional[str] = None,
+    search: bool = False,
+    rapide: bool = False,
+    buckets: Optional[int] = None
+):
     """Fonction principale d'entraînement améliorée"""
     print("=" * 90)
     print("🚀 MILA ASSIST - ENTRAÎNEMENT VERSION 2.0 (GESTION BACKUPS INTELLIGENTE)")
@@ -808,19 +2628,32 @@ def main():
     try:
         # Initialisation des composants
         config = ConfigurationManager()
+        quantize = quantize or config.MODEL_QUANTIZATION or None
+        if quantize and quantize not in MODES_QUANTIFICATION:
+            print(f"❌ Mode de quantification inconnu: {quantize}")
+            return False
         
         # Configuration du logging
         training_logger = TrainingLogger()
         logger = logging.getLogger(__name__)
         
+        # Threads TensorFlow fixés pour l'hôte (toujours en mode rapide)
+        threads = config.TRAINING_THREADS or ((os.cpu_count() or 1) if rapide else 0)
+        if threads:
+            configurer_threads_tensorflow(threads)
+        
         # Initialisation des gestionnaires
         api_client = APIClient(config)
         data_processor = DataProcessor(debug=config.DEBUG)
         model_trainer = ModelTrainer(config)
+        if buckets is not None:
+            model_trainer.nb_buckets = max(0, buckets)
+        base_dir = os.path.dirname(os.path.abspath(__file__))
         backup_manager = BackupManager(
-            os.path.dirname(os.path.abspath(__file__)),
+            base_dir,
             max_backups=config.MAX_BACKUPS
         )
+        training_cache = TrainingCache(base_dir)
         
         logger.info(f"🔧 Configuration:")
         logger.info(f"   - API URL: {config.API_URL}")
@@ -837,7 +2670,7 @@ def main():
         backup_summary = backup_manager.get_backup_summary()
         print("\n📊 État actuel des backups:")
         for backup_type, count in backup_summary.items():
-            print(f"   - {backup_type}: {count} fichiers")
+            print(f"   - {backup_type}: {count}")
         print()
         
         # Test de connexion API
@@ -857,7 +2690,8 @@ def main():
         metrics = TrainingMetrics(start_time=time.time())
         
         # Récupération des données
-        connaissances = api_client.recuperer_toutes_connaissances()
+        with metrics.chronometre('fetch'):
+            connaissances = api_client.recuperer_toutes_connaissances()
         if not connaissances:
             logger.error("Aucune donnée récupérée - impossible d'entraîner")
             return False
@@ -865,59 +2699,173 @@ def main():
         metrics.total_knowledge = len(connaissances)
         
         # Traitement des données
-        donnees_tags = data_processor.convertir_donnees_vers_format_entrainement(connaissances)
-        donnees_augmentees = data_processor.augmenter_donnees(donnees_tags)
+        with metrics.chronometre('preprocess'):
+            donnees_tags = data_processor.convertir_donnees_vers_format_entrainement(connaissances)
+            donnees_augmentees = data_processor.augmenter_donnees(donnees_tags)
+            
+            # Calcul du facteur d'augmentation
+            patterns_avant = sum(len(d['patterns']) for d in donnees_tags.values())
+            patterns_après = sum(len(d['patterns']) for d in donnees_augmentees.values())
+            metrics.data_augmentation_factor = patterns_après / patterns_avant if patterns_avant > 0 else 1.0
+            
+            # Empreinte des données
+            data_hash = training_cache.calculer_hash_donnees(donnees_tags)
+        
+        def obtenir_features() -> TrainingFeatures:
+            """Features depuis le cache si seules les options du modèle ont changé"""
+            with metrics.chronometre('preprocess'):
+                features = None if force else training_cache.charger_features(data_hash, model_trainer.nb_buckets)
+                if features is None:
+                    # Prétraitement incrémental: seuls les nouveaux patterns sont tokenisés
+                    corpus = model_trainer.preprocessor.pretraiter(
+                        (p for donnees in donnees_augmentees.values() for p in donnees['patterns']),
+                        corpus_existant=None if force else training_cache.charger_corpus()
+                    )
+                    training_cache.sauvegarder_corpus(corpus)
+                    features = model_trainer.preparer_features(donnees_augmentees, corpus)
+                    training_cache.sauvegarder_features(data_hash, features)
+            return features
+        
+        # Recherche d'architecture: la configuration retenue remplace celle du modèle
+        features = None
+        if search:
+            features = obtenir_features()
+            recherche = ArchitectureSearch(config)
+            with metrics.chronometre('search'):
+                resultat = recherche.executer(features, model_trainer.model_config)
+            training_logger.log_rapport(f"architecture_search_{datetime.now().strftime('%Y%m%d-%H%M%S')}", resultat)
+            recherche.enregistrer_choix(resultat['choix'])
+            model_trainer.model_config.update(resultat['choix']['config'])
+            metrics.selected_architecture = {
+                'nom': resultat['choix']['nom'],
+                'config': resultat['choix']['config'],
+                'precision_validation': resultat['choix']['precision_validation'],
+                'latence_p50_ms': resultat['choix']['latence_ms']['p50_ms'],
+                'octets_poids': resultat['choix']['octets_poids'],
+                'front_pareto': resultat['front_pareto'],
+                'budget_latence_ms': resultat['budget_latence_ms']
+            }
         
-        # Calcul du facteur d'augmentation
-        patterns_avant = sum(len(d['patterns']) for d in donnees_tags.values())
-        patterns_après = sum(len(d['patterns']) for d in donnees_augmentees.values())
-        metrics.data_augmentation_factor = patterns_après / patterns_avant if patterns_avant > 0 else 1.0
+        # Empreinte de la configuration du modèle (après une éventuelle recherche)
+        config_modele = dict(model_trainer.model_config)
+        if quantize:
+            config_modele['quantization'] = quantize
+        if rapide:
+            config_modele['mode_rapide'] = ModelTrainer.MODE_RAPIDE
+        if model_trainer.nb_buckets:
+            config_modele['hachage_buckets'] = model_trainer.nb_buckets
+        config_hash = training_cache.calculer_hash_config(config_modele)
+        etat_precedent = training_cache.charger_etat()
+        bundle_path = os.path.join(base_dir, BUNDLE_FILENAME)
+        artefacts_presents = os.path.exists(bundle_path)
+        
+        if (not force and artefacts_presents
+                and etat_precedent.get('data_hash') == data_hash
+                and etat_precedent.get('config_hash') == config_hash):
+            metrics.training_skipped = True
+            metrics.end_time = time.time()
+            training_logger.log_metrics(metrics)
+            
+            print("\n" + "=" * 90)
+            print("✅ BASE DE CONNAISSANCES ET CONFIGURATION INCHANGÉES - ENTRAÎNEMENT IGNORÉ")
+            print("=" * 90)
+            print(f"📊 Empreinte des données: {data_hash[:16]}")
+            print(f"📊 Durée totale: {metrics.duration:.2f} secondes")
+            print("💡 Utilisez --force pour réentraîner malgré tout")
+            return True
+        
+        if features is None:
+            features = obtenir_features()
         
         # Sauvegarde des fichiers existants
         logger.info("💾 Sauvegarde des fichiers existants...")
-        backup_manager.backup_model()
-        backup_manager.backup_vocabulary_files()
+        backup_manager.backup_bundle()
         
         # Entraînement du modèle
-        words, classes, model, training_metrics = model_trainer.entrainer_modele(donnees_augmentees)
+        with metrics.chronometre('fit'):
+            words, classes, model, training_metrics = model_trainer.entrainer_modele(
+                donnees_augmentees, features, rapide=rapide
+            )
         
-        if not words or not classes:
+        if model is None or not classes or (not words and not features.nb_buckets):
             logger.error("Erreur lors de l'entraînement")
             return False
         
         # Fusion des métriques
-        metrics.end_time = training_metrics.end_time
         metrics.valid_tags = training_metrics.valid_tags
         metrics.vocabulary_size = training_metrics.vocabulary_size
         metrics.total_patterns = training_metrics.total_patterns
         metrics.model_accuracy = training_metrics.model_accuracy
         metrics.training_loss = training_metrics.training_loss
         metrics.epochs_completed = training_metrics.epochs_completed
+        metrics.features_from_cache = training_metrics.features_from_cache
+        metrics.training_mode = training_metrics.training_mode
+        metrics.training_seconds = training_metrics.training_seconds
+        metrics.validation_accuracy = training_metrics.validation_accuracy
+        metrics.hashing_buckets = training_metrics.hashing_buckets
+        metrics.hashing_collision_rate = training_metrics.hashing_collision_rate
         
         # Sauvegarde des nouveaux fichiers
         logger.info("💾 Sauvegarde des nouveaux fichiers...")
         
-        # Sauvegarde du modèle
-        if model is not None:
-            model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chatbot_model.keras")
-            model.save(model_path)
-            logger.info(f"💾 Nouveau modèle sauvegardé: {model_path}")
+        # Publication du bundle versionné (écriture atomique)
+        with metrics.chronometre('save'):
+            bundle = ModelBundle.depuis_modele(
+                model,
+                words=words,
+                classes=classes,
+                responses={tag: d['responses'] for tag, d in donnees_augmentees.items()},
+                version=f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{data_hash[:8]}",
+                preprocessing=model_trainer.configuration_pretraitement(),
+                metadata={
+                    'data_hash': data_hash,
+                    'config_hash': config_hash,
+                    'model_config': model_trainer.model_config,
+                    'accuracy': metrics.model_accuracy,
+                    'loss': metrics.training_loss,
+                    'epochs': metrics.epochs_completed
+                }
+            )
         
-        # Sauvegarde des vocabulaires
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        for filename, data in [("words.pkl", words), ("classes.pkl", classes)]:
-            file_path = os.path.join(base_dir, filename)
-            with open(file_path, 'wb') as f:
-                pickle.dump(data, f)
-            logger.info(f"📄 Nouveau {filename} créé")
+        # Quantification post-entraînement: publiée seulement si la précision tient
+        if quantize:
+            with metrics.chronometre('quantize'):
+                bundle_quantifie = quantifier_bundle(bundle, quantize)
+                rapport = rapport_quantification(bundle, bundle_quantifie, features.train_x, features.train_y)
+            training_logger.log_rapport(f"quantization_report_{bundle_quantifie.version}", rapport)
+            logger.info(
+                f"🗜️ Quantification {quantize}: précision {rapport['precision_float32']:.4f} -> "
+                f"{rapport['precision_quantifiee']:.4f}, poids {rapport['octets_poids_float32'] // 1024} Ko -> "
+                f"{rapport['octets_poids_quantifies'] // 1024} Ko, latence p50 "
+                f"{rapport['latence_keras_float32']['p50_ms']:.2f} ms -> {rapport['latence_numpy_quantifiee']['p50_ms']:.2f} ms"
+            )
+            
+            if rapport['perte_precision'] <= config.QUANTIZATION_MAX_ACCURACY_DROP:
+                bundle = bundle_quantifie
+                metrics.quantization = quantize
+                metrics.quantized_accuracy = rapport['precision_quantifiee']
+            else:
+                logger.warning(
+                    f"⚠️ Perte de précision {rapport['perte_precision']:.4f} > "
+                    f"{config.QUANTIZATION_MAX_ACCURACY_DROP} - bundle float32 publié"
+                )
         
-        # Sauvegarde des patterns et métriques
-        backup_manager.backup_training_patterns(donnees_augmentees)
-        backup_manager.backup_metrics(metrics)
+        with metrics.chronometre('save'):
+            bundle.sauvegarder(bundle_path)
+            logger.info(f"📦 Nouveau bundle publié: {bundle.version}")
+            
+            # Manifeste de la nouvelle version: bundle et patterns
+            backup_manager.backup_bundle()
+            backup_manager.backup_training_patterns(donnees_augmentees)
         
-        # Sauvegarde des métriques dans l'historique
+        # Sauvegarde des métriques dans l'historique (une ligne JSONL)
+        metrics.bundle_version = bundle.version
+        metrics.end_time = time.time()
         training_logger.log_metrics(metrics)
         
+        # Mémorisation des empreintes pour les prochains entraînements
+        training_cache.sauvegarder_etat(data_hash, config_hash)
+        
         # Résumé final des backups après nettoyage
         final_backup_summary = backup_manager.get_backup_summary()
         
@@ -927,22 +2875,25 @@ def main():
         print("=" * 90)
         print(f"📊 Connaissances utilisées: {metrics.total_knowledge}")
         print(f"📊 Tags d'entraînement: {metrics.valid_tags}")
-        print(f"📊 Vocabulaire: {metrics.vocabulary_size} mots")
+        if metrics.hashing_buckets:
+            print(f"📊 Hachage: {metrics.hashing_buckets} colonnes (collisions: {metrics.hashing_collision_rate:.1%})")
+        else:
+            print(f"📊 Vocabulaire: {metrics.vocabulary_size} mots")
         print(f"📊 Patterns total: {metrics.total_patterns}")
         print(f"📊 Facteur d'augmentation: {metrics.data_augmentation_factor:.2f}x")
         print(f"📊 Précision finale: {metrics.model_accuracy:.4f}")
+        print(f"📊 Précision validation: {metrics.validation_accuracy:.4f}")
+        print(f"⏱️ Entraînement {metrics.training_mode}: {metrics.training_seconds:.2f} secondes")
         print(f"📊 Durée totale: {metrics.duration:.2f} secondes")
+        print("⏱️ Étapes: " + ", ".join(f"{etape} {duree:.2f}s" for etape, duree in metrics.stage_seconds.items()))
         print(f"📊 Epochs complétés: {metrics.epochs_completed}")
         
         print("\n📁 Fichiers mis à jour:")
-        print("   ✅ chatbot_model.keras (modèle Keras entraîné)")
-        print("   ✅ words.pkl (vocabulaire à jour)")
-        print("   ✅ classes.pkl (classes à jour)")
-        print("   ✅ training_patterns.pkl (patterns de fallback)")
+        print(f"   ✅ {BUNDLE_FILENAME} (bundle {bundle.version}, checksum {bundle.checksum[:12]})")
         
-        print("\n🗃️ Gestion des backups (max 3 versions):")
+        print(f"\n🗃️ Gestion des backups (max {config.MAX_BACKUPS} versions, stockage dédupliqué):")
         for backup_type, count in final_backup_summary.items():
-            print(f"   📦 {backup_type}: {count} versions conservées")
+            print(f"   📦 {backup_type}: {count}")
         
         print("\n💡 Le chatbot peut maintenant utiliser le modèle mis à jour!")
         print("🔄 Redémarrez l'application pour prendre en compte les changements")
@@ -961,5 +2912,50 @@ def main():
         return False
 
 if __name__ == "__main__":
-    success = main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Entraînement du modèle Keras de Mila Assist")
+    parser.add_argument("--force", action="store_true",
+                        help="Réentraîner même si les données et la configuration sont inchangées")
+    parser.add_argument("--quantize", choices=MODES_QUANTIFICATION,
+                        help="Publier un bundle quantifié (int8 ou float16) après comparaison de précision")
+    parser.add_argument("--search", action="store_true",
+                        help="Rechercher l'architecture (front de Pareto précision/latence/mémoire) avant l'entraînement")
+    parser.add_argument("--fast", action="store_true",
+                        help="Mode rapide: pipeline tf.data, batchs adaptatifs, warm-up et arrêt précoce resserré")
+    parser.add_argument("--hashing-buckets", type=int, default=None, metavar="N",
+                        help="Hacher les lemmes sur N colonnes au lieu du vocabulaire (0 = vocabulaire)")
+    parser.add_argument("--fine-tune", action="store_true",
+                        help="Ajuster le bundle publié avec les corrections des feedbacks (sans réentraînement complet)")
+    parser.add_argument("--allow-no-replay", action="store_true",
+                        help="Avec --fine-tune: publier même sans features à rejouer (précision non vérifiée)")
+    parser.add_argument("--evaluate-backups", action="store_true",
+                        help="Comparer le bundle publié et ses sauvegardes (précision, latence p50/p99, mémoire)")
+    parser.add_argument("--promote", metavar="VERSION",
+                        help="Publier une version sauvegardée du bundle (remplacement atomique)")
+    parser.add_argument("--evaluate", nargs="?", const="", metavar="FICHIER",
+                        help="Évaluer le bundle publié hors-ligne (patterns de la dernière sauvegarde par défaut, ou un jeu .jsonl)")
+    parser.add_argument("--history", type=int, nargs="?", const=10, metavar="N",
+                        help="Afficher précision et durées des N derniers entraînements (10 par défaut)")
+    args = parser.parse_args()
+    
+    if args.evaluate is not None:
+        sys.exit(0 if main_evaluation(args.evaluate or None) else 1)
+    
+    if args.history is not None:
+        sys.exit(0 if main_historique(args.history) else 1)
+    
+    if args.evaluate_backups or args.promote:
+        sys.exit(0 if main_selection(args.promote) else 1)
+    
+    if args.fine_tune:
+        sys.exit(0 if main_ajustement(args.allow_no_replay) else 1)
+    
+    success = main(
+        force=args.force or os.getenv('FORCE_RETRAIN', 'false').lower() == 'true',
+        quantize=args.quantize,
+        search=args.search,
+        rapide=args.fast or os.getenv('FAST_TRAINING', 'false').lower() == 'true',
+        buckets=args.hashing_buckets
+    )
     sys.exit(0 if success else 1)